@@ -0,0 +1,44 @@
+"""
+Hatch build hook that bundles the packed project template into wheels.
+
+See ``src/pei_docker/template_pack.py`` for the archive format and how
+``pei-docker-cli create`` uses it. Editable installs are skipped so that
+source checkouts always copy the live template directories.
+"""
+
+import importlib.util
+import os
+import shutil
+import tempfile
+from typing import Any
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+_PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'pei_docker')
+
+
+def _load_template_pack() -> Any:
+    # load by path: the build environment does not have the runtime dependencies
+    spec = importlib.util.spec_from_file_location('_pei_template_pack', os.path.join(_PACKAGE_DIR, 'template_pack.py'))
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CustomBuildHook(BuildHookInterface):
+    PLUGIN_NAME = 'custom'
+
+    def initialize(self, version: str, build_data: dict[str, Any]) -> None:
+        if self.target_name != 'wheel' or version == 'editable':
+            return
+        template_pack = _load_template_pack()
+        self._tmp_dir = tempfile.mkdtemp(prefix='pei-template-')
+        archive = os.path.join(self._tmp_dir, 'project-files.tar')
+        template_pack.pack_project_template(_PACKAGE_DIR, archive)
+        build_data['force_include'][archive] = f'pei_docker/{template_pack.PACKED_TEMPLATE_RESOURCE}'
+
+    def finalize(self, version: str, build_data: dict[str, Any], artifact_path: str) -> None:
+        tmp_dir = getattr(self, '_tmp_dir', None)
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -3,17 +3,35 @@
 APT Cache Management Script for PeiDocker Testing
 
 This script manages apt package caching to accelerate testing by:
-1. Copying cached packages from workspace cache to project tmp directories
+1. Linking cached packages from workspace cache to project tmp directories
 2. Setting up builds to use cached packages
 3. Collecting packages back to workspace cache after builds
+
+The workspace cache (tmp/apt-cache) is a content-addressed store: each
+package is kept once, keyed by its SHA-256, and projects get reflinks or
+hardlinks to it instead of copies. The store has a size cap (least recently
+used packages are evicted) and ``stats`` reports its usage.
 """
 
 import os
+import sys
+import json
+import time
+import fcntl
 import shutil
+import hashlib
 import argparse
-import sys
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 
+# Default store size cap; override with --max-size or PEI_APT_CACHE_MAX_SIZE
+DEFAULT_MAX_SIZE = "20G"
+INDEX_VERSION = 1
+# Linux FICLONE ioctl: share the extents of a file (btrfs, xfs, ...)
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 1024 * 1024
+
 def get_workspace_root():
     """Get the PeiDocker workspace root directory"""
     return Path(__file__).parent.parent
@@ -22,60 +40,331 @@ def get_cache_dir():
     """Get the workspace apt cache directory"""
     return get_workspace_root() / "tmp" / "apt-cache"
 
-def copy_cache_to_project(project_path):
+def parse_size(text):
     """
-    Copy cached packages from workspace cache to project tmp directories
-    
+    Parse a size such as ``500M``, ``20G`` or a plain byte count
+
     Args:
-        project_path: Path to the project directory (e.g., test-minimal-build)
+        text: Size string; suffixes K, M, G and T are powers of 1024
+
+    Returns:
+        The size in bytes
     """
-    project_path = Path(project_path)
-    cache_dir = get_cache_dir()
-    
-    if not cache_dir.exists():
-        print(f"Cache directory {cache_dir} does not exist, creating it...")
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        return
-    
-    # Copy to both stage-1 and stage-2 tmp directories
+    text = str(text).strip().upper().rstrip("B")
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def format_size(size):
+    """Format a byte count for humans"""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+def file_sha256(path):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _reflink(src, dest):
+    """Clone ``src`` to ``dest`` copy-on-write; raise OSError where unsupported"""
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dest)
+            raise
+    shutil.copystat(src, dest)
+
+def place_file(src, dest):
+    """
+    Make ``dest`` have the content of ``src`` without copying data where possible
+
+    Tries a reflink (copy-on-write clone), then a hardlink, then falls back to
+    a plain copy, e.g. when the project is on another filesystem.
+
+    Args:
+        src: Existing file
+        dest: Path to create (replaced if it exists)
+
+    Returns:
+        How the file was placed: ``"reflink"``, ``"hardlink"`` or ``"copy"``
+    """
+    src, dest = Path(src), Path(dest)
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        _reflink(src, tmp)
+        method = "reflink"
+    except OSError:
+        try:
+            os.link(src, tmp)
+            method = "hardlink"
+        except OSError:
+            shutil.copy2(src, tmp)
+            method = "copy"
+    os.replace(tmp, dest)
+    return method
+
+class PackageStore:
+    """
+    Content-addressed store of .deb files
+
+    Packages live once under ``objects/<aa>/<sha256>`` and ``index.json``
+    records, per object, its size, the file names it was seen under and
+    when it was last used. Projects get reflinks or hardlinks to the
+    objects, so a package takes disk space once no matter how many
+    projects and stages use it. Objects are read-only, since hardlinked
+    project copies share them. When the store grows past its size cap the
+    least recently used objects are evicted.
+
+    Args:
+        root: Store directory (the workspace ``tmp/apt-cache``)
+        max_size: Size cap in bytes
+    """
+
+    def __init__(self, root, max_size):
+        self.root = Path(root)
+        self.max_size = max_size
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.objects = {}
+        self._by_name = {}
+
+    @contextmanager
+    def locked(self):
+        """Hold the store lock and keep the index loaded; save it on exit"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._load()
+            self._migrate_flat_files()
+            yield self
+            self._save()
+
+    def _load(self):
+        try:
+            data = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            data = {}
+        except ValueError:
+            print(f"Warning: {self.index_path} is corrupt, rebuilding it from the stored objects")
+            data = {}
+        if data.get("version") == INDEX_VERSION:
+            self.objects = data.get("objects", {})
+        else:
+            self.objects = {}
+        # objects on disk but missing from the index (e.g. after a crash)
+        if self.objects_dir.exists():
+            for path in self.objects_dir.glob("*/*"):
+                if path.name not in self.objects and len(path.name) == 64:
+                    st = path.stat()
+                    self.objects[path.name] = {"size": st.st_size, "names": [], "last_used": st.st_mtime}
+        self._by_name = {}
+        for sha, entry in sorted(self.objects.items(), key=lambda kv: kv[1]["last_used"]):
+            for name in entry["names"]:
+                self._by_name[name] = sha
+
+    def _save(self):
+        data = {"version": INDEX_VERSION, "objects": self.objects}
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _migrate_flat_files(self):
+        """Move .deb files from the old flat cache layout into the store"""
+        for item in self.root.glob("*.deb"):
+            self.add(item)
+            item.unlink()
+
+    def object_path(self, sha):
+        return self.objects_dir / sha[:2] / sha
+
+    def names(self):
+        """Map each known file name to its object hash (the most recently stored one)"""
+        return {name: sha for name, sha in self._by_name.items() if sha in self.objects}
+
+    def _find_linked(self, path, st):
+        """Return the hash of the object ``path`` is a hardlink of, if any (saves hashing it)"""
+        sha = self._by_name.get(path.name)
+        if sha is None or sha not in self.objects:
+            return None
+        try:
+            obj = self.object_path(sha).stat()
+        except FileNotFoundError:
+            return None
+        return sha if (obj.st_dev, obj.st_ino) == (st.st_dev, st.st_ino) else None
+
+    def add(self, path):
+        """
+        Add a file to the store
+
+        Args:
+            path: .deb file to add
+
+        Returns:
+            ``(sha256, new)``, where ``new`` is False if the content was already stored
+        """
+        path = Path(path)
+        st = path.stat()
+        sha = self._find_linked(path, st) or file_sha256(path)
+        entry = self.objects.get(sha)
+        new = entry is None or not self.object_path(sha).exists()
+        if new:
+            obj = self.object_path(sha)
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            place_file(path, obj)
+            os.chmod(obj, 0o444)
+            entry = self.objects[sha] = {"size": st.st_size, "names": [], "last_used": time.time()}
+        if path.name not in entry["names"]:
+            entry["names"].append(path.name)
+        self._by_name[path.name] = sha
+        entry["last_used"] = time.time()
+        return sha, new
+
+    def link_into(self, sha, dest):
+        """
+        Place a stored object at ``dest`` (skipped if it is already linked there)
+
+        Returns:
+            How the file was placed, or ``None`` if it already was
+        """
+        obj = self.object_path(sha)
+        self.objects[sha]["last_used"] = time.time()
+        try:
+            st, ost = Path(dest).stat(), obj.stat()
+            if (st.st_dev, st.st_ino) == (ost.st_dev, ost.st_ino):
+                return None
+        except FileNotFoundError:
+            pass
+        return place_file(obj, dest)
+
+    def total_size(self):
+        return sum(entry["size"] for entry in self.objects.values())
+
+    def evict(self):
+        """
+        Remove least recently used objects until the store fits its size cap
+
+        Returns:
+            The number of objects removed
+        """
+        total = self.total_size()
+        removed = 0
+        for sha, entry in sorted(self.objects.items(), key=lambda kv: kv[1]["last_used"]):
+            if total <= self.max_size:
+                break
+            try:
+                self.object_path(sha).unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self.objects[sha]
+            removed += 1
+        return removed
+
+def get_store(max_size=None):
+    """Open the workspace package store with the configured size cap"""
+    if max_size is None:
+        max_size = os.environ.get("PEI_APT_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+    return PackageStore(get_cache_dir(), parse_size(max_size))
+
+def _stage_debs(project_path):
+    """Yield the .deb files in the stage tmp directories of a project"""
     for stage in ["stage-1", "stage-2"]:
         stage_tmp = project_path / "installation" / stage / "tmp"
-        stage_tmp.mkdir(parents=True, exist_ok=True)
-        
-        if cache_dir.exists() and any(cache_dir.iterdir()):
-            print(f"Copying cached packages to {stage_tmp}")
-            for item in cache_dir.iterdir():
+        if stage_tmp.exists():
+            for item in stage_tmp.iterdir():
                 if item.is_file() and item.name.endswith('.deb'):
-                    dest = stage_tmp / item.name
-                    shutil.copy2(item, dest)
-                    print(f"  Copied {item.name}")
-        else:
-            print(f"No cached packages found in {cache_dir}")
+                    yield item
 
-def collect_cache_from_project(project_path):
+def copy_cache_to_project(project_path, store=None):
     """
-    Collect packages from project tmp directories back to workspace cache
-    
+    Link cached packages from the workspace store into project tmp directories
+
+    Each stage gets a reflink or hardlink to the stored object; files that are
+    already linked to it are left alone, so repeated runs cost almost nothing.
+
     Args:
         project_path: Path to the project directory (e.g., test-minimal-build)
+        store: Package store to use (defaults to the workspace store)
     """
     project_path = Path(project_path)
-    cache_dir = get_cache_dir()
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    
+    store = store or get_store()
+
+    with store.locked():
+        names = store.names()
+        if not names:
+            print(f"No cached packages found in {store.root}")
+        for stage in ["stage-1", "stage-2"]:
+            stage_tmp = project_path / "installation" / stage / "tmp"
+            stage_tmp.mkdir(parents=True, exist_ok=True)
+            methods = {}
+            for name, sha in sorted(names.items()):
+                method = store.link_into(sha, stage_tmp / name)
+                methods[method] = methods.get(method, 0) + 1
+            if names:
+                placed = ", ".join(f"{count} {method}" for method, count in methods.items() if method)
+                print(f"Linked cached packages to {stage_tmp}: {placed or 'all up to date'}")
+
+def collect_cache_from_project(project_path, store=None):
+    """
+    Collect packages from project tmp directories into the workspace store
+
+    Packages are deduplicated by content, so a package downloaded by both
+    stages or by several projects is stored once.
+
+    Args:
+        project_path: Path to the project directory (e.g., test-minimal-build)
+        store: Package store to use (defaults to the workspace store)
+    """
+    project_path = Path(project_path)
+    store = store or get_store()
+
     collected = 0
-    for stage in ["stage-1", "stage-2"]:
-        stage_tmp = project_path / "installation" / stage / "tmp"
-        if stage_tmp.exists():
-            for item in stage_tmp.iterdir():
-                if item.is_file() and item.name.endswith('.deb'):
-                    dest = cache_dir / item.name
-                    if not dest.exists():
-                        shutil.copy2(item, dest)
-                        collected += 1
-                        print(f"Collected {item.name} to cache")
-    
+    with store.locked():
+        for item in _stage_debs(project_path):
+            sha, new = store.add(item)
+            if new:
+                collected += 1
+                print(f"Collected {item.name} to cache")
+            # replace the project copy by a link to the stored object
+            store.link_into(sha, item)
+        evicted = store.evict()
+
     print(f"Collected {collected} new packages to cache")
+    if evicted:
+        print(f"Evicted {evicted} least recently used packages to stay under {format_size(store.max_size)}")
+
+def print_stats(store=None):
+    """
+    Print store statistics: objects, file names, size against the cap
+
+    Args:
+        store: Package store to use (defaults to the workspace store)
+    """
+    store = store or get_store()
+    with store.locked():
+        objects = store.objects
+        total = store.total_size()
+        names = sum(len(entry["names"]) for entry in objects.values())
+        print(f"Store:      {store.root}")
+        print(f"Packages:   {len(objects)} objects, {names} file names")
+        print(f"Size:       {format_size(total)} of {format_size(store.max_size)} "
+              f"({100 * total / store.max_size if store.max_size else 0:.1f}%)")
+        if objects:
+            used = sorted(entry["last_used"] for entry in objects.values())
+            fmt = "%Y-%m-%d %H:%M"
+            print(f"Last used:  oldest {time.strftime(fmt, time.localtime(used[0]))}, "
+                  f"newest {time.strftime(fmt, time.localtime(used[-1]))}")
 
 def setup_project_for_caching(project_path):
     """
@@ -162,16 +451,23 @@ def clear_project_cache(project_path):
 
 def main():
     parser = argparse.ArgumentParser(description="Manage APT cache for PeiDocker testing")
-    parser.add_argument("command", choices=["copy-to", "collect-from", "setup", "clear"], 
+    parser.add_argument("command", choices=["copy-to", "collect-from", "setup", "clear", "stats"],
                        help="Command to execute")
-    parser.add_argument("project_path", help="Path to the project directory")
+    parser.add_argument("project_path", nargs="?", help="Path to the project directory")
+    parser.add_argument("--max-size", default=None,
+                       help=f"Store size cap, e.g. 500M or 20G (default: $PEI_APT_CACHE_MAX_SIZE or {DEFAULT_MAX_SIZE})")
     
     args = parser.parse_args()
+    if args.command != "stats" and not args.project_path:
+        parser.error(f"{args.command} requires a project path")
+    store = get_store(args.max_size)
     
     if args.command == "copy-to":
-        copy_cache_to_project(args.project_path)
+        copy_cache_to_project(args.project_path, store)
     elif args.command == "collect-from":
-        collect_cache_from_project(args.project_path)
+        collect_cache_from_project(args.project_path, store)
+    elif args.command == "stats":
+        print_stats(store)
     elif args.command == "setup":
         setup_project_for_caching(args.project_path)
     elif args.command == "clear":
@@ -56,6 +56,7 @@ Package Structure
 -----------------
 config_processor : Main configuration transformation engine
 pei : CLI entry point with Click commands
+docker_engine : Minimal Docker Engine API client used for resource cleanup
 pei_utils : Utility functions for environment substitution and SSH key handling
 user_config : Type-safe data structures for configuration management
 gui : Terminal-based GUI application for interactive configuration
@@ -12,10 +12,10 @@ orchestrates the entire configuration transformation.
 import os
 import logging
 import shlex
+import urllib.parse
 import omegaconf as oc
 from omegaconf import DictConfig
 from attrs import define, field
-import cattrs
 from typing import Any, Optional, Tuple
 
 from pei_docker.user_config import (
@@ -30,6 +30,7 @@ from pei_docker.user_config import (
     UserConfig,
     env_str_to_dict,
 )
+from pei_docker.user_config.structure_cache import structure_user_config
 
 logging.basicConfig(level=logging.INFO)
 
@@ -95,9 +96,17 @@ class Defaults:
     Stage2_ImageName='pei-image:stage-2'
     Stage1_BaseImageName='ubuntu:22.04'
     RunDevice='cpu'    
+    ProjectLabel='io.peidocker.project'
+    """Label key carrying the project id on generated images, containers and volumes."""
+    ProjectIdBuildArg='PEI_PROJECT_ID'
+    """Build arg passing the project id to the Dockerfiles (image label and cache mount ids)."""
     SpecialAptSources : list[str] = [
         'tuna','aliyun','163','ustc','cn'
     ]
+    AptCacheProxyHost='host.docker.internal'
+    """Host name under which builds reach the host (mapped to host-gateway in the compose template)."""
+    AptCacheProxyPort=3142
+    """Default port of `pei-docker-cli apt-cache serve`."""
     
     # ubuntu versions
     UbuntuCuda='nvidia/cuda:12.3.2-runtime-ubuntu22.04'
@@ -207,7 +216,7 @@ class PeiConfigProcessor:
         from pei_docker.pei_utils import load_yaml_file_with_duplicate_key_check
 
         config = load_yaml_file_with_duplicate_key_check(config_file)
-        compose = oc.OmegaConf.load(compose_template_file)
+        compose = load_yaml_file_with_duplicate_key_check(compose_template_file)
         
         # Ensure we have DictConfig objects
         if not isinstance(config, DictConfig):
@@ -362,6 +371,10 @@ class PeiConfigProcessor:
         # keep proxy after build?
         keep_proxy = bool(apt_config.keep_proxy_after_build)
         oc_set(build_compose, 'apt.keep_proxy', keep_proxy)
+        
+        # fetch packages through the host's apt cache proxy?
+        if apt_config.cache_proxy:
+            oc_set(build_compose, 'apt.cache_proxy', self._resolve_apt_cache_proxy(apt_config.cache_proxy))
     
     def _apply_proxy(self, proxy_config : ProxyConfig, build_compose : DictConfig) -> None:
         """
@@ -581,6 +594,10 @@ class PeiConfigProcessor:
             custom_config = _stage.custom
             if custom_config is not None:
                 self._check_custom_scripts(custom_config)
+
+            # package-manager caches mounted for the on_build scripts
+            if _stage.build_caches is not None:
+                oc_set(build_compose, 'build_caches', ' '.join(_stage.build_caches.enabled()))
                 
             # device
             if _stage.device is not None and _stage.device.type is not None:
@@ -737,6 +754,59 @@ class PeiConfigProcessor:
             # write to compose
             oc.OmegaConf.update(stage_compose, 'volumes', vol_mapping_strings)
         
+    def _apply_project_labels(self, compose_resolved : DictConfig) -> None:
+        """
+        Tag the generated Docker resources with the project id.
+
+        Adds the `Defaults.ProjectLabel` label to every service (containers),
+        every service build (images) and every compose-managed volume, and
+        passes the id to the Dockerfiles as `Defaults.ProjectIdBuildArg` so
+        BuildKit cache mounts are namespaced per project. External volumes
+        (manual-volume storage) are left untouched, as they are not owned by
+        the project. `pei-docker-cli remove --prune` relies on these labels.
+
+        Parameters
+        ----------
+        compose_resolved : DictConfig
+            The resolved Docker Compose configuration to be updated in-place.
+        """
+        from pei_docker.pei_utils import compute_project_id
+
+        project_id = compute_project_id(self.m_project_dir)
+        label = {Defaults.ProjectLabel: project_id}
+
+        # label keys contain dots, so merge plain dicts instead of OmegaConf.update
+        def _with_label(existing: Any) -> dict[str, Any]:
+            labels: dict[str, Any] = {}
+            if isinstance(existing, DictConfig):
+                container = oc.OmegaConf.to_container(existing, resolve=True)
+                if isinstance(container, dict):
+                    labels.update({str(k): v for k, v in container.items()})
+            labels.update(label)
+            return labels
+
+        services = oc.OmegaConf.select(compose_resolved, 'services')
+        if services is not None:
+            for _, service in services.items():
+                service['labels'] = _with_label(service.get('labels'))
+                build = service.get('build')
+                if build is not None:
+                    build['labels'] = _with_label(build.get('labels'))
+                    if build.get('args') is None:
+                        build['args'] = {}
+                    build.args[Defaults.ProjectIdBuildArg] = project_id
+
+        volumes = oc.OmegaConf.select(compose_resolved, 'volumes')
+        if volumes is not None:
+            for vol_key in list(volumes.keys()):
+                vol = volumes[vol_key]
+                if vol is not None and vol.get('external'):
+                    continue
+                if vol is None:
+                    volumes[vol_key] = {}
+                    vol = volumes[vol_key]
+                vol['labels'] = _with_label(vol.get('labels'))
+
     @staticmethod
     def _parse_script_entry(script_entry: str) -> Tuple[str, str]:
         """
@@ -848,6 +918,34 @@ class PeiConfigProcessor:
                     f"Found in {context}[{i}]: {entry!r}"
                 )
 
+    @staticmethod
+    def _resolve_apt_cache_proxy(value: str) -> str:
+        """
+        Turn an ``apt.cache_proxy`` setting into the proxy URL used by apt.
+
+        ``host`` and ``host:PORT`` refer to ``pei-docker-cli apt-cache serve``
+        on the Docker host; anything else must be an ``http://`` URL with a
+        host name, optionally with credentials and a port (80 if omitted).
+        """
+        value = str(value).strip()
+        if value == 'host' or value.startswith('host:'):
+            port = value.partition(':')[2] or str(Defaults.AptCacheProxyPort)
+            if not port.isdigit():
+                raise ValueError(f"Invalid apt.cache_proxy port in {value!r}")
+            return f'http://{Defaults.AptCacheProxyHost}:{port}'
+        if not value.startswith('http://'):
+            raise ValueError(
+                f"Invalid apt.cache_proxy {value!r}: use 'host', 'host:PORT' or an http:// proxy URL"
+            )
+        parts = urllib.parse.urlsplit(value)
+        try:
+            parts.port
+        except ValueError as e:
+            raise ValueError(f"Invalid apt.cache_proxy port in {value!r}") from e
+        if not parts.hostname:
+            raise ValueError(f"Invalid apt.cache_proxy {value!r}: the URL has no host")
+        return value
+
     @staticmethod
     def _bool_from_compose_arg(value: Any) -> bool:
         """Coerce a compose build arg value to bool using PeiDocker conventions."""
@@ -1194,8 +1292,9 @@ class PeiConfigProcessor:
                             # Convert string to single-element list
                             config_dict[stage]['custom']['on_entry'] = [on_entry]
         
-        # parse the user config
-        user_config : UserConfig = cattrs.structure(config_dict, UserConfig)
+        # parse the user config; unchanged configs come from the structure cache,
+        # so user_config is shared and must not be modified
+        user_config : UserConfig = structure_user_config(config_dict)
 
         # Validate stage-2 build-time scripts early (before generating compose/scripts).
         if user_config.stage_2 is not None and user_config.stage_2.custom is not None:
@@ -1243,6 +1342,7 @@ class PeiConfigProcessor:
         
         # apply the stage configuration to the compose template again
         self._apply_config_to_resolved_compose(user_config, compose_resolved)
+        self._apply_project_labels(compose_resolved)
         
         # generate script files
         if generate_custom_script_files:
@@ -0,0 +1,331 @@
+"""
+Minimal Docker Engine API client over the local unix socket.
+
+This module lets the CLI talk to the Docker daemon directly instead of
+spawning a ``docker`` process for every query. Only the handful of endpoints
+used by resource cleanup are implemented: container listing, stop and
+removal, image inspection and removal, volume removal, disk usage and
+build cache pruning.
+
+Connections are HTTP/1.1 keep-alive sockets that are reused across calls.
+Each thread gets its own connection, so a single client can be shared by a
+thread pool that stops many containers concurrently.
+
+The client is deliberately conservative about when it is used. It is only
+returned by :func:`get_docker_engine_client` when the daemon is reachable on
+a unix socket and no non-default Docker context is selected; in every other
+case (TCP or SSH ``DOCKER_HOST``, Docker contexts, Windows named pipes,
+missing socket) callers fall back to the ``docker`` CLI, which already knows
+how to reach the right daemon.
+
+Examples
+--------
+>>> client = get_docker_engine_client()
+>>> if client is not None:
+...     ids = client.list_containers(ancestor='my-app:stage-1')
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Optional
+from urllib.parse import quote, urlencode
+
+# Default location of the Docker daemon socket on Linux and macOS
+DEFAULT_DOCKER_SOCKET = '/var/run/docker.sock'
+
+# Seconds to wait for the daemon on calls that do not stop containers
+DEFAULT_API_TIMEOUT = 30.0
+
+
+class DockerEngineError(Exception):
+    """
+    Error returned by the Docker Engine API.
+
+    Attributes
+    ----------
+    status : int
+        HTTP status code of the failed request (0 for transport errors).
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection whose transport is a unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class DockerEngineClient:
+    """
+    Small Docker Engine API client bound to a unix socket.
+
+    Parameters
+    ----------
+    socket_path : str
+        Filesystem path of the Docker daemon socket.
+    timeout : float, default DEFAULT_API_TIMEOUT
+        Socket timeout in seconds for regular requests. Stop requests extend
+        it by the container stop timeout.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_API_TIMEOUT) -> None:
+        self.m_socket_path = socket_path
+        self.m_timeout = timeout
+        self.m_local = threading.local()
+
+    @property
+    def socket_path(self) -> str:
+        """Path of the daemon socket this client talks to."""
+        return self.m_socket_path
+
+    def _connection(self) -> _UnixHTTPConnection:
+        conn: Optional[_UnixHTTPConnection] = getattr(self.m_local, 'conn', None)
+        if conn is None:
+            conn = _UnixHTTPConnection(self.m_socket_path, self.m_timeout)
+            self.m_local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close the connection held by the calling thread, if any."""
+        conn = getattr(self.m_local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.m_local.conn = None
+
+    def request(self, method: str, path: str, query: Optional[dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> tuple[int, bytes]:
+        """
+        Send one request on the persistent connection and return the raw response.
+
+        A request that fails because the daemon dropped an idle keep-alive
+        connection is retried once on a fresh connection.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method (``GET``, ``POST``, ``DELETE``).
+        path : str
+            Request path, already percent-encoded (e.g. ``/containers/json``).
+        query : dict, optional
+            Query parameters appended to the path.
+        timeout : float, optional
+            Socket timeout for this request; defaults to the client timeout.
+
+        Returns
+        -------
+        tuple[int, bytes]
+            HTTP status code and response body.
+
+        Raises
+        ------
+        DockerEngineError
+            If the daemon cannot be reached (status 0).
+        """
+        url = path + ('?' + urlencode(query) if query else '')
+        last_error: Optional[Exception] = None
+        for _ in range(2):
+            conn = self._connection()
+            conn.timeout = timeout if timeout is not None else self.m_timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, url, headers={'Host': 'docker'})
+                response = conn.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, body
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                # stale keep-alive connection, reconnect once
+                last_error = e
+                self.close()
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                raise DockerEngineError(0, f'Cannot reach Docker daemon at {self.m_socket_path}: {e}') from e
+        raise DockerEngineError(0, f'Cannot reach Docker daemon at {self.m_socket_path}: {last_error}')
+
+    def _json(self, method: str, path: str, query: Optional[dict[str, Any]] = None,
+              ok: tuple[int, ...] = (200,), timeout: Optional[float] = None) -> Any:
+        status, body = self.request(method, path, query=query, timeout=timeout)
+        if status not in ok:
+            raise DockerEngineError(status, _error_message(status, body))
+        if not body:
+            return None
+        return json.loads(body)
+
+    def ping(self) -> bool:
+        """Return True if the daemon answers ``GET /_ping``."""
+        try:
+            status, _ = self.request('GET', '/_ping')
+        except DockerEngineError:
+            return False
+        return status == 200
+
+    def list_containers(self, ancestor: Optional[str] = None, include_stopped: bool = True) -> list[str]:
+        """
+        List container IDs, like ``docker ps [-a] [--filter ancestor=...]``.
+
+        Parameters
+        ----------
+        ancestor : str, optional
+            Only return containers created from this image (or its descendants).
+        include_stopped : bool, default True
+            Include stopped containers (``docker ps -a``).
+
+        Returns
+        -------
+        list[str]
+            Full container IDs.
+        """
+        query: dict[str, Any] = {'all': '1' if include_stopped else '0'}
+        if ancestor:
+            query['filters'] = json.dumps({'ancestor': [ancestor]})
+        containers = self._json('GET', '/containers/json', query=query) or []
+        return [c['Id'] for c in containers]
+
+    def stop_container(self, container_id: str, timeout: int = 10) -> None:
+        """
+        Stop a container, waiting up to ``timeout`` seconds before killing it.
+
+        An already stopped container is not an error.
+        """
+        self._json('POST', f'/containers/{quote(container_id, safe="")}/stop',
+                   query={'t': str(timeout)}, ok=(204, 304),
+                   timeout=self.m_timeout + timeout)
+
+    def remove_container(self, container_id: str) -> None:
+        """Remove a stopped container."""
+        self._json('DELETE', f'/containers/{quote(container_id, safe="")}', ok=(204,))
+
+    def image_exists(self, image_name: str) -> bool:
+        """Return True if the image is present in the local image store."""
+        status, body = self.request('GET', f'/images/{quote(image_name, safe="")}/json')
+        if status == 200:
+            return True
+        if status == 404:
+            return False
+        raise DockerEngineError(status, _error_message(status, body))
+
+    def remove_image(self, image_name: str, force: bool = False) -> None:
+        """Remove an image, like ``docker rmi [-f]``."""
+        query = {'force': '1'} if force else None
+        self._json('DELETE', f'/images/{quote(image_name, safe="")}', query=query, ok=(200,))
+
+    def system_df(self) -> dict[str, Any]:
+        """
+        Return disk usage of images, containers, volumes and build cache.
+
+        Equivalent of ``docker system df -v``; each entry carries its labels
+        (build cache entries carry a description instead) and size in bytes.
+        """
+        return self._json('GET', '/system/df') or {}
+
+    def remove_volume(self, volume_name: str) -> None:
+        """Remove a volume, like ``docker volume rm``."""
+        self._json('DELETE', f'/volumes/{quote(volume_name, safe="")}', ok=(204,))
+
+    def prune_build_cache(self, cache_ids: list[str]) -> int:
+        """
+        Remove the given build cache records, returning the bytes reclaimed.
+        """
+        if not cache_ids:
+            return 0
+        result = self._json('POST', '/build/prune',
+                            query={'all': '1', 'filters': json.dumps({'id': cache_ids})},
+                            timeout=self.m_timeout * 10)
+        return int((result or {}).get('SpaceReclaimed') or 0)
+
+
+def _error_message(status: int, body: bytes) -> str:
+    try:
+        message = json.loads(body).get('message')
+    except (ValueError, AttributeError):
+        message = None
+    return message or body.decode('utf-8', errors='replace').strip() or f'HTTP {status}'
+
+
+def resolve_docker_socket_path() -> Optional[str]:
+    """
+    Work out which unix socket the ``docker`` CLI would use, if any.
+
+    Returns
+    -------
+    str or None
+        The socket path when the daemon is addressed through a local unix
+        socket, or None when the CLI should be used instead (non-unix
+        ``DOCKER_HOST``, a selected Docker context, or no unix socket support).
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    docker_host = os.environ.get('DOCKER_HOST')
+    if docker_host:
+        if docker_host.startswith('unix://'):
+            return docker_host[len('unix://'):]
+        return None
+
+    context = os.environ.get('DOCKER_CONTEXT')
+    if context is None:
+        config_dir = os.environ.get('DOCKER_CONFIG') or os.path.join(os.path.expanduser('~'), '.docker')
+        try:
+            with open(os.path.join(config_dir, 'config.json'), encoding='utf-8') as f:
+                context = json.load(f).get('currentContext')
+        except (OSError, ValueError, AttributeError):
+            context = None
+    if context and context != 'default':
+        # contexts may point anywhere, let the CLI resolve them
+        return None
+
+    return DEFAULT_DOCKER_SOCKET
+
+
+_client_cache: dict[str, DockerEngineClient] = {}
+_client_cache_lock = threading.Lock()
+
+
+def get_docker_engine_client() -> Optional[DockerEngineClient]:
+    """
+    Return a shared client for the local Docker daemon, or None to use the CLI.
+
+    Clients are cached per socket path so their keep-alive connections are
+    reused across calls. A socket that is missing or does not answer a ping
+    yields None and is checked again on the next call.
+    """
+    socket_path = resolve_docker_socket_path()
+    if socket_path is None or not os.path.exists(socket_path):
+        return None
+
+    with _client_cache_lock:
+        client = _client_cache.get(socket_path)
+    if client is not None:
+        return client
+
+    client = DockerEngineClient(socket_path)
+    if not client.ping():
+        client.close()
+        logging.debug(f'Docker socket {socket_path} is not responding, falling back to the docker CLI')
+        return None
+
+    with _client_cache_lock:
+        return _client_cache.setdefault(socket_path, client)
@@ -134,6 +134,7 @@ def _write_merged_env(
         "KEEP_APT_SOURCE_FILE": "Keep APT sources file after build (true/false)",
         "APT_USE_PROXY": "Use HTTP proxy for APT operations (true/false)",
         "APT_KEEP_PROXY": "Keep APT proxy settings after build (true/false)",
+        "APT_CACHE_PROXY": "Host apt cache proxy URL used during build (e.g., http://host.docker.internal:3142)",
         "APT_NUM_RETRY": "APT retry count for package operations",
         "PEI_HTTP_PROXY_1": "HTTP proxy URL for stage-1 (e.g., http://host.docker.internal:7890)",
         "PEI_HTTPS_PROXY_1": "HTTPS proxy URL for stage-1",
@@ -147,6 +148,7 @@ def _write_merged_env(
         "SSH_PUBKEY_FILE": "Public key file path(s) for SSH users (comma-separated)",
         "SSH_PRIVKEY_FILE": "Private key file path(s) for SSH users (comma-separated)",
         "PEI_BAKE_ENV_STAGE_1": "Bake stage-1 env vars into the image (true/false)",
+        "PEI_BUILD_CACHES_1": "Package-manager caches mounted for stage-1 on_build scripts (e.g., 'pip uv')",
         # Stage-2
         "PEI_STAGE_HOST_DIR_2": "Host path to installation/stage-2 (copied into image)",
         "PEI_STAGE_DIR_2": "In-container path for stage-2 files (default /pei-from-host/stage-2)",
@@ -159,6 +161,7 @@ def _write_merged_env(
         "PEI_PATH_SOFT": "Soft storage base path (default /soft)",
         "PEI_HTTP_PROXY_2": "HTTP proxy URL for stage-2",
         "PEI_HTTPS_PROXY_2": "HTTPS proxy URL for stage-2",
+        "PEI_BUILD_CACHES_2": "Package-manager caches mounted for stage-2 on_build scripts (e.g., 'pip uv')",
         # Shared flags also used in stage-2 context
         # ENABLE_GLOBAL_PROXY and REMOVE_GLOBAL_PROXY_AFTER_BUILD already listed above
         "WITH_ESSENTIAL_APPS_2": "Install essential utilities during build (stage-2)",
@@ -177,6 +180,7 @@ def _write_merged_env(
         "KEEP_APT_SOURCE_FILE",
         "APT_USE_PROXY",
         "APT_KEEP_PROXY",
+        "APT_CACHE_PROXY",
         "APT_NUM_RETRY",
         "PEI_HTTP_PROXY_1",
         "PEI_HTTPS_PROXY_1",
@@ -190,6 +194,7 @@ def _write_merged_env(
         "SSH_PUBKEY_FILE",
         "SSH_PRIVKEY_FILE",
         "PEI_BAKE_ENV_STAGE_1",
+        "PEI_BUILD_CACHES_1",
     ]
 
     order2 = [
@@ -208,6 +213,7 @@ def _write_merged_env(
         "PEI_HTTPS_PROXY_2",
         "ENABLE_GLOBAL_PROXY",
         "REMOVE_GLOBAL_PROXY_AFTER_BUILD",
+        "PEI_BUILD_CACHES_2",
     ]
 
     # Normalize keys and prepare
@@ -27,6 +27,18 @@ The CLI provides three main commands:
    Safely removes Docker images and containers created by the project,
    with optional confirmation bypass.
 
+4. **Cache apt downloads on the host**:
+   pei-docker-cli apt-cache serve [--port 3142]
+   
+   Runs a caching HTTP proxy that stage-1 builds use when
+   ``apt.cache_proxy`` is set.
+
+5. **Download installer artifacts before building**:
+   pei-docker-cli prefetch -p ./my-project [--jobs 4]
+   
+   Fetches the files the configured on_build installers download into the
+   project's prefetch/ directory, where the build picks them up.
+
 Architecture
 ------------
 The CLI orchestrates the following components:
@@ -40,6 +52,7 @@ Environment Variable Substitution
 All configuration files support Docker Compose-style variable substitution:
 - ${VAR}: Replace with environment variable value
 - ${VAR:-default}: Replace with environment variable or default value
+- ${VAR-default}, ${VAR:?error}, ${VAR:+alt} and $$ escapes, as in Docker Compose
 
 This enables deployment-specific customization without modifying config files.
 
@@ -72,24 +85,55 @@ All operations work with the project directory structure created by the
 import click
 import logging
 import os
-import shutil
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 import omegaconf as oc
-import yaml
-from pei_docker.config_processor import Defaults, PeiConfigProcessor
+from pei_docker.config_processor import Defaults
+from pei_docker.pei_utils_configure import configure_project_direct
+from pei_docker.pei_utils_create import create_project_direct, write_usage_guide
+from pei_docker.docker_engine import DockerEngineClient, DockerEngineError, get_docker_engine_client
+from pei_docker.pei_utils_installers import prune_unused_system_dirs
+from pei_docker.pei_utils_apt_cache import (
+    DEFAULT_CACHE_DIR as APT_CACHE_DEFAULT_DIR,
+    DEFAULT_INDEX_TTL as APT_CACHE_DEFAULT_INDEX_TTL,
+    DEFAULT_PORT as APT_CACHE_DEFAULT_PORT,
+    build_apt_cache_server,
+)
+from pei_docker.pei_utils_prefetch import (
+    DEFAULT_JOBS as PREFETCH_DEFAULT_JOBS,
+    DEFAULT_RETRIES as PREFETCH_DEFAULT_RETRIES,
+    ensure_prefetch_dir,
+    find_artifacts,
+    load_user_config,
+    prefetch_artifacts,
+)
+from pei_docker.pei_utils_prune import (
+    find_project_resources,
+    format_bytes,
+    prune_project_resources,
+    total_reclaimable,
+)
 from pei_docker.pei_utils import (
+    compute_project_id,
     load_yaml_file_with_duplicate_key_check,
-    process_config_env_substitution,
-    find_first_passthrough_marker_in_container,
-    rewrite_passthrough_markers_in_container,
-    validate_no_leftover_substitution,
 )
 
 # Configure logging with consistent format
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s]\t%(message)s')
 
+# Seconds `docker stop` waits before killing a container (Docker's own default)
+DEFAULT_STOP_TIMEOUT = 10
+
+# Maximum number of container IDs passed to one `docker stop` / `docker rm` call
+DOCKER_BATCH_SIZE = 50
+
+# Maximum concurrent Engine API requests (one connection each) per batch
+ENGINE_MAX_WORKERS = 8
+
 @click.group()
 def cli() -> None:
     """
@@ -99,7 +143,8 @@ def cli() -> None:
     without requiring deep knowledge of Dockerfiles or docker-compose syntax.
     
     Use the subcommands 'create', 'configure', and 'remove' to manage your
-    Docker container projects throughout their lifecycle.
+    Docker container projects throughout their lifecycle, and 'apt-cache'
+    to share downloaded apt packages between builds.
     """
     pass
     
@@ -148,7 +193,11 @@ def format_quick_templates_help() -> str:
               help='copy example files to the project dir')
 @click.option('--quick', '-q', default=None, 
               help=format_quick_templates_help())
-def create(project_dir : str, with_examples : bool, quick : str | None) -> None:
+@click.option('--link', is_flag=True, default=False,
+              help='reflink template files, or hardlink the immutable installer scripts, instead of copying')
+@click.option('--prune-unused', is_flag=True, default=False,
+              help='only keep the installation/stage-*/system installers referenced by user_config.yml')
+def create(project_dir : str, with_examples : bool, quick : str | None, link : bool, prune_unused : bool) -> None:
     """
     Create a new PeiDocker project with template files and directory structure.
     
@@ -179,160 +228,45 @@ def create(project_dir : str, with_examples : bool, quick : str | None) -> None:
       
       # Create with CN development template
       pei-docker-cli create -p ./my-project --quick cn-dev
-    """
-    logging.info(f'Creating PeiDocker project in {project_dir}')
-    os.makedirs(project_dir, exist_ok=True)
+      
+      # Create a throwaway project quickly (e.g. in CI), sharing template files
+      pei-docker-cli create -p ./my-project --link
+      
+      # Only keep the system installers the config references
+      pei-docker-cli create -p ./my-project --quick minimal --prune-unused
     
-    # the directory should be empty
-    # if len(os.listdir(project_dir)) > 0:
-    #     logging.error(f'Directory {project_dir} is not empty')
-    #     return
+    \b
+    Template files:
+      By default the packed template archive bundled with the package is
+      extracted in one pass (source checkouts copy the template directories).
+      With --link, files are reflinked on copy-on-write filesystems; otherwise
+      installer scripts that PeiDocker never modifies (installation/stage-*/
+      system, internals, utilities, and examples) are hardlinked to the
+      installed package and the remaining files are copied. Do not edit
+      hardlinked files in place.
     
-    # copy all the files and folders in project_files to the output dir
-    this_dir : str = os.path.dirname(os.path.realpath(__file__))
-    project_template_dir = f'{this_dir}/project_files'    
-    for item in os.listdir(project_template_dir):
-        s = os.path.join(project_template_dir, item)
-        d = os.path.join(project_dir, item)
-        if os.path.isdir(s):
-            logging.info(f'Copying directory {s} to {d}')
-            shutil.copytree(s, d, dirs_exist_ok=True)
-        else:
-            logging.info(f'Copying file {s} to {d}')
-            shutil.copy2(s, d)
-            
-    # Always copy full template as reference_config.yml
-    src_config_template : str = f'{this_dir}/{Defaults.ConfigTemplatePath}'
-    dst_reference_config : str = f'{project_dir}/reference_config.yml'
-    logging.info(f'Copying full config template to {dst_reference_config} as reference')
-    shutil.copy2(src_config_template, dst_reference_config)
-    
-    # Copy appropriate template to user_config.yml based on --quick option
-    dst_user_config : str = f'{project_dir}/{Defaults.OutputConfigName}'
-    
-    if quick:
-        # Validate quick template exists
-        quick_template_path = f'{this_dir}/templates/quick/config-{quick}.yml'
-        if not os.path.exists(quick_template_path):
-            available = get_available_quick_templates()
-            if available:
-                logging.error(f'Quick template "{quick}" not found. Available templates: {", ".join(available)}')
-            else:
-                logging.error(f'Quick template "{quick}" not found. No quick templates available.')
-            sys.exit(1)
-        
-        logging.info(f'Using quick template "{quick}" for {dst_user_config}')
-        shutil.copy2(quick_template_path, dst_user_config)
-    else:
-        # Use full template for user_config.yml (default behavior)
-        logging.info(f'Copying full config template to {dst_user_config}')
-        shutil.copy2(src_config_template, dst_user_config)
-    
-    # Copy compose template
-    src_compose_template : str = f'{this_dir}/{Defaults.ComposeTemplatePath}'
-    dst_compose_template : str = f'{project_dir}/{Defaults.OutputComposeTemplateName}'
-    logging.info(f'Copying compose template {src_compose_template} to {dst_compose_template}')
-    shutil.copy2(src_compose_template, dst_compose_template)
-    
-    # copy example files to the project dir
-    # the examples is in Defaults.ConfigExamplesDir
-    if with_examples:
-        examples_dir : str = f'{this_dir}/{Defaults.ConfigExamplesDir}'
-        
-        # copy this dir to project_dir/examples
-        examples_dst_dir : str = f'{project_dir}/examples'
-        logging.info(f'Copying examples from {examples_dir} to {examples_dst_dir}')
-        shutil.copytree(examples_dir, examples_dst_dir, dirs_exist_ok=True)
+    \b
+    Unused installers:
+      With --prune-unused, installer directories under installation/stage-*/
+      system that user_config.yml does not reference are removed, shrinking
+      the project and the Docker build context. 'configure' copies them back
+      from the package when the config starts referencing them.
+    """
+    try:
+        create_project_direct(project_dir, with_examples=with_examples, quick=quick, link=link)
+    except ValueError:
+        # unknown quick template, already reported
+        sys.exit(1)
+    
+    if prune_unused:
+        user_config = load_yaml_file_with_duplicate_key_check(os.path.join(project_dir, Defaults.OutputConfigName))
+        prune_unused_system_dirs(project_dir, oc.OmegaConf.to_container(user_config, resolve=False))
     
     # Generate usage guide
-    _write_usage_guide(project_dir)
+    write_usage_guide(project_dir)
         
     logging.info('Done')
 
-def _write_usage_guide(project_dir: str) -> None:
-    """Generate PEI-DOCKER-USAGE-GUIDE.md in the project directory."""
-    guide_path = os.path.join(project_dir, "PEI-DOCKER-USAGE-GUIDE.md")
-    logging.info(f"Generating usage guide at {guide_path}")
-    
-    content = """# PeiDocker Project Usage Guide
-
-This project was generated/configured by PeiDocker.
-
-## Project Structure
-
-*   `user_config.yml`: **Main configuration file.** Edit this to define your image, SSH users, scripts, etc.
-*   `docker-compose.yml`: Generated file.
-    *   **Note**: You **CAN** modify this file manually to add advanced Docker features not supported by PeiDocker.
-    *   **Warning**: Running `pei-docker-cli configure` will **OVERWRITE** this file. If you make manual changes, ensure you back them up or be prepared to re-apply them after re-configuration.
-*   `installation/`: Directory copied into the container at `/pei-from-host`.
-    *   `stage-1/`: System layer scripts (APT, SSH, Proxy).
-    *   `stage-2/`: Application layer scripts (Pixi, Conda, Custom).
-    *   `stage-2/custom/`: Place your custom setup scripts here.
-
-## How to Configure
-
-1.  Edit `user_config.yml`.
-2.  Run configuration command to regenerate artifacts:
-    ```bash
-    pei-docker-cli configure
-    ```
-    *   Add `--with-merged` to generate standalone build scripts (`build-merged.sh`).
-
-## How to Build and Run
-
-### Option A: Docker Compose (Standard)
-
-*   **Build**:
-    ```bash
-    docker compose build stage-2
-    ```
-*   **Run**:
-    ```bash
-    # Starts stage-2 service by default (stage-1 is excluded)
-    docker compose up
-    
-    # Detached mode
-    docker compose up -d
-    ```
-*   **SSH**:
-    Connect to the port defined in `user_config.yml` (default host port: 2222).
-    ```bash
-    ssh <user>@localhost -p 2222
-    ```
-
-### Option B: Merged Build (Standalone)
-
-Useful if you want a single `docker build` command or don't want to use Compose.
-
-1.  Ensure you ran `pei-docker-cli configure --with-merged`.
-2.  **Build**:
-    ```bash
-    ./build-merged.sh
-    ```
-3.  **Run**:
-    ```bash
-    ./run-merged.sh
-    
-    # Run with interactive shell
-    ./run-merged.sh --shell
-    ```
-
-## Scripts & Customization
-
-*   **Build Hooks**: Add scripts to `custom.on_build` in `user_config.yml`.
-*   **Runtime Hooks**: Add scripts to `custom.on_first_run`, `on_every_run`, or `on_user_login`.
-*   **System Scripts**: PeiDocker provides built-in scripts in `installation/stage-*/system/` (e.g., for installing Pixi, UV, Conda). Reference them in your config.
-
-## Troubleshooting
-
-*   **Rebuild**: If you change `user_config.yml`, always run `pei-docker-cli configure` again.
-*   **Stage 1 vs Stage 2**:
-    *   `Stage 1`: Base system (Ubuntu + CUDA + SSH + APT). Changes here invalidate the whole cache.
-    *   `Stage 2`: Application layer. Optimized for frequent changes.
-"""
-    with open(guide_path, "w") as f:
-        f.write(content)
-        
 @click.command()
 @click.option('--project-dir', '-p', help='project directory (default: current working directory)', required=False, 
               default=None, type=click.Path(exists=False, file_okay=False))
@@ -340,7 +274,9 @@ Useful if you want a single `docker build` command or don't want to use Compose.
               type=click.Path(exists=False, file_okay=True, dir_okay=False))
 @click.option('--full-compose', '-f', is_flag=True, default=False, help='generate full compose file with x-??? sections')
 @click.option('--with-merged', is_flag=True, default=False, help='Generate merged.Dockerfile, merged.env, and build-merged.sh')
-def configure(project_dir:str, config:str, full_compose:bool, with_merged:bool) -> None:
+@click.option('--prune-unused', is_flag=True, default=False,
+              help='remove installation/stage-*/system installers the config does not reference')
+def configure(project_dir:str, config:str, full_compose:bool, with_merged:bool, prune_unused:bool) -> None:
     """Generate docker-compose.yml from user configuration.
     
     Processes the user configuration file through environment variable substitution
@@ -373,6 +309,15 @@ def configure(project_dir:str, config:str, full_compose:bool, with_merged:bool)
       
       # Generate full compose with debug sections
       pei-docker-cli configure -p ./my-project --full-compose
+      
+      # Drop the system installers the config does not use
+      pei-docker-cli configure -p ./my-project --prune-unused
+    
+    \b
+    System Installers:
+      Installer directories under installation/stage-*/system that the config
+      references but that are missing from the project (e.g. after
+      --prune-unused) are copied back from the package before processing.
     
     \b
     Output Files:
@@ -387,86 +332,12 @@ def configure(project_dir:str, config:str, full_compose:bool, with_merged:bool)
     if project_dir is None:
         project_dir = os.getcwd()
     
-    logging.info(f'Configuring PeiDocker project from {project_dir}/{config}')
-    # is config file a relative path?
-    # if yes, then append to project dir
-    # if no, then use as is
-    if not os.path.isabs(config) or config == Defaults.OutputConfigName:
-        config_path = os.path.join(project_dir, config)
-    else:
-        config_path = config
-
-    
-    # file exists?
-    if not os.path.exists(config_path):
-        logging.error(f'Config file {config_path} does not exist')
+    try:
+        configure_project_direct(project_dir, config=config, full_compose=full_compose,
+                                 with_merged=with_merged, prune_unused=prune_unused)
+    except FileNotFoundError as e:
+        logging.error(str(e))
         return
-    
-    in_config = load_yaml_file_with_duplicate_key_check(config_path)
-    if not isinstance(in_config, oc.DictConfig):
-        raise ValueError("Configuration file must contain a dictionary, not a list")
-    
-    # Process environment variable substitution
-    logging.info('Processing environment variable substitution')
-    in_config = process_config_env_substitution(in_config)
-    validate_no_leftover_substitution(in_config)
-
-    if with_merged:
-        cfg_container = oc.OmegaConf.to_container(in_config, resolve=False)
-        found = find_first_passthrough_marker_in_container(cfg_container)
-        if found is not None:
-            found_path, found_value = found
-            raise ValueError(
-                "Passthrough markers `{{...}}` are supported only for generated "
-                "`docker-compose.yml` and are incompatible with `--with-merged`. "
-                f"Found marker-like content at {found_path!r}: {found_value!r}."
-            )
-    
-    # read the compose template file
-    compose_path : str = os.path.join(project_dir, Defaults.OutputComposeTemplateName)
-    in_compose = oc.OmegaConf.load(compose_path)
-    if not isinstance(in_compose, oc.DictConfig):
-        raise ValueError("Compose template file must contain a dictionary, not a list")
-    
-    # process the config file
-    proc : PeiConfigProcessor = PeiConfigProcessor.from_config(in_config, in_compose, project_dir=project_dir)
-    out_compose = proc.process(remove_extra=not full_compose)
-
-    out_compose_container = oc.OmegaConf.to_container(out_compose, resolve=True)
-    if with_merged:
-        found = find_first_passthrough_marker_in_container(out_compose_container)
-        if found is not None:
-            found_path, found_value = found
-            raise ValueError(
-                "Passthrough markers `{{...}}` are supported only for generated "
-                "`docker-compose.yml` and are incompatible with `--with-merged`. "
-                f"Found marker-like content at {found_path!r}: {found_value!r}."
-            )
-    out_compose_container = rewrite_passthrough_markers_in_container(out_compose_container)
-    out_yaml = yaml.safe_dump(
-        out_compose_container,
-        default_flow_style=False,
-        sort_keys=False,
-        indent=2,
-    )
-    
-    # write the compose file to the same directory as config file
-    out_compose_path = os.path.join(project_dir, Defaults.OutputComposeName)
-    logging.info(f'Writing compose file to {out_compose_path}')
-    with open(out_compose_path, 'w') as f:
-        f.write(out_yaml)
-    
-    # Optionally generate standalone merged build artifacts
-    if with_merged:
-        try:
-            from pei_docker.merge_build import generate_merged_build
-            generate_merged_build(project_dir, out_compose)
-            logging.info('Generated merged.Dockerfile, merged.env, and build-merged.sh')
-        except Exception as e:
-            logging.error(f'Failed to generate merged build artifacts: {e}')
-
-    # Generate usage guide
-    _write_usage_guide(project_dir)
 
     logging.info('Done')
 
@@ -534,8 +405,8 @@ def get_containers_using_image(image_name: str) -> list[str]:
         
     Notes
     -----
-    Uses 'docker ps -a --filter ancestor=<image>' to find containers.
-    The filter includes both running and stopped containers to ensure
+    Queries the Docker Engine API over the local socket when available,
+    otherwise uses 'docker ps -a --filter ancestor=<image>'. The filter includes both running and stopped containers to ensure
     complete dependency checking before image removal.
     
     Examples
@@ -545,18 +416,158 @@ def get_containers_using_image(image_name: str) -> list[str]:
         >>> if containers:
         ...     print(f"Found {len(containers)} containers using the image")
     """
+    client = get_docker_engine_client()
+    if client is not None:
+        try:
+            return client.list_containers(ancestor=image_name)
+        except DockerEngineError as e:
+            logging.warning(f'Docker Engine API query failed, falling back to docker CLI: {e}')
+    
     success, output = run_docker_command(['docker', 'ps', '-a', '--filter', f'ancestor={image_name}', '--format', '{{.ID}}'])
     if success and output:
         return output.split('\n')
     return []
 
-def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False) -> bool:
+def run_docker_batch(action_args: list[str], container_ids: list[str]) -> tuple[list[str], dict[str, str]]:
+    """
+    Run one Docker CLI invocation over many containers and split the outcome per container.
+    
+    Commands such as ``docker stop`` and ``docker rm`` accept several container
+    IDs at once, handle them in parallel inside the daemon client, echo every
+    container they processed on stdout and report failures one line per
+    container on stderr. This helper issues a single invocation and maps that
+    output back to the individual container IDs.
+    
+    Parameters
+    ----------
+    action_args : list[str]
+        Docker sub-command and its options, without the container IDs
+        (e.g., ``['stop', '-t', '10']``).
+    container_ids : list[str]
+        Container IDs appended to the command.
+        
+    Returns
+    -------
+    tuple[list[str], dict[str, str]]
+        Tuple containing:
+        - list[str]: container IDs the command processed successfully
+        - dict[str, str]: failed container IDs mapped to their error message
+        
+    Notes
+    -----
+    A container is considered successful only when Docker echoes it on stdout.
+    Error lines that mention a container ID are attributed to that container;
+    any remaining unprocessed container gets the whole stderr text as message.
+    
+    Examples
+    --------
+    Stop two containers in one call:
+        >>> done, failed = run_docker_batch(['stop', '-t', '5'], ['abc123', 'def456'])
+        >>> for cid, msg in failed.items():
+        ...     print(f"{cid}: {msg}")
+    """
+    if not container_ids:
+        return [], {}
+    
+    cmd = ['docker', *action_args, *container_ids]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError as e:
+        return [], {cid: str(e) for cid in container_ids}
+    
+    echoed = {line.strip() for line in result.stdout.splitlines() if line.strip()}
+    error_lines = [line.strip() for line in result.stderr.splitlines() if line.strip()]
+    
+    succeeded: list[str] = []
+    failures: dict[str, str] = {}
+    for cid in container_ids:
+        if cid in echoed:
+            succeeded.append(cid)
+            continue
+        own_errors = [line for line in error_lines if cid in line]
+        if own_errors:
+            failures[cid] = '; '.join(own_errors)
+        elif result.returncode == 0:
+            # docker exited cleanly but did not echo the id (e.g. name vs. id), trust the exit code
+            succeeded.append(cid)
+        else:
+            failures[cid] = result.stderr.strip() or f'docker exited with code {result.returncode}'
+    return succeeded, failures
+
+def run_engine_batch(client: DockerEngineClient, action: Callable[[str], None],
+                     container_ids: list[str],
+                     max_workers: int = ENGINE_MAX_WORKERS) -> tuple[list[str], dict[str, str]]:
+    """
+    Apply a Docker Engine API action to many containers concurrently.
+    
+    Counterpart of run_docker_batch() for the Engine API path. Up to
+    ``max_workers`` worker threads take containers from the batch in turn,
+    each reusing one keep-alive connection to the daemon for all of its
+    containers and closing it when the batch is done, so slow stops overlap
+    just like they do inside a multi-container ``docker stop``.
+    
+    Parameters
+    ----------
+    client : DockerEngineClient
+        Client that ``action`` uses; its per-thread connections are closed
+        by the workers before they exit.
+    action : Callable[[str], None]
+        Function taking a container ID and raising DockerEngineError on failure
+        (e.g., ``client.remove_container``).
+    container_ids : list[str]
+        Container IDs to process.
+    max_workers : int, default ENGINE_MAX_WORKERS
+        Maximum number of concurrent requests (and connections).
+        
+    Returns
+    -------
+    tuple[list[str], dict[str, str]]
+        Succeeded container IDs in input order, and failed container IDs
+        mapped to their error message.
+    """
+    if not container_ids:
+        return [], {}
+    
+    errors: list[str | None] = [None] * len(container_ids)
+    pending = iter(range(len(container_ids)))
+    pending_lock = threading.Lock()
+    
+    def _worker() -> None:
+        try:
+            while True:
+                with pending_lock:
+                    index = next(pending, None)
+                if index is None:
+                    return
+                try:
+                    action(container_ids[index])
+                except DockerEngineError as e:
+                    errors[index] = str(e)
+        finally:
+            client.close()
+    
+    workers = max(1, min(max_workers, len(container_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(_worker) for _ in range(workers)]:
+            future.result()
+    
+    succeeded = [cid for cid, err in zip(container_ids, errors) if err is None]
+    failures = {cid: err for cid, err in zip(container_ids, errors) if err is not None}
+    return succeeded, failures
+
+def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False, 
+                               stop_timeout: int = DEFAULT_STOP_TIMEOUT, 
+                               batch_size: int = DOCKER_BATCH_SIZE) -> bool:
     """
     Stop and remove Docker containers with optional user confirmation.
     
     Safely stops and removes the specified containers, with user confirmation
     unless bypassed. This ensures containers are properly cleaned up before
-    removing their associated Docker images.
+    removing their associated Docker images. Containers are handled in batches
+    so that one ``docker stop`` and one ``docker rm`` invocation cover many
+    containers, and Docker stops the containers of a batch in parallel. When
+    the Docker Engine API is reachable over the local socket, the same
+    batches are sent as concurrent API requests instead of CLI processes.
     
     Parameters
     ----------
@@ -565,6 +576,11 @@ def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False
     force_yes : bool, default False
         If True, skip user confirmation prompts. If False, prompt user
         for confirmation before proceeding.
+    stop_timeout : int, default DEFAULT_STOP_TIMEOUT
+        Seconds Docker waits for each container to exit gracefully before
+        killing it (passed as ``docker stop -t``).
+    batch_size : int, default DOCKER_BATCH_SIZE
+        Maximum number of container IDs passed to a single Docker invocation.
         
     Returns
     -------
@@ -575,15 +591,17 @@ def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False
     Process
     -------
     1. If containers exist and force_yes is False, prompt for confirmation
-    2. Stop all containers using 'docker stop <id>'
-    3. Remove all containers using 'docker rm <id>'
-    4. Log warnings for any containers that fail to stop or remove
+    2. Stop containers in batches using 'docker stop -t <timeout> <id>...'
+    3. Remove containers in batches using 'docker rm <id>...'
+    4. Log progress per batch and a warning for every container that fails
     
     Notes
     -----
     Stopping containers gracefully allows them to clean up resources.
     Removal is necessary before Docker images can be deleted.
-    Individual container failures don't stop the overall process.
+    Individual container failures don't stop the overall process; a container
+    that fails to stop is still passed to 'docker rm' so that already-exited
+    containers are cleaned up.
     
     Examples
     --------
@@ -592,8 +610,8 @@ def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False
         >>> if stop_and_remove_containers(container_ids):
         ...     print("Containers removed successfully")
         
-    Force removal without confirmation:
-        >>> stop_and_remove_containers(container_ids, force_yes=True)
+    Force removal without confirmation and a short grace period:
+        >>> stop_and_remove_containers(container_ids, force_yes=True, stop_timeout=2)
     """
     if not container_ids:
         return True
@@ -603,19 +621,44 @@ def stop_and_remove_containers(container_ids: list[str], force_yes: bool = False
         if not click.confirm(f'Stop and remove containers: {container_list}?'):
             return False
     
+    client = get_docker_engine_client()
+    batch_size = max(1, batch_size)
+    batches = [container_ids[i:i + batch_size] for i in range(0, len(container_ids), batch_size)]
+    total = len(container_ids)
+    
     # Stop containers
-    for container_id in container_ids:
-        logging.info(f'Stopping container {container_id}')
-        success, output = run_docker_command(['docker', 'stop', container_id])
-        if not success:
-            logging.warning(f'Failed to stop container {container_id}: {output}')
+    stopped = 0
+    stop_failures: dict[str, str] = {}
+    for batch in batches:
+        logging.info(f'Stopping {len(batch)} container(s) (timeout {stop_timeout}s): {", ".join(batch)}')
+        if client is not None:
+            done, failed = run_engine_batch(client, lambda cid: client.stop_container(cid, timeout=stop_timeout), batch)
+        else:
+            done, failed = run_docker_batch(['stop', '-t', str(stop_timeout)], batch)
+        stopped += len(done)
+        stop_failures.update(failed)
+        for container_id, message in failed.items():
+            logging.warning(f'Failed to stop container {container_id}: {message}')
+        logging.info(f'Stopped {stopped}/{total} container(s)')
     
     # Remove containers
-    for container_id in container_ids:
-        logging.info(f'Removing container {container_id}')
-        success, output = run_docker_command(['docker', 'rm', container_id])
-        if not success:
-            logging.warning(f'Failed to remove container {container_id}: {output}')
+    removed = 0
+    remove_failures: dict[str, str] = {}
+    for batch in batches:
+        logging.info(f'Removing {len(batch)} container(s): {", ".join(batch)}')
+        if client is not None:
+            done, failed = run_engine_batch(client, client.remove_container, batch)
+        else:
+            done, failed = run_docker_batch(['rm'], batch)
+        removed += len(done)
+        remove_failures.update(failed)
+        for container_id, message in failed.items():
+            logging.warning(f'Failed to remove container {container_id}: {message}')
+        logging.info(f'Removed {removed}/{total} container(s)')
+    
+    if stop_failures or remove_failures:
+        logging.warning(f'Container cleanup finished with {len(stop_failures)} stop failure(s) '
+                        f'and {len(remove_failures)} removal failure(s)')
     
     return True
 
@@ -643,10 +686,10 @@ def remove_image(image_name: str, force_yes: bool = False) -> bool:
         
     Process
     -------
-    1. Check if image exists using 'docker images -q <image_name>'
+    1. Check if image exists via the Engine API or 'docker images -q <image_name>'
     2. If image doesn't exist, return True (nothing to do)
     3. If force_yes is False, prompt user for confirmation
-    4. Remove image using 'docker rmi <image_name>'
+    4. Remove image via the Engine API or 'docker rmi <image_name>'
     5. Log success or failure messages
     
     Notes
@@ -664,9 +707,19 @@ def remove_image(image_name: str, force_yes: bool = False) -> bool:
     Force removal without confirmation:
         >>> remove_image("my-app:stage-1", force_yes=True)
     """
+    client = get_docker_engine_client()
+    
     # Check if image exists
-    success, output = run_docker_command(['docker', 'images', '-q', image_name])
-    if not success or not output:
+    if client is not None:
+        try:
+            exists = client.image_exists(image_name)
+        except DockerEngineError as e:
+            logging.warning(f'Docker Engine API query failed, falling back to docker CLI: {e}')
+            client = None
+    if client is None:
+        success, output = run_docker_command(['docker', 'images', '-q', image_name])
+        exists = success and bool(output)
+    if not exists:
         logging.info(f'Image {image_name} not found, skipping')
         return True
     
@@ -675,7 +728,14 @@ def remove_image(image_name: str, force_yes: bool = False) -> bool:
             return False
     
     logging.info(f'Removing image {image_name}')
-    success, output = run_docker_command(['docker', 'rmi', image_name])
+    if client is not None:
+        try:
+            client.remove_image(image_name)
+            success, output = True, ''
+        except DockerEngineError as e:
+            success, output = False, str(e)
+    else:
+        success, output = run_docker_command(['docker', 'rmi', image_name])
     if not success:
         logging.error(f'Failed to remove image {image_name}: {output}')
         return False
@@ -683,11 +743,114 @@ def remove_image(image_name: str, force_yes: bool = False) -> bool:
     logging.info(f'Successfully removed image {image_name}')
     return True
 
+def get_compose_project_id(compose_config: oc.DictConfig, project_dir: str) -> str:
+    """
+    Read the project id that ``configure`` wrote into the compose labels.
+    
+    Parameters
+    ----------
+    compose_config : DictConfig
+        Loaded docker-compose.yml of the project.
+    project_dir : str
+        Project directory, used to recompute the id for compose files
+        generated before resources were labelled.
+        
+    Returns
+    -------
+    str
+        The project id found on any service, or the id computed from the
+        project directory.
+    """
+    services = compose_config.get('services') or {}
+    for _, service_config in services.items():
+        labels = service_config.get('labels') if service_config is not None else None
+        if labels is not None and Defaults.ProjectLabel in labels:
+            return str(labels[Defaults.ProjectLabel])
+    
+    project_id = compute_project_id(project_dir)
+    logging.warning(f'docker-compose.yml has no {Defaults.ProjectLabel} label, re-run "configure" '
+                    f'to label new builds; assuming project id {project_id}')
+    return project_id
+
+def report_project_prune(project_id: str) -> int:
+    """
+    Log every resource labelled with the project id and the space it uses.
+    
+    Parameters
+    ----------
+    project_id : str
+        Project id to look for.
+        
+    Returns
+    -------
+    int
+        Reclaimable bytes over the resources whose size is known.
+    """
+    items = find_project_resources(project_id)
+    if not items:
+        logging.info(f'No Docker resources labelled with project id {project_id}')
+        return 0
+    
+    for item in items:
+        logging.info(f'[dry-run] would remove {item.kind} {item.name} ({format_bytes(item.size)})')
+    total, unknown = total_reclaimable(items)
+    suffix = f', plus {unknown} item(s) of unknown size' if unknown else ''
+    logging.info(f'[dry-run] {len(items)} resource(s) of project {project_id}, '
+                 f'{format_bytes(total)} ({total} bytes) reclaimable{suffix}')
+    return total
+
+def prune_project(project_id: str, force_yes: bool = False) -> bool:
+    """
+    Remove every remaining Docker resource labelled with the project id.
+    
+    Runs after the regular image/container removal and catches what it
+    cannot see: images from earlier builds that lost their tag, containers
+    of those images, compose-managed volumes, and BuildKit cache mounts.
+    
+    Parameters
+    ----------
+    project_id : str
+        Project id to prune.
+    force_yes : bool, default False
+        If True, skip the confirmation prompt.
+        
+    Returns
+    -------
+    bool
+        False if the user cancelled, True otherwise (individual failures are
+        logged as warnings).
+    """
+    items = find_project_resources(project_id)
+    if not items:
+        logging.info(f'Nothing left to prune for project {project_id}')
+        return True
+    
+    total, unknown = total_reclaimable(items)
+    logging.info(f'Found {len(items)} resource(s) of project {project_id} '
+                 f'({format_bytes(total)}{" + unknown" if unknown else ""})')
+    if not force_yes:
+        listing = '\n'.join(f'  {item.kind} {item.name}' for item in items)
+        if not click.confirm(f'Remove these resources?\n{listing}\n'):
+            return False
+    
+    reclaimed, failures = prune_project_resources(items)
+    logging.info(f'Pruned project {project_id}: reclaimed {format_bytes(reclaimed)}')
+    if failures:
+        logging.warning(f'{len(failures)} resource(s) could not be removed')
+    return True
+
 @click.command()
 @click.option('--project-dir', '-p', help='project directory', required=True, 
               type=click.Path(exists=True, file_okay=False))
 @click.option('--yes', '-y', is_flag=True, default=False, help='skip confirmation prompts')
-def remove(project_dir: str, yes: bool) -> None:
+@click.option('--stop-timeout', '-t', type=click.IntRange(min=0), default=DEFAULT_STOP_TIMEOUT, show_default=True,
+              help='seconds to wait for containers to stop before killing them')
+@click.option('--prune', is_flag=True, default=False,
+              help="also remove everything labelled with this project's id: old/dangling images, "
+                   "leftover containers, auto-volumes and BuildKit cache")
+@click.option('--dry-run', is_flag=True, default=False,
+              help='with --prune, only list what would be removed and the reclaimable size')
+def remove(project_dir: str, yes: bool, stop_timeout: int, prune: bool, dry_run: bool) -> None:
     """Remove Docker images and containers created by PeiDocker project.
     
     Safely removes all Docker resources (images and containers) associated with
@@ -710,7 +873,9 @@ def remove(project_dir: str, yes: bool) -> None:
          a. Find containers using the image
          b. Stop and remove containers (with confirmation)
          c. Remove the image (with confirmation)
-      4. Report cleanup completion status
+      4. With --prune, remove all remaining resources labelled with the
+         project id (dangling images, containers, volumes, build cache)
+      5. Report cleanup completion status
     
     \b
     Examples:
@@ -719,6 +884,13 @@ def remove(project_dir: str, yes: bool) -> None:
       
       # Force removal without prompts
       pei-docker-cli remove -p ./my-project --yes
+      
+      # Kill containers that do not exit within 2 seconds
+      pei-docker-cli remove -p ./my-project --yes --stop-timeout 2
+      
+      # Show what a full project cleanup would reclaim, then do it
+      pei-docker-cli remove -p ./my-project --prune --dry-run
+      pei-docker-cli remove -p ./my-project --prune --yes
     
     \b
     Requirements:
@@ -731,6 +903,9 @@ def remove(project_dir: str, yes: bool) -> None:
       This operation removes Docker images and containers permanently.
       Ensure you have saved any important data from containers before removal.
     """
+    if dry_run and not prune:
+        raise click.UsageError('--dry-run can only be used together with --prune')
+    
     logging.info(f'Removing images from PeiDocker project in {project_dir}')
     
     # Look for the generated docker-compose.yml file
@@ -743,7 +918,11 @@ def remove(project_dir: str, yes: bool) -> None:
     
     try:
         # Load docker-compose.yml
-        compose_config = oc.OmegaConf.load(compose_path)
+        compose_config = load_yaml_file_with_duplicate_key_check(compose_path)
+        
+        if dry_run:
+            report_project_prune(get_compose_project_id(compose_config, project_dir))
+            return
         
         # Extract image names from services
         images_to_remove = []
@@ -757,9 +936,8 @@ def remove(project_dir: str, yes: bool) -> None:
         
         if not images_to_remove:
             logging.info('No images found in configuration')
-            return
-        
-        logging.info(f'Found images to remove: {", ".join(images_to_remove)}')
+        else:
+            logging.info(f'Found images to remove: {", ".join(images_to_remove)}')
         
         # Process each image
         for image_name in images_to_remove:
@@ -768,7 +946,7 @@ def remove(project_dir: str, yes: bool) -> None:
             
             if container_ids:
                 logging.info(f'Found {len(container_ids)} container(s) using image {image_name}')
-                if not stop_and_remove_containers(container_ids, yes):
+                if not stop_and_remove_containers(container_ids, yes, stop_timeout=stop_timeout):
                     logging.info(f'Skipping removal of image {image_name} due to user cancellation')
                     continue
             else:
@@ -779,16 +957,133 @@ def remove(project_dir: str, yes: bool) -> None:
                 logging.info('Skipping due to user cancellation or error')
                 continue
         
+        if prune:
+            prune_project(get_compose_project_id(compose_config, project_dir), yes)
+        
         logging.info('Cleanup completed')
         
     except Exception as e:
         logging.error(f'Error processing config file: {e}')
         sys.exit(1)
         
+@click.group(name='apt-cache')
+def apt_cache() -> None:
+    """
+    Host-side apt package cache shared by all stage-1 builds.
+    """
+    pass
+
+@apt_cache.command(name='serve')
+@click.option('--port', type=click.IntRange(1, 65535), default=APT_CACHE_DEFAULT_PORT, show_default=True,
+              help='port to listen on (apt.cache_proxy in the user config must use the same one)')
+@click.option('--host', default='0.0.0.0', show_default=True,
+              help='address to bind; builds reach the host through the docker bridge, not loopback')
+@click.option('--cache-dir', default=APT_CACHE_DEFAULT_DIR, show_default=True,
+              help='directory holding cached packages and indices')
+@click.option('--index-ttl', type=click.FloatRange(min=0), default=APT_CACHE_DEFAULT_INDEX_TTL, show_default=True,
+              help='seconds a cached repository index is used before it is revalidated')
+@click.option('--upstream-proxy', default=None, help='HTTP proxy used to reach the mirrors, e.g. http://proxy:8080')
+@click.option('--allow-public-clients', is_flag=True, default=False,
+              help='also serve clients outside loopback and private networks')
+def apt_cache_serve(port: int, host: str, cache_dir: str, index_ttl: float,
+                    upstream_proxy: str | None, allow_public_clients: bool) -> None:
+    """
+    Run a caching HTTP proxy for apt on this host.
+
+    Set apt.cache_proxy in stage_1 of user_config.yml and keep this
+    running while building: packages are then downloaded from the mirrors
+    once and served from the host cache to every later build.
+    """
+    try:
+        server = build_apt_cache_server(cache_dir, host=host, port=port, index_ttl=index_ttl,
+                                        upstream_proxy=upstream_proxy,
+                                        allow_public_clients=allow_public_clients)
+    except OSError as e:
+        logging.error(f'Cannot listen on {host}:{port}: {e}')
+        sys.exit(1)
+    logging.info(f'apt cache proxy listening on {host}:{port}, caching in {cache_dir}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info('apt cache proxy stopped: ' + ', '.join(f'{k} {v}' for k, v in server.stats.items()))
+
+@click.command()
+@click.option('--project-dir', '-p', help='project directory (default: current working directory)', required=False,
+              default=None, type=click.Path(exists=False, file_okay=False))
+@click.option('--config', '-c', default=f'{Defaults.OutputConfigName}', help='config file name, relative to the project dir',
+              type=click.Path(exists=False, file_okay=True, dir_okay=False))
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=PREFETCH_DEFAULT_JOBS, show_default=True,
+              help='number of parallel downloads')
+@click.option('--retries', type=click.IntRange(min=1), default=PREFETCH_DEFAULT_RETRIES, show_default=True,
+              help='attempts per file before giving up')
+@click.option('--arch', type=click.Choice(['x86_64', 'amd64', 'aarch64', 'arm64']), default='x86_64',
+              show_default=True, help='architecture of the image')
+@click.option('--refresh', is_flag=True, default=False, help='download every file again, even if it is up to date')
+@click.option('--dry-run', is_flag=True, default=False, help='list the files without downloading them')
+def prefetch(project_dir: str | None, config: str, jobs: int, retries: int, arch: str, refresh: bool,
+             dry_run: bool) -> None:
+    """Download installer artifacts into the project before building.
+    
+    Scans the on_build entries of both stages for system installers that
+    download large files during the build (Miniconda, the pixi/uv/bun install
+    scripts, NVM) and fetches them concurrently into <project>/prefetch/,
+    along with a SHA256SUMS file. The on_build step mounts that directory and
+    the installers use a file from it when its checksum matches, instead of
+    downloading it again; the files do not end up in the image.
+    
+    Files of versioned URLs are kept while their checksum matches. Files of
+    unversioned URLs (Miniconda3-latest, the install scripts, NVM master)
+    are revalidated with the server on every run and downloaded again when
+    they changed; --refresh downloads everything again.
+    
+    \b
+    Examples:
+      # Fetch everything user_config.yml needs, 8 downloads at a time
+      pei-docker-cli prefetch -p ./my-project -j 8
+      
+      # Show what would be fetched for an arm64 image
+      pei-docker-cli prefetch -p ./my-project --arch arm64 --dry-run
+    """
+    if project_dir is None:
+        project_dir = os.getcwd()
+    config_path = config if os.path.isabs(config) else os.path.join(project_dir, config)
+
+    try:
+        artifacts = find_artifacts(load_user_config(config_path), arch=arch)
+    except FileNotFoundError as e:
+        logging.error(str(e))
+        sys.exit(1)
+    except ValueError as e:
+        logging.error(f'Error processing config file: {e}')
+        sys.exit(1)
+
+    if not artifacts:
+        logging.info('No on_build installer downloads anything that can be prefetched')
+    for artifact in artifacts:
+        logging.info(f'{artifact.url} ({artifact.entry})')
+    if dry_run:
+        return
+
+    dest_dir = ensure_prefetch_dir(project_dir)
+    results = prefetch_artifacts(artifacts, dest_dir, jobs=jobs, retries=retries, refresh=refresh)
+    failed = [r for r in results if r.status == 'failed']
+    for r in failed:
+        logging.error(f'Could not download {r.artifact.url}: {r.error}')
+    logging.info(f'Prefetched into {dest_dir}: '
+                 f"{sum(r.status == 'downloaded' for r in results)} downloaded, "
+                 f"{sum(r.status == 'cached' for r in results)} up to date, {len(failed)} failed")
+    if failed:
+        sys.exit(1)
+
 # Register commands with the CLI group
 cli.add_command(create)
 cli.add_command(configure) 
 cli.add_command(remove)
+cli.add_command(apt_cache)
+cli.add_command(prefetch)
 
 if __name__ == '__main__':
     # Run the command line interface when script is executed directly
@@ -0,0 +1,485 @@
+"""
+Host-side caching HTTP proxy for apt (``pei-docker-cli apt-cache serve``).
+
+Stage-1 builds point apt at this proxy (``apt.cache_proxy`` in the user
+config, reached through ``host.docker.internal``), so packages downloaded by
+one build are served from the host's disk to every later build, in any
+project. apt sends plain HTTP requests with absolute URIs to a proxy; HTTPS
+repositories are not proxied and keep going direct.
+
+Responses are cached by URL under the cache directory according to what the
+file is:
+
+- packages (``.deb``, ``.udeb``, ``.ddeb``) and ``by-hash`` indices never
+  change under the same URL, so they are cached without expiry;
+- repository indices (``InRelease``, ``Release``, ``Packages``, ...) are
+  cached for ``index_ttl`` seconds and then revalidated with
+  ``If-Modified-Since``. When a suite's ``Release`` file changes, the other
+  cached indices of that suite are expired at once, so apt never combines a
+  new ``Release`` with stale index files. If the mirror cannot be reached, a
+  stale index is served rather than failing the build;
+- other files under a repository's ``dists/`` or ``pool/`` are passed
+  through without caching; anything else is refused.
+
+Requests for loopback or link-local hosts (the Docker host itself, cloud
+metadata services at ``169.254.169.254``) are refused, so containers cannot
+use the proxy to reach services they should not see.
+
+Concurrent requests for the same uncached file share one download: the
+first request streams it from the mirror to its client and the cache, the
+others wait and are then served from the cache.
+"""
+
+import http.client
+import ipaddress
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Port of the proxy (the one apt-cacher-ng uses)
+DEFAULT_PORT = 3142
+
+# Seconds a cached repository index is used before it is revalidated
+DEFAULT_INDEX_TTL = 600
+
+# Default cache directory (under $XDG_CACHE_HOME, or ~/.cache)
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'pei-docker', 'apt',
+)
+
+# Seconds to wait for the mirror
+UPSTREAM_TIMEOUT = 60
+
+IO_CHUNK_SIZE = 256 * 1024
+
+_IMMUTABLE_PATTERN = re.compile(r'(\.u?deb|\.ddeb|/by-hash/[^/]+/[0-9a-fA-F]+)$')
+_INDEX_PATTERN = re.compile(
+    r'/dists/.+/(InRelease|Release(\.gpg)?|'
+    r'(Packages|Sources|Contents-[^/]+|Translation-[^/]+|Components-[^/]+|Commands-[^/]+|icons-[^/]+)'
+    r'(\.(gz|xz|bz2|lzma|zst))?)$'
+)
+_RELEASE_PATTERN = re.compile(r'^(?P<suite>.*/dists/[^/]+)/(InRelease|Release)$')
+_REPOSITORY_PATTERN = re.compile(r'/(dists|pool)/')
+
+
+def classify_path(path: str) -> str:
+    """
+    Tell how a repository file may be cached.
+
+    Parameters
+    ----------
+    path : str
+        URL path, e.g. ``/ubuntu/pool/main/c/curl/curl_8.5.0_amd64.deb``.
+
+    Returns
+    -------
+    str
+        ``"immutable"`` for packages and by-hash files, ``"index"`` for
+        repository indices, ``"pass"`` for other files of a repository
+        (under ``dists/`` or ``pool/``) and ``"refuse"`` for everything else.
+    """
+    if _IMMUTABLE_PATTERN.search(path):
+        return 'immutable'
+    if _INDEX_PATTERN.search(path):
+        return 'index'
+    if _REPOSITORY_PATTERN.search(path):
+        return 'pass'
+    return 'refuse'
+
+
+def _host_addresses(host: str) -> List[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]]:
+    """IP addresses of a host name or literal; empty if it does not resolve here."""
+    try:
+        addresses = [ipaddress.ip_address(host.split('%', 1)[0])]
+    except ValueError:
+        try:
+            infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        except (OSError, UnicodeError):
+            # maybe only the upstream proxy can resolve it
+            return []
+        addresses = [ipaddress.ip_address(str(info[4][0]).split('%', 1)[0]) for info in infos]
+    return [ip.ipv4_mapped if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped else ip
+            for ip in addresses]
+
+
+def mirror_host_allowed(host: str, allow_loopback: bool = False) -> bool:
+    """
+    Tell whether the proxy may fetch from a mirror host.
+
+    Parameters
+    ----------
+    host : str
+        Host name or IP address from the requested URL.
+    allow_loopback : bool, default False
+        Accept loopback (and unspecified) addresses.
+
+    Returns
+    -------
+    bool
+        ``False`` if the host is empty or any of its addresses is
+        link-local, or loopback unless ``allow_loopback`` is set.
+    """
+    if not host:
+        return False
+    for ip in _host_addresses(host):
+        if ip.is_link_local or ((ip.is_loopback or ip.is_unspecified) and not allow_loopback):
+            return False
+    return True
+
+
+class AptCacheStore:
+    """
+    On-disk cache of mirror files, laid out as ``<root>/<host>/<path>``.
+
+    Index files have a ``<file>.meta`` JSON sidecar with the time they were
+    fetched and the mirror's ``Last-Modified``.
+
+    Parameters
+    ----------
+    root : str
+        Cache directory.
+    index_ttl : float
+        Seconds a cached index is fresh.
+    """
+
+    def __init__(self, root: str, index_ttl: float = DEFAULT_INDEX_TTL) -> None:
+        self.root = Path(root)
+        self.index_ttl = index_ttl
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path_for(self, url: str) -> Path:
+        """Return the cache file of a mirror URL."""
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.hostname or '_') + (f'_{parts.port}' if parts.port else '')
+        segments = [s for s in urllib.parse.unquote(parts.path).split('/') if s not in ('', '.', '..')]
+        return self.root.joinpath(host, *segments)
+
+    def lock_for(self, url: str) -> threading.Lock:
+        """Return the lock serializing downloads of ``url``."""
+        with self._locks_guard:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def read_meta(self, path: Path) -> Dict[str, object]:
+        try:
+            return json.loads(path.with_name(path.name + '.meta').read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def write_meta(self, path: Path, meta: Dict[str, object]) -> None:
+        meta_path = path.with_name(path.name + '.meta')
+        tmp = meta_path.with_name(meta_path.name + '.tmp')
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_path)
+
+    def is_fresh(self, path: Path, kind: str) -> bool:
+        """Whether a cached file can be served without asking the mirror."""
+        if not path.is_file():
+            return False
+        if kind == 'immutable':
+            return True
+        fetched = float(self.read_meta(path).get('fetched_at', 0))  # type: ignore[arg-type]
+        return time.time() - fetched < self.index_ttl
+
+    def expire_suite(self, release_path: Path) -> None:
+        """Mark every cached index next to a changed ``Release`` file stale."""
+        for meta_path in release_path.parent.rglob('*.meta'):
+            if meta_path.name.startswith(('InRelease', 'Release')):
+                continue
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                continue
+            meta['fetched_at'] = 0
+            meta_path.write_text(json.dumps(meta))
+
+
+class AptCacheProxy(ThreadingHTTPServer):
+    """
+    Threaded HTTP proxy server answering apt requests from an :class:`AptCacheStore`.
+
+    Parameters
+    ----------
+    address : tuple of (str, int)
+        Address to listen on.
+    store : AptCacheStore
+        Where cached files live.
+    upstream_proxy : str, optional
+        HTTP proxy used to reach the mirrors, e.g. ``http://proxy:8080``.
+    allow_public_clients : bool, default False
+        Serve clients outside loopback and private networks. The proxy
+        fetches files from any mirror, so this is off by default.
+    allow_local_mirrors : bool, default False
+        Fetch from mirrors on loopback addresses (link-local ones are
+        always refused). Meant for tests with a mirror on this machine.
+    """
+
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, address: Tuple[str, int], store: AptCacheStore,
+                 upstream_proxy: Optional[str] = None, allow_public_clients: bool = False,
+                 allow_local_mirrors: bool = False) -> None:
+        super().__init__(address, AptCacheHandler)
+        self.store = store
+        self.allow_public_clients = allow_public_clients
+        self.allow_local_mirrors = allow_local_mirrors
+        handlers = [urllib.request.ProxyHandler({'http': upstream_proxy} if upstream_proxy else {})]
+        self.opener = urllib.request.build_opener(*handlers)
+        self.stats = {'hit': 0, 'miss': 0, 'revalidated': 0, 'stale': 0, 'pass': 0, 'error': 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, result: str) -> None:
+        with self.stats_lock:
+            self.stats[result] += 1
+
+
+class AptCacheHandler(BaseHTTPRequestHandler):
+    """Serves one apt proxy request: from the cache, or from the mirror while caching it."""
+
+    protocol_version = 'HTTP/1.1'
+    server: AptCacheProxy
+
+    def log_message(self, format: str, *args: object) -> None:
+        logging.debug('apt-cache %s: ' + format, self.client_address[0], *args)
+
+    def _client_allowed(self) -> bool:
+        if self.server.allow_public_clients:
+            return True
+        try:
+            address = ipaddress.ip_address(self.client_address[0])
+        except ValueError:
+            return False
+        return address.is_loopback or (address.is_private and not address.is_link_local)
+
+    def _error(self, status: int, message: str) -> None:
+        body = (message + '\n').encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_CONNECT(self) -> None:
+        self._error(501, 'HTTPS is not proxied; configure apt to reach https mirrors directly')
+        self.close_connection = True
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        if not self._client_allowed():
+            self._error(403, 'client not allowed')
+            return
+        url = self.path
+        if not url.startswith('http://'):
+            self._error(400, 'expected an absolute http:// URL (use this server as an HTTP proxy)')
+            return
+
+        kind = classify_path(urllib.parse.urlsplit(url).path)
+        if kind == 'refuse':
+            self._error(403, 'only apt repository files (under dists/ or pool/) are proxied')
+            return
+        if not mirror_host_allowed(urllib.parse.urlsplit(url).hostname or '', self.server.allow_local_mirrors):
+            self._error(403, 'loopback and link-local mirrors are not proxied')
+            return
+        try:
+            if kind == 'pass':
+                self._pass_through(url)
+            else:
+                self._serve_cached(url, kind)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            self.server.count('error')
+            logging.warning(f'apt-cache: {url}: {e}')
+            self._error(502, f'upstream error: {e}')
+
+    def _upstream(self, url: str, headers: Optional[Dict[str, str]] = None) -> http.client.HTTPResponse:
+        request = urllib.request.Request(url, headers=headers or {}, method=self.command)
+        return self.server.opener.open(request, timeout=UPSTREAM_TIMEOUT)
+
+    def _send_file(self, path: Path, result: str) -> None:
+        size = path.stat().st_size
+        self.send_response(200)
+        self.send_header('Content-Length', str(size))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('X-Cache', result.upper())
+        self.end_headers()
+        if self.command != 'HEAD':
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, IO_CHUNK_SIZE)
+        self.server.count(result)
+        logging.info(f'apt-cache {result.upper():<11} {self.path}')
+
+    def _pass_through(self, url: str) -> None:
+        try:
+            resp = self._upstream(url)
+        except urllib.error.HTTPError as e:
+            self._error(e.code, str(e.reason))
+            return
+        with resp:
+            self.send_response(resp.status)
+            length = resp.headers.get('Content-Length')
+            self.send_header('Content-Type', resp.headers.get('Content-Type', 'application/octet-stream'))
+            if length is not None:
+                self.send_header('Content-Length', length)
+            else:
+                self.close_connection = True
+            self.end_headers()
+            if self.command != 'HEAD':
+                shutil.copyfileobj(resp, self.wfile, IO_CHUNK_SIZE)
+        self.server.count('pass')
+
+    def _serve_cached(self, url: str, kind: str) -> None:
+        store = self.server.store
+        path = store.path_for(url)
+        if store.is_fresh(path, kind):
+            self._send_file(path, 'hit')
+            return
+
+        with store.lock_for(url):
+            # another request may have fetched it while we waited
+            if store.is_fresh(path, kind):
+                self._send_file(path, 'hit')
+                return
+            self._fetch(url, kind, path)
+
+    def _fetch(self, url: str, kind: str, path: Path) -> None:
+        store = self.server.store
+        headers = {}
+        meta = store.read_meta(path) if path.is_file() else {}
+        if kind == 'index' and meta.get('last_modified'):
+            headers['If-Modified-Since'] = str(meta['last_modified'])
+
+        try:
+            resp = self._upstream(url, headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                meta['fetched_at'] = time.time()
+                store.write_meta(path, meta)
+                self._send_file(path, 'revalidated')
+                return
+            if e.code >= 500 and path.is_file():
+                logging.warning(f'apt-cache: {url}: HTTP {e.code}; serving the cached copy')
+                self._send_file(path, 'stale')
+                return
+            self._error(e.code, str(e.reason))
+            return
+        except (urllib.error.URLError, OSError) as e:
+            if path.is_file():
+                logging.warning(f'apt-cache: {url}: {e}; serving the cached copy')
+                self._send_file(path, 'stale')
+                return
+            raise
+
+        with resp:
+            if self.command == 'HEAD':
+                self.send_response(resp.status)
+                self.send_header('Content-Length', resp.headers.get('Content-Length', '0'))
+                self.end_headers()
+                return
+            self._stream_and_store(resp, path)
+
+        if kind == 'index':
+            store.write_meta(path, {'fetched_at': time.time(),
+                                    'last_modified': resp.headers.get('Last-Modified')})
+            match = _RELEASE_PATTERN.match(urllib.parse.urlsplit(url).path)
+            if match:
+                store.expire_suite(path)
+        self.server.count('miss')
+        logging.info(f'apt-cache {"MISS":<11} {url}')
+
+    def _stream_and_store(self, resp: http.client.HTTPResponse, path: Path) -> None:
+        """Send the mirror's response to the client while writing it to the cache."""
+        length = resp.headers.get('Content-Length')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('X-Cache', 'MISS')
+        if length is not None:
+            self.send_header('Content-Length', length)
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.part')
+        received = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in _iter_chunks(resp):
+                    f.write(chunk)
+                    received += len(chunk)
+                    if length is None:
+                        self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                    else:
+                        self.wfile.write(chunk)
+            if length is None:
+                self.wfile.write(b'0\r\n\r\n')
+            if length is not None and received != int(length):
+                raise OSError(f'truncated download: {received} of {length} bytes')
+            os.replace(tmp, path)
+        except BaseException:
+            self.close_connection = True
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def _iter_chunks(resp: http.client.HTTPResponse) -> Iterator[bytes]:
+    while True:
+        chunk = resp.read(IO_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def build_apt_cache_server(cache_dir: str, host: str = '0.0.0.0', port: int = DEFAULT_PORT,
+                           index_ttl: float = DEFAULT_INDEX_TTL, upstream_proxy: Optional[str] = None,
+                           allow_public_clients: bool = False, allow_local_mirrors: bool = False) -> AptCacheProxy:
+    """
+    Create the apt caching proxy server (call ``serve_forever`` to run it).
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding the cached files; created if missing.
+    host : str, default '0.0.0.0'
+        Address to bind. Containers reach the host through the Docker bridge,
+        so binding only to loopback would make the proxy unreachable from builds.
+    port : int, default 3142
+        Port to listen on.
+    index_ttl : float, default 600
+        Seconds a cached repository index is served before revalidation.
+    upstream_proxy : str, optional
+        HTTP proxy used to reach the mirrors.
+    allow_public_clients : bool, default False
+        Also serve clients outside loopback and private networks.
+    allow_local_mirrors : bool, default False
+        Fetch from mirrors on loopback addresses.
+
+    Returns
+    -------
+    AptCacheProxy
+        The bound server.
+    """
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    store = AptCacheStore(cache_dir, index_ttl=index_ttl)
+    return AptCacheProxy((host, port), store, upstream_proxy=upstream_proxy,
+                         allow_public_clients=allow_public_clients, allow_local_mirrors=allow_local_mirrors)
@@ -0,0 +1,203 @@
+"""
+Run ``docker compose build`` for a configured project and stream its output.
+
+The generated ``docker-compose.yml`` defines ``stage-1`` (in the
+``build-helper`` profile) and ``stage-2``, and stage-2 is built on top of the
+stage-1 image, so the stages are built one after the other, as the usage
+guide written by ``create`` does. Each stage is one ``docker compose build``
+process whose output (BuildKit ``plain`` progress, stdout and stderr merged)
+is read line by line without blocking the event loop.
+
+Build logs of apt or conda steps can produce thousands of lines per second.
+Consumers that display them should put them into a :class:`BuildLogBuffer`
+and drain it periodically: the buffer is bounded, dropping the oldest lines
+when the reader is faster than the display, and a drain returns everything
+since the last one so it can be shown in a single update.
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+from attrs import define, field
+
+# Compose services in build order
+BUILD_SERVICES = ('stage-1', 'stage-2')
+
+# Longest line read from the build output; longer lines are split
+MAX_LINE_BYTES = 1024 * 1024
+
+# BuildKit plain progress step line, e.g. '#8 [stage-1 3/7] RUN apt-get update'
+_STEP_PATTERN = re.compile(r'^#\d+ \[(?P<target>[^\s\]]+) (?P<step>\d+)/(?P<total>\d+)\]')
+
+
+@define(kw_only=True)
+class StageResult:
+    """
+    Outcome of building one compose service.
+
+    Attributes
+    ----------
+    service : str
+        Compose service name, e.g. ``stage-1``.
+    returncode : int
+        Exit status of ``docker compose build``.
+    elapsed : float
+        Wall time of the build in seconds.
+    """
+    service: str = field()
+    returncode: int = field()
+    elapsed: float = field()
+
+
+class BuildLogBuffer:
+    """Bounded line buffer between a fast producer and a slower display."""
+
+    def __init__(self, max_lines: int) -> None:
+        self._lines: Deque[str] = collections.deque(maxlen=max_lines)
+        self._dropped = 0
+
+    def append(self, line: str) -> None:
+        """Add a line, dropping the oldest one when the buffer is full."""
+        if len(self._lines) == self._lines.maxlen:
+            self._dropped += 1
+        self._lines.append(line)
+
+    def drain(self) -> Tuple[List[str], int]:
+        """Return ``(lines, dropped)`` since the last drain and empty the buffer."""
+        lines, dropped = list(self._lines), self._dropped
+        self._lines.clear()
+        self._dropped = 0
+        return lines, dropped
+
+
+def parse_build_step(line: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse the ``step/total`` of a BuildKit plain progress line.
+
+    Parameters
+    ----------
+    line : str
+        One line of build output.
+
+    Returns
+    -------
+    tuple[int, int] or None
+        ``(step, total)``, or None if the line is not a numbered step.
+    """
+    m = _STEP_PATTERN.match(line)
+    if m is None:
+        return None
+    return int(m.group('step')), int(m.group('total'))
+
+
+def compose_build_command(service: str, docker: Optional[str] = None) -> List[str]:
+    """
+    Command line building one compose service.
+
+    Parameters
+    ----------
+    service : str
+        Compose service to build.
+    docker : str, optional
+        Docker executable; defaults to ``docker`` found on PATH.
+
+    Returns
+    -------
+    list[str]
+        The command.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no docker executable is found.
+    """
+    if docker is None:
+        docker = shutil.which('docker')
+        if docker is None:
+            raise FileNotFoundError('docker executable not found on PATH')
+    return [docker, 'compose', 'build', service]
+
+
+async def _read_lines(stream: asyncio.StreamReader, on_line: Callable[[str], None]) -> None:
+    while True:
+        try:
+            raw = await stream.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            raw = e.partial
+            if not raw:
+                return
+        except asyncio.LimitOverrunError as e:
+            # overlong line: hand it over in pieces
+            raw = await stream.readexactly(e.consumed)
+        on_line(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+
+
+async def run_compose_build(project_dir: str, on_line: Callable[[str], None],
+                            on_stage: Optional[Callable[[str], None]] = None,
+                            services: Iterable[str] = BUILD_SERVICES,
+                            docker: Optional[str] = None) -> List[StageResult]:
+    """
+    Build the project's images, streaming the build output.
+
+    Stages are built in order and the build stops at the first failing
+    stage. Cancelling the coroutine terminates the running build.
+
+    Parameters
+    ----------
+    project_dir : str
+        Configured project directory (containing ``docker-compose.yml``).
+    on_line : callable
+        Called with every output line, on the event loop.
+    on_stage : callable, optional
+        Called with the service name when its build starts.
+    services : iterable of str
+        Compose services to build, in order.
+    docker : str, optional
+        Docker executable; defaults to ``docker`` found on PATH.
+
+    Returns
+    -------
+    list[StageResult]
+        One result per stage that was started.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the project has no ``docker-compose.yml`` or docker is not found.
+    """
+    if not os.path.isfile(os.path.join(project_dir, 'docker-compose.yml')):
+        raise FileNotFoundError(f'No docker-compose.yml in {project_dir}, configure the project first')
+
+    env = dict(os.environ, BUILDKIT_PROGRESS='plain')
+    results: List[StageResult] = []
+    for service in services:
+        cmd = compose_build_command(service, docker)
+        logging.info(f'Building {service}: {" ".join(cmd)}')
+        if on_stage is not None:
+            on_stage(service)
+        start = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, cwd=project_dir, env=env, limit=MAX_LINE_BYTES,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        try:
+            assert proc.stdout is not None
+            await _read_lines(proc.stdout, on_line)
+            returncode = await proc.wait()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.terminate()
+                await proc.wait()
+            raise
+        results.append(StageResult(service=service, returncode=returncode, elapsed=time.monotonic() - start))
+        if returncode != 0:
+            logging.error(f'Build of {service} failed with exit code {returncode}')
+            break
+    return results
@@ -0,0 +1,175 @@
+"""
+Utility function for configuring PeiDocker projects.
+
+This module provides the body of ``pei-docker-cli configure`` as a plain
+function without Click decorators, so other Python code such as the web GUI
+can configure a project in-process instead of spawning a CLI subprocess.
+Progress is reported per phase through an optional callback; detailed
+messages go through :mod:`logging` as in the CLI.
+"""
+
+import logging
+import os
+from typing import Callable, Optional
+
+import omegaconf as oc
+import yaml
+
+from pei_docker.config_processor import Defaults, PeiConfigProcessor
+from pei_docker.pei_utils import (
+    find_first_passthrough_marker_in_container,
+    load_yaml_dict_with_duplicate_key_check,
+    load_yaml_file_with_duplicate_key_check,
+    rewrite_passthrough_markers_in_container,
+    substitute_config,
+)
+from pei_docker.pei_utils_create import write_usage_guide
+from pei_docker.pei_utils_extends import resolve_extends
+from pei_docker.pei_utils_installers import (
+    find_referenced_system_dirs,
+    prune_unused_system_dirs,
+    restore_referenced_system_dirs,
+)
+from pei_docker.pei_utils_prefetch import ensure_prefetch_dir
+
+# Phases reported to the progress callback, in order
+CONFIGURE_PHASES = ('load', 'substitute', 'process', 'write', 'finalize')
+
+
+def _reject_passthrough_marker(found_path: str, found_value: str) -> None:
+    raise ValueError(
+        "Passthrough markers `{{...}}` are supported only for generated "
+        "`docker-compose.yml` and are incompatible with `--with-merged`. "
+        f"Found marker-like content at {found_path!r}: {found_value!r}."
+    )
+
+
+def _check_no_passthrough_markers(container: object) -> None:
+    found = find_first_passthrough_marker_in_container(container)
+    if found is not None:
+        _reject_passthrough_marker(*found)
+
+
+def configure_project_direct(project_dir: str,
+                             config: str = Defaults.OutputConfigName,
+                             full_compose: bool = False,
+                             with_merged: bool = False,
+                             prune_unused: bool = False,
+                             progress: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Generate docker-compose.yml (and optional merged build files) for a project.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+    config : str
+        Config file name relative to the project dir, or an absolute path.
+        Default is ``user_config.yml``.
+    full_compose : bool
+        Keep the ``x-???`` sections in the generated compose file. Default is False.
+    with_merged : bool
+        Also generate merged.Dockerfile, merged.env and build-merged.sh. Default is False.
+    prune_unused : bool
+        Remove system installers the config does not reference. Default is False.
+    progress : callable, optional
+        Called with each phase name from :data:`CONFIGURE_PHASES` as it starts.
+
+    Returns
+    -------
+    str
+        Path of the written docker-compose.yml.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the config file does not exist.
+    ValueError
+        If the configuration is invalid.
+    """
+    def _phase(name: str) -> None:
+        if progress is not None:
+            progress(name)
+
+    _phase('load')
+    logging.info(f'Configuring PeiDocker project from {project_dir}/{config}')
+    # is config file a relative path?
+    # if yes, then append to project dir
+    # if no, then use as is
+    if not os.path.isabs(config) or config == Defaults.OutputConfigName:
+        config_path = os.path.join(project_dir, config)
+    else:
+        config_path = config
+
+    # file exists?
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f'Config file {config_path} does not exist')
+
+    raw_config = resolve_extends(load_yaml_dict_with_duplicate_key_check(config_path), config_path)
+
+    # Process environment variable substitution, leftovers and passthrough
+    # markers in a single traversal
+    _phase('substitute')
+    logging.info('Processing environment variable substitution')
+    substituted = substitute_config(raw_config)
+    substituted.check_leftover()
+    if with_merged and substituted.marker is not None:
+        _reject_passthrough_marker(*substituted.marker)
+    cfg_plain = substituted.config
+    in_config = oc.OmegaConf.create(cfg_plain)
+    assert isinstance(in_config, oc.DictConfig)
+
+    # bring back installers removed by --prune-unused that are referenced again
+    referenced_installers = find_referenced_system_dirs(project_dir, cfg_plain)
+    restore_referenced_system_dirs(project_dir, cfg_plain, referenced_installers)
+
+    # read the compose template file
+    _phase('process')
+    compose_path : str = os.path.join(project_dir, Defaults.OutputComposeTemplateName)
+    in_compose = load_yaml_file_with_duplicate_key_check(compose_path)
+    if not isinstance(in_compose, oc.DictConfig):
+        raise ValueError("Compose template file must contain a dictionary, not a list")
+
+    # process the config file
+    proc : PeiConfigProcessor = PeiConfigProcessor.from_config(in_config, in_compose, project_dir=project_dir)
+    out_compose = proc.process(remove_extra=not full_compose)
+
+    out_compose_container = oc.OmegaConf.to_container(out_compose, resolve=True)
+    if with_merged:
+        # nothing to rewrite once markers are ruled out
+        _check_no_passthrough_markers(out_compose_container)
+    else:
+        out_compose_container = rewrite_passthrough_markers_in_container(out_compose_container)
+    out_yaml = yaml.safe_dump(
+        out_compose_container,
+        default_flow_style=False,
+        sort_keys=False,
+        indent=2,
+    )
+
+    # write the compose file to the same directory as config file
+    _phase('write')
+    out_compose_path = os.path.join(project_dir, Defaults.OutputComposeName)
+    logging.info(f'Writing compose file to {out_compose_path}')
+    with open(out_compose_path, 'w') as f:
+        f.write(out_yaml)
+
+    # the on_build step bind-mounts prefetch/, so it must exist even when nothing is prefetched
+    ensure_prefetch_dir(project_dir)
+
+    # Optionally generate standalone merged build artifacts
+    _phase('finalize')
+    if with_merged:
+        try:
+            from pei_docker.merge_build import generate_merged_build
+            generate_merged_build(project_dir, out_compose)
+            logging.info('Generated merged.Dockerfile, merged.env, and build-merged.sh')
+        except Exception as e:
+            logging.error(f'Failed to generate merged build artifacts: {e}')
+
+    if prune_unused:
+        prune_unused_system_dirs(project_dir, cfg_plain, referenced_installers)
+
+    # Generate usage guide
+    write_usage_guide(project_dir)
+    return out_compose_path
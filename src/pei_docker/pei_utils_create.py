@@ -3,13 +3,26 @@ Utility function for creating PeiDocker projects.
 
 This module provides a direct function for creating projects without Click decorators,
 allowing it to be called from other Python code like the GUI.
+
+Template files are materialized in one of three ways:
+
+- packed (default when available): the ``project-files.tar`` archive bundled in
+  wheels is extracted in a single pass, see :mod:`pei_docker.template_pack`
+- copied: ``project_files`` and ``examples`` are copied file by file
+- linked (``link=True``): every file is reflinked (copy-on-write clone) where
+  the filesystem supports it; files PeiDocker never writes to (installer
+  scripts under ``system/``, ``internals/``, ``utilities/`` and the examples)
+  are hardlinked otherwise, and everything else is copied
 """
 
+import errno
 import os
 import shutil
 import logging
 from typing import Optional
 from pei_docker.config_processor import Defaults
+from pei_docker.pei_utils_prefetch import ensure_prefetch_dir
+from pei_docker.template_pack import extract_project_template, find_packed_template
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s]\t%(message)s')
@@ -38,7 +51,138 @@ def get_available_quick_templates() -> list[str]:
     return sorted(templates)
 
 
-def create_project_direct(project_dir: str, with_examples: bool = True, quick: Optional[str] = None) -> None:
+# FICLONE ioctl request number (Linux), clones file extents copy-on-write
+_FICLONE = 0x40049409
+
+# directories under installation/stage-*/ whose files are never modified by
+# `configure` or the GUI, so sharing an inode with the package is safe
+_IMMUTABLE_INSTALLATION_DIRS = ('system', 'internals', 'utilities')
+
+# destination devices on which reflink failed, to avoid retrying per file
+_reflink_unsupported_devices: set[int] = set()
+
+
+def is_immutable_template_file(rel_path: str) -> bool:
+    """
+    Tell whether a template file may be hardlinked into a project.
+
+    Parameters
+    ----------
+    rel_path : str
+        Path relative to the project root (e.g. ``installation/stage-1/system/uv/install-uv.sh``).
+
+    Returns
+    -------
+    bool
+        True for installer scripts under ``installation/stage-*/{system,internals,utilities}``
+        and for files under ``examples``; False for files users are expected to
+        edit or that ``configure`` rewrites (Dockerfiles, ``custom``, ``generated``).
+    """
+    parts = rel_path.replace(os.sep, '/').split('/')
+    if parts[0] == 'examples':
+        return len(parts) > 1
+    return (
+        len(parts) > 3
+        and parts[0] == 'installation'
+        and parts[1].startswith('stage-')
+        and parts[2] in _IMMUTABLE_INSTALLATION_DIRS
+    )
+
+
+def _try_reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    dst_dev = os.stat(os.path.dirname(dst) or '.').st_dev
+    if dst_dev in _reflink_unsupported_devices:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError as e:
+        if os.path.exists(dst):
+            os.unlink(dst)
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM):
+            _reflink_unsupported_devices.add(dst_dev)
+            return False
+        raise
+    shutil.copystat(src, dst)
+    return True
+
+
+def link_or_copy_file(src: str, dst: str, allow_hardlink: bool) -> str:
+    """
+    Materialize one template file as cheaply as possible.
+
+    Parameters
+    ----------
+    src : str
+        Source file in the package.
+    dst : str
+        Destination path; an existing file is replaced (never written through).
+    allow_hardlink : bool
+        Permit a hardlink when reflink is not available. Only pass True for
+        files nobody will modify in place.
+
+    Returns
+    -------
+    str
+        ``'reflink'``, ``'hardlink'`` or ``'copy'``.
+    """
+    if os.path.lexists(dst):
+        # replace rather than overwrite, an existing hardlink must not be written through
+        os.unlink(dst)
+    if _try_reflink(src, dst):
+        return 'reflink'
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def link_template_tree(src_dir: str, dst_dir: str, rel_root: str = '') -> dict[str, int]:
+    """
+    Recreate a template directory using reflinks/hardlinks where safe.
+
+    Parameters
+    ----------
+    src_dir : str
+        Template directory in the package.
+    dst_dir : str
+        Destination directory, created if missing.
+    rel_root : str, default ''
+        Path of ``dst_dir`` relative to the project root, used to decide
+        which files are immutable.
+
+    Returns
+    -------
+    dict[str, int]
+        Count of files per method (``reflink``, ``hardlink``, ``copy``).
+    """
+    stats = {'reflink': 0, 'hardlink': 0, 'copy': 0}
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        dirnames[:] = [d for d in dirnames if d != '__pycache__']
+        rel_dir = os.path.relpath(dirpath, src_dir)
+        target_dir = os.path.normpath(os.path.join(dst_dir, rel_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            rel_path = os.path.normpath(os.path.join(rel_root, rel_dir, name))
+            method = link_or_copy_file(
+                os.path.join(dirpath, name),
+                os.path.join(target_dir, name),
+                allow_hardlink=is_immutable_template_file(rel_path),
+            )
+            stats[method] += 1
+    return stats
+
+
+def create_project_direct(project_dir: str, with_examples: bool = True, quick: Optional[str] = None,
+                          link: bool = False, template_archive: Optional[str] = None) -> None:
     """
     Create a new PeiDocker project with template files and directory structure.
     
@@ -54,23 +198,60 @@ def create_project_direct(project_dir: str, with_examples: bool = True, quick: O
     quick : str, optional
         Name of quick template to use for user_config.yml. If not specified,
         the full template is used. Available templates: minimal, cn-dev, cn-ml
+    link : bool
+        Reflink template files, or hardlink the immutable ones, instead of
+        copying them. Default is False. Hardlinked files share their inode
+        with the installed package, so they must not be edited in place.
+    template_archive : str, optional
+        Packed template archive to extract instead of the one bundled with
+        the package. Ignored when ``link`` is True.
+    
+    Raises
+    ------
+    ValueError
+        If the quick template does not exist.
     """
     logging.info(f'Creating PeiDocker project in {project_dir}')
     os.makedirs(project_dir, exist_ok=True)
     
-    # copy all the files and folders in project_files to the output dir
     this_dir: str = os.path.dirname(os.path.realpath(__file__))
     project_template_dir = f'{this_dir}/project_files'
+    examples_dir: str = f'{this_dir}/{Defaults.ConfigExamplesDir}'
+    examples_dst_dir: str = f'{project_dir}/examples'
     
-    for item in os.listdir(project_template_dir):
-        s = os.path.join(project_template_dir, item)
-        d = os.path.join(project_dir, item)
-        if os.path.isdir(s):
-            logging.info(f'Copying directory {s} to {d}')
-            shutil.copytree(s, d, dirs_exist_ok=True)
+    # materialize project_files (and examples) in the cheapest available way
+    examples_done = False
+    packed = None if link else (template_archive or find_packed_template())
+    if link:
+        stats = link_template_tree(project_template_dir, project_dir)
+        if with_examples:
+            logging.info(f'Linking examples from {examples_dir} to {examples_dst_dir}')
+            for k, v in link_template_tree(examples_dir, examples_dst_dir, rel_root='examples').items():
+                stats[k] += v
+            examples_done = True
+        logging.info(f'Linked template files into {project_dir}: '
+                     f'{stats["reflink"]} reflinked, {stats["hardlink"]} hardlinked, {stats["copy"]} copied')
+    elif packed is not None:
+        logging.info(f'Extracting packed template into {project_dir}')
+        if isinstance(packed, str):
+            with open(packed, 'rb') as f:
+                n_files = extract_project_template(f, project_dir, with_examples)
         else:
-            logging.info(f'Copying file {s} to {d}')
-            shutil.copy2(s, d)
+            with packed.open('rb') as f:
+                n_files = extract_project_template(f, project_dir, with_examples)
+        logging.info(f'Extracted {n_files} template files')
+        examples_done = with_examples
+    else:
+        # copy all the files and folders in project_files to the output dir
+        for item in os.listdir(project_template_dir):
+            s = os.path.join(project_template_dir, item)
+            d = os.path.join(project_dir, item)
+            if os.path.isdir(s):
+                logging.info(f'Copying directory {s} to {d}')
+                shutil.copytree(s, d, dirs_exist_ok=True)
+            else:
+                logging.info(f'Copying file {s} to {d}')
+                shutil.copy2(s, d)
     
     # Always copy full template as reference_config.yml
     src_config_template: str = f'{this_dir}/{Defaults.ConfigTemplatePath}'
@@ -106,12 +287,96 @@ def create_project_direct(project_dir: str, with_examples: bool = True, quick: O
     shutil.copy2(src_compose_template, dst_compose_template)
     
     # copy example files to the project dir
-    if with_examples:
-        examples_dir: str = f'{this_dir}/{Defaults.ConfigExamplesDir}'
-        
-        # copy this dir to project_dir/examples
-        examples_dst_dir: str = f'{project_dir}/examples'
+    if with_examples and not examples_done:
         logging.info(f'Copying examples from {examples_dir} to {examples_dst_dir}')
         shutil.copytree(examples_dir, examples_dst_dir, dirs_exist_ok=True)
     
-    logging.info('Done')
\ No newline at end of file
+    # bind-mounted by the on_build step, so it must exist before the first build
+    ensure_prefetch_dir(project_dir)
+    
+    logging.info('Done')
+
+
+def write_usage_guide(project_dir: str) -> None:
+    """Generate PEI-DOCKER-USAGE-GUIDE.md in the project directory."""
+    guide_path = os.path.join(project_dir, "PEI-DOCKER-USAGE-GUIDE.md")
+    logging.info(f"Generating usage guide at {guide_path}")
+    
+    content = """# PeiDocker Project Usage Guide
+
+This project was generated/configured by PeiDocker.
+
+## Project Structure
+
+*   `user_config.yml`: **Main configuration file.** Edit this to define your image, SSH users, scripts, etc.
+*   `docker-compose.yml`: Generated file.
+    *   **Note**: You **CAN** modify this file manually to add advanced Docker features not supported by PeiDocker.
+    *   **Warning**: Running `pei-docker-cli configure` will **OVERWRITE** this file. If you make manual changes, ensure you back them up or be prepared to re-apply them after re-configuration.
+*   `installation/`: Directory copied into the container at `/pei-from-host`.
+    *   `stage-1/`: System layer scripts (APT, SSH, Proxy).
+    *   `stage-2/`: Application layer scripts (Pixi, Conda, Custom).
+    *   `stage-2/custom/`: Place your custom setup scripts here.
+
+## How to Configure
+
+1.  Edit `user_config.yml`.
+2.  Run configuration command to regenerate artifacts:
+    ```bash
+    pei-docker-cli configure
+    ```
+    *   Add `--with-merged` to generate standalone build scripts (`build-merged.sh`).
+
+## How to Build and Run
+
+### Option A: Docker Compose (Standard)
+
+*   **Build**:
+    ```bash
+    docker compose build stage-2
+    ```
+*   **Run**:
+    ```bash
+    # Starts stage-2 service by default (stage-1 is excluded)
+    docker compose up
+    
+    # Detached mode
+    docker compose up -d
+    ```
+*   **SSH**:
+    Connect to the port defined in `user_config.yml` (default host port: 2222).
+    ```bash
+    ssh <user>@localhost -p 2222
+    ```
+
+### Option B: Merged Build (Standalone)
+
+Useful if you want a single `docker build` command or don't want to use Compose.
+
+1.  Ensure you ran `pei-docker-cli configure --with-merged`.
+2.  **Build**:
+    ```bash
+    ./build-merged.sh
+    ```
+3.  **Run**:
+    ```bash
+    ./run-merged.sh
+    
+    # Run with interactive shell
+    ./run-merged.sh --shell
+    ```
+
+## Scripts & Customization
+
+*   **Build Hooks**: Add scripts to `custom.on_build` in `user_config.yml`.
+*   **Runtime Hooks**: Add scripts to `custom.on_first_run`, `on_every_run`, or `on_user_login`.
+*   **System Scripts**: PeiDocker provides built-in scripts in `installation/stage-*/system/` (e.g., for installing Pixi, UV, Conda). Reference them in your config.
+
+## Troubleshooting
+
+*   **Rebuild**: If you change `user_config.yml`, always run `pei-docker-cli configure` again.
+*   **Stage 1 vs Stage 2**:
+    *   `Stage 1`: Base system (Ubuntu + CUDA + SSH + APT). Changes here invalidate the whole cache.
+    *   `Stage 2`: Application layer. Optimized for frequent changes.
+"""
+    with open(guide_path, "w") as f:
+        f.write(content)
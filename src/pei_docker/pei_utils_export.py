@@ -0,0 +1,180 @@
+"""
+Export a PeiDocker project directory as a zip archive.
+
+The archive holds what a colleague needs to rebuild the project, which is
+the Docker build context (the project directory, see ``context: .`` in the
+compose template) minus local caches. Paths are filtered with
+``.dockerignore``-style rules:
+
+- :data:`DEFAULT_EXPORT_EXCLUDES`: download caches under
+  ``installation/stage-*/tmp``, Python bytecode and VCS metadata
+- the project's own ``.dockerignore``, if present, applied after the defaults
+  (so ``!pattern`` lines can re-include a default exclusion)
+
+Files are streamed into the zip one by one with a progress callback, so
+callers can run the export on a worker thread and report progress.
+"""
+
+import os
+import re
+import zipfile
+from typing import Callable, Iterable, Optional
+
+# Default exclusions, in .dockerignore syntax relative to the project dir
+DEFAULT_EXPORT_EXCLUDES = (
+    'installation/stage-*/tmp',
+    '**/__pycache__',
+    '**/*.pyc',
+    '.git',
+)
+
+# Called with (bytes_done, bytes_total) after each file
+ProgressCallback = Callable[[int, int], None]
+
+
+def _pattern_to_regex(pattern: str) -> re.Pattern[str]:
+    """Translate a .dockerignore pattern into a regex over '/'-separated paths."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return re.compile(''.join(parts) + r'\Z')
+
+
+class ExcludeRules:
+    """Ordered .dockerignore-style rules; the last matching rule wins."""
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._rules: list[tuple[re.Pattern[str], bool]] = []
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:].strip()
+            line = os.path.normpath(line).replace(os.sep, '/').lstrip('/')
+            if line in ('', '.'):
+                continue
+            self._rules.append((_pattern_to_regex(line), negate))
+
+    @property
+    def has_negations(self) -> bool:
+        """Whether any ``!pattern`` rule may re-include paths below an excluded directory."""
+        return any(negate for _, negate in self._rules)
+
+    def is_excluded(self, rel_path: str) -> bool:
+        """
+        Tell whether a path (relative to the project, '/'-separated) is excluded.
+
+        A rule matching a parent directory applies to everything below it.
+        """
+        candidates = []
+        parts = rel_path.split('/')
+        for n in range(1, len(parts) + 1):
+            candidates.append('/'.join(parts[:n]))
+        excluded = False
+        for regex, negate in self._rules:
+            if any(regex.match(c) for c in candidates):
+                excluded = not negate
+        return excluded
+
+
+def load_export_rules(project_dir: str) -> ExcludeRules:
+    """Default exclusions followed by the project's ``.dockerignore``, if any."""
+    patterns = list(DEFAULT_EXPORT_EXCLUDES)
+    dockerignore = os.path.join(project_dir, '.dockerignore')
+    if os.path.isfile(dockerignore):
+        with open(dockerignore, encoding='utf-8') as f:
+            patterns.extend(f.read().splitlines())
+    return ExcludeRules(patterns)
+
+
+def list_export_files(project_dir: str, rules: Optional[ExcludeRules] = None) -> list[tuple[str, int]]:
+    """
+    List the files an export would contain.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+    rules : ExcludeRules, optional
+        Exclusion rules; defaults to :func:`load_export_rules`.
+
+    Returns
+    -------
+    list[tuple[str, int]]
+        ``(relative_path, size)`` pairs, '/'-separated and sorted.
+    """
+    if rules is None:
+        rules = load_export_rules(project_dir)
+    result = []
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        rel_dir = os.path.relpath(dirpath, project_dir).replace(os.sep, '/')
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        # prune excluded directories instead of walking their contents,
+        # unless a negation could re-include something inside them
+        if rules.has_negations:
+            dirnames.sort()
+        else:
+            dirnames[:] = sorted(d for d in dirnames if not rules.is_excluded(prefix + d))
+        for name in sorted(filenames):
+            rel_path = prefix + name
+            if rules.is_excluded(rel_path):
+                continue
+            full = os.path.join(dirpath, name)
+            if os.path.islink(full) and not os.path.exists(full):
+                continue
+            result.append((rel_path, os.path.getsize(full)))
+    return result
+
+
+def write_project_zip(project_dir: str, out_path: str,
+                      files: Optional[list[tuple[str, int]]] = None,
+                      progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Write the project files into a zip archive.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+    out_path : str
+        Path of the zip file to write.
+    files : list[tuple[str, int]], optional
+        Result of :func:`list_export_files`; computed if not given.
+    progress : callable, optional
+        Called with ``(bytes_done, bytes_total)`` after each file.
+
+    Returns
+    -------
+    int
+        Number of files written.
+    """
+    if files is None:
+        files = list_export_files(project_dir)
+    total = sum(size for _, size in files)
+    done = 0
+    with zipfile.ZipFile(out_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for rel_path, size in files:
+            # ZipFile.write streams the file in chunks, memory use stays flat
+            zf.write(os.path.join(project_dir, rel_path), arcname=rel_path)
+            done += size
+            if progress is not None:
+                progress(done, total)
+    return len(files)
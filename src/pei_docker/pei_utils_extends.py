@@ -0,0 +1,185 @@
+"""
+Config composition: ``extends`` in user_config.yml.
+
+A user config can list shared fragment files under a top-level ``extends``
+key (a path or a list of paths, relative to the file that names them).
+Fragments are YAML files with the same layout as user_config.yml and may
+extend other fragments. They are merged in order, then the extending file on
+top, with the rules of :meth:`UserConfig.merge_dicts`::
+
+    extends:
+      - ../shared/ssh.yml
+      - ../shared/proxy-and-apt.yml
+    stage_1:
+      image:
+        output: my-app:stage-1
+
+Parsed fragments are cached in ``$XDG_CACHE_HOME/pei-docker/fragments`` (or
+``~/.cache``), keyed by the fragment's real path and validated against its
+mtime, size and SHA-256, so configuring many projects that share a fragment
+parses it only once. Each fragment is parsed with the duplicate-key check
+before it is cached. The cache holds the raw data: environment substitution
+happens after merging, so it never goes stale when variables change.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from pei_docker.pei_utils import load_yaml_dict_with_duplicate_key_check
+from pei_docker.user_config import UserConfig
+
+# Top-level key naming the fragments a config extends
+EXTENDS_KEY = 'extends'
+
+# Default fragment cache directory (under $XDG_CACHE_HOME, or ~/.cache)
+DEFAULT_FRAGMENT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'pei-docker', 'fragments',
+)
+
+
+def _cache_file(cache_dir: str, real_path: str) -> str:
+    return os.path.join(cache_dir, hashlib.sha256(real_path.encode('utf-8')).hexdigest()[:32] + '.json')
+
+
+def _read_cache(cache_file: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _write_cache(cache_file: str, entry: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        logging.debug(f'Could not write fragment cache {cache_file}: {e}')
+
+
+def load_fragment(path: str, cache_dir: Optional[str] = DEFAULT_FRAGMENT_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Load a config fragment, from the fragment cache when it is current.
+
+    Parameters
+    ----------
+    path : str
+        Path of the fragment file.
+    cache_dir : str or None
+        Fragment cache directory; ``None`` disables the cache.
+
+    Returns
+    -------
+    dict
+        The fragment's raw data, ``extends`` included.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the fragment does not exist.
+    ValueError
+        If the fragment has duplicate keys or is not a mapping.
+
+    Notes
+    -----
+    A cache entry is used as is when the file's mtime and size are unchanged,
+    and after re-hashing the file when only they changed (e.g. the file was
+    touched or checked out again). Data that does not survive a JSON round
+    trip, such as dates or non-string keys, is not cached.
+    """
+    if cache_dir is None:
+        return load_yaml_dict_with_duplicate_key_check(path)
+
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    cache_file = _cache_file(cache_dir, real_path)
+    entry = _read_cache(cache_file)
+    if entry is not None and entry.get('path') == real_path \
+            and entry.get('mtime_ns') == st.st_mtime_ns and entry.get('size') == st.st_size:
+        return entry['data']
+
+    with open(real_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    if entry is not None and entry.get('path') == real_path and entry.get('sha256') == digest:
+        data = entry['data']
+    else:
+        data = load_yaml_dict_with_duplicate_key_check(real_path)
+        try:
+            if json.loads(json.dumps(data)) != data:
+                return data
+        except (TypeError, ValueError):
+            return data
+    _write_cache(cache_file, {'path': real_path, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                              'sha256': digest, 'data': data})
+    return data
+
+
+def _extends_paths(config: Dict[str, Any], config_path: str) -> List[str]:
+    value = config.get(EXTENDS_KEY)
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{EXTENDS_KEY}' in {config_path} must be a path or a list of paths")
+    base_dir = os.path.dirname(os.path.abspath(config_path))
+    return [os.path.join(base_dir, os.path.expanduser(item)) for item in value]
+
+
+def resolve_extends(config: Dict[str, Any], config_path: str,
+                    cache_dir: Optional[str] = DEFAULT_FRAGMENT_CACHE_DIR,
+                    _chain: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    Merge the fragments a config ``extends`` into it.
+
+    Parameters
+    ----------
+    config : dict
+        Raw config data, as loaded from ``config_path``. Not modified.
+    config_path : str
+        Path of the config; relative fragment paths are resolved from its
+        directory.
+    cache_dir : str or None
+        Fragment cache directory; ``None`` disables the cache.
+
+    Returns
+    -------
+    dict
+        The config with its fragments merged in and no ``extends`` key.
+        Returned unchanged when it extends nothing.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a fragment does not exist.
+    ValueError
+        If fragments extend each other in a cycle, ``extends`` is malformed,
+        or a fragment has duplicate keys or is not a mapping.
+    """
+    fragment_paths = _extends_paths(config, config_path)
+    if not fragment_paths:
+        return config
+
+    chain = _chain + (os.path.realpath(config_path),)
+    merged: Dict[str, Any] = {}
+    for fragment_path in fragment_paths:
+        real_path = os.path.realpath(fragment_path)
+        if real_path in chain:
+            cycle = ' -> '.join(chain[chain.index(real_path):] + (real_path,))
+            raise ValueError(f'Config fragments extend each other in a cycle: {cycle}')
+        if not os.path.exists(real_path):
+            raise FileNotFoundError(f'Config fragment {fragment_path} (extended by {config_path}) does not exist')
+        fragment = resolve_extends(load_fragment(real_path, cache_dir), real_path, cache_dir, chain)
+        merged = UserConfig.merge_dicts(merged, fragment)
+
+    own = {k: v for k, v in config.items() if k != EXTENDS_KEY}
+    return UserConfig.merge_dicts(merged, own)
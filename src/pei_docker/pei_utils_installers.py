@@ -0,0 +1,249 @@
+"""
+Selective materialization of the built-in system installers.
+
+A project created from the template carries every installer under
+``installation/stage-*/system/<name>`` (pixi, conda, ros2, opencv, ...),
+although a given ``user_config.yml`` usually references only a few of them.
+The whole ``installation`` tree is part of the Docker build context, so the
+unused installers cost disk space in every project and bytes sent to the
+Docker daemon on every build.
+
+This module finds the installer directories a configuration actually needs
+and removes the rest (``--prune-unused``). Pruned directories are restored
+from the installed package on demand: ``configure`` copies back any
+referenced installer that is missing before processing the configuration.
+
+An installer directory is referenced when its path (``stage-N/system/<name>``
+or ``$PEI_STAGE_DIR_N/system/<name>``) appears in
+
+- any string value of the user configuration, typically ``custom.*`` script
+  entries (``apt.repo_source`` and similar paths are covered as well),
+- a user script under ``installation/stage-*/custom``, or
+- a file of another referenced installer directory (stage-2 wrappers forward
+  to their stage-1 counterparts, e.g. ``stage-2/system/pixi`` uses
+  ``$PEI_STAGE_DIR_1/system/pixi``).
+
+Only directories that also exist in the package template are ever pruned,
+so directories users add under ``system/`` are left alone, and files at the
+top level of ``system/`` (``set-locale.sh``, ``README.md``) are always kept.
+"""
+
+import logging
+import os
+import re
+import shutil
+from typing import Any, Iterator, Optional
+
+from pei_docker.pei_utils_prune import format_bytes
+
+# Matches `stage-1/system/pixi` and `$PEI_STAGE_DIR_1/system/pixi` / `${PEI_STAGE_DIR_1}/system/pixi`
+_SYSTEM_REF_PATTERN = re.compile(r'(?:stage-|STAGE_DIR_)([12])\}?/system/([A-Za-z0-9_.-]+)')
+
+# Stages whose system/ directory is managed
+_STAGES = ('stage-1', 'stage-2')
+
+
+def get_template_installation_dir() -> str:
+    """Return the ``installation`` directory of the package's project template."""
+    this_dir: str = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(this_dir, 'project_files', 'installation')
+
+
+def _iter_strings(data: Any) -> Iterator[str]:
+    """Yield every string (keys included) in a nested dict/list structure."""
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(key, str):
+                yield key
+            yield from _iter_strings(value)
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            yield from _iter_strings(item)
+
+
+def _iter_text_files(root: str) -> Iterator[str]:
+    """Yield the contents of the files below ``root``, skipping caches and binaries."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != '__pycache__']
+        for name in filenames:
+            try:
+                with open(os.path.join(dirpath, name), 'rb') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            if b'\0' in content:
+                continue
+            yield content.decode('utf-8', errors='ignore')
+
+
+def _find_refs(text: str) -> set[tuple[str, str]]:
+    return {(f'stage-{m.group(1)}', m.group(2)) for m in _SYSTEM_REF_PATTERN.finditer(text)}
+
+
+def list_system_dirs(installation_dir: str, stage: str) -> list[str]:
+    """
+    List the installer directories under ``<installation_dir>/<stage>/system``.
+
+    Parameters
+    ----------
+    installation_dir : str
+        Path to an ``installation`` directory (project or package template).
+    stage : str
+        ``'stage-1'`` or ``'stage-2'``.
+
+    Returns
+    -------
+    list[str]
+        Sorted directory names; empty if ``system`` does not exist.
+    """
+    system_dir = os.path.join(installation_dir, stage, 'system')
+    if not os.path.isdir(system_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(system_dir)
+        if name != '__pycache__' and os.path.isdir(os.path.join(system_dir, name))
+    )
+
+
+def find_referenced_system_dirs(project_dir: str, config: Any) -> set[tuple[str, str]]:
+    """
+    Find the installer directories a project configuration depends on.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory; its ``installation/stage-*/custom``
+        scripts are scanned for references too.
+    config : Any
+        User configuration as plain containers (e.g. the result of
+        ``OmegaConf.to_container``).
+
+    Returns
+    -------
+    set[tuple[str, str]]
+        ``(stage, name)`` pairs such as ``('stage-1', 'pixi')``, closed over
+        references between installer directories.
+    """
+    installation_dir = os.path.join(project_dir, 'installation')
+    template_dir = get_template_installation_dir()
+
+    refs: set[tuple[str, str]] = set()
+    for value in _iter_strings(config):
+        refs |= _find_refs(value)
+    for stage in _STAGES:
+        for text in _iter_text_files(os.path.join(installation_dir, stage, 'custom')):
+            refs |= _find_refs(text)
+
+    # close over installer -> installer references, reading the package copy
+    # when the project copy has been pruned
+    referenced: set[tuple[str, str]] = set()
+    pending = list(refs)
+    while pending:
+        stage, name = pending.pop()
+        if (stage, name) in referenced:
+            continue
+        src = os.path.join(installation_dir, stage, 'system', name)
+        if not os.path.isdir(src):
+            src = os.path.join(template_dir, stage, 'system', name)
+        if not os.path.isdir(src):
+            # a top-level file such as set-locale.sh, or a typo reported by configure
+            continue
+        referenced.add((stage, name))
+        for text in _iter_text_files(src):
+            pending.extend(_find_refs(text) - referenced)
+    return referenced
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def prune_unused_system_dirs(project_dir: str, config: Any,
+                             referenced: Optional[set[tuple[str, str]]] = None) -> tuple[list[str], int]:
+    """
+    Remove the built-in installer directories the configuration does not reference.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+    config : Any
+        User configuration as plain containers.
+    referenced : set[tuple[str, str]], optional
+        Precomputed result of :func:`find_referenced_system_dirs`.
+
+    Returns
+    -------
+    tuple[list[str], int]
+        Removed directories (relative to the project dir) and the number of
+        bytes they held.
+    """
+    if referenced is None:
+        referenced = find_referenced_system_dirs(project_dir, config)
+    installation_dir = os.path.join(project_dir, 'installation')
+    template_dir = get_template_installation_dir()
+
+    removed: list[str] = []
+    removed_bytes = 0
+    for stage in _STAGES:
+        # only prune what can be restored from the package
+        restorable = set(list_system_dirs(template_dir, stage))
+        for name in list_system_dirs(installation_dir, stage):
+            if name not in restorable or (stage, name) in referenced:
+                continue
+            path = os.path.join(installation_dir, stage, 'system', name)
+            removed_bytes += _dir_size(path)
+            shutil.rmtree(path)
+            removed.append(f'installation/{stage}/system/{name}')
+    if removed:
+        logging.info(f'Pruned {len(removed)} unused installer dir(s) ({format_bytes(removed_bytes)}); '
+                     f'configure restores them when referenced')
+    else:
+        logging.info('No unused installer dirs to prune')
+    return removed, removed_bytes
+
+
+def restore_referenced_system_dirs(project_dir: str, config: Any,
+                                   referenced: Optional[set[tuple[str, str]]] = None) -> list[str]:
+    """
+    Copy referenced installer directories that are missing back from the package.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+    config : Any
+        User configuration as plain containers.
+    referenced : set[tuple[str, str]], optional
+        Precomputed result of :func:`find_referenced_system_dirs`.
+
+    Returns
+    -------
+    list[str]
+        Restored directories, relative to the project dir.
+    """
+    if referenced is None:
+        referenced = find_referenced_system_dirs(project_dir, config)
+    installation_dir = os.path.join(project_dir, 'installation')
+    template_dir = get_template_installation_dir()
+
+    restored: list[str] = []
+    for stage, name in sorted(referenced):
+        dst = os.path.join(installation_dir, stage, 'system', name)
+        src = os.path.join(template_dir, stage, 'system', name)
+        if os.path.exists(dst) or not os.path.isdir(src):
+            continue
+        shutil.copytree(src, dst, ignore=shutil.ignore_patterns('__pycache__'))
+        restored.append(f'installation/{stage}/system/{name}')
+    if restored:
+        logging.info(f'Restored {len(restored)} referenced installer dir(s) from the package: {", ".join(restored)}')
+    return restored
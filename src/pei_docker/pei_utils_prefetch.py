@@ -0,0 +1,553 @@
+"""
+Download installer artifacts on the host ahead of ``docker build``
+(``pei-docker-cli prefetch``).
+
+Several system installers download a large file while the image is built:
+the Miniconda installer, the pixi/uv/bun install scripts or an NVM release.
+During a build these downloads run one after another, and a network error
+fails the whole layer. This module finds the artifacts the ``on_build``
+entries of a user config will need, downloads them concurrently into the
+project's ``prefetch/`` directory and records their SHA-256 checksums.
+
+The ``prefetch/`` directory is part of the build context but not of the
+image: the ``custom-on-build.sh`` step bind-mounts it at ``PEI_PREFETCH_DIR``
+and the installers look files up there through ``system/prefetched.sh``,
+falling back to the network when a file is missing or its checksum does not
+match. Files are named ``<key>-<basename>``, where ``key`` is the first 16 hex
+digits of the SHA-256 of the URL, so the shell side can find a file from the
+URL alone. A tracked ``README.md`` keeps the directory in the build context
+(and in git) while nothing has been prefetched.
+
+Several of these URLs name no version (``Miniconda3-latest``, the vendor
+install scripts, NVM's ``master``) and change over time. The manifest keeps
+each file's ``ETag`` and ``Last-Modified``; such files are revalidated with
+a conditional GET on every run, while files of versioned URLs are reused as
+long as their checksum matches.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from attrs import define, field
+
+from pei_docker.pei_utils import (
+    load_yaml_dict_with_duplicate_key_check,
+    substitute_config,
+)
+from pei_docker.pei_utils_export import ExcludeRules
+from pei_docker.pei_utils_extends import resolve_extends
+
+# Directory under the project (and the build context) holding the artifacts
+PREFETCH_DIR_NAME = 'prefetch'
+
+# Checksums of the prefetched files, in ``sha256sum`` format
+CHECKSUM_FILE = 'SHA256SUMS'
+
+# Which artifact came from which URL and on_build entry, with HTTP validators
+MANIFEST_FILE = 'manifest.json'
+
+# Placeholder that keeps the directory around while nothing is prefetched
+PLACEHOLDER_FILE = 'README.md'
+
+_PLACEHOLDER_TEXT = '''# prefetch
+
+Installer downloads fetched by `pei-docker-cli prefetch`. The `on_build` step
+bind-mounts this directory, so it must be part of the build context: keep this
+file, and do not exclude `prefetch/` in `.dockerignore`.
+'''
+
+# Parallel downloads
+DEFAULT_JOBS = 4
+
+# Attempts per artifact before giving up
+DEFAULT_RETRIES = 3
+
+# Seconds to wait for a server
+DOWNLOAD_TIMEOUT = 60
+
+IO_CHUNK_SIZE = 256 * 1024
+
+# Stages whose on_build entries are scanned
+_STAGES = ('stage_1', 'stage_2')
+
+# Architecture names used by the installer download URLs
+_ARCH_ALIASES = {'x86_64': 'x86_64', 'amd64': 'x86_64', 'aarch64': 'aarch64', 'arm64': 'aarch64'}
+
+# Installer script inside a stage's system directory, e.g. stage-1/system/uv/install-uv.sh
+_SYSTEM_SCRIPT_PATTERN = re.compile(r'(?:^|/)system/(?P<dir>[A-Za-z0-9_.-]+)/(?P<script>[A-Za-z0-9_.-]+)$')
+
+# HTTP errors worth retrying; other 4xx answers will not change
+_RETRY_STATUS = {408, 425, 429}
+
+# A URL path naming a version, and path parts naming a moving target
+_VERSION_PATTERN = re.compile(r'\d+\.\d+')
+_MOVING_PATTERN = re.compile(r'latest|/heads/|/(master|main)/', re.IGNORECASE)
+
+
+@define(kw_only=True)
+class Artifact:
+    """
+    A file an installer downloads during the build.
+
+    Attributes
+    ----------
+    url : str
+        Download URL, exactly as the installer builds it.
+    entry : str
+        The on_build entry that needs the file.
+    """
+    url: str = field()
+    entry: str = field()
+
+    @property
+    def filename(self) -> str:
+        """Name of the file in the prefetch directory."""
+        return artifact_filename(self.url)
+
+
+@define(kw_only=True)
+class PrefetchResult:
+    """
+    Outcome of prefetching one artifact.
+
+    Attributes
+    ----------
+    artifact : Artifact
+        The artifact.
+    status : str
+        ``'downloaded'``, ``'cached'`` (already present with a matching
+        checksum, and unchanged on the server for unversioned URLs) or
+        ``'failed'``.
+    sha256 : str, optional
+        Checksum of the file, unless the download failed.
+    size : int
+        File size in bytes.
+    etag : str, optional
+        The server's ``ETag`` for the file, if it sent one.
+    last_modified : str, optional
+        The server's ``Last-Modified`` for the file, if it sent one.
+    error : str, optional
+        Last error, for failed downloads.
+    """
+    artifact: Artifact = field()
+    status: str = field()
+    sha256: Optional[str] = field(default=None)
+    size: int = field(default=0)
+    etag: Optional[str] = field(default=None)
+    last_modified: Optional[str] = field(default=None)
+    error: Optional[str] = field(default=None)
+
+
+def artifact_filename(url: str) -> str:
+    """
+    Name a downloaded URL in the prefetch directory.
+
+    Parameters
+    ----------
+    url : str
+        Download URL.
+
+    Returns
+    -------
+    str
+        ``<key>-<basename>``; ``system/prefetched.sh`` derives the same key.
+    """
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    basename = os.path.basename(urllib.parse.urlsplit(url).path) or 'artifact'
+    return f"{key}-{re.sub(r'[^A-Za-z0-9._-]', '_', basename)}"
+
+
+def is_pinned_url(url: str) -> bool:
+    """
+    Tell whether a URL names one fixed version of a file.
+
+    Parameters
+    ----------
+    url : str
+        Download URL.
+
+    Returns
+    -------
+    bool
+        ``True`` if the path carries a version number and no moving name
+        such as ``latest`` or a branch head; a checked copy of such a file
+        never goes stale.
+    """
+    path = urllib.parse.urlsplit(url).path
+    return bool(_VERSION_PATTERN.search(path)) and not _MOVING_PATTERN.search(path)
+
+
+def ensure_prefetch_dir(project_dir: str) -> str:
+    """
+    Create the project's prefetch directory with its placeholder file.
+
+    The ``on_build`` step bind-mounts the directory, so the build fails
+    without it; a warning is logged if the project's ``.dockerignore``
+    leaves it out of the build context.
+
+    Parameters
+    ----------
+    project_dir : str
+        Path to the project directory.
+
+    Returns
+    -------
+    str
+        Path of the prefetch directory.
+    """
+    dest_dir = os.path.join(project_dir, PREFETCH_DIR_NAME)
+    os.makedirs(dest_dir, exist_ok=True)
+    placeholder = os.path.join(dest_dir, PLACEHOLDER_FILE)
+    if not os.path.exists(placeholder):
+        with open(placeholder, 'w', encoding='utf-8') as f:
+            f.write(_PLACEHOLDER_TEXT)
+
+    dockerignore = os.path.join(project_dir, '.dockerignore')
+    if os.path.isfile(dockerignore):
+        with open(dockerignore, encoding='utf-8') as f:
+            rules = ExcludeRules(f.read().splitlines())
+        if rules.is_excluded(f'{PREFETCH_DIR_NAME}/{PLACEHOLDER_FILE}'):
+            logging.warning(f'{dockerignore} excludes {PREFETCH_DIR_NAME}/, which the on_build step '
+                            f'bind-mounts; the build will fail until it is part of the build context')
+    return dest_dir
+
+
+def _option(args: List[str], name: str) -> Optional[str]:
+    """Value of ``--name VALUE`` or ``--name=VALUE`` in an argument list (last one wins)."""
+    value: Optional[str] = None
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            value = args[i + 1]
+        elif arg.startswith(name + '='):
+            value = arg[len(name) + 1:]
+    return value
+
+
+def _is_url(value: str) -> bool:
+    return value.startswith(('http://', 'https://'))
+
+
+def _miniconda_urls(args: List[str], arch: str) -> List[str]:
+    package = f'Miniconda3-latest-Linux-{arch}.sh'
+    source = _option(args, '--installer-url') or 'official'
+    if source == 'official':
+        return [f'https://repo.anaconda.com/miniconda/{package}']
+    if source == 'tuna':
+        return [f'https://mirrors.tuna.tsinghua.edu.cn/anaconda/miniconda/{package}']
+    return [source] if _is_url(source) else []
+
+
+def _install_script_urls(official: str) -> Callable[[List[str], str], List[str]]:
+    """Resolver for installers that pipe a vendor install script into a shell."""
+    def resolve(args: List[str], arch: str) -> List[str]:
+        source = _option(args, '--installer-url') or 'official'
+        if source in ('official', 'cn'):
+            return [official]
+        return [source] if _is_url(source) else []
+    return resolve
+
+
+def _nvm_tag(version: Optional[str]) -> Optional[str]:
+    if not version:
+        return None
+    return version if version.startswith('v') else f'v{version}'
+
+
+def _nvm_archive_urls(args: List[str], arch: str) -> List[str]:
+    tag = _nvm_tag(_option(args, '--version'))
+    ref = f'tags/{tag}' if tag else 'heads/master'
+    return [f'https://github.com/nvm-sh/nvm/archive/refs/{ref}.tar.gz']
+
+
+def _nvm_install_script_urls(args: List[str], arch: str) -> List[str]:
+    tag = _nvm_tag(_option(args, '--nvm-version')) or 'master'
+    return [f'https://raw.githubusercontent.com/nvm-sh/nvm/{tag}/install.sh']
+
+
+# (system directory, script) -> function(args, arch) returning the URLs it downloads.
+# The URLs must match what the script computes, since they name the files.
+_RESOLVERS: Dict[Tuple[str, str], Callable[[List[str], str], List[str]]] = {
+    ('conda', 'install-miniconda.sh'): _miniconda_urls,
+    ('pixi', 'install-pixi.bash'): _install_script_urls('https://pixi.sh/install.sh'),
+    ('uv', 'install-uv.sh'): _install_script_urls('https://astral.sh/uv/install.sh'),
+    ('bun', 'install-bun.sh'): _install_script_urls('https://bun.sh/install'),
+    ('nodejs', 'install-nvm.sh'): _nvm_archive_urls,
+    ('nodejs', 'install-nvm-nodejs.sh'): _nvm_install_script_urls,
+}
+
+
+def load_user_config(config_path: str) -> Dict[str, Any]:
+    """
+    Load a user config with its ``extends`` fragments and environment
+    substitution, as ``configure`` does.
+
+    Parameters
+    ----------
+    config_path : str
+        Path of ``user_config.yml``.
+
+    Returns
+    -------
+    dict
+        The configuration as plain containers.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist.
+    ValueError
+        If the file is not a mapping or a substitution is left unresolved.
+    """
+    if not os.path.exists(config_path):
+        raise FileNotFoundError(f'Config file {config_path} does not exist')
+    raw_config = resolve_extends(load_yaml_dict_with_duplicate_key_check(config_path), config_path)
+    substituted = substitute_config(raw_config)
+    substituted.check_leftover()
+    return substituted.config
+
+
+def normalize_arch(arch: str) -> str:
+    """
+    Map an architecture name to the one used in download URLs.
+
+    Raises
+    ------
+    ValueError
+        If the architecture is not supported.
+    """
+    try:
+        return _ARCH_ALIASES[arch]
+    except KeyError:
+        raise ValueError(f'Unsupported architecture {arch!r}, use one of {sorted(_ARCH_ALIASES)}') from None
+
+
+def find_artifacts(config: Dict[str, Any], arch: str = 'x86_64') -> List[Artifact]:
+    """
+    List the downloads the on_build entries of a user config will make.
+
+    Parameters
+    ----------
+    config : dict
+        User configuration as plain containers (see :func:`load_user_config`).
+    arch : str
+        Target architecture of the image, e.g. ``x86_64`` or ``arm64``.
+
+    Returns
+    -------
+    list[Artifact]
+        One artifact per URL, in on_build order. Entries of installers that
+        are not known to download anything are ignored.
+    """
+    arch = normalize_arch(arch)
+    artifacts: Dict[str, Artifact] = {}
+    for stage in _STAGES:
+        custom = (config.get(stage) or {}).get('custom') or {}
+        for entry in custom.get('on_build') or []:
+            try:
+                tokens = shlex.split(entry)
+            except ValueError:
+                logging.warning(f'Cannot parse on_build entry {entry!r}, skipping')
+                continue
+            if not tokens:
+                continue
+            m = _SYSTEM_SCRIPT_PATTERN.search(tokens[0])
+            resolver = _RESOLVERS.get((m.group('dir'), m.group('script'))) if m else None
+            if resolver is None:
+                continue
+            for url in resolver(tokens[1:], arch):
+                artifacts.setdefault(url, Artifact(url=url, entry=entry))
+    return list(artifacts.values())
+
+
+def read_checksums(dest_dir: str) -> Dict[str, str]:
+    """Return ``{filename: sha256}`` from the checksum file of a prefetch directory."""
+    checksums: Dict[str, str] = {}
+    try:
+        with open(os.path.join(dest_dir, CHECKSUM_FILE)) as f:
+            for line in f:
+                digest, _, name = line.rstrip('\n').partition('  ')
+                if digest and name:
+                    checksums[name] = digest
+    except FileNotFoundError:
+        pass
+    return checksums
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(IO_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_validators(dest_dir: str) -> Dict[str, Dict[str, str]]:
+    """Return ``{filename: {'etag': ..., 'last_modified': ...}}`` from the manifest."""
+    try:
+        with open(os.path.join(dest_dir, MANIFEST_FILE)) as f:
+            entries = json.load(f).get('artifacts') or []
+    except (OSError, ValueError, AttributeError):
+        return {}
+    validators: Dict[str, Dict[str, str]] = {}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get('file'):
+            validators[entry['file']] = {k: entry[k] for k in ('etag', 'last_modified') if entry.get(k)}
+    return validators
+
+
+def _download(url: str, path: str, headers: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
+    """
+    Download ``url`` to ``path`` atomically.
+
+    Returns its SHA-256 and the ``etag``/``last_modified`` the server sent.
+    A ``304`` answer to conditional ``headers`` raises ``HTTPError``.
+    """
+    request = urllib.request.Request(url, headers={'User-Agent': 'pei-docker-prefetch', **(headers or {})})
+    fd, part = tempfile.mkstemp(prefix='.', suffix='.part', dir=os.path.dirname(path))
+    try:
+        h = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as out, urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as resp:
+            expected = resp.headers.get('Content-Length')
+            validators = {key: value for key, value in (('etag', resp.headers.get('ETag')),
+                                                        ('last_modified', resp.headers.get('Last-Modified')))
+                          if value}
+            size = 0
+            for chunk in iter(lambda: resp.read(IO_CHUNK_SIZE), b''):
+                out.write(chunk)
+                h.update(chunk)
+                size += len(chunk)
+        if expected is not None and int(expected) != size:
+            raise OSError(f'truncated download: got {size} of {expected} bytes')
+        os.chmod(part, 0o644)
+        os.replace(part, path)
+    except BaseException:
+        os.unlink(part)
+        raise
+    return h.hexdigest(), validators
+
+
+def _prefetch_one(artifact: Artifact, dest_dir: str, known: Dict[str, str],
+                  validators: Dict[str, Dict[str, str]], retries: int, retry_delay: float,
+                  refresh: bool) -> PrefetchResult:
+    path = os.path.join(dest_dir, artifact.filename)
+    previous = validators.get(artifact.filename, {})
+    present = (os.path.isfile(path) and artifact.filename in known
+               and _file_sha256(path) == known[artifact.filename])
+
+    def cached() -> PrefetchResult:
+        return PrefetchResult(artifact=artifact, status='cached', sha256=known[artifact.filename],
+                              size=os.path.getsize(path), etag=previous.get('etag'),
+                              last_modified=previous.get('last_modified'))
+
+    conditional: Dict[str, str] = {}
+    if present and not refresh:
+        if is_pinned_url(artifact.url):
+            return cached()
+        # the server may have published a new file under the same URL
+        if previous.get('etag'):
+            conditional['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            conditional['If-Modified-Since'] = previous['last_modified']
+
+    error = ''
+    for attempt in range(retries):
+        if attempt:
+            time.sleep(retry_delay * 2 ** (attempt - 1))
+        try:
+            digest, received = _download(artifact.url, path, conditional)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and conditional:
+                return cached()
+            error = f'HTTP {e.code} {e.reason}'
+            if e.code < 500 and e.code not in _RETRY_STATUS:
+                break
+        except (OSError, ValueError) as e:
+            error = str(e)
+        else:
+            status = 'cached' if present and digest == known[artifact.filename] else 'downloaded'
+            return PrefetchResult(artifact=artifact, status=status, sha256=digest,
+                                  size=os.path.getsize(path), etag=received.get('etag'),
+                                  last_modified=received.get('last_modified'))
+        logging.warning(f'Download of {artifact.url} failed (attempt {attempt + 1}/{retries}): {error}')
+    if present:
+        logging.warning(f'Could not check {artifact.url} for updates, keeping the prefetched copy')
+        return cached()
+    return PrefetchResult(artifact=artifact, status='failed', error=error)
+
+
+def prefetch_artifacts(artifacts: List[Artifact], dest_dir: str, jobs: int = DEFAULT_JOBS,
+                       retries: int = DEFAULT_RETRIES, retry_delay: float = 1.0,
+                       refresh: bool = False) -> List[PrefetchResult]:
+    """
+    Download artifacts concurrently into a prefetch directory.
+
+    Files of versioned URLs already present with the recorded checksum are
+    not downloaded again; files of unversioned URLs are revalidated with a
+    conditional GET and downloaded again only if they changed. Afterwards
+    the directory holds exactly the given artifacts: files of artifacts the
+    config no longer needs are removed, and the checksum file and manifest
+    are rewritten.
+
+    Parameters
+    ----------
+    artifacts : list[Artifact]
+        Artifacts to fetch, e.g. from :func:`find_artifacts`.
+    dest_dir : str
+        Prefetch directory; created if missing.
+    jobs : int
+        Number of parallel downloads.
+    retries : int
+        Attempts per artifact.
+    retry_delay : float
+        Seconds before the first retry, doubled for each further one.
+    refresh : bool
+        Download every artifact again, even if it is up to date.
+
+    Returns
+    -------
+    list[PrefetchResult]
+        One result per artifact, in the given order. Failed artifacts are
+        left out of the checksum file, so the build downloads them itself.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    known = read_checksums(dest_dir)
+    validators = _read_validators(dest_dir)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(
+            lambda a: _prefetch_one(a, dest_dir, known, validators, retries, retry_delay, refresh), artifacts))
+
+    wanted = {a.filename for a in artifacts}
+    for name in os.listdir(dest_dir):
+        if name not in wanted and name not in (CHECKSUM_FILE, MANIFEST_FILE, PLACEHOLDER_FILE):
+            path = os.path.join(dest_dir, name)
+            if os.path.isfile(path):
+                logging.info(f'Removing {name}, no longer referenced')
+                os.unlink(path)
+
+    ok = [r for r in results if r.sha256 is not None]
+    with open(os.path.join(dest_dir, CHECKSUM_FILE), 'w') as f:
+        for r in ok:
+            f.write(f'{r.sha256}  {r.artifact.filename}\n')
+    manifest = {
+        'artifacts': [
+            {'url': r.artifact.url, 'file': r.artifact.filename, 'sha256': r.sha256,
+             'size': r.size, 'entry': r.artifact.entry, 'etag': r.etag, 'last_modified': r.last_modified}
+            for r in ok
+        ],
+    }
+    with open(os.path.join(dest_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write('\n')
+    return results
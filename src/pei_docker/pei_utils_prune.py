@@ -0,0 +1,304 @@
+"""
+Utility functions for reclaiming the Docker resources of one PeiDocker project.
+
+Every resource generated by ``pei-docker-cli configure`` carries the
+``io.peidocker.project`` label (images, containers, compose-managed volumes)
+or a project-scoped id (the BuildKit cache mount ``pei-<project id>-build``;
+the apt cache mount ``pei-apt`` is shared by all projects and kept). This
+module finds those resources, reports how much space they use, and removes
+them in dependency order, without touching anything that belongs to other
+projects.
+
+Discovery uses the Docker Engine API (one ``/system/df`` request gives sizes
+for everything) and falls back to the ``docker`` CLI when the socket is not
+available; in that case container/volume sizes are reported as unknown and
+build cache entries are not discovered.
+"""
+
+import logging
+import subprocess
+from typing import Any, Optional
+
+from attrs import define, field
+
+from pei_docker.config_processor import Defaults
+from pei_docker.docker_engine import DockerEngineClient, DockerEngineError, get_docker_engine_client
+
+# Resource kinds, in the order they must be removed
+KIND_CONTAINER = 'container'
+KIND_IMAGE = 'image'
+KIND_VOLUME = 'volume'
+KIND_BUILD_CACHE = 'build-cache'
+PRUNE_ORDER = [KIND_CONTAINER, KIND_IMAGE, KIND_VOLUME, KIND_BUILD_CACHE]
+
+
+@define(kw_only=True)
+class PruneItem:
+    """
+    A Docker resource owned by a project.
+
+    Attributes
+    ----------
+    kind : str
+        One of ``container``, ``image``, ``volume`` or ``build-cache``.
+    ref : str
+        Identifier used to remove it (container/image id, volume name, cache id).
+    name : str
+        Human readable name for reporting.
+    size : int or None
+        Bytes reclaimed by removing it, or None when unknown.
+    running : bool
+        For containers, whether the container is currently running.
+    created : int
+        Creation time (or any rank where newer is larger), used to remove
+        child images before their parents.
+    """
+    kind: str = field()
+    ref: str = field()
+    name: str = field(default='')
+    size: Optional[int] = field(default=None)
+    running: bool = field(default=False)
+    created: int = field(default=0)
+
+
+def format_bytes(size: Optional[int]) -> str:
+    """
+    Format a byte count the way the Docker CLI does (decimal units).
+
+    Examples
+    --------
+    >>> format_bytes(1536000)
+    '1.54MB'
+    >>> format_bytes(None)
+    'unknown'
+    """
+    if size is None:
+        return 'unknown'
+    value = float(size)
+    for unit in ('B', 'kB', 'MB', 'GB', 'TB'):
+        if value < 1000 or unit == 'TB':
+            return f'{int(value)}B' if unit == 'B' else f'{value:.3g}{unit}'
+        value /= 1000
+    return f'{size}B'
+
+
+def project_cache_id(project_id: str) -> str:
+    """Id of the BuildKit cache mount owned by a project (package-manager caches)."""
+    return f'pei-{project_id}-build'
+
+
+def _has_project_label(labels: Any, project_id: str) -> bool:
+    return isinstance(labels, dict) and labels.get(Defaults.ProjectLabel) == project_id
+
+
+def _find_with_engine(client: DockerEngineClient, project_id: str) -> list[PruneItem]:
+    usage = client.system_df()
+    items: list[PruneItem] = []
+
+    for c in usage.get('Containers') or []:
+        if _has_project_label(c.get('Labels'), project_id):
+            names = c.get('Names') or []
+            items.append(PruneItem(
+                kind=KIND_CONTAINER, ref=c['Id'],
+                name=names[0].lstrip('/') if names else c['Id'][:12],
+                size=c.get('SizeRw'), running=c.get('State') == 'running',
+                created=int(c.get('Created') or 0),
+            ))
+
+    for img in usage.get('Images') or []:
+        if _has_project_label(img.get('Labels'), project_id):
+            tags = [t for t in (img.get('RepoTags') or []) if t != '<none>:<none>']
+            size = img.get('Size')
+            shared = img.get('SharedSize')
+            if size is not None and shared is not None and shared > 0:
+                # layers shared with images of other projects stay on disk
+                size = max(0, size - shared)
+            items.append(PruneItem(
+                kind=KIND_IMAGE, ref=img['Id'],
+                name=', '.join(tags) if tags else f'<dangling> {img["Id"][7:19]}',
+                size=size, created=int(img.get('Created') or 0),
+            ))
+
+    for vol in usage.get('Volumes') or []:
+        if _has_project_label(vol.get('Labels'), project_id):
+            vol_size = (vol.get('UsageData') or {}).get('Size')
+            items.append(PruneItem(
+                kind=KIND_VOLUME, ref=vol['Name'], name=vol['Name'],
+                size=vol_size if vol_size is not None and vol_size >= 0 else None,
+            ))
+
+    marker = f'with id "{project_cache_id(project_id)}"'
+    for cache in usage.get('BuildCache') or []:
+        if marker in (cache.get('Description') or ''):
+            items.append(PruneItem(
+                kind=KIND_BUILD_CACHE, ref=cache['ID'],
+                name=cache.get('Description', cache['ID']), size=cache.get('Size'),
+            ))
+    return items
+
+
+def _cli_lines(cmd: list[str]) -> list[str]:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError:
+        return []
+    if result.returncode != 0:
+        logging.warning(f'{" ".join(cmd)} failed: {result.stderr.strip()}')
+        return []
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def _find_with_cli(project_id: str) -> list[PruneItem]:
+    label_filter = f'label={Defaults.ProjectLabel}={project_id}'
+    items: list[PruneItem] = []
+
+    for line in _cli_lines(['docker', 'ps', '-a', '--no-trunc', '--filter', label_filter,
+                            '--format', '{{.ID}}\t{{.Names}}\t{{.State}}']):
+        cid, _, rest = line.partition('\t')
+        name, _, state = rest.partition('\t')
+        items.append(PruneItem(kind=KIND_CONTAINER, ref=cid, name=name or cid[:12], running=state == 'running'))
+
+    # `docker images` lists newest first; rank by that order so children are removed before parents
+    image_ids = list(dict.fromkeys(_cli_lines(['docker', 'images', '-a', '-q', '--no-trunc', '--filter', label_filter])))
+    rank = {image_id: len(image_ids) - i for i, image_id in enumerate(image_ids)}
+    if image_ids:
+        for line in _cli_lines(['docker', 'image', 'inspect', '--format',
+                                '{{.Id}}\t{{.Size}}\t{{join .RepoTags ", "}}', *image_ids]):
+            image_id, _, rest = line.partition('\t')
+            size, _, tags = rest.partition('\t')
+            items.append(PruneItem(
+                kind=KIND_IMAGE, ref=image_id,
+                name=tags or f'<dangling> {image_id[7:19]}',
+                size=int(size) if size.isdigit() else None,
+                created=rank.get(image_id, 0),
+            ))
+
+    for name in _cli_lines(['docker', 'volume', 'ls', '-q', '--filter', label_filter]):
+        items.append(PruneItem(kind=KIND_VOLUME, ref=name, name=name))
+
+    logging.warning('Docker Engine API socket not available: BuildKit cache entries of the project '
+                    'cannot be discovered and are skipped')
+    return items
+
+
+def find_project_resources(project_id: str) -> list[PruneItem]:
+    """
+    List the Docker resources that belong to a project.
+
+    Parameters
+    ----------
+    project_id : str
+        Project id as written to the ``io.peidocker.project`` label.
+
+    Returns
+    -------
+    list[PruneItem]
+        Resources in removal order: containers, images (children before
+        parents), volumes, build cache.
+    """
+    client = get_docker_engine_client()
+    items: Optional[list[PruneItem]] = None
+    if client is not None:
+        try:
+            items = _find_with_engine(client, project_id)
+        except DockerEngineError as e:
+            logging.warning(f'Docker Engine API query failed, falling back to docker CLI: {e}')
+    if items is None:
+        items = _find_with_cli(project_id)
+
+    items.sort(key=lambda it: (PRUNE_ORDER.index(it.kind), -it.created))
+    return items
+
+
+def total_reclaimable(items: list[PruneItem]) -> tuple[int, int]:
+    """
+    Sum the known sizes of the given resources.
+
+    Returns
+    -------
+    tuple[int, int]
+        Total bytes over items with a known size, and the number of items
+        whose size is unknown.
+    """
+    known = sum(it.size for it in items if it.size is not None)
+    unknown = sum(1 for it in items if it.size is None)
+    return known, unknown
+
+
+def _remove_with_engine(client: DockerEngineClient, item: PruneItem) -> None:
+    if item.kind == KIND_CONTAINER:
+        if item.running:
+            client.stop_container(item.ref)
+        client.remove_container(item.ref)
+    elif item.kind == KIND_IMAGE:
+        client.remove_image(item.ref, force=True)
+    elif item.kind == KIND_VOLUME:
+        client.remove_volume(item.ref)
+
+
+def _remove_with_cli(item: PruneItem) -> None:
+    if item.kind == KIND_CONTAINER:
+        cmd = ['docker', 'rm', '-f', item.ref]
+    elif item.kind == KIND_IMAGE:
+        cmd = ['docker', 'rmi', '-f', item.ref]
+    elif item.kind == KIND_VOLUME:
+        cmd = ['docker', 'volume', 'rm', item.ref]
+    else:
+        raise DockerEngineError(0, f'cannot remove {item.kind} {item.ref} without the Docker Engine API')
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError as e:
+        raise DockerEngineError(0, str(e)) from e
+    if result.returncode != 0:
+        raise DockerEngineError(result.returncode, result.stderr.strip())
+
+
+def prune_project_resources(items: list[PruneItem]) -> tuple[int, dict[str, str]]:
+    """
+    Remove the given project resources in order.
+
+    Parameters
+    ----------
+    items : list[PruneItem]
+        Resources as returned by find_project_resources().
+
+    Returns
+    -------
+    tuple[int, dict[str, str]]
+        Bytes reclaimed (known sizes of removed items, or the daemon's count
+        for build cache), and failures keyed by ``<kind> <name>``.
+    """
+    client = get_docker_engine_client()
+    reclaimed = 0
+    failures: dict[str, str] = {}
+
+    cache_items = [it for it in items if it.kind == KIND_BUILD_CACHE]
+    for item in items:
+        if item.kind == KIND_BUILD_CACHE:
+            continue
+        try:
+            if client is not None:
+                _remove_with_engine(client, item)
+            else:
+                _remove_with_cli(item)
+        except DockerEngineError as e:
+            failures[f'{item.kind} {item.name}'] = str(e)
+            logging.warning(f'Failed to remove {item.kind} {item.name}: {e}')
+            continue
+        logging.info(f'Removed {item.kind} {item.name}')
+        reclaimed += item.size or 0
+
+    if cache_items:
+        if client is None:
+            for item in cache_items:
+                failures[f'{item.kind} {item.name}'] = 'Docker Engine API not available'
+        else:
+            try:
+                reclaimed += client.prune_build_cache([it.ref for it in cache_items])
+                logging.info(f'Removed {len(cache_items)} build cache record(s)')
+            except DockerEngineError as e:
+                for item in cache_items:
+                    failures[f'{item.kind} {item.name}'] = str(e)
+                logging.warning(f'Failed to prune build cache: {e}')
+
+    return reclaimed, failures
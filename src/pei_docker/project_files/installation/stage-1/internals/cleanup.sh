@@ -12,6 +12,9 @@ if [ "$APT_KEEP_PROXY" != "true" ]; then
     fi
 fi
 
+# the host apt cache proxy only exists during build
+rm -f /etc/apt/apt.conf.d/zz-pei-cache-proxy.conf
+
 # apt source file, it can be /etc/apt/sources.list or /etc/apt/sources.list.d/ubuntu.sources
 # see which file exists, check /etc/apt/sources.list.d/ubuntu.sources first
 CURRENT_APT_SOURCE=/etc/apt/sources.list
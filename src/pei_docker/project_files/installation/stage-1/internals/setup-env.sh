@@ -53,6 +53,30 @@ if [ "$APT_USE_PROXY" = "true" ]; then
   fi
 fi
 
+# if APT_CACHE_PROXY is set, fetch http repositories through the apt cache proxy on the host
+# (pei-docker-cli apt-cache serve); the file sorts after proxy.conf, so it wins for http
+if [ -n "$APT_CACHE_PROXY" ]; then
+  # http://[user:password@]host[:port][/], host may be a bracketed IPv6 address
+  __cache_hostport="${APT_CACHE_PROXY#*://}"
+  __cache_hostport="${__cache_hostport%%/*}"
+  __cache_hostport="${__cache_hostport##*@}"
+  case "$__cache_hostport" in
+    \[*\]:*) __cache_host="${__cache_hostport%:*}"; __cache_port="${__cache_hostport##*:}" ;;
+    \[*\])   __cache_host="$__cache_hostport"; __cache_port=80 ;;
+    *:*)     __cache_host="${__cache_hostport%:*}"; __cache_port="${__cache_hostport##*:}" ;;
+    *)       __cache_host="$__cache_hostport"; __cache_port=80 ;;
+  esac
+  __cache_host="${__cache_host#[}"
+  __cache_host="${__cache_host%]}"
+  if timeout 3 bash -c "echo > /dev/tcp/$__cache_host/$__cache_port" 2>/dev/null; then
+    echo "Using apt cache proxy $APT_CACHE_PROXY"
+    echo "Acquire::http::Proxy \"$APT_CACHE_PROXY\";" > /etc/apt/apt.conf.d/zz-pei-cache-proxy.conf
+  else
+    echo "apt cache proxy $APT_CACHE_PROXY is not reachable (is pei-docker-cli apt-cache serve running?)"
+    echo "Downloading apt packages without it"
+  fi
+fi
+
 # apt source file, it can be /etc/apt/sources.list or /etc/apt/sources.list.d/ubuntu.sources
 # see which file exists, check /etc/apt/sources.list.d/ubuntu.sources first
 CURRENT_APT_SOURCE=/etc/apt/sources.list
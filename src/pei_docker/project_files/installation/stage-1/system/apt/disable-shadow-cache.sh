@@ -4,5 +4,6 @@
 if [ -f /etc/apt/apt.conf.d/01-shadow-cache ]; then
     rm /etc/apt/apt.conf.d/01-shadow-cache
 fi
+rm -f /usr/local/sbin/pei-apt-shadow-sync
 echo "Shadow cache disabled"
 
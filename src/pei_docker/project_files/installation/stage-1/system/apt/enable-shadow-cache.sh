@@ -1,35 +1,53 @@
 #!/bin/bash
 
-# Usage: ./enable-shadow-cache.sh [custom_cache_directory]
+# Usage: ./enable-shadow-cache.sh [--link] [custom_cache_directory]
 #
-# This script enables a shadow cache for APT, which copies downloaded package 
+# This script enables a shadow cache for APT, which copies downloaded package
 # archives to a specified directory after each APT operation.
 #
+# The copy is done by sync-shadow-cache.sh, installed as
+# /usr/local/sbin/pei-apt-shadow-sync. It keeps a manifest of the archives
+# already in the shadow cache and only copies the new ones, printing how many
+# bytes it moved.
+#
 # If run without arguments, it will use the PEI_APT_SHADOW_CACHE_DIR environment 
 # variable if set, or default to /apt-shadow-cache.
 #
 # Options:
+#   --link                    Hardlink archives instead of copying them when the
+#                             shadow cache is on the same filesystem as the apt cache.
 #   custom_cache_directory    Specify a custom directory for the shadow cache.
 #
 # Examples:
 #   ./enable-shadow-cache.sh
 #   ./enable-shadow-cache.sh /my/custom/cache/dir
+#   ./enable-shadow-cache.sh --link /my/custom/cache/dir
+#
+# Use export-shadow-cache.sh to pack the shadow cache into a tarball.
 #
 # Note: This script must be run with root privileges.
 
 # if --help is used, print usage and exit
 if [ "$1" == "--help" ]; then
-    echo "Usage: ./enable-shadow-cache.sh [custom_cache_directory]"
+    echo "Usage: ./enable-shadow-cache.sh [--link] [custom_cache_directory]"
     echo "This script enables a shadow cache for APT, which copies downloaded package archives to a specified directory after each APT operation."
     echo "If run without arguments, it will use the PEI_APT_SHADOW_CACHE_DIR environment variable if set, or default to /apt-shadow-cache."
     echo "Options:"
+    echo "  --link                    Hardlink archives instead of copying them when on the same filesystem."
     echo "  custom_cache_directory    Specify a custom directory for the shadow cache."
     echo "Examples:"
     echo "  ./enable-shadow-cache.sh"
     echo "  ./enable-shadow-cache.sh /my/custom/cache/dir"
+    echo "  ./enable-shadow-cache.sh --link /my/custom/cache/dir"
     exit 0
 fi
 
+SYNC_OPTIONS=""
+if [ "$1" == "--link" ]; then
+    SYNC_OPTIONS="--link "
+    shift
+fi
+
 # require root permission
 if [ "$(id -u)" -ne 0 ]; then
     echo "This script must be run as root" 
@@ -63,10 +81,16 @@ if [ -z "$ARCHIVE_DIR" ]; then
     ARCHIVE_DIR='/var/cache/apt/archives'
 fi
 
-# add a dpkg post-invoke to copy archives to the directory
+# install the sync script outside the installation directory, so the hook
+# keeps working if that directory is removed
+SYNC_SCRIPT=/usr/local/sbin/pei-apt-shadow-sync
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+install -m 755 "$SCRIPT_DIR/sync-shadow-cache.sh" "$SYNC_SCRIPT"
+
+# add a dpkg post-invoke to copy new archives to the directory
 cat << EOF > /etc/apt/apt.conf.d/01-shadow-cache
 DPkg::Post-Invoke {
-    "cp -u $ARCHIVE_DIR/*.deb $PEI_APT_SHADOW_CACHE_DIR && chmod 777 $PEI_APT_SHADOW_CACHE_DIR/*.deb || true";
+    "$SYNC_SCRIPT $SYNC_OPTIONS'$ARCHIVE_DIR' '$PEI_APT_SHADOW_CACHE_DIR' || true";
 };
 EOF
 
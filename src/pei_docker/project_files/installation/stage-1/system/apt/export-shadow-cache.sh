@@ -0,0 +1,101 @@
+#!/bin/bash
+
+# Usage: ./export-shadow-cache.sh [-o output_file] [shadow_cache_directory]
+#
+# This script packs the APT shadow cache (see enable-shadow-cache.sh) into a
+# compressed tarball, to seed the shadow cache or the apt cache of another
+# host or project.
+#
+# If no directory is given, it will use the PEI_APT_SHADOW_CACHE_DIR
+# environment variable if set, or default to /apt-shadow-cache.
+#
+# Options:
+#   -o, --output FILE    Tarball to write. The compression follows the
+#                        extension: .tar.zst, .tar.xz or .tar.gz.
+#                        Default: ./apt-shadow-cache-<date>.tar.zst, or
+#                        .tar.gz when zstd is not installed.
+#
+# Examples:
+#   ./export-shadow-cache.sh
+#   ./export-shadow-cache.sh -o /soft/data/apt-cache.tar.zst /my/custom/cache/dir
+#
+# To seed another cache, extract the tarball into it, e.g.:
+#   tar -C /apt-shadow-cache -xf apt-shadow-cache-20250101.tar.zst
+
+usage() {
+    echo "Usage: ./export-shadow-cache.sh [-o output_file] [shadow_cache_directory]"
+    echo "Packs the APT shadow cache into a compressed tarball (.tar.zst, .tar.xz or .tar.gz)."
+    echo "If no directory is given, PEI_APT_SHADOW_CACHE_DIR or /apt-shadow-cache is used."
+}
+
+OUTPUT=""
+CACHE_DIR=""
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -o|--output)
+            OUTPUT="$2"
+            shift 2
+            ;;
+        --help|-h)
+            usage
+            exit 0
+            ;;
+        *)
+            CACHE_DIR="$1"
+            shift
+            ;;
+    esac
+done
+
+if [ -z "$CACHE_DIR" ]; then
+    CACHE_DIR="${PEI_APT_SHADOW_CACHE_DIR:-/apt-shadow-cache}"
+fi
+if [ ! -d "$CACHE_DIR" ]; then
+    echo "Error: shadow cache directory $CACHE_DIR does not exist" >&2
+    exit 1
+fi
+
+if [ -z "$OUTPUT" ]; then
+    if command -v zstd >/dev/null 2>&1; then
+        OUTPUT="apt-shadow-cache-$(date +%Y%m%d).tar.zst"
+    else
+        OUTPUT="apt-shadow-cache-$(date +%Y%m%d).tar.gz"
+    fi
+fi
+
+case "$OUTPUT" in
+    *.tar.zst|*.tzst) COMPRESS=(zstd -q -T0) ;;
+    *.tar.xz|*.txz) COMPRESS=(xz -T0) ;;
+    *.tar.gz|*.tgz) COMPRESS=(gzip) ;;
+    *)
+        echo "Error: unsupported output extension in $OUTPUT (use .tar.zst, .tar.xz or .tar.gz)" >&2
+        exit 2
+        ;;
+esac
+if ! command -v "${COMPRESS[0]}" >/dev/null 2>&1; then
+    echo "Error: ${COMPRESS[0]} is required to write $OUTPUT" >&2
+    exit 1
+fi
+
+# the archives and the manifest, but no partial copies
+mapfile -t FILES < <(cd "$CACHE_DIR" && find . -maxdepth 1 -type f \( -name '*.deb' -o -name '.manifest' \) -printf '%P\n' | sort)
+if [ ${#FILES[@]} -eq 0 ]; then
+    echo "Error: no archives in $CACHE_DIR" >&2
+    exit 1
+fi
+
+set -o pipefail
+if ! printf '%s\n' "${FILES[@]}" | tar -C "$CACHE_DIR" -cf - -T - | "${COMPRESS[@]}" > "$OUTPUT.part"; then
+    rm -f "$OUTPUT.part"
+    echo "Error: failed to write $OUTPUT" >&2
+    exit 1
+fi
+mv "$OUTPUT.part" "$OUTPUT"
+
+TOTAL_BYTES=$(cd "$CACHE_DIR" && du -cb "${FILES[@]}" | tail -n1 | cut -f1)
+OUTPUT_BYTES=$(stat -c %s "$OUTPUT")
+if command -v numfmt >/dev/null 2>&1; then
+    TOTAL_BYTES=$(numfmt --to=iec-i --suffix=B "$TOTAL_BYTES")
+    OUTPUT_BYTES=$(numfmt --to=iec-i --suffix=B "$OUTPUT_BYTES")
+fi
+echo "Exported ${#FILES[@]} files ($TOTAL_BYTES) from $CACHE_DIR to $OUTPUT ($OUTPUT_BYTES)"
@@ -0,0 +1,113 @@
+#!/bin/bash
+
+# Usage: ./sync-shadow-cache.sh [--link] <archive_directory> <shadow_cache_directory>
+#
+# This script copies the package archives downloaded by APT into the shadow
+# cache. enable-shadow-cache.sh installs it as a dpkg post-invoke hook, so it
+# runs after every APT operation.
+#
+# The shadow cache keeps a manifest (.manifest, one "<file> <size>" line per
+# archive) of the archives already synced, so each run only copies the
+# archives that are new since the previous run, instead of the whole archive
+# directory again. An archive listed in the manifest is copied again when its
+# copy in the shadow cache is missing or has a different size, and the
+# manifest is rewritten to match the shadow cache.
+#
+# Options:
+#   --link    Hardlink the archives instead of copying them when both
+#             directories are on the same filesystem (copies otherwise).
+#
+# Examples:
+#   ./sync-shadow-cache.sh /var/cache/apt/archives /apt-shadow-cache
+#   ./sync-shadow-cache.sh --link /var/cache/apt/archives /apt-shadow-cache
+
+usage() {
+    echo "Usage: ./sync-shadow-cache.sh [--link] <archive_directory> <shadow_cache_directory>"
+}
+
+USE_LINK=false
+if [ "$1" == "--help" ]; then
+    usage
+    exit 0
+fi
+if [ "$1" == "--link" ]; then
+    USE_LINK=true
+    shift
+fi
+
+ARCHIVE_DIR="$1"
+SHADOW_DIR="$2"
+if [ -z "$ARCHIVE_DIR" ] || [ -z "$SHADOW_DIR" ]; then
+    usage >&2
+    exit 2
+fi
+
+MANIFEST="$SHADOW_DIR/.manifest"
+mkdir -p "$SHADOW_DIR"
+
+format_bytes() {
+    if command -v numfmt >/dev/null 2>&1; then
+        numfmt --to=iec-i --suffix=B "$1"
+    else
+        echo "$1 bytes"
+    fi
+}
+
+# archives synced by earlier runs, with their recorded sizes
+declare -A synced=()
+if [ -f "$MANIFEST" ]; then
+    while read -r name size; do
+        [ -n "$name" ] && synced["$name"]="$size"
+    done < "$MANIFEST"
+fi
+manifest_changed=false
+
+copied=0
+copied_bytes=0
+linked=0
+linked_bytes=0
+shopt -s nullglob
+for deb in "$ARCHIVE_DIR"/*.deb; do
+    name="${deb##*/}"
+    dest="$SHADOW_DIR/$name"
+    if [ -n "${synced[$name]:-}" ] && [ "$(stat -c %s "$dest" 2>/dev/null)" = "${synced[$name]}" ]; then
+        continue
+    fi
+    size=$(stat -c %s "$deb") || continue
+
+    if [ "$(stat -c %s "$dest" 2>/dev/null)" = "$size" ]; then
+        # already there, e.g. seeded from an exported tarball
+        :
+    elif [ "$USE_LINK" = true ] && ln -f "$deb" "$dest" 2>/dev/null; then
+        linked=$((linked + 1))
+        linked_bytes=$((linked_bytes + size))
+    elif cp "$deb" "$dest.part" && mv "$dest.part" "$dest"; then
+        chmod 666 "$dest"
+        copied=$((copied + 1))
+        copied_bytes=$((copied_bytes + size))
+    else
+        rm -f "$dest.part"
+        echo "[shadow-cache] failed to copy $name" >&2
+        continue
+    fi
+    synced["$name"]="$size"
+    manifest_changed=true
+done
+
+# rewrite the manifest, leaving out archives no longer in the shadow cache
+if [ "$manifest_changed" = true ]; then
+    for name in "${!synced[@]}"; do
+        [ -e "$SHADOW_DIR/$name" ] || unset 'synced[$name]'
+    done
+    for name in "${!synced[@]}"; do
+        echo "$name ${synced[$name]}"
+    done | sort > "$MANIFEST.tmp" && mv "$MANIFEST.tmp" "$MANIFEST"
+fi
+
+if [ $((copied + linked)) -gt 0 ]; then
+    summary="[shadow-cache] synced $((copied + linked)) new archive(s) to $SHADOW_DIR: $(format_bytes "$copied_bytes") copied"
+    if [ "$USE_LINK" = true ]; then
+        summary="$summary, $(format_bytes "$linked_bytes") hardlinked"
+    fi
+    echo "$summary, ${#synced[@]} archives in cache"
+fi
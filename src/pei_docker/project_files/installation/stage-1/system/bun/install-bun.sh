@@ -129,8 +129,14 @@ echo "[bun] Installing Bun for user: ${TARGET_USER} (invoked by ${CURRENT_USER})
 echo "[bun] Install Dir: ${INSTALL_DIR}"
 echo "[bun] Installer URL: ${INSTALLER_URL}"
 
-# Install Bun
-INSTALL_CMD="curl -fsSL ${INSTALLER_URL} | bash"
+# Install Bun (from the prefetched install script when available)
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/../prefetched.sh"
+FETCH_CMD="curl -fsSL ${INSTALLER_URL}"
+if PREFETCHED_SCRIPT="$(pei_prefetched "$INSTALLER_URL")"; then
+  FETCH_CMD="cat '${PREFETCHED_SCRIPT}'"
+fi
+INSTALL_CMD="${FETCH_CMD} | bash"
 
 # If custom dir, set BUN_INSTALL env var
 if [[ -n "${INSTALL_DIR}" ]]; then
@@ -118,10 +118,15 @@ case "$INSTALLER_URL" in
     ;;
 esac
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/../prefetched.sh"
+
 mkdir -p "$TMP_DIR"
 CONDA_INSTALLER_PATH="$TMP_DIR/$CONDA_PACKAGE_NAME"
 
-if [[ ! -f "$CONDA_INSTALLER_PATH" ]]; then
+if PREFETCHED_INSTALLER="$(pei_prefetched "$CONDA_DOWNLOAD_URL")"; then
+  CONDA_INSTALLER_PATH="$PREFETCHED_INSTALLER"
+elif [[ ! -f "$CONDA_INSTALLER_PATH" ]]; then
   echo "Downloading Miniconda installer to $CONDA_INSTALLER_PATH ..."
   logv "URL: $CONDA_DOWNLOAD_URL"
   if command -v curl >/dev/null 2>&1; then
@@ -144,7 +149,6 @@ else
   chmod -R 777 "$INSTALL_DIR" || true
 fi
 
-SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 CONDARC_TEMPLATE="$SCRIPT_DIR/conda-tsinghua.txt"
 
 CURRENT_USER="$(whoami)"
@@ -1,26 +1,404 @@
+import bisect
+import collections
+import hashlib
 import http.client
 import http.server
+import json
 import os
+import queue
+import select
 import sys
+import threading
+import time
 import urllib.parse
+from typing import Iterator, Optional, Union
 
 LITELLM_URL = os.environ.get("LITELLM_URL", "http://127.0.0.1:8000")
 PORT = int(os.environ.get("PORT", "11899"))
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", "120"))
+# Idle keep-alive connections kept open to LiteLLM
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", "16"))
+# Request bodies up to this size are buffered (and can be resent on a stale
+# pooled connection), larger ones are streamed to LiteLLM as they arrive
+STREAM_BODY_THRESHOLD = int(os.environ.get("STREAM_BODY_THRESHOLD", str(64 * 1024)))
+IO_CHUNK_SIZE = 64 * 1024
+# Prometheus metrics are served here (empty disables the endpoint)
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+# "json": one JSON access log line per request on stderr, "off": errors only
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "json")
+# GET paths whose responses are cached (comma separated, empty disables the cache)
+CACHE_PATHS = frozenset(
+    p.strip() for p in os.environ.get("CACHE_PATHS", "/v1/models,/models,/v1/model/info,/model/info").split(",") if p.strip()
+)
+# Default lifetime of a cached response, unless Cache-Control max-age says otherwise
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "10"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "256"))
+# Larger responses are passed through but not stored
+CACHE_MAX_BODY = int(os.environ.get("CACHE_MAX_BODY", str(1024 * 1024)))
 
 UPSTREAM = urllib.parse.urlparse(LITELLM_URL)
 UPSTREAM_SCHEME = UPSTREAM.scheme or "http"
 UPSTREAM_HOST = UPSTREAM.hostname or "127.0.0.1"
 UPSTREAM_PORT = UPSTREAM.port or (443 if UPSTREAM_SCHEME == "https" else 80)
 
+# Errors meaning a pooled connection was closed by the upstream while idle
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Distinct request paths tracked as labels; further paths are counted as "other"
+MAX_PATH_LABELS = 64
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets (not thread-safe, see Metrics)."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, name: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Request counters, gauges and latency histograms of the proxy.
+
+    Each request takes the lock twice (start and finish) and does a few
+    integer updates, so the hot path stays cheap; rendering happens only
+    when ``/metrics`` is scraped.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.paths: set[str] = set()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.upstream_connections = {"new": 0, "reused": 0}
+        self.cache = {"hit": 0, "miss": 0, "coalesced": 0, "bypass": 0}
+        self.duration = Histogram()
+        self.upstream_connect = Histogram()
+        self.upstream_ttfb = Histogram()
+
+    def path_label(self, path: str) -> str:
+        path = path.split("?", 1)[0]
+        if path in self.paths:
+            return path
+        with self._lock:
+            if len(self.paths) < MAX_PATH_LABELS:
+                self.paths.add(path)
+                return path
+        return "other"
+
+    def start(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finish(self, method: str, path: str, status: int, duration: float, bytes_in: int, bytes_out: int,
+               connect: Optional[float], ttfb: Optional[float], reused: Optional[bool],
+               cache: Optional[str] = None) -> None:
+        key = (method, path, str(status))
+        with self._lock:
+            self.in_flight -= 1
+            if cache is not None:
+                self.cache[cache] += 1
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.duration.observe(duration)
+            if reused is not None:
+                self.upstream_connections["reused" if reused else "new"] += 1
+            if connect is not None:
+                self.upstream_connect.observe(connect)
+            if ttfb is not None:
+                self.upstream_ttfb.observe(ttfb)
+
+    def cache_hit_ratio(self) -> float:
+        """Share of cached-path requests answered without their own upstream call."""
+        with self._lock:
+            served = self.cache["hit"] + self.cache["coalesced"]
+            total = served + self.cache["miss"] + self.cache["bypass"]
+        return served / total if total else 0.0
+
+    def render(self) -> str:
+        def label(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        with self._lock:
+            lines = [
+                "# HELP litellm_shim_requests_total Requests handled, by method, path and status.",
+                "# TYPE litellm_shim_requests_total counter",
+            ]
+            for (method, path, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'litellm_shim_requests_total{{method="{label(method)}",path="{label(path)}",status="{status}"}} {count}'
+                )
+            lines += [
+                "# HELP litellm_shim_requests_in_flight Requests being handled.",
+                "# TYPE litellm_shim_requests_in_flight gauge",
+                f"litellm_shim_requests_in_flight {self.in_flight}",
+                "# HELP litellm_shim_request_bytes_total Request body bytes received from clients.",
+                "# TYPE litellm_shim_request_bytes_total counter",
+                f"litellm_shim_request_bytes_total {self.bytes_in}",
+                "# HELP litellm_shim_response_bytes_total Response body bytes sent to clients.",
+                "# TYPE litellm_shim_response_bytes_total counter",
+                f"litellm_shim_response_bytes_total {self.bytes_out}",
+                "# HELP litellm_shim_upstream_requests_total Upstream requests, by whether a pooled connection was reused.",
+                "# TYPE litellm_shim_upstream_requests_total counter",
+            ]
+            for kind, count in self.upstream_connections.items():
+                lines.append(f'litellm_shim_upstream_requests_total{{connection="{kind}"}} {count}')
+            lines += [
+                "# HELP litellm_shim_cache_requests_total Requests to cached paths, by cache result.",
+                "# TYPE litellm_shim_cache_requests_total counter",
+            ]
+            for result, count in self.cache.items():
+                lines.append(f'litellm_shim_cache_requests_total{{result="{result}"}} {count}')
+            for name, help_text, hist in (
+                ("litellm_shim_request_duration_seconds", "Total time to handle a request.", self.duration),
+                ("litellm_shim_upstream_connect_seconds", "Time to open a new upstream connection.", self.upstream_connect),
+                ("litellm_shim_upstream_ttfb_seconds", "Time from sending the upstream request to its response headers.", self.upstream_ttfb),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                lines += hist.render(name)
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class UpstreamPool:
+    """Bounded pool of idle keep-alive connections to the upstream.
+
+    Connections are handed out last-in first-out, so the warmest one is
+    reused; when no idle connection is left a new one is opened. Only
+    connections whose response was read to the end and that the upstream
+    did not ask to close go back to the pool, at most ``size`` of them.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=size)
+
+    def connect(self) -> tuple[http.client.HTTPConnection, float]:
+        """Open a new connection; return it with the time the connect took."""
+        if UPSTREAM_SCHEME == "https":
+            conn: http.client.HTTPConnection = http.client.HTTPSConnection(
+                UPSTREAM_HOST, UPSTREAM_PORT, timeout=UPSTREAM_TIMEOUT
+            )
+        else:
+            conn = http.client.HTTPConnection(UPSTREAM_HOST, UPSTREAM_PORT, timeout=UPSTREAM_TIMEOUT)
+        start = time.perf_counter()
+        conn.connect()
+        return conn, time.perf_counter() - start
+
+    @staticmethod
+    def _is_alive(conn: http.client.HTTPConnection) -> bool:
+        # an idle keep-alive socket only becomes readable when the peer closed it
+        if conn.sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def acquire(self) -> tuple[http.client.HTTPConnection, Optional[float]]:
+        """Return ``(connection, connect_seconds)``; the time is None for a reused connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+            if self._is_alive(conn):
+                return conn, None
+            conn.close()
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            try:
+                self._idle.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+POOL = UpstreamPool(UPSTREAM_POOL_SIZE)
+
+
+def _cache_control(value: Optional[str]) -> dict[str, Optional[str]]:
+    directives: dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+class CachedResponse:
+    def __init__(self, status: int, reason: str, headers: list[tuple[str, str]], body: bytes, ttl: float) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    @staticmethod
+    def ttl_for(status: int, cache_control: Optional[str], size: int) -> Optional[float]:
+        """How long a response may be cached, or None if it must not be."""
+        if status != 200 or size > CACHE_MAX_BODY:
+            return None
+        directives = _cache_control(cache_control)
+        if "no-store" in directives or "no-cache" in directives:
+            return None
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name) is not None:
+                try:
+                    ttl = float(directives[name] or 0)
+                except ValueError:
+                    return None
+                return ttl if ttl > 0 else None
+        return CACHE_TTL if CACHE_TTL > 0 else None
+
+
+class _Flight:
+    """One upstream fetch that concurrent identical requests wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: Optional[CachedResponse] = None
+
+
+class ResponseCache:
+    """TTL + LRU cache of GET responses with single-flight upstream fetches.
+
+    Entries are keyed by path (with query) and the caller's credentials, so
+    clients with different API keys never see each other's responses. While
+    one request fetches a key from the upstream, identical requests wait for
+    its response instead of making their own call.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max = max_entries
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[str, CachedResponse]" = collections.OrderedDict()
+        self._flights: dict[str, _Flight] = {}
+
+    @staticmethod
+    def key(path: str, headers: "http.client.HTTPMessage") -> str:
+        varying = "\0".join(headers.get(h, "") for h in ("Authorization", "x-api-key", "api-key", "Accept-Encoding"))
+        return path + "\0" + hashlib.sha256(varying.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.age() >= entry.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+    def join(self, key: str) -> tuple[_Flight, bool]:
+        """Return the in-progress fetch of ``key`` and whether the caller leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def land(self, key: str, flight: _Flight, response: Optional[CachedResponse]) -> None:
+        """Publish the leader's result (None if not shareable) and release the waiters."""
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.response = response
+        flight.done.set()
+
+
+CACHE = ResponseCache(CACHE_MAX_ENTRIES)
+
 
 class RequestHandler(http.server.BaseHTTPRequestHandler):
     protocol_version = "HTTP/1.1"
+    # small writes (single SSE events) go out immediately
+    disable_nagle_algorithm = True
 
     def _read_body(self) -> bytes:
-        content_length = int(self.headers.get("Content-Length", "0") or "0")
-        if content_length <= 0:
-            return b""
-        return self.rfile.read(content_length)
+        return b"".join(self._iter_body())
+
+    def _iter_body(self) -> Iterator[bytes]:
+        """Yield the request body as it arrives (Content-Length or chunked)."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    # skip trailers
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                while size > 0:
+                    data = self.rfile.read(min(size, IO_CHUNK_SIZE))
+                    if not data:
+                        raise ConnectionError("client closed the connection mid-body")
+                    size -= len(data)
+                    self._bytes_in += len(data)
+                    yield data
+                self.rfile.readline()
+            return
+        remaining = int(self.headers.get("Content-Length", "0") or "0")
+        while remaining > 0:
+            data = self.rfile.read(min(remaining, IO_CHUNK_SIZE))
+            if not data:
+                raise ConnectionError("client closed the connection mid-body")
+            remaining -= len(data)
+            self._bytes_in += len(data)
+            yield data
+
+    def _request_body(self) -> tuple[Union[bytes, Iterator[bytes], None], bool]:
+        """Return ``(body, replayable)``: small bodies are buffered, large or chunked ones streamed."""
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            content_length = int(self.headers.get("Content-Length", "0") or "0")
+            if content_length <= 0:
+                return None, True
+            if content_length <= STREAM_BODY_THRESHOLD:
+                return self._read_body(), True
+        return self._iter_body(), False
 
     @staticmethod
     def _filter_hop_by_hop_headers(headers: list[tuple[str, str]]) -> list[tuple[str, str]]:
@@ -41,66 +419,312 @@ class RequestHandler(http.server.BaseHTTPRequestHandler):
         hop_by_hop = {"host", "connection", "proxy-connection", "keep-alive", "transfer-encoding"}
         return {k: v for k, v in self.headers.items() if k.lower() not in hop_by_hop}
 
-    def _make_conn(self) -> http.client.HTTPConnection:
-        timeout_s = float(os.environ.get("UPSTREAM_TIMEOUT", "120"))
-        if UPSTREAM_SCHEME == "https":
-            return http.client.HTTPSConnection(UPSTREAM_HOST, UPSTREAM_PORT, timeout=timeout_s)
-        return http.client.HTTPConnection(UPSTREAM_HOST, UPSTREAM_PORT, timeout=timeout_s)
+    def _send_upstream(
+        self, body: Union[bytes, Iterator[bytes], None], replayable: bool, headers: dict[str, str]
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        # a chunked request body goes out chunked again (no Content-Length is forwarded for it)
+        conn, self._connect_s = POOL.acquire()
+        self._reused = self._connect_s is None
+        try:
+            return conn, self._request_upstream(conn, body, headers)
+        except STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not (self._reused and replayable):
+                raise
+        # the pooled connection had been closed by the upstream: retry once on a fresh one
+        conn, self._connect_s = POOL.connect()
+        self._reused = False
+        try:
+            return conn, self._request_upstream(conn, body, headers)
+        except BaseException:
+            conn.close()
+            raise
+
+    def _request_upstream(
+        self, conn: http.client.HTTPConnection, body: Union[bytes, Iterator[bytes], None], headers: dict[str, str]
+    ) -> http.client.HTTPResponse:
+        start = time.perf_counter()
+        conn.request(self.command, self.path, body=body, headers=headers)
+        resp = conn.getresponse()
+        self._ttfb_s = time.perf_counter() - start
+        return resp
+
+    def _fetch_buffered(self, headers: dict[str, str]) -> tuple[CachedResponse, Optional[float]]:
+        """Fetch the whole upstream response; return it and its cache TTL (None: not cacheable)."""
+        conn, resp = self._send_upstream(None, True, headers)
+        reusable = False
+        try:
+            body = resp.read()
+            reusable = not resp.will_close
+        finally:
+            if not resp.isclosed():
+                resp.close()
+            POOL.release(conn, reusable)
+        ttl = CachedResponse.ttl_for(resp.status, resp.getheader("Cache-Control"), len(body))
+        entry = CachedResponse(resp.status, resp.reason, self._filter_hop_by_hop_headers(resp.getheaders()), body, ttl or 0.0)
+        return entry, ttl
+
+    def _send_cached(self, entry: CachedResponse, cache_result: str) -> None:
+        self._cache = cache_result
+        self.send_response(entry.status, entry.reason)
+        for k, v in entry.headers:
+            if k.lower() != "age":
+                self.send_header(k, v)
+        if cache_result in ("hit", "coalesced"):
+            self.send_header("Age", str(int(entry.age())))
+        self.send_header("X-Cache", "HIT" if cache_result in ("hit", "coalesced") else "MISS")
+        self.send_header("Content-Length", str(len(entry.body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(entry.body)
+            self._bytes_out += len(entry.body)
+
+    def _proxy_cached(self) -> None:
+        """Serve a whitelisted GET from the cache, coalescing concurrent misses."""
+        headers = self._forward_headers()
+        headers["Host"] = f"{UPSTREAM_HOST}:{UPSTREAM_PORT}" if UPSTREAM_PORT else UPSTREAM_HOST
+        key = CACHE.key(self.path, self.headers)
+
+        request_cc = _cache_control(self.headers.get("Cache-Control"))
+        if "no-cache" in request_cc or "no-store" in request_cc or request_cc.get("max-age") == "0":
+            # the client asked for a fresh response: skip the lookup, still refresh the cache
+            entry, ttl = self._fetch_buffered(headers)
+            if ttl is not None and "no-store" not in request_cc:
+                CACHE.put(key, entry)
+            self._send_cached(entry, "bypass")
+            return
+
+        entry = CACHE.get(key)
+        if entry is not None:
+            self._send_cached(entry, "hit")
+            return
+
+        flight, leader = CACHE.join(key)
+        if not leader:
+            flight.done.wait(UPSTREAM_TIMEOUT)
+            if flight.response is not None:
+                self._send_cached(flight.response, "coalesced")
+                return
+            # the leader failed or got an uncacheable response: fetch on our own
+            entry, _ = self._fetch_buffered(headers)
+            self._send_cached(entry, "miss")
+            return
+
+        shared = None
+        try:
+            entry, ttl = self._fetch_buffered(headers)
+            if ttl is not None:
+                CACHE.put(key, entry)
+                shared = entry
+        finally:
+            CACHE.land(key, flight, shared)
+        self._send_cached(entry, "miss")
+
+    def _relay_events(self, resp: http.client.HTTPResponse, chunked: bool) -> None:
+        """Forward a text/event-stream response one event at a time, as soon as it is complete."""
+        event: list[bytes] = []
+        while True:
+            line = resp.readline(IO_CHUNK_SIZE)
+            if line:
+                event.append(line)
+            if line in (b"\n", b"\r\n", b"") and event:
+                self._write_body_chunk(b"".join(event), chunked)
+                event = []
+            if not line:
+                return
+
+    def _write_body_chunk(self, data: bytes, chunked: bool) -> None:
+        self._bytes_out += len(data)
+        if chunked:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        else:
+            self.wfile.write(data)
+        self.wfile.flush()
 
     def _proxy(self) -> None:
-        body = self._read_body()
+        body, replayable = self._request_body()
         headers = self._forward_headers()
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            headers = {k: v for k, v in headers.items() if k.lower() != "content-length"}
 
         headers["Host"] = f"{UPSTREAM_HOST}:{UPSTREAM_PORT}" if UPSTREAM_PORT else UPSTREAM_HOST
 
-        conn = self._make_conn()
+        conn, resp = self._send_upstream(body, replayable, headers)
+        reusable = False
         try:
-            conn.request(self.command, self.path, body=body if body else None, headers=headers)
-            resp = conn.getresponse()
-
             self.send_response(resp.status, resp.reason)
             for k, v in self._filter_hop_by_hop_headers(resp.getheaders()):
                 self.send_header(k, v)
+
+            # keep the client connection alive: forward with a length when
+            # the upstream gave one, chunked otherwise
+            no_body = self.command == "HEAD" or resp.status in (204, 304) or 100 <= resp.status < 200
+            length = resp.getheader("Content-Length")
+            chunked = not no_body and length is None
+            if no_body:
+                pass
+            elif chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Content-Length", length)
             self.end_headers()
 
-            while True:
-                chunk = resp.read(4096)
-                if not chunk:
-                    break
-                self.wfile.write(chunk)
+            if no_body:
+                pass
+            elif (resp.getheader("Content-Type") or "").startswith("text/event-stream"):
+                self._relay_events(resp, chunked)
+            else:
+                while True:
+                    # read1 returns what has arrived instead of waiting for a full buffer
+                    chunk = resp.read1(IO_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self._write_body_chunk(chunk, chunked)
+            # marks the response complete (read1 leaves it open at the end of a sized body)
+            resp.read()
+            if chunked and not no_body:
+                self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            reusable = resp.isclosed() and not resp.will_close
         finally:
-            conn.close()
-            self.close_connection = True
+            if not resp.isclosed():
+                resp.close()
+            POOL.release(conn, reusable)
 
-    def do_POST(self) -> None:
-        if self.path == "/api/event_logging/batch":
-            self.send_response(200)
-            self.send_header("Content-Length", "0")
-            self.end_headers()
-            self.close_connection = True
-            return
+    def _serve_metrics(self) -> None:
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+            self._bytes_out += len(body)
 
+    def _handle(self) -> None:
+        METRICS.start()
+        start = time.perf_counter()
+        error = None
         try:
-            print(f"[proxy] {self.command} {self.path} -> LiteLLM", file=sys.stderr)
-            self._proxy()
+            if self.command == "POST" and self.path == "/api/event_logging/batch":
+                self._read_body()
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif self.command in ("GET", "HEAD") and METRICS_PATH and self.path == METRICS_PATH:
+                self._serve_metrics()
+            elif self.command == "GET" and self.path.split("?", 1)[0] in CACHE_PATHS:
+                self._proxy_cached()
+            elif self.command == "HEAD" and self.path.split("?", 1)[0] in CACHE_PATHS:
+                # answered from a cached GET when there is one; never cached itself
+                entry = CACHE.get(CACHE.key(self.path, self.headers))
+                if entry is not None:
+                    self._send_cached(entry, "hit")
+                else:
+                    self._proxy()
+            else:
+                self._proxy()
         except Exception as e:
-            print(f"[proxy] Error: {e}", file=sys.stderr)
-            self.send_error(500, str(e))
+            error = str(e) or type(e).__name__
+            self._send_error_or_close(e)
+        finally:
+            self._log_access(time.perf_counter() - start, error)
+
+    def _log_access(self, duration: float, error: Optional[str]) -> None:
+        path = METRICS.path_label(self.path)
+        status = self._status or 0
+        METRICS.finish(self.command, path, status, duration, self._bytes_in, self._bytes_out,
+                       self._connect_s, self._ttfb_s, self._reused, self._cache)
+        if ACCESS_LOG == "off":
+            if error is not None:
+                print(f"[proxy] Error: {self.command} {self.path}: {error}", file=sys.stderr)
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "client": self.client_address[0],
+            "method": self.command,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "bytes_in": self._bytes_in,
+            "bytes_out": self._bytes_out,
+        }
+        if self._reused is not None:
+            record["upstream_reused"] = self._reused
+        if self._connect_s is not None:
+            record["upstream_connect_ms"] = round(self._connect_s * 1000, 2)
+        if self._ttfb_s is not None:
+            record["upstream_ttfb_ms"] = round(self._ttfb_s * 1000, 2)
+        if self._cache is not None:
+            record["cache"] = self._cache
+            record["cache_hit_ratio"] = round(METRICS.cache_hit_ratio(), 3)
+        if error is not None:
+            record["error"] = error
+        # one write per line, so lines from concurrent requests do not interleave
+        sys.stderr.write(json.dumps(record) + "\n")
+        sys.stderr.flush()
+
+    def do_POST(self) -> None:
+        self._handle()
 
     def do_GET(self) -> None:
-        try:
-            self._proxy()
-        except Exception as e:
-            print(f"[proxy] Error: {e}", file=sys.stderr)
-            self.send_error(500, str(e))
+        self._handle()
+
+    def do_HEAD(self) -> None:
+        self._handle()
+
+    def log_request(self, code: Union[int, str] = "-", size: Union[int, str] = "-") -> None:
+        # replaced by the access log written in _log_access
+        pass
+
+    def _send_error_or_close(self, e: Exception) -> None:
+        # once the response has started, the only way to signal an error is to drop the connection
+        if not self._response_started:
+            try:
+                self.send_error(500, str(e))
+            except OSError:
+                pass
+        self.close_connection = True
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self._response_started = True
+        self._status = code
+        super().send_response(code, message)
+
+    def handle_one_request(self) -> None:
+        # per-request state for error handling, metrics and the access log
+        self._response_started = False
+        self._status: Optional[int] = None
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._connect_s: Optional[float] = None
+        self._ttfb_s: Optional[float] = None
+        self._reused: Optional[bool] = None
+        self._cache: Optional[str] = None
+        super().handle_one_request()
+
+
+class ProxyServer(http.server.ThreadingHTTPServer):
+    """Serves every client connection on its own thread."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    # many agents may connect at once
+    request_queue_size = 128
+
+
+def build_server(port: int = PORT) -> ProxyServer:
+    return ProxyServer(("", port), RequestHandler)
 
 
 def main() -> None:
-    http.server.HTTPServer.allow_reuse_address = True
     print(f"Proxy running on port {PORT} -> LiteLLM {LITELLM_URL}", file=sys.stderr)
-    http.server.HTTPServer(("", PORT), RequestHandler).serve_forever()
+    server = build_server()
+    try:
+        server.serve_forever()
+    finally:
+        POOL.close()
 
 
 if __name__ == "__main__":
     main()
-
@@ -188,6 +188,13 @@ fi
 
 INSTALLER_SNIPPET='if command -v curl >/dev/null 2>&1; then curl -fsSL '"${NVM_INSTALL_URL}"' | bash; else wget -qO- '"${NVM_INSTALL_URL}"' | bash; fi'
 
+# Use the install script fetched on the host by `pei-docker-cli prefetch`, if any
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/../prefetched.sh"
+if PREFETCHED_SCRIPT="$(pei_prefetched "${NVM_INSTALL_URL}")"; then
+  INSTALLER_SNIPPET="bash '${PREFETCHED_SCRIPT}'"
+fi
+
 # Run NVM installation as the target user
 if [[ "${TARGET_USER}" == "${CURRENT_USER}" ]]; then
   bash -lc "set -eu; export NVM_DIR='${INSTALL_DIR}'; export PROFILE='${BASHRC_PATH}'; ${INSTALLER_SNIPPET}"
@@ -105,8 +105,33 @@ append_block_if_missing() {
     fi
 }
 
-# do we have tmp/nvm directory? if not, git clone nvm
-if [ ! -d "$tmp_dir/nvm" ]; then
+# Normalize the requested version to a git tag ('v' prefix)
+NVM_TAG=""
+if [ -n "$NVM_VERSION" ]; then
+    if [[ "$NVM_VERSION" != v* ]]; then
+        NVM_TAG="v$NVM_VERSION"
+    else
+        NVM_TAG="$NVM_VERSION"
+    fi
+fi
+
+# release archive fetched on the host by `pei-docker-cli prefetch`, if any
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/../prefetched.sh"
+if [ -n "$NVM_TAG" ]; then
+    NVM_ARCHIVE_URL="https://github.com/nvm-sh/nvm/archive/refs/tags/$NVM_TAG.tar.gz"
+else
+    NVM_ARCHIVE_URL="https://github.com/nvm-sh/nvm/archive/refs/heads/master.tar.gz"
+fi
+
+# do we have tmp/nvm directory? if not, use the prefetched archive or git clone nvm
+if [ ! -d "$tmp_dir/nvm" ] && NVM_ARCHIVE="$(pei_prefetched "$NVM_ARCHIVE_URL")"; then
+    echo "extracting $NVM_ARCHIVE to $NVM_DIR ..."
+    mkdir -p "$NVM_DIR"
+    tar -xzf "$NVM_ARCHIVE" -C "$NVM_DIR" --strip-components=1
+    # the archive already is the requested version
+    NVM_TAG=""
+elif [ ! -d "$tmp_dir/nvm" ]; then
     echo "cloning nvm to $NVM_DIR from $NVM_REPO_URL ..."
     git clone "$NVM_REPO_URL" "$NVM_DIR"
 else
@@ -116,13 +141,7 @@ else
 fi
 
 # If a specific NVM version was requested, attempt to check out that version
-if [ -n "$NVM_VERSION" ]; then
-    # Normalize version to start with 'v'
-    if [[ "$NVM_VERSION" != v* ]]; then
-        NVM_TAG="v$NVM_VERSION"
-    else
-        NVM_TAG="$NVM_VERSION"
-    fi
+if [ -n "$NVM_TAG" ]; then
     if [ -d "$NVM_DIR/.git" ]; then
         echo "Switching NVM to tag $NVM_TAG ..."
         # Ensure tags are available, but tolerate offline or shallow clones
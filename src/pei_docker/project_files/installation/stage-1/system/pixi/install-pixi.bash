@@ -284,7 +284,13 @@ else
     echo "Installing pixi to $USER_PIXI_DIR for user ${TARGET_USER}..."
     verbose_echo "Setting PIXI_HOME=$USER_PIXI_DIR for installation"
 
-    INSTALL_CMD="export PIXI_HOME='$USER_PIXI_DIR'; curl -fsSL ${INSTALLER_URL} | bash"
+    source "$SCRIPT_DIR/../prefetched.sh"
+    FETCH_CMD="curl -fsSL ${INSTALLER_URL}"
+    if PREFETCHED_SCRIPT="$(pei_prefetched "$INSTALLER_URL")"; then
+        FETCH_CMD="cat '${PREFETCHED_SCRIPT}'"
+    fi
+
+    INSTALL_CMD="export PIXI_HOME='$USER_PIXI_DIR'; ${FETCH_CMD} | bash"
     if [ "$VERBOSE" != true ]; then
         INSTALL_CMD="$INSTALL_CMD >/dev/null 2>&1"
     fi
@@ -0,0 +1,35 @@
+#!/bin/bash
+
+# Look up installer downloads prefetched on the host by `pei-docker-cli prefetch`.
+#
+# Usage (source this file, then):
+#   if file="$(pei_prefetched "$url")"; then ... use "$file" ...; fi
+#
+# During the on_build step the project's prefetch/ directory is bind-mounted
+# at $PEI_PREFETCH_DIR. Files there are named <key>-<basename>, where <key> is
+# the first 16 hex digits of the SHA-256 of the URL. A file is only returned
+# when it matches the checksum recorded in SHA256SUMS; otherwise the caller
+# downloads from the network as usual.
+
+pei_prefetched() {
+    local url="$1"
+    local dir="${PEI_PREFETCH_DIR:-}"
+    local key file name
+
+    if [[ -z "$dir" || ! -f "$dir/SHA256SUMS" ]] || ! command -v sha256sum >/dev/null 2>&1; then
+        return 1
+    fi
+
+    key="$(printf '%s' "$url" | sha256sum | cut -c1-16)"
+    for file in "$dir/$key"-*; do
+        [[ -f "$file" ]] || continue
+        name="$(basename "$file")"
+        if awk -v n="$name" '$2 == n' "$dir/SHA256SUMS" | (cd "$dir" && sha256sum -c --status - 2>/dev/null); then
+            echo "[prefetch] using $name for $url" >&2
+            echo "$file"
+            return 0
+        fi
+        echo "[prefetch] checksum mismatch for $name, downloading $url instead" >&2
+    done
+    return 1
+}
@@ -143,14 +143,21 @@ fi
 ##########
 # Build and run the installation command
 ##########
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/../prefetched.sh"
+FETCH_CMD="curl -LsSf ${INSTALLER_URL}"
+if PREFETCHED_SCRIPT="$(pei_prefetched "$INSTALLER_URL")"; then
+  FETCH_CMD="cat '${PREFETCHED_SCRIPT}'"
+fi
+
 if [[ "${TARGET_USER}" == "${CURRENT_USER}" ]]; then
   # Installing for the invoking user
   if [[ -n "${INSTALL_DIR}" ]]; then
     mkdir -p "${INSTALL_DIR}"
     export UV_INSTALL_DIR="${INSTALL_DIR}"
-    INSTALL_CMD="curl -LsSf ${INSTALLER_URL} | env UV_INSTALL_DIR='${INSTALL_DIR}' sh"
+    INSTALL_CMD="${FETCH_CMD} | env UV_INSTALL_DIR='${INSTALL_DIR}' sh"
   else
-    INSTALL_CMD="curl -LsSf ${INSTALLER_URL} | sh"
+    INSTALL_CMD="${FETCH_CMD} | sh"
   fi
   eval "${INSTALL_CMD}"
 else
@@ -160,9 +167,9 @@ else
     # Ensure the target user owns the install dir
     primary_group=$(id -gn "${TARGET_USER}" 2>/dev/null || echo "${TARGET_USER}")
     chown -R "${TARGET_USER}:${primary_group}" "${INSTALL_DIR}" || true
-    INSTALL_AS_USER_CMD="curl -LsSf ${INSTALLER_URL} | env UV_INSTALL_DIR='${INSTALL_DIR}' sh"
+    INSTALL_AS_USER_CMD="${FETCH_CMD} | env UV_INSTALL_DIR='${INSTALL_DIR}' sh"
   else
-    INSTALL_AS_USER_CMD="curl -LsSf ${INSTALLER_URL} | sh"
+    INSTALL_AS_USER_CMD="${FETCH_CMD} | sh"
   fi
 
   if command -v runuser >/dev/null 2>&1; then
@@ -8,8 +8,34 @@ echo "Executing $DIR/custom-on-build.sh ..."
 
 DIR_GENERATED="$DIR/../generated"
 
+# package-manager caches (build_caches in user_config.yml): point each tool at its
+# directory in the BuildKit cache mounted by the Dockerfile, which is not part of the image
+BUILD_CACHE_ROOT="/var/cache/pei-build"
+for tool in ${PEI_BUILD_CACHES_2:-}; do
+    cache_dir="$BUILD_CACHE_ROOT/$tool"
+    case "$tool" in
+        pip) export PIP_CACHE_DIR="$cache_dir" ;;
+        conda) export CONDA_PKGS_DIRS="$cache_dir" ;;
+        pixi) export PIXI_CACHE_DIR="$cache_dir" ;;
+        # the cache is on another filesystem than the environments, so hardlinks fail
+        uv) export UV_CACHE_DIR="$cache_dir" UV_LINK_MODE=copy ;;
+        npm) export npm_config_cache="$cache_dir" ;;
+        *) echo "Warning: unknown build cache '$tool', ignored" >&2; continue ;;
+    esac
+    # created once per cache mount, writable by root and by ssh users running installers;
+    # what each tool writes below it keeps the tool's own permissions
+    if [ ! -d "$cache_dir" ]; then
+        mkdir -p "$cache_dir"
+        chmod 777 "$cache_dir"
+    fi
+    echo "Using build cache for $tool at $cache_dir"
+done
+
+status=0
 # if the file exists, execute it
 if [ -f "$DIR_GENERATED/_custom-on-build.sh" ]; then
     echo "Found custom on-build script, executing ..."
-    bash "$DIR_GENERATED/_custom-on-build.sh"
-fi
\ No newline at end of file
+    bash "$DIR_GENERATED/_custom-on-build.sh" || status=$?
+fi
+
+exit $status
\ No newline at end of file
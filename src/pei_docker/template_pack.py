@@ -0,0 +1,163 @@
+"""
+Packed project template used by ``pei-docker-cli create``.
+
+Copying ``project_files`` and ``examples`` file by file costs one open/copy
+per template file (a couple of hundred of them). Wheels therefore ship the
+two trees as a single uncompressed tar archive, ``templates/project-files.tar``,
+which ``create`` reads through :mod:`importlib.resources` with a single read
+and extracts in one pass. The archive is produced at wheel build time by
+``hatch_build.py``; source checkouts and editable installs have no archive
+and ``create`` copies the directories instead.
+
+Archive layout::
+
+    project/...    contents of pei_docker/project_files
+    examples/...   contents of pei_docker/examples
+
+This module only depends on the standard library so the build hook can load
+it without the package's runtime dependencies.
+"""
+
+import io
+import os
+import tarfile
+from importlib import resources
+from importlib.resources.abc import Traversable
+from typing import IO, Optional
+
+# Location of the packed template inside the pei_docker package
+PACKED_TEMPLATE_RESOURCE = 'templates/project-files.tar'
+
+# Archive prefixes and the package directories they are built from
+PROJECT_PREFIX = 'project'
+EXAMPLES_PREFIX = 'examples'
+_PACKED_TREES = {
+    PROJECT_PREFIX: 'project_files',
+    EXAMPLES_PREFIX: 'examples',
+}
+
+
+def _normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    # reproducible archive: no host ownership in the wheel
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    # integer mtimes keep GNU headers free of per-member pax records
+    info.mtime = int(info.mtime)
+    return info
+
+
+def pack_project_template(package_dir: str, out_path: str) -> int:
+    """
+    Pack the project template trees of a package checkout into one tar file.
+
+    Parameters
+    ----------
+    package_dir : str
+        Path to the ``pei_docker`` package directory (containing
+        ``project_files`` and ``examples``).
+    out_path : str
+        Path of the tar archive to write.
+
+    Returns
+    -------
+    int
+        Number of regular files packed.
+    """
+    count = 0
+    with tarfile.open(out_path, 'w', format=tarfile.GNU_FORMAT) as tar:
+        for prefix, subdir in _PACKED_TREES.items():
+            root = os.path.join(package_dir, subdir)
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+                for name in sorted(filenames):
+                    if name.endswith('.pyc'):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    arcname = '/'.join([prefix, *os.path.relpath(path, root).split(os.sep)])
+                    tar.add(path, arcname=arcname, recursive=False, filter=_normalize)
+                    count += 1
+    return count
+
+
+def find_packed_template() -> Optional[Traversable]:
+    """
+    Return the packed template bundled with the installed package, if any.
+    """
+    ref = resources.files('pei_docker').joinpath(PACKED_TEMPLATE_RESOURCE)
+    return ref if ref.is_file() else None
+
+
+def _project_path(name: str, with_examples: bool) -> Optional[str]:
+    """Map an archive member name to its path relative to the project, or None to skip it."""
+    prefix, _, rest = name.partition('/')
+    if not rest:
+        return None
+    parts = rest.split('/')
+    if any(part in ('', '.', '..') for part in parts):
+        raise ValueError(f'Unsafe path in packed template: {name!r}')
+    if prefix == PROJECT_PREFIX:
+        return os.path.join(*parts)
+    if prefix == EXAMPLES_PREFIX and with_examples:
+        return os.path.join(EXAMPLES_PREFIX, *parts)
+    return None
+
+
+def extract_project_template(fileobj: IO[bytes], project_dir: str, with_examples: bool = True) -> int:
+    """
+    Extract a packed template into a project directory in one pass.
+
+    The archive is read into memory once (about 1 MB) and every regular file
+    is written straight from that buffer, avoiding the per-member overhead
+    of ``TarFile.extract``. Only directories and regular files are accepted.
+
+    Parameters
+    ----------
+    fileobj : IO[bytes]
+        Readable binary stream of the tar archive.
+    project_dir : str
+        Destination project directory (created if missing). Existing files
+        are replaced, matching ``copytree(..., dirs_exist_ok=True)``.
+    with_examples : bool, default True
+        Also extract the ``examples`` tree into ``<project_dir>/examples``.
+
+    Returns
+    -------
+    int
+        Number of regular files extracted.
+
+    Raises
+    ------
+    ValueError
+        If the archive contains links, devices or paths escaping the project.
+    """
+    data = fileobj.read()
+    os.makedirs(project_dir, exist_ok=True)
+    made_dirs: set[str] = {project_dir}
+    count = 0
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:') as tar:
+        for member in tar:
+            rel_path = _project_path(member.name, with_examples)
+            if rel_path is None:
+                continue
+            target = os.path.join(project_dir, rel_path)
+            if member.isdir():
+                if target not in made_dirs:
+                    os.makedirs(target, exist_ok=True)
+                    made_dirs.add(target)
+                continue
+            if not member.isfile():
+                raise ValueError(f'Unsupported member type in packed template: {member.name!r}')
+
+            parent = os.path.dirname(target)
+            if parent not in made_dirs:
+                os.makedirs(parent, exist_ok=True)
+                made_dirs.add(parent)
+            if os.path.lexists(target):
+                # replace instead of writing through a hardlinked file
+                os.unlink(target)
+            with open(target, 'wb') as f:
+                f.write(data[member.offset_data:member.offset_data + member.size])
+            os.chmod(target, member.mode & 0o777)
+            os.utime(target, (member.mtime, member.mtime))
+            count += 1
+    return count
@@ -19,6 +19,7 @@ UserConfig
 │   ├── apt: AptConfig (APT repository mirror settings)
 │   ├── device: DeviceConfig (CPU/GPU hardware configuration)
 │   ├── custom: CustomScriptConfig (lifecycle hook scripts)
+│   ├── build_caches: BuildCacheConfig (package caches for on_build scripts)
 │   ├── storage: Dict[str, StorageOption] (volume configurations)
 │   ├── ports: List[str] (port mappings)
 │   └── environment: Dict[str, str] (environment variables)
@@ -39,6 +40,7 @@ port_mapping_str_to_dict : Convert port mapping strings to dictionary
 port_mapping_dict_to_str : Convert port mapping dictionary to strings
 env_str_to_dict : Convert environment variable strings to dictionary
 env_dict_to_str : Convert environment variable dictionary to strings
+structure_user_config : Structure a config dict into UserConfig, cached by config hash
 
 Validation Features
 -------------------
@@ -69,9 +71,11 @@ from pei_docker.user_config.ssh import SSHUserConfig, SSHConfig
 from pei_docker.user_config.network import ProxyConfig, AptConfig
 from pei_docker.user_config.hardware import DeviceConfig
 from pei_docker.user_config.scripts import CustomScriptConfig
+from pei_docker.user_config.build_cache import BuildCacheConfig
 from pei_docker.user_config.storage import StorageTypes, StorageOption
 from pei_docker.user_config.stage import StageConfig
 from pei_docker.user_config.config import UserConfig
+from pei_docker.user_config.structure_cache import structure_user_config, clear_structure_cache
 
 # Maintain backward compatibility with the original __all__ list
 __all__ = [
@@ -82,6 +86,7 @@ __all__ = [
     'AptConfig',
     'DeviceConfig',
     'CustomScriptConfig',
+    'BuildCacheConfig',
     'StorageOption',
     'StageConfig',
     'StorageTypes',
@@ -91,4 +96,6 @@ __all__ = [
     'env_str_to_dict',
     'env_dict_to_str',
     'env_converter',
+    'structure_user_config',
+    'clear_structure_cache',
 ]
@@ -0,0 +1,67 @@
+"""
+Build cache configuration for PeiDocker.
+
+This module provides the BuildCacheConfig class that selects which package
+managers keep their download caches in a BuildKit cache mount during the
+on_build step.
+"""
+
+from attrs import define, field
+from typing import List
+
+
+@define(kw_only=True)
+class BuildCacheConfig:
+    """
+    Package-manager caches shared between builds of a project.
+
+    The on_build step of both stages mounts a BuildKit cache at
+    ``/var/cache/pei-build``. For every enabled tool, a subdirectory of it is
+    exported to the on_build scripts through the tool's cache variable, so
+    packages downloaded by one build are reused by the next one. The cache
+    mount is never part of an image layer, and ``remove --prune`` deletes it
+    together with the project's apt cache.
+
+    Attributes
+    ----------
+    pip : bool, default False
+        Cache pip wheels and downloads (``PIP_CACHE_DIR``).
+    conda : bool, default False
+        Cache conda packages (``CONDA_PKGS_DIRS``).
+    pixi : bool, default False
+        Cache pixi/rattler packages (``PIXI_CACHE_DIR``).
+    uv : bool, default False
+        Cache uv wheels and Python downloads (``UV_CACHE_DIR``).
+    npm : bool, default False
+        Cache npm packages (``npm_config_cache``).
+
+    Examples
+    --------
+    Reuse Python packages between rebuilds:
+        >>> caches = BuildCacheConfig(pip=True, uv=True)
+        >>> caches.enabled()
+        ['pip', 'uv']
+
+    Notes
+    -----
+    The cache directories are writable by every user, so installers that
+    run as an SSH user (``--user``) share them with those running as root.
+    Installers that switch users with ``su -l`` drop the variables and
+    download as before.
+    """
+    pip: bool = field(default=False)
+    conda: bool = field(default=False)
+    pixi: bool = field(default=False)
+    uv: bool = field(default=False)
+    npm: bool = field(default=False)
+
+    def enabled(self) -> List[str]:
+        """
+        Names of the enabled caches, in declaration order.
+
+        Returns
+        -------
+        List[str]
+            E.g. ``['pip', 'uv']``; the names the on_build step understands.
+        """
+        return [name for name in ('pip', 'conda', 'pixi', 'uv', 'npm') if getattr(self, name)]
@@ -6,7 +6,7 @@ user configuration for a PeiDocker project.
 """
 
 from attrs import define, field
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from pei_docker.user_config.stage import StageConfig
 
@@ -70,6 +70,69 @@ class UserConfig:
     If only stage_1 is specified, the system will build and run a single-stage
     container. If both stages are specified, stage_2 uses stage_1's output
     image as its base image automatically.
+
+    A user_config.yml may ``extends`` shared fragment files; see
+    :meth:`merge_dicts` for how they combine.
     """
     stage_1: Optional[StageConfig] = field(default=None)
-    stage_2: Optional[StageConfig] = field(default=None)
\ No newline at end of file
+    stage_2: Optional[StageConfig] = field(default=None)
+
+    @staticmethod
+    def merge_dicts(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Deep-merge two raw (unstructured) configurations.
+
+        This is how a config is layered over the fragments it ``extends``:
+
+        - mappings are merged key by key, recursively
+        - ``environment`` is merged by variable name, so list
+          (``["KEY=VALUE"]``) and mapping forms combine; the result is a list
+          if either side is one, which keeps bare ``KEY`` entries (passed
+          through from the host by Compose) as they are
+        - lists (``ports``, ``on_build`` entries, ...) and scalars from
+          ``override`` replace those of ``base``
+        - ``null`` in ``override`` removes the key inherited from ``base``
+
+        Parameters
+        ----------
+        base : Dict[str, Any]
+            Configuration being extended. Not modified.
+        override : Dict[str, Any]
+            Configuration taking precedence. Not modified.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The merged configuration.
+
+        Examples
+        --------
+        >>> UserConfig.merge_dicts(
+        ...     {'stage_1': {'ssh': {'enable': True, 'port': 22}, 'ports': ['80:80']}},
+        ...     {'stage_1': {'ssh': {'port': 2222}, 'ports': ['8080:80']}},
+        ... )
+        {'stage_1': {'ssh': {'enable': True, 'port': 2222}, 'ports': ['8080:80']}}
+        """
+        merged = dict(base)
+        for key, value in override.items():
+            old = merged.get(key)
+            if value is None:
+                merged.pop(key, None)
+            elif key == 'environment' and isinstance(value, (dict, list)) and isinstance(old, (dict, list)):
+                env = {**_env_as_dict(old), **_env_as_dict(value)}
+                if isinstance(old, list) or isinstance(value, list):
+                    merged[key] = [name if v is None else f'{name}={v}' for name, v in env.items()]
+                else:
+                    merged[key] = env
+            elif isinstance(value, dict) and isinstance(old, dict):
+                merged[key] = UserConfig.merge_dicts(old, value)
+            else:
+                merged[key] = value
+        return merged
+
+
+def _env_as_dict(env: Any) -> Dict[str, Any]:
+    # bare "KEY" entries map to None (pass-through), not to an empty value
+    if isinstance(env, dict):
+        return env
+    return dict(str(item).split('=', 1) if '=' in str(item) else (str(item), None) for item in env)
\ No newline at end of file
@@ -101,6 +101,15 @@ class AptConfig:
     keep_proxy_after_build : bool, default False
         Whether to maintain APT proxy settings in the final image.
         When False, removes proxy configuration after build completion.
+    cache_proxy : str, optional
+        Fetch packages through the host's apt caching proxy
+        (``pei-docker-cli apt-cache serve``) during the stage-1 build. Can be:
+        - "host": the proxy on the Docker host at its default port
+        - "host:PORT": the proxy on the Docker host at another port
+        - A proxy URL such as "http://192.168.1.10:3142"
+        - None to disable
+        The proxy is only used for http repositories and is never kept in
+        the final image; if it is not reachable, apt downloads directly.
         
     Examples
     --------
@@ -116,6 +125,9 @@ class AptConfig:
         ...     keep_proxy_after_build=False
         ... )
         
+    Shared package cache on the build host:
+        >>> apt = AptConfig(cache_proxy="host")
+        
     Custom repository file:
         >>> apt = AptConfig(
         ...     repo_source="stage-1/custom/my-sources.list",
@@ -146,4 +158,6 @@ class AptConfig:
     keep_repo_after_build: bool = field(default=True)
     
     use_proxy: bool = field(default=False)
-    keep_proxy_after_build: bool = field(default=False)
\ No newline at end of file
+    keep_proxy_after_build: bool = field(default=False)
+    
+    cache_proxy: Optional[str] = field(default=None)
\ No newline at end of file
@@ -16,6 +16,7 @@ from pei_docker.user_config.image import ImageConfig
 from pei_docker.user_config.ssh import SSHConfig
 from pei_docker.user_config.network import ProxyConfig, AptConfig
 from pei_docker.user_config.hardware import DeviceConfig
+from pei_docker.user_config.build_cache import BuildCacheConfig
 from pei_docker.user_config.scripts import CustomScriptConfig
 from pei_docker.user_config.storage import StorageOption
 
@@ -59,6 +60,10 @@ class StageConfig:
     mount : Dict[str, StorageOption], optional
         Mount configurations for both stages. Maps mount names to storage
         options, providing flexible volume management.
+    build_caches : BuildCacheConfig, optional
+        Package-manager caches (pip, conda, pixi, uv, npm) kept in a BuildKit
+        cache mount during the on_build step, so rebuilds do not download
+        the same packages again. Never part of the image.
         
     Methods
     -------
@@ -110,6 +115,7 @@ class StageConfig:
     custom: Optional[CustomScriptConfig] = field(default=None)
     storage: Optional[Dict[str, StorageOption]] = field(factory=dict)
     mount: Optional[Dict[str, StorageOption]] = field(factory=dict)
+    build_caches: Optional[BuildCacheConfig] = field(default=None)
 
     def __attrs_post_init__(self) -> None:
         """Validate stage configuration invariants.
@@ -0,0 +1,113 @@
+"""
+Cached structuring of user configs into UserConfig.
+
+``cattrs.structure(config_dict, UserConfig)`` runs every attrs validator and
+``__attrs_post_init__`` (SSH key formats, storage options, script entries),
+which adds up when a long-running process such as the GUI structures the
+same config again and again. This module keeps the results in a small
+in-memory LRU cache, keyed by a canonical hash of the dict being structured;
+a hit returns the cached object itself.
+
+Keys also cover the source of this package, so changing a validator
+invalidates the cache. Only successful results are cached; an invalid config
+is structured, and fails, every time. Nothing is written to disk: structured
+configs hold passwords and private keys, and a one-shot CLI run would gain
+little from loading them back.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+import cattrs
+
+from pei_docker.user_config.config import UserConfig
+
+# Configs kept in memory, least recently used first out
+MEMORY_CACHE_SIZE = 64
+
+_memory_cache: 'OrderedDict[str, UserConfig]' = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _schema_fingerprint() -> str:
+    digest = hashlib.sha256(cattrs.__version__.encode('utf-8') if hasattr(cattrs, '__version__') else b'')
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            with open(os.path.join(package_dir, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+def config_hash(config_dict: Any) -> Optional[str]:
+    """
+    Canonical hash of a config dict, as used for the structuring cache key.
+
+    Parameters
+    ----------
+    config_dict : Any
+        The dict that would be passed to ``cattrs.structure``.
+
+    Returns
+    -------
+    str or None
+        Hex digest, independent of key order; ``None`` if the dict holds
+        values JSON cannot represent (e.g. dates) or keys of mixed types.
+    """
+    try:
+        canonical = json.dumps(config_dict, sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256((_schema_fingerprint() + canonical).encode('utf-8')).hexdigest()
+
+
+def structure_user_config(config_dict: Any) -> UserConfig:
+    """
+    ``cattrs.structure(config_dict, UserConfig)``, skipped for unchanged configs.
+
+    Parameters
+    ----------
+    config_dict : Any
+        The config as plain dicts and lists, environment and ``on_entry``
+        already normalized as ``PeiConfigProcessor`` does.
+
+    Returns
+    -------
+    UserConfig
+        The structured config. A memory hit returns the same object as
+        earlier calls, so callers must not modify it.
+
+    Raises
+    ------
+    ValueError, TypeError, AssertionError, cattrs errors
+        As ``cattrs.structure`` does for an invalid config.
+    """
+    key = config_hash(config_dict)
+    if key is None:
+        return cattrs.structure(config_dict, UserConfig)
+
+    with _memory_lock:
+        cached = _memory_cache.get(key)
+        if cached is not None:
+            _memory_cache.move_to_end(key)
+            return cached
+
+    user_config = cattrs.structure(config_dict, UserConfig)
+
+    with _memory_lock:
+        _memory_cache[key] = user_config
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return user_config
+
+
+def clear_structure_cache() -> None:
+    """Drop all cached structured configs."""
+    with _memory_lock:
+        _memory_cache.clear()
@@ -7,15 +7,19 @@ with the existing PeiDocker CLI commands.
 """
 
 import asyncio
+import logging
 import os
 import tempfile
+import time
 from pathlib import Path
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 from functools import partial
 
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from nicegui import ui, app
+from starlette.background import BackgroundTask
 
 # Optional import for native dialog support
 try:
@@ -26,14 +30,36 @@ except ImportError:
     webview = None  # type: ignore
 
 from pei_docker.webgui.models.ui_state import AppUIState
-from pei_docker.webgui.utils.ui_state_bridge import UIStateBridge
-from pei_docker.webgui.utils.utils import ProjectManager
+from pei_docker.webgui.utils.ui_state_bridge import SaveReport, UIStateBridge
+from pei_docker.webgui.utils.utils import Debouncer, ExportStore, ProjectManager
 from pei_docker.webgui.tabs import (
     ProjectTab, SSHTab, NetworkTab, EnvironmentTab, 
     StorageTab, ScriptsTab, SummaryTab
 )
-from pei_docker.webgui.constants import EntryModes, ScriptTypes
-from pei_docker.pei_utils_create import create_project_direct
+from pei_docker.webgui.constants import (
+    BuildSettings, EntryModes, ExportSettings, ScriptTypes, TaskLimits, ValidationSettings
+)
+from pei_docker.pei_utils_build import BUILD_SERVICES, BuildLogBuffer, parse_build_step, run_compose_build
+from pei_docker.pei_utils_configure import CONFIGURE_PHASES
+from pei_docker.pei_utils_export import list_export_files, write_project_zip
+from pei_docker.pei_utils_prune import format_bytes
+
+# Export archives shared by all clients; each is deleted once downloaded
+_export_store = ExportStore()
+
+
+@app.get(ExportSettings.ROUTE + '/{token}')
+def _serve_export(token: str) -> Response:
+    """Serve an export archive once, deleting it after the response is sent."""
+    entry = _export_store.get(token)
+    if entry is None:
+        return PlainTextResponse('Export not found or expired', status_code=404)
+    path, filename = entry
+    return FileResponse(path, filename=filename, media_type='application/zip',
+                        background=BackgroundTask(_export_store.discard, token))
+
+
+app.on_shutdown(_export_store.cleanup)
 
 # Keep TabName enum for navigation
 class TabName(Enum):
@@ -52,20 +78,64 @@ class AppState(Enum):
     INITIAL = "initial"  # No active project
     ACTIVE = "active"    # Project loaded and active
 
+class TaskLogPanel:
+    """Dialog streaming the phase and log lines of a running create/configure/build task."""
+    
+    def __init__(self, title: str, phases: tuple[str, ...] = ()) -> None:
+        self._phases = phases
+        with ui.dialog().props('persistent') as dialog, ui.card().classes('w-full max-w-3xl'):
+            self.dialog = dialog
+            ui.label(title).classes('text-lg font-bold')
+            self.phase_label = ui.label('Starting...').classes('text-sm text-gray-600')
+            self.progress = ui.linear_progress(value=0, show_value=False)
+            self.log_view = ui.log(max_lines=TaskLimits.LOG_MAX_LINES).classes('w-full h-64') \
+                .props('data-testid="task-log"')
+            self.close_button = ui.button('Close', on_click=dialog.close)
+            self.close_button.disable()
+        dialog.open()
+    
+    def push(self, line: str) -> None:
+        """Append a log line."""
+        self.log_view.push(line)
+    
+    def set_phase(self, phase: str) -> None:
+        """Show the phase that just started."""
+        self.phase_label.text = f'⏳ {phase.title()}...'
+        if phase in self._phases:
+            self.progress.value = self._phases.index(phase) / len(self._phases)
+    
+    def set_progress(self, fraction: float, text: str) -> None:
+        """Show progress of a task without named phases."""
+        self.progress.value = min(max(fraction, 0.0), 1.0)
+        self.phase_label.text = text
+    
+    def finish(self, success: bool) -> None:
+        """Show the final state and allow closing the dialog."""
+        if success:
+            self.progress.value = 1.0
+        self.phase_label.text = '✅ Done' if success else '❌ Failed, see the log below'
+        self.close_button.enable()
+
 class PeiDockerWebGUI:
     """Main PeiDocker Web GUI Application using NiceGUI."""
     
-    def __init__(self) -> None:
+    def __init__(self, project_manager: Optional[ProjectManager] = None) -> None:
         # Use new UI state instead of legacy AppData
         self.ui_state = AppUIState()
         self.bridge = UIStateBridge()
         
-        # Keep utility classes for now
-        self.project_manager = ProjectManager()
+        # Worker pool for create/configure/export, shared by all sessions when given
+        self.project_manager = project_manager or ProjectManager()
         
         # App state management
         self.app_state: AppState = AppState.INITIAL
         
+        # Running docker compose build, if any
+        self._build_task: Optional[asyncio.Task] = None
+        
+        # Field changes revalidate the changed sections once typing pauses
+        self._validation_debouncer = Debouncer(ValidationSettings.DEBOUNCE_SECONDS, self._refresh_validation)
+        
         # Tab implementations
         self.tabs: Dict[TabName, Any] = {
             TabName.PROJECT: ProjectTab(self),
@@ -85,6 +155,13 @@ class PeiDockerWebGUI:
         self.status_bar_container: Optional[ui.row] = None
         self.active_tab_container: Optional[ui.column] = None
     
+    def close(self) -> None:
+        """Release the session: stop a running build, cancel pending timers and forget saved-file hashes."""
+        if self._build_task is not None:
+            self._build_task.cancel()
+        self._validation_debouncer.cancel()
+        self.bridge.save_tracker.forget()
+    
     def setup_ui(self) -> None:
         """Setup the main UI layout."""
         # Page configuration
@@ -122,6 +199,9 @@ class PeiDockerWebGUI:
                 ui.button('⚙️ Configure', on_click=self.configure_project) \
                     .classes('bg-yellow-600 hover:bg-yellow-700')
                 
+                ui.button('🔨 Build', on_click=self.build_project) \
+                    .classes('bg-purple-600 hover:bg-purple-700')
+                
                 ui.button('📦 Download', on_click=self.download_project) \
                     .classes('bg-blue-500 hover:bg-blue-600')
                 
@@ -281,10 +361,18 @@ class PeiDockerWebGUI:
             if self.ui_state.has_errors:
                 self.error_label.text = f'❌ {self.ui_state.error_count} errors'
     
-    def _refresh_validation(self) -> None:
-        """Refresh validation state and update error indicators."""
-        # Validate the entire UI state
-        is_valid, errors = self.bridge.validate_ui_state(self.ui_state)
+    def request_validation(self) -> None:
+        """Schedule a validation refresh after the debounce window."""
+        self._validation_debouncer.trigger()
+    
+    def _refresh_validation(self, refresh_summary: bool = True) -> None:
+        """Refresh validation state and update error indicators.
+        
+        Only sections whose UI data changed are revalidated; the summary tab
+        is rebuilt only when something was revalidated.
+        """
+        self._validation_debouncer.cancel()
+        is_valid, errors, revalidated = self.bridge.validate_sections(self.ui_state)
         
         # Update validation state
         self.ui_state.has_errors = not is_valid
@@ -294,7 +382,7 @@ class PeiDockerWebGUI:
         self._update_error_indicators()
         
         # If on summary tab, refresh it to show validation
-        if self.ui_state.active_tab == TabName.SUMMARY.value:
+        if refresh_summary and revalidated and self.ui_state.active_tab == TabName.SUMMARY.value:
             if TabName.SUMMARY in self.tabs:
                 summary_tab = self.tabs[TabName.SUMMARY]
                 if hasattr(summary_tab, 'refresh_summary'):
@@ -333,11 +421,8 @@ class PeiDockerWebGUI:
         self.ui_state.active_tab = tab_name.value
         self._update_tab_styling()
         
-        # Render the new tab
+        # Render the new tab (also refreshes validation state)
         self.render_active_tab()
-        
-        # Refresh validation state
-        self._refresh_validation()
     
     def render_active_tab(self) -> None:
         """Render the active tab content."""
@@ -349,22 +434,27 @@ class PeiDockerWebGUI:
                 with self.active_tab_container:
                     self.tabs[active_tab].render()
             
-            # Refresh validation after rendering
-            self._refresh_validation()
+            # Refresh validation after rendering; a freshly rendered summary is already current
+            self._refresh_validation(refresh_summary=False)
     
     # Project management methods
     async def create_project(self, project_dir: str) -> None:
-        """Create a new project using pei-docker-cli create command with minimal template."""
+        """Create a new project in-process using the minimal template."""
+        panel = TaskLogPanel(f'Creating project {project_dir}')
         try:
-            # Use pei-docker-cli create logic to properly create the project with minimal template
-            # This creates the project directory and all necessary files including user_config.yml
-            await asyncio.get_event_loop().run_in_executor(
-                None, 
-                create_project_direct, 
-                project_dir, 
-                True,  # with_examples=True
-                'minimal'  # quick='minimal' - use minimal template for faster setup
+            # Runs create_project_direct on the shared worker pool, streaming its log
+            success = await self.project_manager.create_project(
+                Path(project_dir),
+                quick='minimal',  # use minimal template for faster setup
+                with_examples=True,
+                on_log=panel.push
             )
+            panel.finish(success)
+            if not success:
+                ui.notify('❌ Failed to create project, see the log for details', type='negative')
+                return
+            
+            panel.dialog.close()
             
             # Notify that project was created
             ui.notify(f'✅ Project created: {project_dir}', type='positive')
@@ -373,6 +463,7 @@ class PeiDockerWebGUI:
             await self.load_project(project_dir)
                 
         except Exception as e:
+            panel.finish(False)
             ui.notify(f'❌ Failed to create project: {str(e)}', type='negative')
     
     async def load_project(self, project_dir: str) -> None:
@@ -417,18 +508,26 @@ class PeiDockerWebGUI:
             project_path = Path(project_dir)
             project_path.mkdir(parents=True, exist_ok=True)
             
+            # Full validation runs as part of the save, drop any pending incremental one
+            self._validation_debouncer.cancel()
+            
             # Save configuration using UIStateBridge
             config_file = project_path / 'user_config.yml'
-            success, errors = self.bridge.save_to_yaml(self.ui_state, str(config_file))
+            report = SaveReport()
+            success, errors = self.bridge.save_to_yaml(self.ui_state, str(config_file), report=report)
             
             if success:
                 # Save inline scripts
-                await self._save_inline_scripts(project_path)
+                await self._save_inline_scripts(project_path, report)
                 
                 # Mark as saved
                 self.ui_state.mark_saved()
                 self._update_modified_indicators()
-                ui.notify('Configuration saved successfully!', type='positive')
+                for path in report.written:
+                    logging.info(f'Saved {path}')
+                if report.changed_sections:
+                    logging.info(f'Changed config sections: {", ".join(report.changed_sections)}')
+                ui.notify(report.summary(), type='positive')
                 
                 # Refresh summary tab if it's active
                 if self.ui_state.active_tab == TabName.SUMMARY.value:
@@ -440,10 +539,19 @@ class PeiDockerWebGUI:
         except Exception as e:
             ui.notify(f'Error saving configuration: {str(e)}', type='negative', timeout=10000)
     
-    async def _save_inline_scripts(self, project_path: Path) -> None:
-        """Save inline scripts from the Scripts tab to files."""
+    async def _save_inline_scripts(self, project_path: Path, report: Optional[SaveReport] = None) -> None:
+        """Save inline scripts from the Scripts tab to files.
+        
+        Scripts whose content is unchanged since the last save are skipped,
+        changed ones are written atomically (see SaveTracker).
+        """
         installation_dir = project_path / 'installation'
         installation_dir.mkdir(parents=True, exist_ok=True)
+        tracker = self.bridge.save_tracker
+        
+        def script_text(content: str) -> str:
+            # Add a shebang if missing
+            return content if content.startswith('#!') else '#!/bin/bash\n' + content
         
         # Process inline scripts for both stages
         for stage_num, stage_ui in [(1, self.ui_state.stage_1), (2, self.ui_state.stage_2)]:
@@ -455,17 +563,8 @@ class PeiDockerWebGUI:
                 entry_content = scripts_ui.entry_inline_content
                 
                 if entry_name and entry_content:
-                    script_path = installation_dir / entry_name
-                    script_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Write script with proper shebang if missing
-                    with open(script_path, 'w') as f:
-                        if not entry_content.startswith('#!'):
-                            f.write('#!/bin/bash\n')
-                        f.write(entry_content)
-                    
-                    # Make executable
-                    script_path.chmod(0o755)
+                    tracker.write_if_changed(str(installation_dir / entry_name), script_text(entry_content),
+                                             executable=True, report=report)
             
             # Lifecycle inline scripts - access directly from scripts_ui
             lifecycle_scripts = scripts_ui.lifecycle_scripts
@@ -476,18 +575,11 @@ class PeiDockerWebGUI:
                         script_content = script.get('content', '')
                         
                         if script_name and script_content:
-                            script_path = installation_dir / script_name
-                            script_path.parent.mkdir(parents=True, exist_ok=True)
-                            
-                            with open(script_path, 'w') as f:
-                                if not script_content.startswith('#!'):
-                                    f.write('#!/bin/bash\n')
-                                f.write(script_content)
-                            
-                            script_path.chmod(0o755)
+                            tracker.write_if_changed(str(installation_dir / script_name), script_text(script_content),
+                                                     executable=True, report=report)
     
     async def configure_project(self) -> None:
-        """Configure the project (run pei-docker-cli configure)."""
+        """Configure the project (same as pei-docker-cli configure, run in-process)."""
         # First save the configuration
         await self.save_configuration()
         
@@ -497,22 +589,116 @@ class PeiDockerWebGUI:
             ui.notify('No project directory set', type='negative')
             return
         
+        panel = TaskLogPanel('Configuring project', phases=CONFIGURE_PHASES)
         try:
-            # Run pei-docker-cli configure
-            success = await self.project_manager.configure_project(Path(project_dir))
+            # Run configure in-process, streaming phases and log lines to the panel
+            success = await self.project_manager.configure_project(
+                Path(project_dir), on_log=panel.push, on_progress=panel.set_phase
+            )
+            panel.finish(success)
             
             if success:
                 ui.notify('Project configured successfully!', type='positive')
             else:
-                ui.notify('Configuration failed. Check the console for details.', type='negative')
+                ui.notify('Configuration failed. See the log for details.', type='negative')
                 
         except Exception as e:
+            panel.finish(False)
             ui.notify(f'Error configuring project: {str(e)}', type='negative', timeout=10000)
     
+    async def build_project(self) -> None:
+        """Build the project's images (docker compose build), streaming the log.
+        
+        The build runs as a subprocess read by the event loop. Its output goes
+        into a bounded buffer that is flushed to the log panel as one update
+        every BuildSettings.FLUSH_SECONDS, so large apt/conda logs drop old
+        lines instead of flooding the websocket.
+        """
+        project_dir = self.ui_state.project.project_directory
+        if not project_dir:
+            ui.notify('Please set a project directory first', type='negative')
+            return
+        if not (Path(project_dir) / 'docker-compose.yml').exists():
+            ui.notify('Configure the project before building', type='warning')
+            return
+        if self._build_task is not None and not self._build_task.done():
+            ui.notify('A build is already running', type='warning')
+            return
+        
+        panel = TaskLogPanel('Building images')
+        buffer = BuildLogBuffer(TaskLimits.LOG_MAX_LINES)
+        # service -> [start time, elapsed or None while running, step, total]
+        stages: Dict[str, list] = {}
+        
+        def on_stage(service: str) -> None:
+            for entry in stages.values():
+                if entry[1] is None:
+                    entry[1] = time.monotonic() - entry[0]
+            stages[service] = [time.monotonic(), None, 0, 0]
+        
+        def on_line(line: str) -> None:
+            buffer.append(line)
+            step = parse_build_step(line)
+            if step is not None and stages:
+                entry = stages[next(reversed(stages))]
+                entry[2], entry[3] = step
+        
+        def flush() -> None:
+            lines, dropped = buffer.drain()
+            if dropped:
+                panel.push(f'[... {dropped} lines skipped ...]')
+            if lines:
+                panel.push('\n'.join(lines))
+            if not stages:
+                return
+            parts = []
+            done_fraction = 0.0
+            for service, (start, elapsed, step, total) in stages.items():
+                if elapsed is None:
+                    step_text = f' step {step}/{total}' if total else ''
+                    parts.append(f'⏳ {service}{step_text} {time.monotonic() - start:.0f}s')
+                    done_fraction += step / total if total else 0.0
+                else:
+                    parts.append(f'{service} {elapsed:.1f}s')
+                    done_fraction += 1.0
+            panel.set_progress(done_fraction / len(BUILD_SERVICES), ' · '.join(parts))
+        
+        self._build_task = asyncio.create_task(
+            run_compose_build(project_dir, on_line=on_line, on_stage=on_stage)
+        )
+        try:
+            while not self._build_task.done():
+                await asyncio.wait({self._build_task}, timeout=BuildSettings.FLUSH_SECONDS)
+                flush()
+            results = self._build_task.result()
+        except asyncio.CancelledError:
+            panel.push('[ERROR]\tBuild cancelled')
+            panel.finish(False)
+            return
+        except Exception as e:
+            flush()
+            panel.push(f'[ERROR]\t{e}')
+            panel.finish(False)
+            ui.notify(f'Build failed: {str(e)}', type='negative', timeout=10000)
+            return
+        
+        for result in results:
+            status = 'ok' if result.returncode == 0 else f'failed (exit code {result.returncode})'
+            panel.push(f'[INFO]\t{result.service}: {status} in {result.elapsed:.1f}s')
+        success = len(results) == len(BUILD_SERVICES) and all(r.returncode == 0 for r in results)
+        panel.finish(success)
+        if success:
+            ui.notify('Images built successfully!', type='positive')
+        else:
+            ui.notify('Build failed. See the log for details.', type='negative')
+    
     async def download_project(self) -> None:
-        """Download project as archive."""
-        import shutil
+        """Export the project as a zip archive and download it.
         
+        The archive is written on the worker pool with progress shown in a
+        dialog, excluding local caches (see pei_utils_export), and deleted
+        once the browser has fetched it.
+        """
         # Get project directory
         project_dir = self.ui_state.project.project_directory
         if not project_dir:
@@ -524,27 +710,40 @@ class PeiDockerWebGUI:
             ui.notify('Project directory does not exist', type='negative')
             return
         
+        project_name = self.ui_state.project.project_name or 'peidocker-project'
+        token, zip_path = _export_store.reserve(f'{project_name}.zip')
+        panel = TaskLogPanel(f'Exporting {project_name}.zip')
         try:
-            # Create ZIP file using shutil
-            project_name = self.ui_state.project.project_name or 'peidocker-project'
-            
-            # Create zip file in temp directory (not using context manager to avoid premature cleanup)
-            temp_dir = tempfile.gettempdir()
-            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-            temp_zip_base = os.path.join(temp_dir, f'{project_name}-{timestamp}')
-            
-            # Use shutil.make_archive to create the zip file
-            zip_file_path = shutil.make_archive(temp_zip_base, 'zip', str(project_path))
+            files = await self.project_manager.run_task(list_export_files, str(project_path))
+            total = sum(size for _, size in files)
+            panel.push(f'[INFO]\t{len(files)} files, {format_bytes(total)} to export')
+            
+            last_shown = [-1]
+            
+            def show_progress(done: int, total: int) -> None:
+                # coalesce per-file callbacks into at most 100 UI updates
+                percent = done * 100 // total if total else 100
+                if percent != last_shown[0]:
+                    last_shown[0] = percent
+                    panel.set_progress(percent / 100, f'⏳ {format_bytes(done)} / {format_bytes(total)} ({percent}%)')
+            
+            await self.project_manager.run_task(
+                write_project_zip, str(project_path), zip_path, files,
+                progress=self.project_manager.threadsafe(show_progress),
+                on_log=panel.push
+            )
             
-            # Trigger download using ui.download() in the UI context
-            ui.download(zip_file_path, f'{project_name}.zip')
+            panel.push(f'[INFO]\tArchive size: {format_bytes(os.path.getsize(zip_path))}')
+            panel.finish(True)
+            panel.dialog.close()
             
+            # Served once by _serve_export, which deletes the file afterwards
+            ui.download(f'{ExportSettings.ROUTE}/{token}', f'{project_name}.zip')
             ui.notify('Project exported successfully!', type='positive')
             
-            # Note: The temp file will be cleaned up by the OS eventually
-            # or we could implement a cleanup mechanism after download completes
-            
         except Exception as e:
+            _export_store.discard(token)
+            panel.finish(False)
             ui.notify(f'Error exporting project: {str(e)}', type='negative', timeout=10000)
     
     def change_project(self) -> None:
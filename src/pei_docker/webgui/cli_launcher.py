@@ -87,6 +87,8 @@ Notes
 - Project validation occurs before server startup to prevent runtime errors
 - Jump-to-page functionality is ideal for development and debugging workflows
 - Default projects are created in system temp directory with timestamp
+- Each browser gets its own UI state; sessions idle for 30 minutes after the
+  last tab closes are dropped, and at most 32 are kept in memory
 """
 
 from __future__ import annotations
@@ -95,8 +97,8 @@ import argparse
 import asyncio
 import importlib.util
 import os
+import secrets
 import socket
-import subprocess
 import sys
 from pathlib import Path
 from typing import Optional
@@ -194,47 +196,6 @@ def find_free_port(start_port: int = 8080, max_tries: int = 100) -> Optional[int
     return None
 
 
-def create_project_with_cli(project_dir: Path) -> bool:
-    """Create a new project using pei-docker-cli create command.
-
-    Executes the `pei-docker-cli create` command to initialize a new PeiDocker
-    project in the specified directory. Captures output and returns success status.
-
-    Parameters
-    ----------
-    project_dir : Path
-        Directory path where the new project will be created. Must be a valid
-        filesystem path.
-
-    Returns
-    -------
-    bool
-        True if project creation succeeded (return code 0), False otherwise.
-
-    Notes
-    -----
-    This function calls the external `pei-docker-cli` command and requires it
-    to be available in the system PATH. Error messages are written to stderr
-    if the command fails or raises an exception.
-
-    Examples
-    --------
-    >>> from pathlib import Path
-    >>> create_project_with_cli(Path("/tmp/my-project"))
-    True
-    """
-    try:
-        result = subprocess.run(
-            ['pei-docker-cli', 'create', '-p', str(project_dir)],
-            capture_output=True,
-            text=True
-        )
-        return result.returncode == 0
-    except Exception as e:
-        print(f"Error creating project: {e}", file=sys.stderr)
-        return False
-
-
 def validate_project_directory(project_dir: Path) -> tuple[bool, str]:
     """Validate if a project directory is legitimate for PeiDocker.
 
@@ -356,7 +317,7 @@ async def setup_initial_state(gui_app: PeiDockerWebGUI, project_dir: Optional[Pa
     -----
     Project handling logic:
     - Existing project (has user_config.yml): Load project directly
-    - New location: Create project using pei-docker-cli, then load
+    - New location: Create project in-process (as `pei-docker-cli create`), then load
     - Navigation only occurs if project loading succeeds
     - Errors are printed to stdout with traceback for debugging
 
@@ -393,7 +354,8 @@ async def setup_initial_state(gui_app: PeiDockerWebGUI, project_dir: Optional[Pa
                 if not project_dir.exists():
                     project_dir.mkdir(parents=True, exist_ok=True)
                 
-                if not create_project_with_cli(project_dir):
+                # in-process on the GUI's worker pool, full template like `pei-docker-cli create`
+                if not await gui_app.project_manager.create_project(project_dir, quick=None):
                     print("Failed to create project")
                     return
                 
@@ -444,7 +406,8 @@ def start_command(args: argparse.Namespace) -> None:
     2. Validate project directory path and permissions
     3. Validate page name if jump-to-page specified
     4. Check webview availability if native mode requested
-    5. Configure NiceGUI application with timer-based state setup
+    5. Configure NiceGUI application with one session (UI state) per browser
+       and timer-based state setup for new sessions
     6. Start server on 0.0.0.0 with selected port (or native mode)
 
     The server runs with auto-detect dark mode, no reload, and 🐳 favicon.
@@ -461,8 +424,10 @@ def start_command(args: argparse.Namespace) -> None:
         Exits with code 1 if project directory is invalid, page name is invalid,
         or native mode requested but pywebview not installed.
     """
-    from nicegui import ui
+    from nicegui import Client, app, ui
     from pei_docker.webgui.app import PeiDockerWebGUI
+    from pei_docker.webgui.constants import SessionSettings
+    from pei_docker.webgui.utils.utils import ProjectManager, SessionRegistry
 
     # Determine which port to use
     actual_port: int
@@ -516,15 +481,26 @@ def start_command(args: argparse.Namespace) -> None:
             print(f"Error: {error_msg}", file=sys.stderr)
             sys.exit(1)
     
-    # Create and configure the app
-    gui_app = PeiDockerWebGUI()
+    # One app instance (UI state) per browser, sharing the worker pool
+    project_manager = ProjectManager()
+    sessions: SessionRegistry[PeiDockerWebGUI] = SessionRegistry(
+        lambda: PeiDockerWebGUI(project_manager=project_manager),
+        on_evict=lambda gui_app: gui_app.close(),
+    )
+    app.timer(SessionSettings.SWEEP_SECONDS, sessions.evict_idle)
+    app.on_shutdown(project_manager.shutdown)
     
     @ui.page('/')
-    async def index() -> None:
+    async def index(client: Client) -> None:
+        session_id = app.storage.browser['id']
+        is_new = session_id not in sessions
+        gui_app = sessions.open(session_id)
+        client.on_connect(lambda: sessions.connect(session_id))
+        client.on_disconnect(lambda: sessions.disconnect(session_id))
         gui_app.setup_ui()
         
-        # Setup initial state if project directory or page specified
-        if project_path or args.jump_to_page:
+        # Setup initial state if project directory or page specified (new sessions only)
+        if is_new and (project_path or args.jump_to_page):
             ui.timer(0.5, lambda: asyncio.create_task(
                 setup_initial_state(gui_app, project_path, args.jump_to_page)
             ), once=True)
@@ -544,7 +520,8 @@ def start_command(args: argparse.Namespace) -> None:
         favicon='🐳',
         dark=None,  # Auto-detect from system
         reload=False,
-        native=native_mode  # Enable native mode if requested
+        native=native_mode,  # Enable native mode if requested
+        storage_secret=secrets.token_urlsafe(32),  # signs the per-browser session id cookie
     )
 
 
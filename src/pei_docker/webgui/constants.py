@@ -103,4 +103,41 @@ class AptMirrors:
             cls.MIRRORS_163: 'http://mirrors.163.com/ubuntu/',
             cls.USTC: 'http://mirrors.ustc.edu.cn/ubuntu/',
             cls.CN_ARCHIVE: 'http://cn.archive.ubuntu.com/ubuntu/'
-        }
\ No newline at end of file
+        }
+
+class TaskLimits:
+    """Limits for project tasks (create/configure) that the GUI runs in-process."""
+    
+    MAX_CONCURRENT_TASKS: int = 2  # worker threads shared by all clients
+    LOG_MAX_LINES: int = 500  # lines kept in the task log panel
+
+
+
+class BuildSettings:
+    """Streaming of docker compose build output to the task log panel."""
+    
+    FLUSH_SECONDS: float = 0.25  # buffered build lines are pushed to the browser this often
+
+
+
+class ValidationSettings:
+    """Timing of the incremental validation that runs while editing."""
+    
+    DEBOUNCE_SECONDS: float = 0.3  # quiet period after the last change before revalidating
+
+
+
+class ExportSettings:
+    """Project export (Download button) settings."""
+    
+    ROUTE: str = '/_pei/export'  # download route, followed by the export token
+    TTL_SECONDS: float = 3600.0  # archives never downloaded are removed after this
+
+
+
+class SessionSettings:
+    """Limits of the per-client GUI sessions (one UI state per browser)."""
+    
+    MAX_SESSIONS: int = 32  # sessions kept in memory, least recently used evicted first
+    IDLE_SECONDS: float = 1800.0  # disconnected sessions are evicted after this
+    SWEEP_SECONDS: float = 60.0  # interval of the idle eviction timer
@@ -41,9 +41,10 @@ class BaseTab(ABC):
         pass
     
     def mark_modified(self) -> None:
-        """Mark this tab as modified."""
+        """Mark this tab as modified and schedule a debounced revalidation."""
         # Mark the UI state as modified
         self.app.ui_state.mark_modified()
+        self.app.request_validation()
     
     def create_section_header(self, title: str, description: Optional[str] = None) -> ui.element:
         """Create a consistent section header."""
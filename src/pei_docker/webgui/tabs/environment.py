@@ -84,7 +84,7 @@ class EnvironmentTab(BaseTab):
                     # Update gpu_enabled when device_type changes
                     def on_device_change(e: Any, env: Any = stage_env) -> None:
                         env.gpu_enabled = (e.value == DeviceTypes.GPU)
-                        self.app.ui_state.mark_modified()
+                        self.mark_modified()
                     
                     device_select.on_value_change(lambda e, se=stage_env: on_device_change(e, se))
                 
@@ -172,14 +172,14 @@ class EnvironmentTab(BaseTab):
                             # Update original key reference
                             data['original_key'] = new_name
                         
-                        self.app.ui_state.mark_modified()
+                        self.mark_modified()
                     
                     # Handle value changes
                     def on_value_change(e: Any, data: Dict[str, Any] = row_data, env: Any = stage_env) -> None:
                         key_name = data['original_key']
                         if key_name:
                             env.env_vars[key_name] = e.value
-                            self.app.ui_state.mark_modified()
+                            self.mark_modified()
                     
                     name_input.on_value_change(on_name_change)
                     value_input.on_value_change(on_value_change)
@@ -202,7 +202,7 @@ class EnvironmentTab(BaseTab):
         self._create_env_variable_row(stage, stage_env, var_name, '')
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def _remove_env_variable(self, stage: str, stage_env: Any, key: str) -> None:
         """Remove an environment variable from a specific stage."""
@@ -220,7 +220,7 @@ class EnvironmentTab(BaseTab):
                 break
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def validate(self) -> tuple[bool, list[str]]:
         """Validate environment configuration for both stages."""
@@ -232,7 +232,7 @@ class NetworkTab(BaseTab):
                     data['mapping'][field] = e.value
                     self._validate_and_update_preview(data)
                     # Mark as modified
-                    self.app.ui_state.mark_modified()
+                    self.mark_modified()
                 
                 host_input.on_value_change(lambda e: update_mapping(e, 'host'))
                 container_input.on_value_change(lambda e: update_mapping(e, 'container'))
@@ -250,7 +250,7 @@ class NetworkTab(BaseTab):
         self._create_port_mapping_row(index, new_mapping, 'stage1')
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def _add_stage2_port_mapping(self) -> None:
         """Add a new port mapping to stage-2."""
@@ -262,7 +262,7 @@ class NetworkTab(BaseTab):
         self._create_port_mapping_row(index, new_mapping, 'stage2')
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def _remove_port_mapping(self, index: int, stage: str) -> None:
         """Remove a port mapping from the specified stage.
@@ -283,7 +283,7 @@ class NetworkTab(BaseTab):
             self._render_stage2_port_mappings()
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def _validate_and_update_preview(self, row_data: Dict[str, Any]) -> None:
         """Validate port mapping and update preview."""
@@ -125,7 +125,7 @@ class ProjectTab(BaseTab):
         
         # Mark as modified when names change
         if project_name:  # Only mark modified if there's actual content
-            self.app.ui_state.mark_modified()
+            self.mark_modified()
     
     def validate(self) -> Tuple[bool, List[str]]:
         """Validate project configuration."""
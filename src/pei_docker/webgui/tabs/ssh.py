@@ -275,7 +275,7 @@ class SSHTab(BaseTab):
                 # Update user data on changes
                 def update_user_field(field: str, value: Any, data: Dict[str, Any] = row_data) -> None:
                     data['user_data'][field] = value
-                    self.app.ui_state.mark_modified()
+                    self.mark_modified()
                 
                 # Bind change handlers for inputs using proper on_value_change
                 username_input.on_value_change(lambda e: update_user_field('name', e.value))
@@ -288,7 +288,7 @@ class SSHTab(BaseTab):
                         data['user_data']['uid'] = int(uid_val) if uid_val else None
                     else:
                         data['user_data']['uid'] = None
-                    self.app.ui_state.mark_modified()
+                    self.mark_modified()
                 
                 uid_enabled.on_value_change(lambda e: update_uid())
                 uid_input.on_value_change(lambda e: update_uid())
@@ -310,7 +310,7 @@ class SSHTab(BaseTab):
                         ssh_keys.append({'type': 'private', 'content': data['privkey_text'].value})
                     
                     data['user_data']['ssh_keys'] = ssh_keys
-                    self.app.ui_state.mark_modified()
+                    self.mark_modified()
                 
                 for component in [pubkey_source, pubkey_file_input, pubkey_text_input,
                                 privkey_source, privkey_file_input, privkey_text_input]:
@@ -330,7 +330,7 @@ class SSHTab(BaseTab):
         else:
             # Update user data
             row_data['user_data']['password'] = password
-            self.app.ui_state.mark_modified()
+            self.mark_modified()
     
     def _add_user(self) -> None:
         """Add a new SSH user."""
@@ -353,7 +353,7 @@ class SSHTab(BaseTab):
         self._create_user_row(len(ssh_ui.users) - 1, new_user)
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def _remove_user(self, index: int) -> None:
         """Remove a user."""
@@ -367,7 +367,7 @@ class SSHTab(BaseTab):
         self._render_users()
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
     
     def validate(self) -> tuple[bool, list[str]]:
         """Validate SSH configuration."""
@@ -238,7 +238,7 @@ These 3 storage entries are always present and default to 'image' type even when
         storage_ui.mounts.append(new_mount)
         
         # Mark as modified
-        self.app.ui_state.mark_modified()
+        self.mark_modified()
         
         # Re-render mounts
         self._render_mounts(stage)
@@ -247,7 +247,7 @@ These 3 storage entries are always present and default to 'image' type even when
         """Remove a mount entry."""
         if 0 <= index < len(storage_ui.mounts):
             storage_ui.mounts.pop(index)
-            self.app.ui_state.mark_modified()
+            self.mark_modified()
             
             # Re-render mounts
             stage = 'stage1' if storage_ui == self.app.ui_state.stage_1.storage else 'stage2'
@@ -257,7 +257,7 @@ These 3 storage entries are always present and default to 'image' type even when
         """Update a specific field in a mount entry."""
         if 0 <= index < len(storage_ui.mounts):
             storage_ui.mounts[index][field] = value
-            self.app.ui_state.mark_modified()
+            self.mark_modified()
             
             # If type changed, re-render to update labels
             if field == 'type':
@@ -70,8 +70,8 @@ class SummaryTab(BaseTab):
         self.validation_container.clear()
         
         with self.validation_container:
-            # Validate using UIStateBridge
-            is_valid, errors = self.app.bridge.validate_ui_state(self.app.ui_state)
+            # Validate using UIStateBridge (only sections changed since the last check)
+            is_valid, errors, _ = self.app.bridge.validate_sections(self.app.ui_state)
             
             if is_valid:
                 with ui.row().classes('items-center gap-2'):
@@ -7,5 +7,6 @@ through the adapter layer, as well as YAML serialization/deserialization.
 """
 
 from pei_docker.webgui.utils.ui_state_bridge.bridge import UIStateBridge
+from pei_docker.webgui.utils.ui_state_bridge.persistence import SaveReport, SaveTracker
 
-__all__ = ['UIStateBridge']
\ No newline at end of file
+__all__ = ['UIStateBridge', 'SaveReport', 'SaveTracker']
\ No newline at end of file
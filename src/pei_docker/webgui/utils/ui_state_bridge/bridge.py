@@ -2,20 +2,24 @@
 Main UIStateBridge class that ties together all conversion, loading, and building logic.
 """
 
-from typing import Dict, List, Tuple, Any
-from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
 import attrs
-import cattrs
 from omegaconf import OmegaConf
+import yaml
 
+from pei_docker.pei_utils import load_yaml_file_with_duplicate_key_check
+from pei_docker.pei_utils_extends import EXTENDS_KEY
 from pei_docker.webgui.constants import CustomScriptLifecycleTypes
 from pei_docker.webgui.models.ui_state import AppUIState
 from pei_docker.user_config import (
     UserConfig as AttrsUserConfig,
     env_str_to_dict
 )
+from pei_docker.user_config.structure_cache import structure_user_config
 from pei_docker.webgui.utils.ui_state_bridge.converters import UIToAttrsConverter
 from pei_docker.webgui.utils.ui_state_bridge.loaders import ConfigLoader
+from pei_docker.webgui.utils.ui_state_bridge.persistence import SaveReport, SaveTracker
+from pei_docker.webgui.utils.ui_state_bridge.validation import SectionValidator
 
 
 class UIStateBridge:
@@ -32,6 +36,9 @@ class UIStateBridge:
         """Initialize the UIStateBridge with its components."""
         self._converter = UIToAttrsConverter()
         self._loader = ConfigLoader()
+        self._section_validator = SectionValidator()
+        # Shared with the app so inline scripts are dirty-tracked the same way
+        self.save_tracker = SaveTracker()
     
     def validate_ui_state(self, ui_state: AppUIState) -> Tuple[bool, List[str]]:
         """Validate current UI state without modifying it.
@@ -59,14 +66,33 @@ class UIStateBridge:
             errors.append(f"Unexpected error: {str(e)}")
             return False, errors
     
-    def save_to_yaml(self, ui_state: AppUIState, file_path: str) -> Tuple[bool, List[str]]:
+    def validate_sections(self, ui_state: AppUIState) -> Tuple[bool, List[str], List[str]]:
+        """Validate UI state incrementally, re-checking only changed sections.
+        
+        Cheap enough to run on every field change; the full validation of
+        validate_ui_state() still runs on save.
+        
+        Args:
+            ui_state: AppUIState to validate
+            
+        Returns:
+            Tuple of (is_valid, error_messages, revalidated_section_keys)
+        """
+        return self._section_validator.validate(ui_state)
+    
+    def save_to_yaml(self, ui_state: AppUIState, file_path: str,
+                     report: Optional[SaveReport] = None) -> Tuple[bool, List[str]]:
         """Save UI state to YAML file with validation.
         
         Data flow: GUI state -> ui-data-model -> peidocker-data-model -> OmegaConf -> YAML file
         
+        The file is written atomically, and only if a config section changed
+        or the file was modified on disk since the last save.
+        
         Args:
             ui_state: AppUIState to save
             file_path: Path to save the YAML file
+            report: Optional SaveReport recording whether the file was written
             
         Returns:
             Tuple of (success, error_messages)
@@ -78,16 +104,15 @@ class UIStateBridge:
         if not is_valid:
             return False, validation_errors
         
+        if _uses_extends(file_path):
+            return False, [_extends_error(file_path)]
+        
         try:
             # Convert UI state to user_config format
             config_dict = self._converter.ui_to_user_config_format(ui_state)
             
-            # Create directory if needed
-            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            # Save using OmegaConf for better structured data handling
-            conf = OmegaConf.create(config_dict)
-            OmegaConf.save(conf, file_path)
+            # Save using OmegaConf, skipping the write if nothing changed
+            self.save_tracker.write_yaml_if_changed(file_path, config_dict, report=report)
             
             return True, []
             
@@ -110,13 +135,17 @@ class UIStateBridge:
         errors = []
         
         try:
-            # Step 1: Load YAML file directly with OmegaConf
-            config = OmegaConf.load(file_path)
+            # Step 1: Load YAML file into OmegaConf, rejecting duplicate keys
+            config = load_yaml_file_with_duplicate_key_check(file_path)
             
             if not config:
                 errors.append("Empty configuration file")
                 return False, errors
             
+            if EXTENDS_KEY in config:
+                errors.append(_extends_error(file_path))
+                return False, errors
+            
             # Step 2: Convert to Python dict and prepare for cattrs
             config_dict = OmegaConf.to_container(config, resolve=True)
             
@@ -127,8 +156,9 @@ class UIStateBridge:
                 self._preprocess_config_dict(preprocessed_dict)
                 config_dict = preprocessed_dict
             
-            # Step 4: Parse into UserConfig using cattrs
-            user_config: AttrsUserConfig = cattrs.structure(config_dict, AttrsUserConfig)
+            # Step 4: Parse into UserConfig using cattrs, skipped for configs
+            # already loaded in this session (the result is shared, read-only)
+            user_config: AttrsUserConfig = structure_user_config(config_dict)
             
             # Step 5: Convert UserConfig to UI state
             self._loader.load_user_config_into_ui(user_config, ui_state)
@@ -200,4 +230,20 @@ class UIStateBridge:
                     on_entry = custom[CustomScriptLifecycleTypes.ON_ENTRY]
                     if isinstance(on_entry, str):
                         # Convert string to single-element list
-                        config_dict[stage]['custom'][CustomScriptLifecycleTypes.ON_ENTRY] = [on_entry]
\ No newline at end of file
+                        config_dict[stage]['custom'][CustomScriptLifecycleTypes.ON_ENTRY] = [on_entry]
+
+
+def _uses_extends(file_path: str) -> bool:
+    """Whether an existing config file composes shared fragments."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return False
+    return isinstance(data, dict) and EXTENDS_KEY in data
+
+
+def _extends_error(file_path: str) -> str:
+    return (f"{file_path} uses '{EXTENDS_KEY}' to include shared config fragments. "
+            "The GUI cannot edit composed configs without dropping the fragments; "
+            "edit it in a text editor instead.")
@@ -0,0 +1,199 @@
+"""
+Dirty-tracked, atomic file writes for GUI saves.
+
+A GUI save used to rewrite ``user_config.yml`` and every inline script (and
+chmod them) each time, which takes seconds on network-mounted project
+directories. ``SaveTracker`` remembers a content hash and the on-disk stat of
+every file it wrote, plus a hash per top-level YAML section, and skips files
+whose content did not change and that nobody touched on disk since.
+
+Files that are written go through a temp file in the same directory followed
+by ``os.replace``, so an interrupted save never leaves a truncated file behind.
+Symlinks are followed (the link target is replaced, the link kept) and an
+existing file keeps its permissions, since ``user_config.yml`` may hold
+passwords and private keys.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from omegaconf import OmegaConf
+
+# Mode of newly created files (tempfile creates 0600); existing files keep theirs
+DEFAULT_FILE_MODE = 0o644
+EXECUTABLE_FILE_MODE = 0o755
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    """(mtime_ns, size, mode) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_mode & 0o777
+
+
+def _existing_mode(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write_bytes(path: str, data: bytes, mode: Optional[int] = None) -> None:
+    """Write a file via a temp file in the same directory and ``os.replace``.
+
+    A symlinked ``path`` is resolved first, so the link stays in place and
+    its target is replaced.
+
+    Args:
+        path: Destination path; parent directories are created
+        data: File content
+        mode: Permission bits of the written file; defaults to those of the
+            existing file, or DEFAULT_FILE_MODE for a new one
+    """
+    path = os.path.realpath(path)
+    if mode is None:
+        mode = _existing_mode(path)
+        if mode is None:
+            mode = DEFAULT_FILE_MODE
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@dataclass
+class SaveReport:
+    """What a save wrote and what it skipped."""
+
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    changed_sections: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        if not self.written:
+            return f'No changes to save ({len(self.unchanged)} file(s) up to date)'
+        names = ', '.join(os.path.basename(p) for p in self.written)
+        return f'Saved {len(self.written)} file(s): {names}'
+
+
+class SaveTracker:
+    """Remembers what was last written so unchanged files are not rewritten."""
+
+    def __init__(self) -> None:
+        # abs path -> (content hash, stat key right after our write)
+        self._files: Dict[str, Tuple[str, Optional[Tuple[int, int, int]]]] = {}
+        # abs yaml path -> {section name: hash}
+        self._sections: Dict[str, Dict[str, str]] = {}
+
+    def _is_current(self, path: str, digest: str, executable: bool) -> bool:
+        """Whether the file on disk already holds this content (and is executable)."""
+        stat_key = _stat_key(path)
+        if stat_key is None or (executable and not stat_key[2] & 0o100):
+            return False
+        known = self._files.get(path)
+        if known is not None and known[1] == stat_key:
+            return known[0] == digest
+        # not written by us, or touched since: compare with the actual content
+        with open(path, 'rb') as f:
+            on_disk = _hash(f.read())
+        if on_disk != digest:
+            return False
+        self._files[path] = (digest, stat_key)
+        return True
+
+    def write_if_changed(self, path: str, content: str, executable: bool = False,
+                         report: Optional[SaveReport] = None) -> bool:
+        """Atomically write a text file unless it already has this content.
+
+        Args:
+            path: Destination path
+            content: Text content
+            executable: Make the file executable (0755 when created, exec bits
+                added for each read bit otherwise); other files keep their mode
+            report: SaveReport to record the outcome in
+
+        Returns:
+            True if the file was written
+        """
+        path = os.path.abspath(path)
+        data = content.encode('utf-8')
+        digest = _hash(data)
+        if self._is_current(path, digest, executable):
+            if report is not None:
+                report.unchanged.append(path)
+            return False
+
+        mode = None
+        if executable:
+            existing = _existing_mode(path)
+            mode = EXECUTABLE_FILE_MODE if existing is None else existing | (existing & 0o444) >> 2
+        atomic_write_bytes(path, data, mode)
+        self._files[path] = (digest, _stat_key(path))
+        if report is not None:
+            report.written.append(path)
+        return True
+
+    def write_yaml_if_changed(self, path: str, config_dict: Dict[str, Any],
+                              report: Optional[SaveReport] = None) -> bool:
+        """Write a config dict as YAML if any top-level section changed.
+
+        Section hashes are taken over the plain data, so an unchanged config
+        is detected without serializing it to YAML.
+
+        Args:
+            path: Destination path of the YAML file
+            config_dict: Configuration to save
+            report: SaveReport to record the outcome and changed sections in
+
+        Returns:
+            True if the file was written
+        """
+        path = os.path.abspath(path)
+        section_hashes = {
+            str(name): _hash(json.dumps(value, sort_keys=True, default=str).encode('utf-8'))
+            for name, value in config_dict.items()
+        }
+        previous = self._sections.get(path, {})
+        changed = sorted(
+            name for name in set(section_hashes) | set(previous)
+            if section_hashes.get(name) != previous.get(name)
+        )
+
+        known = self._files.get(path)
+        if not changed and known is not None and known[1] == _stat_key(path):
+            if report is not None:
+                report.unchanged.append(path)
+            return False
+
+        content = OmegaConf.to_yaml(OmegaConf.create(config_dict))
+        written = self.write_if_changed(path, content, report=report)
+        self._sections[path] = section_hashes
+        if written and report is not None:
+            report.changed_sections.extend(changed)
+        return written
+
+    def forget(self) -> None:
+        """Drop all remembered hashes, e.g. when another project is loaded."""
+        self._files.clear()
+        self._sections.clear()
@@ -0,0 +1,124 @@
+"""
+Incremental, per-section validation of the UI state.
+
+Validating the whole ``AppUIState`` means building the complete attrs
+``UserConfig``, which gets slow with many SSH users, mounts and inline
+scripts. ``SectionValidator`` splits the state into sections (project, and
+per stage: ssh, network, environment, scripts, storage), builds only the
+attrs objects of a section, and caches the result under a fingerprint of the
+section's UI data. A section is revalidated only when its fingerprint
+changes, so editing one field re-runs the checks of one section.
+
+Cross-section checks still happen in the full validation that
+``UIStateBridge.save_to_yaml`` runs before saving.
+"""
+
+import dataclasses
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import attrs
+
+from pei_docker.user_config import StageConfig as AttrsStageConfig
+from pei_docker.webgui.models.ui_state import AppUIState, StageUI
+from pei_docker.webgui.utils.ui_state_bridge.builders import ConfigBuilder
+
+# (section key, UI data the section depends on, check raising on invalid data)
+_Section = Tuple[str, Tuple[Any, ...], Callable[[], None]]
+
+
+def _fingerprint(data: Tuple[Any, ...]) -> str:
+    """Cheap content fingerprint of bindable dataclasses (no attrs objects built)."""
+    return repr(tuple(dataclasses.asdict(item) if dataclasses.is_dataclass(item) else item for item in data))
+
+
+def _stage_sections(ui_stage: StageUI, stage_num: int) -> Iterator[_Section]:
+    prefix = f'stage_{stage_num}'
+
+    if stage_num == 1:
+        def _check_ssh() -> None:
+            ConfigBuilder.build_ssh_config(ui_stage.ssh, ui_stage.ssh.enabled)
+        yield f'{prefix}.ssh', (ui_stage.ssh,), _check_ssh
+
+    def _check_network() -> None:
+        proxy = ConfigBuilder.build_proxy_config(ui_stage.network.proxy_enabled, ui_stage.network.http_proxy)
+        apt = None
+        if stage_num == 1:
+            apt = ConfigBuilder.build_apt_config(ui_stage.network.apt_mirror, proxy is not None)
+        AttrsStageConfig(proxy=proxy, apt=apt, ports=ConfigBuilder.build_port_mappings(ui_stage.network.port_mappings))
+    yield f'{prefix}.network', (ui_stage.network,), _check_network
+
+    def _check_environment() -> None:
+        AttrsStageConfig(
+            environment=ui_stage.environment.env_vars or None,
+            device=ConfigBuilder.build_device_config(ui_stage.environment.device_type),
+        )
+    yield f'{prefix}.environment', (ui_stage.environment,), _check_environment
+
+    def _check_scripts() -> None:
+        ConfigBuilder.build_custom_scripts(ui_stage.scripts)
+    yield f'{prefix}.scripts', (ui_stage.scripts,), _check_scripts
+
+    def _check_storage() -> None:
+        AttrsStageConfig(
+            storage=ConfigBuilder.build_storage_config(ui_stage.storage) if stage_num == 2 else None,
+            mount=ConfigBuilder.build_mount_config(ui_stage.storage),
+        )
+    yield f'{prefix}.storage', (ui_stage.storage,), _check_storage
+
+
+def _sections(ui_state: AppUIState) -> Iterator[_Section]:
+    def _check_project() -> None:
+        ConfigBuilder.build_image_config(ui_state.project, 1)
+        ConfigBuilder.build_image_config(ui_state.project, 2)
+    yield 'project', (ui_state.project,), _check_project
+
+    yield from _stage_sections(ui_state.stage_1, 1)
+    yield from _stage_sections(ui_state.stage_2, 2)
+
+
+def _run_check(check: Callable[[], None]) -> List[str]:
+    # same error wording as UIStateBridge.validate_ui_state
+    try:
+        check()
+        return []
+    except (TypeError, ValueError, attrs.exceptions.NotAnAttrsClassError) as e:
+        return [f"Validation error: {str(e)}"]
+    except Exception as e:
+        return [f"Unexpected error: {str(e)}"]
+
+
+class SectionValidator:
+    """Validates UI state section by section, caching results per section."""
+
+    def __init__(self) -> None:
+        # section key -> (fingerprint, errors)
+        self._cache: Dict[str, Tuple[str, List[str]]] = {}
+
+    def validate(self, ui_state: AppUIState) -> Tuple[bool, List[str], List[str]]:
+        """Validate the sections whose UI data changed since the last call.
+
+        Args:
+            ui_state: AppUIState to validate
+
+        Returns:
+            Tuple of (is_valid, error_messages, revalidated_section_keys)
+        """
+        errors: List[str] = []
+        revalidated: List[str] = []
+        for key, data, check in _sections(ui_state):
+            fingerprint = _fingerprint(data)
+            cached = self._cache.get(key)
+            if cached is None or cached[0] != fingerprint:
+                cached = (fingerprint, _run_check(check))
+                self._cache[key] = cached
+                revalidated.append(key)
+            errors.extend(cached[1])
+        return not errors, errors, revalidated
+
+    def section_errors(self) -> Dict[str, List[str]]:
+        """Cached errors per section key, from the last validate() call."""
+        return {key: list(errors) for key, (_, errors) in self._cache.items() if errors}
+
+    def clear(self) -> None:
+        """Drop all cached results."""
+        self._cache.clear()
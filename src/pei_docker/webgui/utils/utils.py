@@ -3,247 +3,373 @@ Utility functions for PeiDocker Web GUI.
 
 This module provides utility classes for project management and
 integration with the existing PeiDocker CLI commands.
+
+Project creation and configuration run in-process through
+``create_project_direct`` and ``configure_project_direct`` on a small
+shared thread pool, so the asyncio event loop stays responsive and no
+interpreter is started per click. Log records emitted by a task's worker
+thread and its phase changes are forwarded to callbacks on the event loop
+while the task runs.
+
+Each browser gets its own ``PeiDockerWebGUI`` (UI state, validation cache,
+save tracker) from a ``SessionRegistry``, which caps the number of sessions
+kept in memory and evicts those idle since their last client disconnected.
 """
 
 import asyncio
+import logging
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-import yaml
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
 
+from pei_docker.pei_utils_configure import configure_project_direct
+from pei_docker.pei_utils_create import create_project_direct, write_usage_guide
+from pei_docker.webgui.constants import ExportSettings, SessionSettings, TaskLimits
 
-class ProjectManager:
-    """Manages PeiDocker project operations."""
+T = TypeVar('T')
+
+# Receives one formatted log line, or one phase name, on the event loop
+LineCallback = Callable[[str], None]
+
+
+class _ThreadLogHandler(logging.Handler):
+    """Forward log records of one thread to a callback on an event loop."""
     
-    def __init__(self) -> None:
-        self._cli_available: Optional[bool] = None
+    def __init__(self, thread_id: int, loop: asyncio.AbstractEventLoop, callback: LineCallback) -> None:
+        super().__init__(level=logging.INFO)
+        self.setFormatter(logging.Formatter('[%(levelname)s]\t%(message)s'))
+        self._thread_id = thread_id
+        self._loop = loop
+        self._callback = callback
     
-    async def check_cli_availability(self) -> bool:
-        """Check if pei-docker-cli is available."""
-        if self._cli_available is not None:
-            return self._cli_available
-        
+    def emit(self, record: logging.LogRecord) -> None:
+        # the root logger is shared by all tasks, only forward our own records
+        if record.thread != self._thread_id:
+            return
         try:
-            process = await asyncio.create_subprocess_exec(
-                'pei-docker-cli', '--version',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            self._cli_available = process.returncode == 0
-            return self._cli_available
-            
-        except FileNotFoundError:
-            self._cli_available = False
-            return False
-        except Exception:
-            self._cli_available = False
-            return False
+            self._loop.call_soon_threadsafe(self._callback, self.format(record))
+        except RuntimeError:
+            # event loop closed while the task was still running
+            pass
+
+
+class Debouncer:
+    """Run a callback once changes have paused for ``delay`` seconds."""
     
-    async def create_project(self, project_dir: Path) -> bool:
-        """Create a new PeiDocker project using CLI or fallback."""
-        try:
-            # Check if directory exists and is empty
-            if project_dir.exists():
-                if any(project_dir.iterdir()):
-                    raise ValueError(f"Directory {project_dir} is not empty")
-            else:
-                project_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Check if CLI is available
-            if await self.check_cli_availability():
-                # Use CLI
-                return await self._create_project_with_cli(project_dir)
-            else:
-                # Use fallback method
-                return await self._create_project_fallback(project_dir)
-                
-        except Exception as e:
-            print(f"Error creating project: {e}")
-            return False
+    def __init__(self, delay: float, callback: Callable[[], None]) -> None:
+        self._delay = delay
+        self._callback = callback
+        self._handle: Optional[asyncio.TimerHandle] = None
     
-    async def _create_project_with_cli(self, project_dir: Path) -> bool:
-        """Create project using pei-docker-cli."""
-        try:
-            cmd = ['pei-docker-cli', 'create', '-p', str(project_dir)]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=project_dir.parent
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode == 0:
-                return True
-            else:
-                print(f"CLI project creation failed: {stderr.decode()}")
-                # Try fallback method
-                return await self._create_project_fallback(project_dir)
-                
-        except Exception as e:
-            print(f"Error with CLI project creation: {e}")
-            # Try fallback method
-            return await self._create_project_fallback(project_dir)
+    @property
+    def pending(self) -> bool:
+        """Whether a call is scheduled."""
+        return self._handle is not None
     
-    async def _create_project_fallback(self, project_dir: Path) -> bool:
-        """Create basic project structure without CLI."""
+    def trigger(self) -> None:
+        """(Re)start the quiet period; without a running event loop, call right away."""
         try:
-            # Create basic project structure
-            project_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Create basic user_config.yml
-            config_file = project_dir / 'user_config.yml'
-            basic_config = {
-                'stage_1': {
-                    'image': {
-                        'base': 'ubuntu:22.04',
-                        'output': f'{project_dir.name}:stage-1'
-                    }
-                },
-                'stage_2': {
-                    'image': {
-                        'output': f'{project_dir.name}:stage-2'
-                    }
-                }
-            }
-            
-            with open(config_file, 'w') as f:
-                yaml.dump(basic_config, f, default_flow_style=False, sort_keys=False, indent=2)
-            
-            # Create basic directory structure
-            (project_dir / 'stage-1' / 'custom').mkdir(parents=True, exist_ok=True)
-            (project_dir / 'stage-2' / 'custom').mkdir(parents=True, exist_ok=True)
-            (project_dir / 'installation').mkdir(parents=True, exist_ok=True)
-            
-            # Create placeholder Dockerfiles
-            stage1_dockerfile = project_dir / 'stage-1.Dockerfile'
-            stage1_dockerfile.write_text("# PeiDocker Stage-1 Dockerfile\n# This will be generated by pei-docker-cli configure\n")
-            
-            stage2_dockerfile = project_dir / 'stage-2.Dockerfile' 
-            stage2_dockerfile.write_text("# PeiDocker Stage-2 Dockerfile\n# This will be generated by pei-docker-cli configure\n")
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error in fallback project creation: {e}")
-            return False
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._callback()
+            return
+        self.cancel()
+        self._handle = loop.call_later(self._delay, self._fire)
     
-    async def configure_project(self, project_dir: Path) -> bool:
-        """Configure a PeiDocker project using CLI or fallback."""
-        try:
-            # Check if CLI is available
-            if await self.check_cli_availability():
-                return await self._configure_project_with_cli(project_dir)
-            else:
-                return await self._configure_project_fallback(project_dir)
-                
-        except Exception as e:
-            print(f"Error configuring project: {e}")
-            return False
+    def flush(self) -> None:
+        """Run a pending call now."""
+        if self._handle is not None:
+            self.cancel()
+            self._callback()
     
-    async def _configure_project_with_cli(self, project_dir: Path) -> bool:
-        """Configure project using pei-docker-cli."""
-        try:
-            cmd = ['pei-docker-cli', 'configure', '-p', str(project_dir)]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=project_dir
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode == 0:
-                return True
-            else:
-                print(f"CLI project configuration failed: {stderr.decode()}")
-                # Try fallback method
-                return await self._configure_project_fallback(project_dir)
-                
-        except Exception as e:
-            print(f"Error with CLI project configuration: {e}")
-            # Try fallback method
-            return await self._configure_project_fallback(project_dir)
+    def cancel(self) -> None:
+        """Drop a pending call."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
     
-    async def _configure_project_fallback(self, project_dir: Path) -> bool:
-        """Configure project without CLI - basic validation and setup."""
-        try:
-            # Check if user_config.yml exists
-            config_file = project_dir / 'user_config.yml'
-            if not config_file.exists():
-                print("No user_config.yml found - cannot configure project")
-                return False
-            
-            # Validate the configuration file is valid YAML
-            with open(config_file, 'r') as f:
-                try:
-                    yaml.safe_load(f)
-                except yaml.YAMLError as e:
-                    print(f"Invalid YAML in user_config.yml: {e}")
-                    return False
-            
-            # Update Dockerfile placeholders with basic content
-            stage1_dockerfile = project_dir / 'stage-1.Dockerfile'
-            if stage1_dockerfile.exists():
-                # Read current config to get base image
-                with open(config_file, 'r') as f:
-                    config = yaml.safe_load(f) or {}
-                
-                base_image = config.get('stage_1', {}).get('image', {}).get('base', 'ubuntu:22.04')
-                
-                basic_dockerfile_content = f'''# PeiDocker Stage-1 Dockerfile (Fallback Mode)
-FROM {base_image}
+    def _fire(self) -> None:
+        self._handle = None
+        self._callback()
 
-# Basic setup - full configuration requires pei-docker-cli
-RUN apt-get update && apt-get install -y \\
-    curl \\
-    wget \\
-    vim \\
-    && rm -rf /var/lib/apt/lists/*
 
-# Note: This is a fallback Dockerfile. 
-# Install pei-docker-cli and run 'pei-docker-cli configure' for full functionality.
-'''
-                
-                stage1_dockerfile.write_text(basic_dockerfile_content)
-            
-            # Create basic docker-compose.yml
-            compose_file = project_dir / 'docker-compose.yml'
-            if not compose_file.exists():
-                compose_content = f'''# PeiDocker docker-compose.yml (Fallback Mode)
-version: '3.8'
+class ExportStore:
+    """Temporary export archives waiting to be downloaded.
+    
+    Each export gets an unguessable token and a file in a private temp dir.
+    The file is removed once it has been served, when it is older than the
+    TTL (downloads that never happened), or on cleanup().
+    """
+    
+    def __init__(self, ttl_seconds: float = ExportSettings.TTL_SECONDS) -> None:
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._dir: Optional[str] = None
+        # token -> (path, download filename, creation time)
+        self._entries: Dict[str, Tuple[str, str, float]] = {}
+    
+    def reserve(self, filename: str) -> Tuple[str, str]:
+        """Return (token, path) for a new archive to be downloaded as ``filename``."""
+        self.sweep()
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            if self._dir is None or not os.path.isdir(self._dir):
+                self._dir = tempfile.mkdtemp(prefix='pei-export-')
+            path = os.path.join(self._dir, f'{token}.zip')
+            self._entries[token] = (path, filename, time.monotonic())
+        return token, path
+    
+    def get(self, token: str) -> Optional[Tuple[str, str]]:
+        """Return (path, filename) of a ready archive, or None."""
+        with self._lock:
+            entry = self._entries.get(token)
+        if entry is None or not os.path.isfile(entry[0]):
+            return None
+        return entry[0], entry[1]
+    
+    def discard(self, token: str) -> None:
+        """Forget an archive and delete its file."""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        if entry is not None:
+            try:
+                os.remove(entry[0])
+            except FileNotFoundError:
+                pass
+    
+    def sweep(self) -> None:
+        """Delete archives older than the TTL."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [t for t, (_, _, created) in self._entries.items() if now - created > self._ttl]
+        for token in expired:
+            self.discard(token)
+    
+    def cleanup(self) -> None:
+        """Delete all archives and the temp dir."""
+        with self._lock:
+            self._entries.clear()
+            temp_dir, self._dir = self._dir, None
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
-services:
-  stage-1:
-    build:
-      context: .
-      dockerfile: stage-1.Dockerfile
-    image: {project_dir.name}:stage-1
-    
-  stage-2:
-    build:
-      context: .
-      dockerfile: stage-2.Dockerfile
-    image: {project_dir.name}:stage-2
-    depends_on:
-      - stage-1
 
-# Note: This is a basic docker-compose.yml. 
-# Install pei-docker-cli and run 'pei-docker-cli configure' for full functionality.
-'''
-                compose_file.write_text(compose_content)
-            
+class SessionRegistry(Generic[T]):
+    """Per-client session objects with a size cap and idle eviction.
+    
+    Sessions are kept in least-recently-used order. A session with connected
+    clients is never idle; once its last client disconnects it is evicted
+    after ``idle_seconds``. When more than ``max_sessions`` exist, the least
+    recently used disconnected sessions are evicted; sessions with connected
+    clients are never evicted, so the registry may go over the cap until
+    some of them disconnect. ``on_evict`` is called with evicted sessions.
+    """
+    
+    def __init__(self, factory: Callable[[], T], max_sessions: int = SessionSettings.MAX_SESSIONS,
+                 idle_seconds: float = SessionSettings.IDLE_SECONDS,
+                 on_evict: Optional[Callable[[T], None]] = None) -> None:
+        self._factory = factory
+        self._max = max_sessions
+        self._idle = idle_seconds
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        # session id -> [session, connected clients, last activity]
+        self._sessions: 'OrderedDict[str, List[Any]]' = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._sessions
+    
+    def open(self, session_id: str) -> T:
+        """Return the session for a page load, creating it if needed."""
+        evicted = self._evict(time.monotonic())
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = [self._factory(), 0, 0.0]
+                self._sessions[session_id] = entry
+            entry[2] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            evicted += self._evict_overflow(keep=session_id)
+        self._notify(evicted)
+        return entry[0]
+    
+    def connect(self, session_id: str) -> None:
+        """Record that a client of the session connected (or reconnected)."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[1] += 1
+                entry[2] = time.monotonic()
+    
+    def disconnect(self, session_id: str) -> None:
+        """Record that a client of the session went away; the idle timer starts at zero clients."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[1] = max(0, entry[1] - 1)
+                entry[2] = time.monotonic()
+    
+    def touch(self, session_id: str) -> None:
+        """Record activity in a session."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[2] = time.monotonic()
+                self._sessions.move_to_end(session_id)
+    
+    def evict_idle(self) -> int:
+        """Evict disconnected sessions idle for longer than the limit; return how many."""
+        evicted = self._evict(time.monotonic())
+        self._notify(evicted)
+        return len(evicted)
+    
+    def _evict(self, now: float) -> List[T]:
+        with self._lock:
+            expired = [sid for sid, (_, clients, last) in self._sessions.items()
+                       if clients == 0 and now - last > self._idle]
+            return [self._sessions.pop(sid)[0] for sid in expired]
+    
+    def _evict_overflow(self, keep: str) -> List[T]:
+        # caller holds the lock; the session being opened is never the victim
+        evicted: List[T] = []
+        while len(self._sessions) > max(self._max, 1):
+            victim = next((sid for sid, entry in self._sessions.items() if sid != keep and entry[1] == 0), None)
+            if victim is None:
+                logging.warning(f'{len(self._sessions)} GUI sessions exceed the limit of {self._max}, '
+                                f'but all others have connected clients; keeping them')
+                break
+            evicted.append(self._sessions.pop(victim)[0])
+        return evicted
+    
+    def _notify(self, evicted: List[T]) -> None:
+        for session in evicted:
+            if self._on_evict is not None:
+                self._on_evict(session)
+        if evicted:
+            logging.info(f'Evicted {len(evicted)} GUI session(s), {len(self._sessions)} active')
+
+
+class ProjectManager:
+    """Manages PeiDocker project operations."""
+    
+    def __init__(self, max_workers: int = TaskLimits.MAX_CONCURRENT_TASKS) -> None:
+        # bounded: at most max_workers tasks run at once, the rest wait in order
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pei-gui-task')
+    
+    async def run_task(self, func: Callable[..., Any], *args: Any,
+                       on_log: Optional[LineCallback] = None, **kwargs: Any) -> Any:
+        """
+        Run a blocking project function on the worker pool.
+        
+        Parameters
+        ----------
+        func : callable
+            Function to run, e.g. ``configure_project_direct``.
+        *args, **kwargs
+            Arguments passed to ``func``.
+        on_log : callable, optional
+            Called on the event loop with each log line ``func`` emits,
+            including the error that ends a failed run. Records below the
+            root logger's level are not forwarded.
+        
+        Returns
+        -------
+        Any
+            The return value of ``func``; its exceptions are re-raised.
+        """
+        loop = asyncio.get_running_loop()
+        
+        def _target() -> Any:
+            handler = None
+            if on_log is not None:
+                handler = _ThreadLogHandler(threading.get_ident(), loop, on_log)
+                logging.getLogger().addHandler(handler)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                logging.error(str(e))
+                raise
+            finally:
+                if handler is not None:
+                    logging.getLogger().removeHandler(handler)
+        
+        return await loop.run_in_executor(self._executor, _target)
+    
+    @staticmethod
+    def threadsafe(callback: Callable[..., None]) -> Callable[..., None]:
+        """Wrap a callback so worker threads can call it; it runs on the current event loop."""
+        loop = asyncio.get_running_loop()
+        
+        def _call(*args: Any) -> None:
+            loop.call_soon_threadsafe(callback, *args)
+        return _call
+    
+    async def create_project(self, project_dir: Path, quick: Optional[str] = 'minimal',
+                             with_examples: bool = True,
+                             on_log: Optional[LineCallback] = None) -> bool:
+        """Create a new PeiDocker project in-process."""
+        # Check if directory exists and is empty
+        if project_dir.exists() and any(project_dir.iterdir()):
+            message = f"Directory {project_dir} is not empty"
+            if on_log is not None:
+                on_log(f'[ERROR]\t{message}')
+            print(f"Error creating project: {message}")
+            return False
+        
+        def _create() -> None:
+            create_project_direct(str(project_dir), with_examples=with_examples, quick=quick)
+            write_usage_guide(str(project_dir))
+        
+        try:
+            await self.run_task(_create, on_log=on_log)
+            return True
+        except Exception as e:
+            print(f"Error creating project: {e}")
+            return False
+    
+    async def configure_project(self, project_dir: Path,
+                                on_log: Optional[LineCallback] = None,
+                                on_progress: Optional[LineCallback] = None) -> bool:
+        """
+        Configure a PeiDocker project in-process.
+        
+        Parameters
+        ----------
+        project_dir : Path
+            Project directory containing user_config.yml.
+        on_log : callable, optional
+            Receives each log line as it is emitted.
+        on_progress : callable, optional
+            Receives each phase name of ``CONFIGURE_PHASES`` as it starts.
+        
+        Returns
+        -------
+        bool
+            True if docker-compose.yml was generated.
+        """
+        progress = self.threadsafe(on_progress) if on_progress is not None else None
+        try:
+            await self.run_task(configure_project_direct, str(project_dir),
+                                progress=progress, on_log=on_log)
             return True
-            
         except Exception as e:
-            print(f"Error in fallback project configuration: {e}")
+            print(f"Error configuring project: {e}")
             return False
     
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running tasks."""
+        self._executor.shutdown(wait=True)
+    
     def validate_project_directory(self, project_dir: Path) -> bool:
         """Validate if a directory is a valid PeiDocker project."""
         if not project_dir.exists():
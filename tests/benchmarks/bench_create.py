@@ -0,0 +1,88 @@
+"""
+Benchmark `pei-docker-cli create` modes: copy, packed archive and --link.
+
+Creates N projects per mode and reports wall time per project and the disk
+space the projects add (allocated blocks of inodes that are not shared with
+the installed package; reflinked files still count as allocated because
+shared extents are not visible from stat).
+
+Usage::
+
+    python tests/benchmarks/bench_create.py --count 50
+    python tests/benchmarks/bench_create.py --count 50 --work-dir ./tmp/bench-create
+
+Hardlinks only work when the work dir is on the same filesystem as the
+installed package; use --work-dir to place it there.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pei_docker
+from pei_docker.pei_utils_create import create_project_direct
+from pei_docker.template_pack import pack_project_template
+
+PACKAGE_DIR = Path(pei_docker.__file__).resolve().parent
+
+
+def _inodes(root: Path) -> dict[tuple[int, int], int]:
+    result = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            st = os.lstat(os.path.join(dirpath, name))
+            result[(st.st_dev, st.st_ino)] = st.st_blocks * 512
+    return result
+
+
+def _run_mode(mode: str, count: int, work_dir: Path, archive: Path) -> tuple[float, int]:
+    root = Path(tempfile.mkdtemp(prefix=f"bench-{mode}-", dir=work_dir))
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            create_project_direct(
+                str(root / f"p{i}"),
+                with_examples=True,
+                quick="minimal",
+                link=mode == "link",
+                template_archive=str(archive) if mode == "packed" else None,
+            )
+        elapsed = time.perf_counter() - start
+        package_inodes = _inodes(PACKAGE_DIR)
+        added = sum(size for key, size in _inodes(root).items() if key not in package_inodes)
+        return elapsed, added
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20, help="projects to create per mode")
+    parser.add_argument("--work-dir", type=Path, default=None, help="where to create the projects")
+    parser.add_argument("--modes", default="copy,packed,link", help="comma separated modes to run")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    work_dir = args.work_dir or Path(tempfile.gettempdir())
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "project-files.tar"
+        pack_project_template(str(PACKAGE_DIR), str(archive))
+
+        print(f"{'mode':<8}{'ms/project':>12}{'MB added':>12}{'MB/project':>12}")
+        for mode in args.modes.split(","):
+            elapsed, added = _run_mode(mode.strip(), args.count, work_dir, archive)
+            print(
+                f"{mode:<8}{elapsed / args.count * 1000:>12.1f}"
+                f"{added / 1e6:>12.2f}{added / args.count / 1e6:>12.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Headless load test of the web GUI session layer.
+
+Simulates N browser clients on one asyncio event loop, as the NiceGUI server
+runs them. Each client has its own session from a ``SessionRegistry``. It
+edits fields (SSH users, environment variables, an inline script), triggers
+the incremental validation like a debounced field change, and saves to its
+own project directory every few edits. The benchmark reports latency
+percentiles per operation and checks that no client saw another's state.
+
+Usage::
+
+    python tests/benchmarks/bench_gui_sessions.py --clients 32 --edits 50
+    python tests/benchmarks/bench_gui_sessions.py --clients 64 --max-sessions 16 --think-ms 5
+
+With ``--max-sessions`` below ``--clients``, disconnected sessions get
+evicted and reopened, which shows up as extra ``open`` samples.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from omegaconf import OmegaConf
+
+from pei_docker.webgui.app import PeiDockerWebGUI
+from pei_docker.webgui.constants import ScriptTypes
+from pei_docker.webgui.utils.ui_state_bridge import SaveReport
+from pei_docker.webgui.utils.utils import ProjectManager, SessionRegistry
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _edit(gui: PeiDockerWebGUI, client: int, step: int, rng: random.Random) -> None:
+    state = gui.ui_state
+    kind = rng.choice(("env", "ssh", "script"))
+    if kind == "env":
+        state.stage_2.environment.env_vars[f"VAR_{step % 8}"] = f"{client}-{step}"
+    elif kind == "ssh":
+        state.stage_1.ssh.users.append({"name": f"user{step}", "password": f"pw{client:04d}{step}"})
+        if len(state.stage_1.ssh.users) > 4:
+            state.stage_1.ssh.users.pop(1)
+    else:
+        scripts = state.stage_1.scripts.lifecycle_scripts.setdefault("on_build", [])
+        if not scripts:
+            scripts.append({"type": ScriptTypes.INLINE, "name": "stage-1/custom/gen.sh", "content": ""})
+        scripts[0]["content"] = f"echo client {client} step {step}\n"
+    state.mark_modified()
+    gui.bridge.validate_sections(state)
+
+
+async def _save(gui: PeiDockerWebGUI, project_dir: Path) -> SaveReport:
+    report = SaveReport()
+    ok, errors = gui.bridge.save_to_yaml(gui.ui_state, str(project_dir / "user_config.yml"), report=report)
+    if not ok:
+        raise RuntimeError(f"save failed: {errors}")
+    await gui._save_inline_scripts(project_dir, report)
+    gui.ui_state.mark_saved()
+    return report
+
+
+async def _client(client: int, args: argparse.Namespace, sessions: SessionRegistry[PeiDockerWebGUI],
+                  root: Path, samples: dict[str, list[float]]) -> None:
+    rng = random.Random(client)
+    session_id = f"browser-{client}"
+    project_dir = root / f"client-{client}"
+
+    def open_session() -> PeiDockerWebGUI:
+        start = time.perf_counter()
+        gui = sessions.open(session_id)
+        sessions.connect(session_id)
+        samples["open"].append(time.perf_counter() - start)
+        if not gui.ui_state.project.project_name:
+            gui.ui_state.project.project_name = f"client-{client}"
+            gui.ui_state.project.project_directory = str(project_dir)
+        return gui
+
+    gui = open_session()
+    for step in range(args.edits):
+        await asyncio.sleep(rng.uniform(0, 2 * args.think_ms) / 1000)
+        if session_id not in sessions:
+            gui = open_session()  # evicted while "away"; the browser reloads
+
+        start = time.perf_counter()
+        _edit(gui, client, step, rng)
+        samples["edit"].append(time.perf_counter() - start)
+
+        if (step + 1) % args.save_every == 0:
+            start = time.perf_counter()
+            await _save(gui, project_dir)
+            samples["save"].append(time.perf_counter() - start)
+
+        if rng.random() < args.disconnect_rate:
+            # the tab goes away for a while, its session may be evicted
+            sessions.disconnect(session_id)
+            await asyncio.sleep(args.think_ms / 1000)
+            gui = open_session()
+
+    start = time.perf_counter()
+    await _save(gui, project_dir)
+    samples["save"].append(time.perf_counter() - start)
+    sessions.disconnect(session_id)
+
+
+async def _run(args: argparse.Namespace, root: Path) -> dict[str, list[float]]:
+    pool = ProjectManager(max_workers=1)
+    sessions: SessionRegistry[PeiDockerWebGUI] = SessionRegistry(
+        lambda: PeiDockerWebGUI(project_manager=pool),
+        max_sessions=args.max_sessions,
+        idle_seconds=args.idle_seconds,
+        on_evict=lambda gui: gui.close(),
+    )
+    samples: dict[str, list[float]] = {"open": [], "edit": [], "save": []}
+    try:
+        await asyncio.gather(*(_client(i, args, sessions, root, samples) for i in range(args.clients)))
+        samples["sessions_left"] = [float(len(sessions))]
+    finally:
+        pool.shutdown()
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--edits", type=int, default=40, help="edits per client")
+    parser.add_argument("--save-every", type=int, default=10, help="save after this many edits")
+    parser.add_argument("--think-ms", type=float, default=2.0, help="mean pause between edits")
+    parser.add_argument("--disconnect-rate", type=float, default=0.05, help="chance per edit that the tab goes away")
+    parser.add_argument("--max-sessions", type=int, default=32)
+    parser.add_argument("--idle-seconds", type=float, default=1800.0)
+    parser.add_argument("--work-dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench-gui-", dir=args.work_dir))
+    try:
+        start = time.perf_counter()
+        samples = asyncio.run(_run(args, root))
+        elapsed = time.perf_counter() - start
+
+        # every client must find only its own data in its saved config
+        leaked = 0
+        for i in range(args.clients):
+            conf = OmegaConf.load(root / f"client-{i}" / "user_config.yml")
+            env = OmegaConf.to_container(conf).get("stage_2", {}).get("environment") or {}
+            leaked += any(not str(v).startswith(f"{i}-") for v in env.values())
+
+        print(f"{args.clients} clients x {args.edits} edits in {elapsed:.2f}s, "
+              f"{int(samples.pop('sessions_left')[0])} sessions left in memory")
+        print(f"{'op':<6} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'mean ms':>8}")
+        for op, values in samples.items():
+            if not values:
+                continue
+            ms = [v * 1000 for v in values]
+            print(f"{op:<6} {len(ms):>6} {_percentile(ms, 0.5):>8.2f} {_percentile(ms, 0.9):>8.2f} "
+                  f"{_percentile(ms, 0.99):>8.2f} {max(ms):>8.2f} {statistics.fmean(ms):>8.2f}")
+        print(f"clients with foreign state: {leaked}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark the LiteLLM shim proxy under concurrent clients.
+
+Starts a stub upstream (tests/llm_stub.py) that answers chat completions
+after a fixed delay, runs ``proxy.py`` as a subprocess in front of it and
+drives it with N client threads, each on its own keep-alive connection.
+Reports throughput, latency percentiles and how many upstream connections
+the proxy opened.
+
+Usage::
+
+    python tests/benchmarks/bench_litellm_proxy.py --clients 32 --requests 50
+    # compare with another version of the proxy, e.g. the one from an older commit
+    git show <commit>:src/pei_docker/project_files/installation/stage-1/system/litellm/proxy.py > /tmp/proxy_old.py
+    python tests/benchmarks/bench_litellm_proxy.py --proxy /tmp/proxy_old.py
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from tests.llm_stub import PROXY_PATH, StubUpstream, free_port, wait_listening  # noqa: E402
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _client(port: int, n: int, payload: bytes, latencies: list[float], errors: list[str]) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    for _ in range(n):
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/v1/chat/completions", body=payload,
+                         headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(str(resp.status))
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="upstream processing time per request")
+    parser.add_argument("--payload-kb", type=int, default=4, help="request body size")
+    parser.add_argument("--proxy", type=Path, default=PROXY_PATH, help="proxy.py to benchmark")
+    args = parser.parse_args()
+
+    upstream = StubUpstream(delay=args.delay_ms / 1000).start()
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), LITELLM_URL=upstream.url)
+    proc = subprocess.Popen([sys.executable, str(args.proxy)], env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_listening(port)
+        payload = json.dumps({"messages": [{"role": "user", "content": "x" * (args.payload_kb * 1024)}]}).encode()
+        latencies: list[float] = []
+        errors: list[str] = []
+        threads = [
+            threading.Thread(target=_client, args=(port, args.requests, payload, latencies, errors))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+        upstream.stop()
+
+    ms = [v * 1000 for v in latencies]
+    print(f"proxy: {args.proxy}")
+    print(f"{args.clients} clients x {args.requests} requests, upstream delay {args.delay_ms:.0f} ms")
+    print(f"throughput: {len(ms) / elapsed:.1f} req/s ({len(ms)} ok, {len(errors)} errors in {elapsed:.2f}s)")
+    if ms:
+        print(f"latency ms: p50 {_percentile(ms, 0.5):.1f}  p90 {_percentile(ms, 0.9):.1f}  "
+              f"p99 {_percentile(ms, 0.99):.1f}  max {max(ms):.1f}")
+    print(f"upstream connections opened: {upstream.connections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure time-to-first-token through the LiteLLM shim proxy.
+
+A stub upstream (tests/llm_stub.py) streams a chat completion as server-sent
+events, one token every ``--token-ms``. The benchmark requests it directly
+and through ``proxy.py`` (run as a subprocess) and reports the time until
+the first ``data:`` event reaches the client and until the stream ends.
+
+Usage::
+
+    python tests/benchmarks/bench_litellm_ttft.py --tokens 40 --token-ms 25
+    python tests/benchmarks/bench_litellm_ttft.py --proxy /tmp/proxy_old.py
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from tests.llm_stub import PROXY_PATH, StubUpstream, free_port, wait_listening  # noqa: E402
+
+
+def _stream_once(port: int, payload: bytes) -> tuple[float, float]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    start = time.perf_counter()
+    conn.request("POST", "/v1/chat/completions", body=payload, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    first = None
+    while True:
+        line = resp.readline()
+        if not line:
+            break
+        if first is None and line.startswith(b"data: "):
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    conn.close()
+    return first if first is not None else total, total
+
+
+def _measure(port: int, payload: bytes, runs: int) -> tuple[float, float]:
+    samples = [_stream_once(port, payload) for _ in range(runs)]
+    return statistics.median(s[0] for s in samples), statistics.median(s[1] for s in samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=float, default=25.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--proxy", type=Path, default=PROXY_PATH, help="proxy.py to benchmark")
+    args = parser.parse_args()
+
+    upstream = StubUpstream(tokens=args.tokens, token_delay=args.token_ms / 1000).start()
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), LITELLM_URL=upstream.url)
+    proc = subprocess.Popen([sys.executable, str(args.proxy)], env=env, stderr=subprocess.DEVNULL)
+    payload = json.dumps({"stream": True, "messages": [{"role": "user", "content": "hi"}]}).encode()
+    try:
+        wait_listening(port)
+        direct = _measure(upstream.server_address[1], payload, args.runs)
+        proxied = _measure(port, payload, args.runs)
+    finally:
+        proc.terminate()
+        proc.wait()
+        upstream.stop()
+
+    print(f"proxy: {args.proxy}")
+    print(f"{args.tokens} events, one every {args.token_ms:.0f} ms, median of {args.runs} runs")
+    print(f"{'':<8} {'TTFT ms':>9} {'total ms':>9}")
+    for name, (ttft, total) in (("direct", direct), ("proxy", proxied)):
+        print(f"{name:<8} {ttft * 1000:>9.1f} {total * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
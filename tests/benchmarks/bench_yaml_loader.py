@@ -0,0 +1,83 @@
+"""
+Benchmark the duplicate-key-checking YAML loader: libyaml (``CSafeLoader``)
+against the pure-Python ``SafeLoader`` on a generated config of about 1 MB.
+
+Parse times exclude ``OmegaConf.create``, which is reported separately as
+part of the end-to-end load. The generated config has many stages' worth of
+mounts, environment entries and custom script lists, shaped like a large
+user_config.yml.
+
+Usage::
+
+    python tests/benchmarks/bench_yaml_loader.py
+    python tests/benchmarks/bench_yaml_loader.py --size-mb 4 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import yaml
+
+from pei_docker import pei_utils
+
+
+def _write_config(path: Path, size_mb: float) -> None:
+    target = int(size_mb * 1024 * 1024)
+    lines = ["stage_1:", "  image:", "    base: ubuntu:24.04", "    output: bench:stage-1"]
+    size = sum(len(line) + 1 for line in lines)
+    block = 0
+    while size < target:
+        chunk = [
+            f"  environment_{block}:",
+            *[f"    VAR_{block}_{i}: 'value-{i}-${{HOME:-/root}}'" for i in range(20)],
+            f"  mount_{block}:",
+            *[f"    m{i}:\n      type: auto-volume\n      dst_path: /data/{block}/{i}" for i in range(10)],
+            f"  on_build_{block}:",
+            *[f"    - 'stage-1/custom/script-{i}.sh --name=\"x{i}\" --flag'" for i in range(10)],
+        ]
+        lines.extend(chunk)
+        size += sum(len(line) + 1 for line in chunk)
+        block += 1
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=1.0, help="size of the generated config")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per loader; the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-yaml-") as tmp:
+        path = Path(tmp) / "user_config.yml"
+        _write_config(path, args.size_mb)
+        print(f"config: {os.path.getsize(path) / 1024 / 1024:.2f} MB, libyaml: {yaml.__with_libyaml__}")
+        text = path.read_text(encoding="utf-8")
+        loaders = [pei_utils._NoDuplicatePySafeLoader]
+        if yaml.__with_libyaml__:
+            loaders.append(pei_utils._NoDuplicateSafeLoader)
+        baseline = None
+        for loader in loaders:
+            parse = _best_of(args.repeat, lambda: yaml.load(text, Loader=loader))
+            baseline = baseline or parse
+            print(f"{loader.__bases__[0].__name__:>12}: parse {parse * 1000:8.1f} ms ({baseline / parse:.1f}x)")
+        # what configure pays end to end, including OmegaConf.create
+        total = _best_of(args.repeat, lambda: pei_utils.load_yaml_file_with_duplicate_key_check(str(path)))
+        print(f"{'total':>12}: {total * 1000:8.1f} ms with the default loader")
+
+
+if __name__ == "__main__":
+    main()
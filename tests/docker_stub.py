@@ -0,0 +1,128 @@
+"""
+Stub Docker daemon serving a subset of the Engine API over a unix socket.
+
+Used by the tests of ``pei_docker.docker_engine`` and of the remove/prune
+commands, so they exercise real HTTP-over-unix-socket traffic without a
+Docker installation.
+"""
+from __future__ import annotations
+
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class StubDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, StubHandler)
+        self.connections = 0
+        self.requests: list[tuple[str, str]] = []
+        self.containers = {"c1": "app:stage-1", "c2": "app:stage-1", "c3": "other:latest"}
+        self.images = {"app:stage-1", "other:latest"}
+        self.fail_stop = {"c2"}
+        self.volumes: set[str] = set()
+        self.system_df: dict[str, Any] = {}
+        self.pruned_cache_ids: list[str] = []
+        self.lock = threading.Lock()
+
+    def start(self) -> "StubDaemon":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubDaemon
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def address_string(self) -> str:
+        return "stub"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(self, status: int, payload: object = None) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, method: str) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        with self.server.lock:
+            self.server.requests.append((method, path))
+        srv = self.server
+
+        if method == "GET" and path == "/_ping":
+            body = b"OK"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif method == "GET" and path == "/containers/json":
+            ancestor = json.loads(query.get("filters", ["{}"])[0]).get("ancestor", [None])[0]
+            ids = [cid for cid, img in srv.containers.items() if ancestor in (None, img)]
+            self._send(200, [{"Id": cid} for cid in ids])
+        elif method == "POST" and path.startswith("/containers/") and path.endswith("/stop"):
+            cid = path.split("/")[2]
+            if cid in srv.fail_stop:
+                self._send(500, {"message": f"cannot stop container: {cid}"})
+            else:
+                self._send(204)
+        elif method == "DELETE" and path.startswith("/containers/"):
+            cid = path.split("/")[2]
+            if srv.containers.pop(cid, None) is None:
+                self._send(404, {"message": f"No such container: {cid}"})
+            else:
+                self._send(204)
+        elif method == "GET" and path.startswith("/images/") and path.endswith("/json"):
+            name = path[len("/images/"):-len("/json")]
+            self._send(200 if name in srv.images else 404, {"message": f"No such image: {name}"})
+        elif method == "DELETE" and path.startswith("/images/"):
+            name = path[len("/images/"):]
+            srv.images.discard(name)
+            self._send(200, [{"Untagged": name}])
+        elif method == "GET" and path == "/system/df":
+            self._send(200, srv.system_df)
+        elif method == "DELETE" and path.startswith("/volumes/"):
+            name = path[len("/volumes/"):]
+            if name in srv.volumes:
+                srv.volumes.discard(name)
+                self._send(204)
+            else:
+                self._send(404, {"message": f"get {name}: no such volume"})
+        elif method == "POST" and path == "/build/prune":
+            ids = json.loads(query.get("filters", ["{}"])[0]).get("id", [])
+            srv.pruned_cache_ids.extend(ids)
+            sizes = {c["ID"]: c.get("Size", 0) for c in srv.system_df.get("BuildCache", [])}
+            self._send(200, {"CachesDeleted": ids, "SpaceReclaimed": sum(sizes.get(i, 0) for i in ids)})
+        else:
+            self._send(404, {"message": "page not found"})
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_POST(self) -> None:
+        self._route("POST")
+
+    def do_DELETE(self) -> None:
+        self._route("DELETE")
+
+
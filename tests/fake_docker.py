@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Fake ``docker`` executable emitting synthetic BuildKit plain progress.
+
+Used by the build streaming tests instead of a Docker installation. Handles
+``docker compose build <service>``; the environment controls the output:
+
+- ``FAKE_DOCKER_LINES``: number of RUN output lines per stage (default 20)
+- ``FAKE_DOCKER_FAIL``: service whose build exits with status 1
+- ``FAKE_DOCKER_SLEEP``: seconds to sleep after the first step (for cancellation)
+"""
+import os
+import sys
+import time
+
+
+def main() -> int:
+    args = sys.argv[1:]
+    if args[:2] != ["compose", "build"] or len(args) != 3:
+        print(f"fake docker: unsupported command {args}", file=sys.stderr)
+        return 2
+    service = args[2]
+    n_lines = int(os.environ.get("FAKE_DOCKER_LINES", "20"))
+    print("#0 building with \"default\" instance using docker driver")
+    print(f"#1 [{service} internal] load build definition from Dockerfile")
+    print(f"#2 [{service} 1/3] FROM docker.io/library/ubuntu:24.04")
+    sys.stdout.flush()
+    time.sleep(float(os.environ.get("FAKE_DOCKER_SLEEP", "0")))
+    print(f"#3 [{service} 2/3] RUN apt-get install -y build-essential")
+    for i in range(n_lines):
+        print(f"#3 {i * 0.01:.3f} Unpacking package-{i} ...")
+    if os.environ.get("FAKE_DOCKER_FAIL") == service:
+        print("#3 ERROR: process did not complete successfully: exit code: 100", file=sys.stderr)
+        return 1
+    print(f"#4 [{service} 3/3] RUN echo done")
+    print("#5 exporting to image")
+    print("#5 DONE 0.1s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Stub LiteLLM upstream and loader for the LiteLLM shim proxy
+(``installation/stage-1/system/litellm/proxy.py``).
+
+Used by the proxy tests and benchmark, so they exercise real HTTP traffic
+without LiteLLM. The stub speaks HTTP/1.1 with keep-alive and records how
+many connections it accepted.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Optional
+
+PROXY_PATH = (
+    Path(__file__).resolve().parents[1]
+    / "src/pei_docker/project_files/installation/stage-1/system/litellm/proxy.py"
+)
+
+
+class StubUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, tokens: int = 5, token_delay: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        # streamed completions: events sent and the pause before each one
+        self.tokens = tokens
+        self.token_delay = token_delay
+        # Cache-Control header sent with GET responses, if any
+        self.cache_control: Optional[str] = None
+        self.connections = 0
+        self.requests: list[tuple[str, str]] = []
+        self.sockets: list[socket.socket] = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubUpstream":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def drop_connections(self) -> None:
+        """Close every accepted connection, like an upstream timing out idle keep-alives."""
+        with self.lock:
+            sockets, self.sockets = self.sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # like uvicorn (LiteLLM), send small writes immediately
+    disable_nagle_algorithm = True
+    server: StubUpstream
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.sockets.append(self.connection)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _json(self, status: int, payload: Any, cache_control: Optional[str] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = b""
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests.append(("GET", self.path))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.path == "/v1/models":
+            self._json(200, {"data": [{"id": "stub-model"}]}, self.server.cache_control)
+        elif self.path.startswith("/chunked"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for part in (b"hello ", b"chunked ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._json(404, {"error": "not found"})
+
+    def _stream_events(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(self.server.tokens):
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            event = f"data: {json.dumps({'choices': [{'delta': {'content': f'tok{i}'}}]})}\n\n".encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.flush()
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(done), done))
+
+    def do_POST(self) -> None:
+        body = self._read_body()
+        with self.server.lock:
+            self.server.requests.append(("POST", self.path))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        try:
+            stream = json.loads(body).get("stream", False)
+        except (ValueError, AttributeError):
+            stream = False
+        if stream:
+            self._stream_events()
+        else:
+            self._json(200, {"object": "chat.completion", "received_bytes": len(body)})
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_listening(port: int, timeout: float = 10.0) -> None:
+    """Wait until something accepts connections on a local port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"nothing listening on port {port}")
+
+
+def load_proxy(upstream_url: str, **env: str) -> ModuleType:
+    """Import a fresh copy of proxy.py configured for ``upstream_url``."""
+    saved = {k: os.environ.get(k) for k in ("LITELLM_URL", *env)}
+    os.environ["LITELLM_URL"] = upstream_url
+    os.environ.update(env)
+    try:
+        spec = importlib.util.spec_from_file_location("litellm_shim_proxy", PROXY_PATH)
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def start_proxy(module: ModuleType) -> tuple[Any, str]:
+    """Serve the proxy on a free port in a background thread; return (server, url)."""
+    server = module.build_server(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
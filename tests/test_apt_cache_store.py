@@ -0,0 +1,101 @@
+"""
+Tests for the content-addressed package store in scripts/manage-apt-cache.py.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "manage-apt-cache.py"
+
+
+@pytest.fixture(scope="module")
+def apt_cache() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("manage_apt_cache", SCRIPT)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _project(root: Path, name: str, debs: dict[str, dict[str, bytes]]) -> Path:
+    project = root / name
+    for stage in ("stage-1", "stage-2"):
+        tmp = project / "installation" / stage / "tmp"
+        tmp.mkdir(parents=True)
+        for filename, content in debs.get(stage, {}).items():
+            (tmp / filename).write_bytes(content)
+    return project
+
+
+def _inode(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_dev, st.st_ino
+
+
+def test_collect_deduplicates_by_content(apt_cache: ModuleType, tmp_path: Path) -> None:
+    store = apt_cache.PackageStore(tmp_path / "store", 1 << 30)
+    project = _project(tmp_path, "p", {
+        "stage-1": {"curl_1.deb": b"curl", "vim_1.deb": b"vim"},
+        "stage-2": {"curl_1.deb": b"curl"},
+    })
+
+    apt_cache.collect_cache_from_project(project, store)
+
+    index = json.loads((store.root / "index.json").read_text())
+    assert len(index["objects"]) == 2
+    s1 = project / "installation/stage-1/tmp/curl_1.deb"
+    s2 = project / "installation/stage-2/tmp/curl_1.deb"
+    assert s1.read_bytes() == s2.read_bytes() == b"curl"
+    # both stages now share the stored object (hardlinks on this filesystem)
+    if apt_cache.place_file(s1, tmp_path / "probe") == "hardlink":
+        assert _inode(s1) == _inode(s2)
+
+
+def test_copy_to_links_packages_and_is_idempotent(apt_cache: ModuleType, tmp_path: Path,
+                                                  capsys: pytest.CaptureFixture[str]) -> None:
+    store = apt_cache.PackageStore(tmp_path / "store", 1 << 30)
+    apt_cache.collect_cache_from_project(_project(tmp_path, "a", {"stage-1": {"git_2.deb": b"git"}}), store)
+
+    target = _project(tmp_path, "b", {})
+    apt_cache.copy_cache_to_project(target, store)
+    for stage in ("stage-1", "stage-2"):
+        assert (target / "installation" / stage / "tmp" / "git_2.deb").read_bytes() == b"git"
+
+    capsys.readouterr()
+    apt_cache.copy_cache_to_project(target, store)
+    assert "all up to date" in capsys.readouterr().out
+
+
+def test_size_cap_evicts_least_recently_used(apt_cache: ModuleType, tmp_path: Path) -> None:
+    store = apt_cache.PackageStore(tmp_path / "store", 250)
+    apt_cache.collect_cache_from_project(_project(tmp_path, "old", {"stage-1": {"old.deb": b"o" * 100}}), store)
+    apt_cache.collect_cache_from_project(_project(tmp_path, "mid", {"stage-1": {"mid.deb": b"m" * 100}}), store)
+    # collecting "old" again makes "mid" the least recently used package
+    apt_cache.collect_cache_from_project(_project(tmp_path, "again", {"stage-2": {"old.deb": b"o" * 100}}), store)
+    apt_cache.collect_cache_from_project(_project(tmp_path, "new", {"stage-1": {"new.deb": b"n" * 100}}), store)
+
+    with store.locked():
+        assert sorted(store.names()) == ["new.deb", "old.deb"]
+        assert store.total_size() == 200
+        assert len(list(store.objects_dir.glob("*/*"))) == 2
+
+
+def test_flat_cache_is_migrated_and_reported(apt_cache: ModuleType, tmp_path: Path,
+                                             capsys: pytest.CaptureFixture[str]) -> None:
+    root = tmp_path / "store"
+    root.mkdir()
+    (root / "a.deb").write_bytes(b"same")
+    (root / "b.deb").write_bytes(b"same")
+    store = apt_cache.PackageStore(root, apt_cache.parse_size("1K"))
+
+    apt_cache.print_stats(store)
+
+    out = capsys.readouterr().out
+    assert "1 objects, 2 file names" in out
+    assert "4 B of 1.0 KiB" in out
+    assert not list(root.glob("*.deb"))
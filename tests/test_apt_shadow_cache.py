@@ -0,0 +1,92 @@
+"""
+Tests for the incremental APT shadow cache sync and export scripts under
+``installation/stage-1/system/apt``.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tarfile
+from pathlib import Path
+
+import pytest
+
+import pei_docker
+
+APT_DIR = Path(pei_docker.__file__).resolve().parent / "project_files" / "installation" / "stage-1" / "system" / "apt"
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+
+
+def _sync(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(["bash", str(APT_DIR / "sync-shadow-cache.sh"), *args],
+                          capture_output=True, text=True, check=True)
+
+
+def test_only_new_archives_are_copied(tmp_path: Path) -> None:
+    archives, shadow = tmp_path / "archives", tmp_path / "shadow"
+    archives.mkdir()
+    (archives / "a_1.0_amd64.deb").write_bytes(b"a" * 100)
+    (archives / "b_1.0_amd64.deb").write_bytes(b"b" * 50)
+
+    first = _sync(str(archives), str(shadow))
+    assert "synced 2 new archive(s)" in first.stdout
+    assert sorted((shadow / ".manifest").read_text().splitlines()) == ["a_1.0_amd64.deb 100", "b_1.0_amd64.deb 50"]
+
+    (archives / "c_1.0_amd64.deb").write_bytes(b"c" * 10)
+    second = _sync(str(archives), str(shadow))
+    assert "synced 1 new archive(s)" in second.stdout
+    assert sorted(os.listdir(shadow)) == [".manifest", "a_1.0_amd64.deb", "b_1.0_amd64.deb", "c_1.0_amd64.deb"]
+
+    assert _sync(str(archives), str(shadow)).stdout == ""
+
+
+def test_missing_or_truncated_copies_are_synced_again(tmp_path: Path) -> None:
+    archives, shadow = tmp_path / "archives", tmp_path / "shadow"
+    archives.mkdir()
+    (archives / "a_1.0_amd64.deb").write_bytes(b"a" * 100)
+    (archives / "b_1.0_amd64.deb").write_bytes(b"b" * 50)
+    _sync(str(archives), str(shadow))
+
+    # the shadow cache was emptied, e.g. rm /apt-shadow-cache/*.deb
+    for deb in shadow.glob("*.deb"):
+        deb.unlink()
+    assert "synced 2 new archive(s)" in _sync(str(archives), str(shadow)).stdout
+    assert (shadow / "b_1.0_amd64.deb").read_bytes() == b"b" * 50
+
+    (shadow / "a_1.0_amd64.deb").write_bytes(b"a" * 10)
+    assert "synced 1 new archive(s)" in _sync(str(archives), str(shadow)).stdout
+    assert (shadow / "a_1.0_amd64.deb").read_bytes() == b"a" * 100
+
+    # one line per archive, and archives gone from both sides are dropped
+    (archives / "b_1.0_amd64.deb").unlink()
+    (shadow / "b_1.0_amd64.deb").unlink()
+    (archives / "c_1.0_amd64.deb").write_bytes(b"c" * 10)
+    assert "2 archives in cache" in _sync(str(archives), str(shadow)).stdout
+    assert (shadow / ".manifest").read_text().splitlines() == ["a_1.0_amd64.deb 100", "c_1.0_amd64.deb 10"]
+
+
+def test_link_mode_hardlinks_on_the_same_filesystem(tmp_path: Path) -> None:
+    archives, shadow = tmp_path / "archives", tmp_path / "shadow"
+    archives.mkdir()
+    (archives / "a_1.0_amd64.deb").write_bytes(b"a" * 100)
+
+    result = _sync("--link", str(archives), str(shadow))
+    assert "hardlinked" in result.stdout
+    assert (shadow / "a_1.0_amd64.deb").stat().st_ino == (archives / "a_1.0_amd64.deb").stat().st_ino
+
+
+def test_export_packs_archives_and_manifest(tmp_path: Path) -> None:
+    archives, shadow = tmp_path / "archives", tmp_path / "shadow"
+    archives.mkdir()
+    (archives / "a_1.0_amd64.deb").write_bytes(b"a" * 100)
+    _sync(str(archives), str(shadow))
+    (shadow / "b_1.0_amd64.deb.part").write_bytes(b"partial")
+
+    output = tmp_path / "cache.tar.gz"
+    result = subprocess.run(["bash", str(APT_DIR / "export-shadow-cache.sh"), "-o", str(output), str(shadow)],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    with tarfile.open(output) as tar:
+        assert sorted(tar.getnames()) == [".manifest", "a_1.0_amd64.deb"]
@@ -0,0 +1,54 @@
+"""
+Tests for ``build_caches``: package-manager cache mounts for on_build scripts.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import omegaconf as oc
+import pytest
+
+import pei_docker
+from pei_docker.config_processor import PeiConfigProcessor
+
+PKG_ROOT = Path(pei_docker.__file__).resolve().parent
+
+
+def _build_args(config: dict[str, Any]) -> tuple[oc.DictConfig, oc.DictConfig]:
+    template = oc.OmegaConf.load(str(PKG_ROOT / "templates" / "base-image-gen.yml"))
+    proc = PeiConfigProcessor.from_config(oc.OmegaConf.create(config), template, project_dir="/tmp/unused")
+    compose = proc.process(remove_extra=True, generate_custom_script_files=False)
+    return compose.services["stage-1"].build.args, compose.services["stage-2"].build.args
+
+
+def test_enabled_caches_are_passed_per_stage() -> None:
+    args1, args2 = _build_args({
+        "stage_1": {"image": {"base": "ubuntu:24.04", "output": "t:1"},
+                    "build_caches": {"pip": True, "uv": True, "npm": False}},
+        "stage_2": {"image": {"output": "t:2"}, "build_caches": {"pixi": True}},
+    })
+    assert args1.PEI_BUILD_CACHES_1 == "pip uv"
+    assert args2.PEI_BUILD_CACHES_2 == "pixi"
+
+
+def test_caches_are_off_by_default() -> None:
+    args1, args2 = _build_args({
+        "stage_1": {"image": {"base": "ubuntu:24.04", "output": "t:1"}},
+        "stage_2": {"image": {"output": "t:2"}},
+    })
+    assert args1.PEI_BUILD_CACHES_1 == ""
+    assert args2.PEI_BUILD_CACHES_2 == ""
+
+
+@pytest.mark.parametrize("stage", [1, 2])
+def test_on_build_step_mounts_the_cache(stage: int) -> None:
+    dockerfile = (PKG_ROOT / "project_files" / f"stage-{stage}.Dockerfile").read_text()
+    run = dockerfile[:dockerfile.index("internals/custom-on-build.sh")]
+    run = run[run.rindex("RUN "):]
+    assert "--mount=type=cache,id=pei-${PEI_PROJECT_ID}-build,target=/var/cache/pei-build" in run
+    assert f"ARG PEI_BUILD_CACHES_{stage}" in dockerfile
+    # permissions are set once per tool directory, not on the whole cache after every build
+    script = (PKG_ROOT / "project_files" / "installation" / f"stage-{stage}" / "internals"
+              / "custom-on-build.sh").read_text()
+    assert "chmod -R" not in script and 'if [ ! -d "$cache_dir" ]' in script
@@ -0,0 +1,140 @@
+"""
+Tests for ``extends`` in user_config.yml: fragment merging and the parsed
+fragment cache.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from pei_docker import pei, pei_utils_configure, pei_utils_extends
+from pei_docker.pei_utils_extends import load_fragment, resolve_extends
+from pei_docker.user_config import UserConfig
+from pei_docker.webgui.models.ui_state import AppUIState
+from pei_docker.webgui.utils.ui_state_bridge import UIStateBridge
+
+
+def _write(path: Path, data: object) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(data), encoding="utf-8")
+    return path
+
+
+def test_fragments_are_merged_in_order(tmp_path: Path) -> None:
+    _write(tmp_path / "shared" / "base.yml", {
+        "stage_1": {"ssh": {"enable": True, "port": 22}, "proxy": {"address": "host.docker.internal"},
+                    "environment": ["A=1", "B=2"]},
+    })
+    _write(tmp_path / "shared" / "ssh.yml", {
+        "extends": "base.yml",
+        "stage_1": {"ssh": {"port": 2222}, "ports": ["80:80"]},
+    })
+    config = {
+        "extends": ["shared/ssh.yml"],
+        "stage_1": {"image": {"base": "ubuntu:24.04"}, "ports": ["8080:80"], "proxy": None,
+                    "environment": {"B": "3"}},
+    }
+
+    merged = resolve_extends(config, str(tmp_path / "user_config.yml"), cache_dir=None)
+
+    assert merged == {"stage_1": {
+        "ssh": {"enable": True, "port": 2222},
+        "environment": ["A=1", "B=3"],
+        "ports": ["8080:80"],
+        "image": {"base": "ubuntu:24.04"},
+    }}
+    assert resolve_extends({"stage_1": {}}, str(tmp_path / "user_config.yml")) == {"stage_1": {}}
+
+
+def test_environment_merge_keeps_pass_through_keys() -> None:
+    base = {"stage_1": {"environment": ["HOME", "A=1", "B=2"]}}
+    assert UserConfig.merge_dicts(base, {"stage_1": {"environment": {"B": "3"}}}) == {
+        "stage_1": {"environment": ["HOME", "A=1", "B=3"]}}
+    assert UserConfig.merge_dicts(base, {"stage_1": {"environment": ["A"]}}) == {
+        "stage_1": {"environment": ["HOME", "A", "B=2"]}}
+    assert UserConfig.merge_dicts({"environment": {"A": "1"}}, {"environment": {"B": ""}}) == {
+        "environment": {"A": "1", "B": ""}}
+
+
+def test_gui_refuses_configs_with_extends(tmp_path: Path) -> None:
+    _write(tmp_path / "ssh.yml", {"stage_1": {"ssh": {"enable": True}}})
+    config_path = _write(tmp_path / "user_config.yml", {
+        "extends": "ssh.yml", "stage_1": {"image": {"base": "ubuntu:24.04", "output": "t:1"}}})
+    original = config_path.read_text(encoding="utf-8")
+    bridge = UIStateBridge()
+    state = AppUIState()
+
+    ok, errors = bridge.load_from_yaml(str(config_path), state)
+    assert not ok and "extends" in errors[0]
+
+    state.project.project_name = "demo"
+    ok, errors = bridge.save_to_yaml(state, str(config_path))
+    assert not ok and "text editor" in errors[0]
+    assert config_path.read_text(encoding="utf-8") == original
+
+
+def test_cycles_and_duplicate_keys_are_rejected(tmp_path: Path) -> None:
+    _write(tmp_path / "a.yml", {"extends": "b.yml"})
+    _write(tmp_path / "b.yml", {"extends": "a.yml"})
+    with pytest.raises(ValueError, match="cycle"):
+        resolve_extends({"extends": "a.yml"}, str(tmp_path / "user_config.yml"), cache_dir=None)
+
+    (tmp_path / "dup.yml").write_text("stage_1:\n  ssh: {}\n  ssh: {}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Duplicate key 'ssh'"):
+        resolve_extends({"extends": "dup.yml"}, str(tmp_path / "user_config.yml"), cache_dir=str(tmp_path / "cache"))
+
+    with pytest.raises(FileNotFoundError):
+        resolve_extends({"extends": "missing.yml"}, str(tmp_path / "user_config.yml"), cache_dir=None)
+
+
+def test_fragments_are_parsed_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    parsed: list[str] = []
+    real_load = pei_utils_extends.load_yaml_dict_with_duplicate_key_check
+
+    def counting_load(path: str) -> dict:
+        parsed.append(path)
+        return real_load(path)
+
+    monkeypatch.setattr(pei_utils_extends, "load_yaml_dict_with_duplicate_key_check", counting_load)
+    fragment = _write(tmp_path / "ssh.yml", {"stage_1": {"ssh": {"port": 2222}}})
+    cache = str(tmp_path / "cache")
+
+    for _ in range(3):
+        assert load_fragment(str(fragment), cache) == {"stage_1": {"ssh": {"port": 2222}}}
+    assert len(parsed) == 1
+
+    # touched but unchanged: re-hashed, not re-parsed
+    st = fragment.stat()
+    os.utime(fragment, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    load_fragment(str(fragment), cache)
+    assert len(parsed) == 1
+
+    _write(fragment, {"stage_1": {"ssh": {"port": 2200}}})
+    assert load_fragment(str(fragment), cache) == {"stage_1": {"ssh": {"port": 2200}}}
+    assert len(parsed) == 2
+
+
+def test_configure_uses_fragments(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = str(tmp_path / "cache")
+    monkeypatch.setattr(pei_utils_configure, "resolve_extends",
+                        lambda config, path: resolve_extends(config, path, cache_dir=cache))
+    project = tmp_path / "proj"
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--quick", "minimal"])
+    assert result.exit_code == 0, result.output
+
+    _write(tmp_path / "shared" / "ssh.yml", {"stage_1": {"ssh": {"enable": True, "port": 22, "host_port": 4222}}})
+    config_path = project / "user_config.yml"
+    config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+    config["extends"] = "../shared/ssh.yml"
+    config["stage_1"].pop("ssh", None)
+    _write(config_path, config)
+
+    result = CliRunner().invoke(pei.cli, ["configure", "-p", str(project)])
+    assert result.exit_code == 0, result.output
+    compose = yaml.safe_load((project / "docker-compose.yml").read_text(encoding="utf-8"))
+    assert "4222:22" in compose["services"]["stage-1"]["ports"]
+    assert len(os.listdir(cache)) == 1
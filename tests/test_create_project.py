@@ -0,0 +1,113 @@
+"""
+Tests for project creation modes: plain copy, packed template and --link.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import pei_docker
+from pei_docker import pei, pei_utils_create, template_pack
+from pei_docker.pei_utils_create import create_project_direct, is_immutable_template_file, link_template_tree
+
+PACKAGE_DIR = Path(pei_docker.__file__).resolve().parent
+
+
+def _tree(root: Path) -> dict[str, tuple[bytes, bool]]:
+    result = {}
+    for path in root.rglob("*"):
+        if path.is_file() and "__pycache__" not in path.parts:
+            result[path.relative_to(root).as_posix()] = (path.read_bytes(), os.access(path, os.X_OK))
+    return result
+
+
+@pytest.mark.parametrize(
+    ("rel_path", "expected"),
+    [
+        ("installation/stage-1/system/uv/install-uv.sh", True),
+        ("installation/stage-2/internals/entrypoint.sh", True),
+        ("installation/stage-2/utilities/install-python-packages.sh", True),
+        ("examples/basic/minimal.yml", True),
+        ("installation/stage-1/custom/my-build-1.sh", False),
+        ("installation/stage-1/generated/_custom-on-build.sh", False),
+        ("stage-1.Dockerfile", False),
+        ("installation/stage-1/system", False),
+    ],
+)
+def test_immutable_template_files(rel_path: str, expected: bool) -> None:
+    assert is_immutable_template_file(rel_path) is expected
+
+
+def test_packed_template_matches_copy(tmp_path: Path) -> None:
+    archive = tmp_path / "project-files.tar"
+    n_packed = template_pack.pack_project_template(str(PACKAGE_DIR), str(archive))
+    assert n_packed > 0
+
+    copied = tmp_path / "copied"
+    packed = tmp_path / "packed"
+    create_project_direct(str(copied), with_examples=True, quick="minimal")
+    create_project_direct(str(packed), with_examples=True, quick="minimal", template_archive=str(archive))
+
+    assert _tree(packed) == _tree(copied)
+
+
+def test_packed_template_without_examples(tmp_path: Path) -> None:
+    archive = tmp_path / "project-files.tar"
+    template_pack.pack_project_template(str(PACKAGE_DIR), str(archive))
+
+    project = tmp_path / "proj"
+    create_project_direct(str(project), with_examples=False, template_archive=str(archive))
+
+    assert (project / "stage-1.Dockerfile").is_file()
+    assert not (project / "examples").exists()
+
+
+def test_link_tree_only_shares_immutable_files(tmp_path: Path) -> None:
+    src = tmp_path / "src"
+    (src / "installation/stage-1/system/tool").mkdir(parents=True)
+    (src / "installation/stage-1/custom").mkdir(parents=True)
+    (src / "installation/stage-1/system/tool/install.sh").write_text("echo install\n")
+    (src / "installation/stage-1/custom/my.sh").write_text("echo custom\n")
+
+    dst = tmp_path / "dst"
+    stats = link_template_tree(str(src), str(dst))
+
+    assert sum(stats.values()) == 2
+    custom = dst / "installation/stage-1/custom/my.sh"
+    assert not custom.samefile(src / "installation/stage-1/custom/my.sh")
+    installer = dst / "installation/stage-1/system/tool/install.sh"
+    assert installer.read_text() == "echo install\n"
+    if stats["hardlink"]:
+        assert installer.samefile(src / "installation/stage-1/system/tool/install.sh")
+
+
+def test_link_replaces_instead_of_writing_through(tmp_path: Path) -> None:
+    src = tmp_path / "template.sh"
+    src.write_text("original\n")
+    dst = tmp_path / "project.sh"
+    os.link(src, dst)
+
+    pei_utils_create.link_or_copy_file(str(src), str(dst), allow_hardlink=False)
+    dst.write_text("edited\n")
+
+    assert src.read_text() == "original\n"
+
+
+def test_create_link_cli(tmp_path: Path) -> None:
+    project = tmp_path / "proj"
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--link", "--quick", "minimal"])
+
+    assert result.exit_code == 0, result.output
+    assert (project / "user_config.yml").is_file()
+    assert (project / "PEI-DOCKER-USAGE-GUIDE.md").is_file()
+    dockerfile = project / "stage-1.Dockerfile"
+    assert not dockerfile.samefile(PACKAGE_DIR / "project_files" / "stage-1.Dockerfile")
+    assert _tree(project / "installation") == _tree(PACKAGE_DIR / "project_files" / "installation")
+
+
+def test_create_unknown_quick_template_exits(tmp_path: Path) -> None:
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(tmp_path / "p"), "--quick", "nope"])
+    assert result.exit_code == 1
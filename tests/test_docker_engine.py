@@ -0,0 +1,104 @@
+"""
+Tests for the Docker Engine API client, run against a stub unix socket server.
+"""
+from __future__ import annotations
+
+import json
+import socket
+from pathlib import Path
+
+import pytest
+
+from pei_docker import docker_engine, pei
+from tests.docker_stub import StubDaemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="unix sockets not available")
+
+
+@pytest.fixture
+def stub_daemon(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    sock_path = str(tmp_path / "docker.sock")
+    server = StubDaemon(sock_path).start()
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{sock_path}")
+    yield server
+    server.stop()
+    client = docker_engine._client_cache.pop(sock_path, None)
+    if client is not None:
+        client.close()
+
+
+def test_client_reuses_connection(stub_daemon: StubDaemon) -> None:
+    client = docker_engine.DockerEngineClient(stub_daemon.server_address)  # type: ignore[arg-type]
+
+    assert client.ping()
+    assert sorted(client.list_containers(ancestor="app:stage-1")) == ["c1", "c2"]
+    assert client.image_exists("app:stage-1")
+    assert not client.image_exists("missing:latest")
+
+    assert stub_daemon.connections == 1
+    client.close()
+
+
+def test_client_raises_engine_errors(stub_daemon: StubDaemon) -> None:
+    client = docker_engine.DockerEngineClient(stub_daemon.server_address)  # type: ignore[arg-type]
+
+    with pytest.raises(docker_engine.DockerEngineError, match="cannot stop container: c2") as excinfo:
+        client.stop_container("c2", timeout=1)
+    assert excinfo.value.status == 500
+    client.close()
+
+
+def test_remove_flow_uses_engine_api(stub_daemon: StubDaemon, caplog: pytest.LogCaptureFixture) -> None:
+    ids = pei.get_containers_using_image("app:stage-1")
+    assert sorted(ids) == ["c1", "c2"]
+
+    with caplog.at_level("INFO"):
+        assert pei.stop_and_remove_containers(sorted(ids), force_yes=True, stop_timeout=1)
+        assert pei.remove_image("app:stage-1", force_yes=True)
+
+    assert ("POST", "/containers/c1/stop") in stub_daemon.requests
+    assert ("DELETE", "/containers/c2") in stub_daemon.requests
+    assert ("DELETE", "/images/app:stage-1") in stub_daemon.requests
+    assert "Failed to stop container c2" in caplog.text
+    assert "Stopped 1/2 container(s)" in caplog.text
+    assert "Removed 2/2 container(s)" in caplog.text
+    assert "app:stage-1" not in stub_daemon.images
+
+
+def test_no_client_when_socket_missing(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{tmp_path / 'missing.sock'}")
+    assert docker_engine.get_docker_engine_client() is None
+
+
+@pytest.mark.parametrize("host", ["tcp://127.0.0.1:2375", "ssh://user@remote"])
+def test_non_unix_docker_host_uses_cli(monkeypatch: pytest.MonkeyPatch, host: str) -> None:
+    monkeypatch.setenv("DOCKER_HOST", host)
+    assert docker_engine.resolve_docker_socket_path() is None
+
+
+def test_docker_context_uses_cli(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DOCKER_HOST", raising=False)
+    monkeypatch.delenv("DOCKER_CONTEXT", raising=False)
+    (tmp_path / "config.json").write_text(json.dumps({"currentContext": "remote"}), encoding="utf-8")
+    monkeypatch.setenv("DOCKER_CONFIG", str(tmp_path))
+    assert docker_engine.resolve_docker_socket_path() is None
+
+
+def test_engine_batch_bounds_and_closes_connections(stub_daemon: StubDaemon, monkeypatch: pytest.MonkeyPatch) -> None:
+    ids = [f"x{i}" for i in range(30)]
+    stub_daemon.containers.update({cid: "bulk:latest" for cid in ids})
+    client = docker_engine.DockerEngineClient(stub_daemon.server_address)  # type: ignore[arg-type]
+    closed = []
+    real_close = client.close
+
+    def counting_close() -> None:
+        closed.append(1)
+        real_close()
+
+    monkeypatch.setattr(client, "close", counting_close)
+    done, failed = pei.run_engine_batch(client, client.remove_container, ids + ["missing"], max_workers=4)
+
+    assert done == ids
+    assert list(failed) == ["missing"]
+    assert stub_daemon.connections <= 4
+    assert len(closed) == 4
@@ -115,6 +115,48 @@ class TestConfigTimeSubstitutionErrors:
         assert processed["key"] == "app-{{TAG:-dev}}"
 
 
+class TestComposeSubstitutionSyntax:
+    ENV = {"SET": "v", "EMPTY": ""}
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("${SET}/${EMPTY}/x", "v//x"),
+            ("${UNSET:-d} ${EMPTY:-d} ${SET:-d}", "d d v"),
+            ("${UNSET-d} ${EMPTY-d} ${SET-d}", "d  v"),
+            ("${SET:+alt} ${EMPTY:+alt} ${EMPTY+alt} ${UNSET+alt}", "alt  alt "),
+            ("${UNSET:-${SET}-nested}", "v-nested"),
+            ("cost: $$5 and $$HOME, {braces}", "cost: $$5 and $$HOME, {braces}"),
+        ],
+    )
+    def test_expansion(self, text: str, expected: str) -> None:
+        result = pei_utils.substitute_config({"key": text}, env=self.ENV)
+        assert result.config == {"key": expected}
+        assert result.leftover is None
+
+    @pytest.mark.parametrize("text", ["${UNSET:?must be set}", "${EMPTY:?must be set}", "${UNSET?must be set}"])
+    def test_required_variables(self, text: str) -> None:
+        with pytest.raises(ValueError, match=r"Required environment variable \w+ is .*: must be set \(at 'a.b\[0\]'\)"):
+            pei_utils.substitute_config({"a": {"b": [text]}}, env=self.ENV)
+        assert pei_utils.substitute_config({"a": "${EMPTY?x}"}, env=self.ENV).config == {"a": ""}
+
+    def test_escaped_substitution_is_rejected(self) -> None:
+        with pytest.raises(ValueError, match="compose-time substitution"):
+            pei_utils.substitute_config({"key": "$${SET}"}, env=self.ENV)
+
+    def test_single_pass_reports_leftovers_and_markers(self) -> None:
+        cfg = {
+            "a": ["${SET}", "{{TAG}}"],
+            "b": {"c": "${UNSET}", "d": "${BROKEN", "e": "${UNSET2}"},
+        }
+        result = pei_utils.substitute_config(cfg, env=self.ENV)
+        assert result.marker == ("a[1]", "{{TAG}}")
+        assert result.leftover == ("b.c", "${UNSET}", "${UNSET}")
+        assert result.config["b"]["d"] == "${BROKEN"
+        with pytest.raises(ValueError, match="forbidden leftover config-time substitution"):
+            result.check_leftover()
+
+
 def _load_compose_template() -> oc.DictConfig:
     import pei_docker
 
@@ -0,0 +1,103 @@
+"""
+Tests for streaming docker compose build output (GUI Build action), using a
+fake docker executable (tests/fake_docker.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from pei_docker.pei_utils_build import BuildLogBuffer, parse_build_step, run_compose_build
+
+FAKE_DOCKER = Path(__file__).with_name("fake_docker.py")
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_DOCKER}" "$@"\n')
+    docker.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "docker-compose.yml").write_text("services: {}\n")
+    return root
+
+
+def test_buffer_is_bounded_and_counts_drops() -> None:
+    buffer = BuildLogBuffer(max_lines=3)
+    for i in range(5):
+        buffer.append(f"line {i}")
+    assert buffer.drain() == (["line 2", "line 3", "line 4"], 2)
+    assert buffer.drain() == ([], 0)
+
+
+def test_parse_build_step() -> None:
+    assert parse_build_step("#8 [stage-1 3/7] RUN apt-get update") == (3, 7)
+    assert parse_build_step("#1 [stage-1 internal] load build definition") is None
+    assert parse_build_step("#8 12.3 Unpacking libc6 ...") is None
+
+
+async def test_stages_stream_in_order(project: Path) -> None:
+    lines: list[str] = []
+    started: list[str] = []
+
+    results = await run_compose_build(str(project), on_line=lines.append, on_stage=started.append)
+
+    assert started == ["stage-1", "stage-2"]
+    assert [(r.service, r.returncode) for r in results] == [("stage-1", 0), ("stage-2", 0)]
+    assert all(r.elapsed >= 0 for r in results)
+    assert "#2 [stage-1 1/3] FROM docker.io/library/ubuntu:24.04" in lines
+    assert lines.index("#4 [stage-1 3/3] RUN echo done") < lines.index("#2 [stage-2 1/3] FROM docker.io/library/ubuntu:24.04")
+
+
+async def test_failed_stage_stops_the_build(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FAKE_DOCKER_FAIL", "stage-1")
+    lines: list[str] = []
+
+    results = await run_compose_build(str(project), on_line=lines.append)
+
+    assert [(r.service, r.returncode) for r in results] == [("stage-1", 1)]
+    # stderr is merged into the stream
+    assert any("ERROR: process did not complete successfully" in line for line in lines)
+
+
+async def test_large_log_through_bounded_buffer(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FAKE_DOCKER_LINES", "20000")
+    buffer = BuildLogBuffer(max_lines=500)
+    shown: list[str] = []
+    dropped_total = 0
+
+    task = asyncio.create_task(run_compose_build(str(project), on_line=buffer.append))
+    while not task.done():
+        await asyncio.wait({task}, timeout=0.05)
+        lines, dropped = buffer.drain()
+        shown.extend(lines)
+        dropped_total += dropped
+
+    assert all(r.returncode == 0 for r in task.result())
+    assert len(shown) + dropped_total == 2 * (20000 + 7)
+    assert shown[-1] == "#5 DONE 0.1s"
+
+
+async def test_cancel_terminates_the_build(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FAKE_DOCKER_SLEEP", "30")
+    lines: list[str] = []
+    task = asyncio.create_task(run_compose_build(str(project), on_line=lines.append))
+    while not any("1/3" in line for line in lines):
+        await asyncio.sleep(0.05)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, timeout=10)
+
+
+async def test_unconfigured_project_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError, match="configure the project first"):
+        await run_compose_build(str(tmp_path), on_line=lambda line: None)
@@ -0,0 +1,104 @@
+"""
+Tests for the web GUI running create/configure in-process on its worker pool.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from pei_docker.pei_utils_configure import CONFIGURE_PHASES
+from pei_docker.webgui.utils.utils import ProjectManager
+
+
+async def test_create_and_configure_stream_logs_and_phases(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+    manager = ProjectManager()
+    project = tmp_path / "proj"
+    lines: list[str] = []
+    phases: list[str] = []
+
+    try:
+        assert await manager.create_project(project, on_log=lines.append)
+        assert (project / "user_config.yml").is_file()
+        assert any("Creating PeiDocker project" in line for line in lines)
+
+        lines.clear()
+        assert await manager.configure_project(project, on_log=lines.append, on_progress=phases.append)
+    finally:
+        manager.shutdown()
+
+    assert phases == list(CONFIGURE_PHASES)
+    assert (project / "docker-compose.yml").is_file()
+    assert any("Writing compose file" in line for line in lines)
+    assert all(line.startswith("[") for line in lines)
+
+
+async def test_configure_failure_is_reported_in_log(tmp_path: Path) -> None:
+    manager = ProjectManager()
+    lines: list[str] = []
+
+    try:
+        assert not await manager.configure_project(tmp_path, on_log=lines.append)
+    finally:
+        manager.shutdown()
+
+    assert any(line.startswith("[ERROR]") and "does not exist" in line for line in lines)
+
+
+async def test_create_refuses_non_empty_dir(tmp_path: Path) -> None:
+    (tmp_path / "something.txt").write_text("x")
+    lines: list[str] = []
+
+    assert not await ProjectManager().create_project(tmp_path, on_log=lines.append)
+    assert lines and "not empty" in lines[0]
+
+
+async def test_task_logs_are_isolated_and_loop_stays_responsive(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+    manager = ProjectManager(max_workers=1)
+    lines: list[str] = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def _work(name: str) -> str:
+        nonlocal active, max_active
+        with lock:
+            active += 1
+            max_active = max(max_active, active)
+        logging.info(f"{name} started")
+        time.sleep(0.1)
+        with lock:
+            active -= 1
+        return name
+
+    ticks = 0
+
+    async def _ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(_ticker())
+    try:
+        results = await asyncio.gather(
+            manager.run_task(_work, "a", on_log=lines.append),
+            manager.run_task(_work, "b"),
+        )
+    finally:
+        ticker.cancel()
+        manager.shutdown()
+
+    assert results == ["a", "b"]
+    # bounded pool: the second task waited for the first
+    assert max_active == 1
+    # only the records of the task that asked for them are forwarded
+    assert lines == ["[INFO]\ta started"]
+    # the event loop kept running while the tasks blocked their worker
+    assert ticks >= 5
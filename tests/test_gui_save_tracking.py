@@ -0,0 +1,115 @@
+"""
+Tests for dirty-tracked, atomic GUI saves (user_config.yml and inline scripts).
+"""
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+
+from omegaconf import OmegaConf
+
+from pei_docker.webgui.models.ui_state import AppUIState
+from pei_docker.webgui.utils.ui_state_bridge import SaveReport, SaveTracker, UIStateBridge
+
+
+def _state() -> AppUIState:
+    state = AppUIState()
+    state.project.project_name = "demo"
+    state.stage_1.ssh.enabled = True
+    state.stage_1.ssh.users.append({"name": "me", "password": "123456"})
+    return state
+
+
+def test_unchanged_config_is_not_rewritten(tmp_path: Path) -> None:
+    bridge = UIStateBridge()
+    state = _state()
+    config_file = tmp_path / "user_config.yml"
+
+    first = SaveReport()
+    assert bridge.save_to_yaml(state, str(config_file), report=first) == (True, [])
+    assert first.written == [str(config_file)]
+    assert "stage_1" in first.changed_sections
+    mtime = config_file.stat().st_mtime_ns
+
+    second = SaveReport()
+    assert bridge.save_to_yaml(state, str(config_file), report=second)[0]
+    assert second.written == [] and second.unchanged == [str(config_file)]
+    assert config_file.stat().st_mtime_ns == mtime
+
+    state.stage_2.environment.env_vars["FOO"] = "bar"
+    third = SaveReport()
+    bridge.save_to_yaml(state, str(config_file), report=third)
+    assert third.written == [str(config_file)] and third.changed_sections == ["stage_2"]
+    assert OmegaConf.load(config_file).stage_2.environment == {"FOO": "bar"}
+    assert [p.name for p in tmp_path.iterdir()] == ["user_config.yml"]  # no temp files left
+
+
+def test_file_edited_on_disk_is_rewritten(tmp_path: Path) -> None:
+    bridge = UIStateBridge()
+    state = _state()
+    config_file = tmp_path / "user_config.yml"
+    bridge.save_to_yaml(state, str(config_file))
+
+    config_file.write_text("edited by hand\n")
+    report = SaveReport()
+    bridge.save_to_yaml(state, str(config_file), report=report)
+    assert report.written == [str(config_file)]
+    assert "edited by hand" not in config_file.read_text()
+
+
+def test_scripts_written_once_with_mode(tmp_path: Path) -> None:
+    tracker = SaveTracker()
+    script = tmp_path / "installation/stage-1/custom/run.sh"
+
+    assert tracker.write_if_changed(str(script), "#!/bin/bash\necho hi\n", executable=True)
+    assert stat.S_IMODE(script.stat().st_mode) == 0o755
+    assert not tracker.write_if_changed(str(script), "#!/bin/bash\necho hi\n", executable=True)
+
+    # a fresh tracker (new GUI session) compares against the file content
+    report = SaveReport()
+    assert not SaveTracker().write_if_changed(str(script), "#!/bin/bash\necho hi\n", executable=True, report=report)
+    assert report.unchanged == [str(script)]
+
+    os.chmod(script, 0o644)
+    assert tracker.write_if_changed(str(script), "#!/bin/bash\necho hi\n", executable=True)
+    assert stat.S_IMODE(script.stat().st_mode) == 0o755
+
+
+def test_save_keeps_mode_and_symlink(tmp_path: Path) -> None:
+    bridge = UIStateBridge()
+    state = _state()
+    target = tmp_path / "shared" / "user_config.yml"
+    target.parent.mkdir()
+    target.write_text("stage_1: {}\n")
+    os.chmod(target, 0o600)
+    link = tmp_path / "user_config.yml"
+    link.symlink_to(target)
+
+    report = SaveReport()
+    assert bridge.save_to_yaml(state, str(link), report=report) == (True, [])
+    assert report.written == [str(link)]
+    assert link.is_symlink()
+    assert "me" in target.read_text()
+    assert stat.S_IMODE(target.stat().st_mode) == 0o600
+    assert sorted(p.name for p in target.parent.iterdir()) == ["user_config.yml"]
+
+    # a private mode is not a change: the next save (fresh session too) skips it
+    assert not SaveTracker().write_if_changed(str(link), target.read_text())
+    report = SaveReport()
+    bridge.save_to_yaml(state, str(link), report=report)
+    assert report.written == []
+    assert stat.S_IMODE(target.stat().st_mode) == 0o600
+
+
+def test_new_files_get_default_mode(tmp_path: Path) -> None:
+    tracker = SaveTracker()
+    config_file = tmp_path / "user_config.yml"
+    assert tracker.write_if_changed(str(config_file), "a: 1\n")
+    assert stat.S_IMODE(config_file.stat().st_mode) == 0o644
+
+    script = tmp_path / "run.sh"
+    script.write_text("old\n")
+    os.chmod(script, 0o600)
+    assert tracker.write_if_changed(str(script), "new\n", executable=True)
+    assert stat.S_IMODE(script.stat().st_mode) == 0o700
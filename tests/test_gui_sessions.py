@@ -0,0 +1,73 @@
+"""
+Tests for per-client web GUI sessions: isolation, size cap and idle eviction.
+"""
+from __future__ import annotations
+
+import pytest
+
+from pei_docker.webgui.app import PeiDockerWebGUI
+from pei_docker.webgui.utils.utils import ProjectManager, SessionRegistry
+
+
+def test_each_browser_gets_its_own_state() -> None:
+    pool = ProjectManager(max_workers=1)
+    sessions: SessionRegistry[PeiDockerWebGUI] = SessionRegistry(lambda: PeiDockerWebGUI(project_manager=pool))
+    try:
+        alice = sessions.open("alice")
+        bob = sessions.open("bob")
+        alice.ui_state.project.project_name = "alice-project"
+
+        assert bob.ui_state.project.project_name != "alice-project"
+        assert sessions.open("alice") is alice
+        assert alice.project_manager is bob.project_manager is pool
+    finally:
+        pool.shutdown()
+
+
+def test_size_cap_evicts_disconnected_sessions_first() -> None:
+    evicted: list[str] = []
+    names = iter(["a", "b", "c", "d"])
+    sessions: SessionRegistry[str] = SessionRegistry(lambda: next(names), max_sessions=2, on_evict=evicted.append)
+
+    sessions.open("s1")
+    sessions.connect("s1")
+    sessions.open("s2")
+    sessions.open("s3")  # s2 is older than s3 and has no client, s1 is connected
+
+    assert evicted == ["b"]
+    assert "s1" in sessions and "s3" in sessions and len(sessions) == 2
+
+
+
+def test_size_cap_never_evicts_connected_sessions(caplog: pytest.LogCaptureFixture) -> None:
+    evicted: list[str] = []
+    names = iter(["a", "b", "c", "d"])
+    sessions: SessionRegistry[str] = SessionRegistry(lambda: next(names), max_sessions=2, on_evict=evicted.append)
+
+    for sid in ("s1", "s2"):
+        sessions.open(sid)
+        sessions.connect(sid)
+    with caplog.at_level("WARNING"):
+        assert sessions.open("s3") == "c"
+    assert evicted == [] and len(sessions) == 3
+    assert "exceed the limit" in caplog.text
+
+    # back under the cap once a session is free to go
+    sessions.connect("s3")
+    sessions.disconnect("s1")
+    sessions.open("s4")
+    assert evicted == ["a"] and len(sessions) == 3
+
+def test_idle_sessions_are_evicted_after_last_disconnect() -> None:
+    evicted: list[object] = []
+    sessions: SessionRegistry[object] = SessionRegistry(object, idle_seconds=-1, on_evict=evicted.append)
+
+    session = sessions.open("s1")
+    sessions.connect("s1")
+    sessions.connect("s1")  # second tab
+    sessions.disconnect("s1")
+    assert sessions.evict_idle() == 0
+
+    sessions.disconnect("s1")
+    assert sessions.evict_idle() == 1
+    assert evicted == [session] and len(sessions) == 0
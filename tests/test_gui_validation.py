@@ -0,0 +1,72 @@
+"""
+Tests for the web GUI's incremental, debounced validation.
+"""
+from __future__ import annotations
+
+import asyncio
+
+from pei_docker.webgui.models.ui_state import AppUIState
+from pei_docker.webgui.utils.ui_state_bridge import UIStateBridge
+from pei_docker.webgui.utils.utils import Debouncer
+
+
+def _state() -> AppUIState:
+    state = AppUIState()
+    state.project.project_name = "demo"
+    state.stage_1.ssh.enabled = True
+    state.stage_1.ssh.users.append({"name": "me", "password": "123456"})
+    return state
+
+
+def test_only_changed_sections_are_revalidated() -> None:
+    bridge = UIStateBridge()
+    state = _state()
+
+    is_valid, errors, revalidated = bridge.validate_sections(state)
+    assert is_valid and errors == []
+    assert "project" in revalidated and "stage_2.storage" in revalidated
+
+    assert bridge.validate_sections(state)[2] == []
+
+    state.stage_1.ssh.users.append({"name": "you", "password": "abcdef"})
+    assert bridge.validate_sections(state)[2] == ["stage_1.ssh"]
+
+    state.stage_2.environment.env_vars["FOO"] = "bar"
+    assert bridge.validate_sections(state)[2] == ["stage_2.environment"]
+
+
+def test_section_errors_are_cached_until_fixed() -> None:
+    bridge = UIStateBridge()
+    state = _state()
+    state.stage_2.storage.mounts.append({"name": "cache", "type": "auto-volume", "target": "relative/path"})
+
+    is_valid, errors, _ = bridge.validate_sections(state)
+    assert not is_valid and len(errors) == 1
+    # agrees with the full validation
+    assert not bridge.validate_ui_state(state)[0]
+
+    # unrelated edit: the cached storage error is still reported
+    state.project.base_image = "ubuntu:24.04"
+    is_valid, errors, revalidated = bridge.validate_sections(state)
+    assert not is_valid and revalidated == ["project"]
+
+    state.stage_2.storage.mounts[0]["target"] = "/cache"
+    is_valid, errors, revalidated = bridge.validate_sections(state)
+    assert is_valid and revalidated == ["stage_2.storage"]
+
+
+async def test_debouncer_coalesces_bursts() -> None:
+    calls: list[int] = []
+    debouncer = Debouncer(0.05, lambda: calls.append(1))
+
+    for _ in range(5):
+        debouncer.trigger()
+        await asyncio.sleep(0.01)
+    assert calls == [] and debouncer.pending
+
+    await asyncio.sleep(0.1)
+    assert calls == [1] and not debouncer.pending
+
+    debouncer.trigger()
+    debouncer.flush()
+    assert calls == [1, 1]
@@ -0,0 +1,273 @@
+"""
+Tests for the LiteLLM shim proxy (installation/stage-1/system/litellm/proxy.py)
+against a stub upstream.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Any, Iterator
+
+import pytest
+
+from tests.llm_stub import StubUpstream, load_proxy, start_proxy
+
+
+@pytest.fixture
+def upstream() -> Iterator[StubUpstream]:
+    stub = StubUpstream().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def proxy(upstream: StubUpstream) -> Iterator[tuple[ModuleType, str]]:
+    module = load_proxy(upstream.url)
+    server, url = start_proxy(module)
+    yield module, url
+    server.shutdown()
+    server.server_close()
+    module.POOL.close()
+
+
+def _client(url: str) -> http.client.HTTPConnection:
+    parsed = urllib.parse.urlparse(url)
+    return http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+
+
+def _post(conn: http.client.HTTPConnection, payload: Any) -> dict[str, Any]:
+    body = json.dumps(payload).encode()
+    conn.request("POST", "/v1/chat/completions", body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    assert resp.status == 200
+    return json.loads(resp.read())
+
+
+def test_requests_are_served_concurrently(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    upstream.delay = 0.3
+    _, url = proxy
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: _post(_client(url), {"n": 1}), range(8)))
+    elapsed = time.monotonic() - start
+
+    assert all(r["object"] == "chat.completion" for r in results)
+    assert elapsed < 8 * 0.3 / 2  # served one at a time this would take 2.4s
+
+
+def test_upstream_connections_are_reused(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    conn = _client(url)
+    for i in range(20):
+        assert _post(conn, {"i": i})["received_bytes"] == len(json.dumps({"i": i}))
+    # one client connection kept alive, one pooled upstream connection
+    assert upstream.connections == 1
+
+
+def test_stale_pooled_connection_is_retried(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    conn = _client(url)
+    _post(conn, {"first": True})
+
+    upstream.drop_connections()
+    time.sleep(0.05)
+
+    assert _post(conn, {"second": True})["object"] == "chat.completion"
+    assert upstream.connections == 2
+
+
+def test_chunked_upstream_response_keeps_client_alive(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    conn = _client(url)
+    conn.request("GET", "/chunked")
+    resp = conn.getresponse()
+    assert resp.read() == b"hello chunked world"
+    assert not resp.will_close
+
+    conn.request("GET", "/v1/models")
+    assert json.loads(conn.getresponse().read())["data"][0]["id"] == "stub-model"
+
+
+def test_telemetry_is_answered_locally(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    conn = _client(url)
+    conn.request("POST", "/api/event_logging/batch", body=b'{"events": []}')
+    resp = conn.getresponse()
+    assert resp.status == 200 and resp.read() == b""
+    assert upstream.requests == []
+
+
+def test_unreachable_upstream_returns_error() -> None:
+    module = load_proxy("http://127.0.0.1:1")
+    server, url = start_proxy(module)
+    try:
+        conn = _client(url)
+        conn.request("GET", "/v1/models")
+        assert conn.getresponse().status == 500
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_events_are_forwarded_as_they_arrive(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    upstream.tokens, upstream.token_delay = 3, 0.3
+    _, url = proxy
+    conn = _client(url)
+
+    start = time.monotonic()
+    conn.request("POST", "/v1/chat/completions", body=json.dumps({"stream": True}).encode(),
+                 headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    assert resp.getheader("Content-Type") == "text/event-stream"
+    first = resp.readline()
+    first_at = time.monotonic() - start
+
+    assert first.startswith(b"data: ") and b"tok0" in first
+    # the first event arrives long before the stream ends (3 x 0.3s)
+    assert first_at < 0.6
+    rest = resp.read()
+    assert rest.count(b"data: ") == 3 and rest.endswith(b"data: [DONE]\n\n")
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_large_request_bodies_are_streamed(upstream: StubUpstream, proxy: tuple[ModuleType, str], chunked: bool) -> None:
+    module, url = proxy
+    payload = json.dumps({"image": "x" * (4 * module.STREAM_BODY_THRESHOLD)}).encode()
+    conn = _client(url)
+
+    if chunked:
+        parts = (payload[i:i + 10000] for i in range(0, len(payload), 10000))
+        conn.request("POST", "/v1/chat/completions", body=parts, encode_chunked=True,
+                     headers={"Transfer-Encoding": "chunked"})
+    else:
+        conn.request("POST", "/v1/chat/completions", body=payload)
+    resp = conn.getresponse()
+
+    assert resp.status == 200
+    assert json.loads(resp.read())["received_bytes"] == len(payload)
+    # the client connection is still usable
+    assert _post(conn, {"after": True})["object"] == "chat.completion"
+
+
+def test_metrics_and_access_log(upstream: StubUpstream, proxy: tuple[ModuleType, str],
+                                capsys: pytest.CaptureFixture[str]) -> None:
+    _, url = proxy
+    conn = _client(url)
+    for _ in range(3):
+        _post(conn, {"hello": "world"})
+    conn.request("GET", "/v1/models?x=1")
+    conn.getresponse().read()
+
+    conn.request("GET", "/metrics")
+    resp = conn.getresponse()
+    text = resp.read().decode()
+    assert resp.getheader("Content-Type").startswith("text/plain")
+
+    assert 'litellm_shim_requests_total{method="POST",path="/v1/chat/completions",status="200"} 3' in text
+    # query strings are not part of the label (the stub answers 404 to them)
+    assert 'litellm_shim_requests_total{method="GET",path="/v1/models",status="404"} 1' in text
+    assert "litellm_shim_requests_in_flight 1" in text  # the scrape itself
+    assert 'litellm_shim_request_duration_seconds_bucket{le="+Inf"} 4' in text
+    assert 'litellm_shim_upstream_connect_seconds_count 1' in text
+    assert 'litellm_shim_upstream_ttfb_seconds_count 4' in text
+    assert 'litellm_shim_upstream_requests_total{connection="reused"} 3' in text
+    assert "litellm_shim_request_bytes_total 54" in text  # 3 x len('{"hello": "world"}')
+    assert upstream.requests.count(("GET", "/metrics")) == 0
+    _post(conn, {})  # the scrape is logged once the handler moves on to this request
+
+    records = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    first = records[0]
+    assert first["method"] == "POST" and first["status"] == 200
+    assert first["upstream_reused"] is False and "upstream_connect_ms" in first
+    assert first["bytes_in"] == 18 and first["bytes_out"] > 0
+    assert records[3]["path"] == "/v1/models?x=1" and records[3]["upstream_reused"] is True
+    assert records[4]["path"] == "/metrics" and records[4]["bytes_out"] == len(text.encode())
+
+
+def _get_models(url: str, **headers: str) -> http.client.HTTPResponse:
+    conn = _client(url)
+    conn.request("GET", "/v1/models", headers=headers)
+    resp = conn.getresponse()
+    assert json.loads(resp.read())["data"][0]["id"] == "stub-model"
+    return resp
+
+
+def test_model_list_is_cached(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    assert _get_models(url).getheader("X-Cache") == "MISS"
+    assert _get_models(url).getheader("X-Cache") == "HIT"
+    assert upstream.requests.count(("GET", "/v1/models")) == 1
+
+    # other credentials get their own entry
+    assert _get_models(url, Authorization="Bearer other").getheader("X-Cache") == "MISS"
+    # the client can ask for a fresh response
+    assert _get_models(url, **{"Cache-Control": "no-cache"}).getheader("X-Cache") == "MISS"
+    assert upstream.requests.count(("GET", "/v1/models")) == 3
+
+    conn = _client(url)
+    conn.request("GET", "/metrics")
+    text = conn.getresponse().read().decode()
+    assert 'litellm_shim_cache_requests_total{result="hit"} 1' in text
+    assert 'litellm_shim_cache_requests_total{result="bypass"} 1' in text
+
+
+def test_concurrent_misses_share_one_upstream_call(upstream: StubUpstream, proxy: tuple[ModuleType, str],
+                                                   capsys: pytest.CaptureFixture[str]) -> None:
+    upstream.delay = 0.3
+    module, url = proxy
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: _get_models(url).getheader("X-Cache"), range(8)))
+
+    assert upstream.requests.count(("GET", "/v1/models")) == 1
+    assert results.count("MISS") == 1 and results.count("HIT") == 7
+    records = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    assert sorted(r["cache"] for r in records).count("coalesced") == 7
+    assert all("cache_hit_ratio" in r for r in records)
+    assert module.METRICS.cache_hit_ratio() == 7 / 8
+
+
+def test_cache_honors_ttl_and_no_store(upstream: StubUpstream) -> None:
+    module = load_proxy(upstream.url, CACHE_TTL="0.2")
+    server, url = start_proxy(module)
+    try:
+        _get_models(url)
+        assert _get_models(url).getheader("X-Cache") == "HIT"
+        time.sleep(0.25)
+        assert _get_models(url).getheader("X-Cache") == "MISS"
+        assert upstream.requests.count(("GET", "/v1/models")) == 2
+
+        upstream.cache_control = "no-store"
+        time.sleep(0.25)
+        _get_models(url)
+        assert _get_models(url).getheader("X-Cache") == "MISS"
+        assert upstream.requests.count(("GET", "/v1/models")) == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+        module.POOL.close()
+
+
+def test_head_requests_get_headers_only(upstream: StubUpstream, proxy: tuple[ModuleType, str]) -> None:
+    _, url = proxy
+    _get_models(url)
+    conn = _client(url)
+
+    conn.request("HEAD", "/v1/models")
+    resp = conn.getresponse()
+    assert resp.status == 200 and resp.getheader("X-Cache") == "HIT"
+    assert int(resp.getheader("Content-Length")) > 0 and resp.read() == b""
+
+    conn.request("HEAD", "/metrics")
+    resp = conn.getresponse()
+    assert resp.status == 200 and int(resp.getheader("Content-Length")) > 0 and resp.read() == b""
+
+    # the connection is still in sync after two bodiless responses
+    assert _get_models(url).getheader("X-Cache") == "HIT"
+    conn.request("GET", "/v1/models")
+    assert json.loads(conn.getresponse().read())["data"][0]["id"] == "stub-model"
+    assert upstream.requests.count(("GET", "/v1/models")) == 1
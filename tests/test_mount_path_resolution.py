@@ -71,6 +71,21 @@ def test_yaml_duplicate_keys_are_rejected(tmp_path: Path) -> None:
         _ = load_yaml_file_with_duplicate_key_check(str(p))
 
 
+@pytest.mark.parametrize("loader", ["_NoDuplicateSafeLoader", "_NoDuplicatePySafeLoader"])
+def test_yaml_loaders_agree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, loader: str) -> None:
+    from pei_docker import pei_utils
+
+    monkeypatch.setattr(pei_utils, "_NoDuplicateSafeLoader", getattr(pei_utils, loader))
+    p = tmp_path / "user_config.yml"
+    p.write_text("a:\n  b: 1\n  c: [x, 2.5, true]\n  d: '${X}'\n", encoding="utf-8")
+    cfg = load_yaml_file_with_duplicate_key_check(str(p))
+    assert oc.OmegaConf.to_container(cfg, resolve=False) == {"a": {"b": 1, "c": ["x", 2.5, True], "d": "${X}"}}
+
+    p.write_text("a:\n  b: 1\n  b: 2\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=r"Duplicate key 'b' in YAML \(line 3, column 3\)"):
+        _ = load_yaml_file_with_duplicate_key_check(str(p))
+
+
 def test_mount_name_can_match_storage_keyword(tmp_path: Path) -> None:
     in_config = oc.OmegaConf.create(
         {
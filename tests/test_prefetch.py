@@ -0,0 +1,225 @@
+"""
+Tests for ``pei-docker-cli prefetch`` (pei_utils_prefetch) against a local
+HTTP server, and for the ``system/prefetched.sh`` lookup used by installers.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from click.testing import CliRunner
+
+import pei_docker
+from pei_docker import pei
+from pei_docker.pei_utils_prefetch import (
+    CHECKSUM_FILE,
+    PLACEHOLDER_FILE,
+    Artifact,
+    artifact_filename,
+    find_artifacts,
+    is_pinned_url,
+    prefetch_artifacts,
+    read_checksums,
+)
+
+PREFETCHED_SH = (Path(pei_docker.__file__).resolve().parent / "project_files" / "installation"
+                 / "stage-1" / "system" / "prefetched.sh")
+
+
+class FileServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FileHandler)
+        self.files: dict[str, bytes] = {}
+        # path -> number of 503 answers still to give
+        self.failures: dict[str, int] = {}
+        self.hits: list[str] = []
+        self.delay = 0.0
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    server: FileServer
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.hits.append(self.path)
+        time.sleep(self.server.delay)
+        if self.server.failures.get(self.path, 0) > 0:
+            self.server.failures[self.path] -= 1
+            self.send_error(503)
+            return
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.sha256(content).hexdigest()[:16]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+@pytest.fixture
+def server() -> Iterator[FileServer]:
+    srv = FileServer()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_artifacts_are_found_in_on_build_entries() -> None:
+    config = {
+        "stage_1": {"custom": {"on_build": [
+            "stage-1/system/conda/install-miniconda.sh --installer-url tuna",
+            "stage-1/system/uv/install-uv.sh --user dev --pypi-repo tuna",
+            "stage-1/custom/my-script.sh",
+        ]}},
+        "stage_2": {"custom": {"on_build": [
+            "stage-2/system/nodejs/install-nvm.sh --version 0.39.7",
+            "stage-2/system/bun/install-bun.sh --installer-url https://example.com/bun.sh",
+            # same URL as above, fetched once
+            "stage-1/system/uv/install-uv.sh --user other",
+        ]}},
+    }
+    urls = [a.url for a in find_artifacts(config, arch="arm64")]
+    assert urls == [
+        "https://mirrors.tuna.tsinghua.edu.cn/anaconda/miniconda/Miniconda3-latest-Linux-aarch64.sh",
+        "https://astral.sh/uv/install.sh",
+        "https://github.com/nvm-sh/nvm/archive/refs/tags/v0.39.7.tar.gz",
+        "https://example.com/bun.sh",
+    ]
+    assert find_artifacts({"stage_1": {"custom": None}}) == []
+    with pytest.raises(ValueError, match="architecture"):
+        find_artifacts(config, arch="riscv64")
+
+
+def test_downloads_are_checksummed_and_reused(server: FileServer, tmp_path: Path) -> None:
+    server.files = {f"/f{i}.sh": f"installer {i}".encode() for i in range(4)}
+    server.delay = 0.2
+    artifacts = [Artifact(url=server.url(path), entry="e") for path in server.files]
+    dest = tmp_path / "prefetch"
+
+    start = time.monotonic()
+    results = prefetch_artifacts(artifacts, str(dest), jobs=4)
+    assert time.monotonic() - start < 4 * 0.2  # fetched in parallel
+    assert [r.status for r in results] == ["downloaded"] * 4
+    checksums = read_checksums(str(dest))
+    assert sorted(checksums) == sorted(a.filename for a in artifacts)
+    assert (dest / artifacts[0].filename).read_bytes() == b"installer 0"
+
+    server.hits.clear()
+    (dest / artifacts[1].filename).write_bytes(b"corrupted")
+    results = prefetch_artifacts(artifacts[:2], str(dest), jobs=4)
+    assert [r.status for r in results] == ["cached", "downloaded"]
+    # the unchanged file is only revalidated (304)
+    assert sorted(server.hits) == ["/f0.sh", "/f1.sh"]
+    # artifacts no longer needed are dropped
+    assert sorted(os.listdir(dest)) == sorted([CHECKSUM_FILE, "manifest.json"] + [a.filename for a in artifacts[:2]])
+
+
+def test_unversioned_files_are_revalidated(server: FileServer, tmp_path: Path) -> None:
+    assert not is_pinned_url("https://repo.anaconda.com/miniconda/Miniconda3-latest-Linux-x86_64.sh")
+    assert not is_pinned_url("https://github.com/nvm-sh/nvm/archive/refs/heads/master.tar.gz")
+    assert not is_pinned_url("https://astral.sh/uv/install.sh")
+    assert is_pinned_url("https://github.com/nvm-sh/nvm/archive/refs/tags/v0.39.7.tar.gz")
+
+    server.files = {"/latest/install.sh": b"v1", "/tool-1.2.3.tar.gz": b"1.2.3"}
+    moving, pinned = (Artifact(url=server.url(path), entry="e") for path in server.files)
+    dest = tmp_path / "prefetch"
+    prefetch_artifacts([moving, pinned], str(dest))
+
+    server.hits.clear()
+    assert [r.status for r in prefetch_artifacts([moving, pinned], str(dest))] == ["cached", "cached"]
+    assert server.hits == ["/latest/install.sh"]
+
+    server.files["/latest/install.sh"] = b"v2"
+    server.files["/tool-1.2.3.tar.gz"] = b"republished"
+    assert [r.status for r in prefetch_artifacts([moving, pinned], str(dest))] == ["downloaded", "cached"]
+    assert (dest / moving.filename).read_bytes() == b"v2"
+    assert read_checksums(str(dest))[moving.filename] == hashlib.sha256(b"v2").hexdigest()
+
+    results = prefetch_artifacts([moving, pinned], str(dest), refresh=True)
+    assert [r.status for r in results] == ["cached", "downloaded"]
+    assert (dest / pinned.filename).read_bytes() == b"republished"
+
+    # the server is down: the checked copy is kept
+    server.failures = {"/latest/install.sh": 5}
+    assert prefetch_artifacts([moving], str(dest), retries=1)[0].status == "cached"
+    assert read_checksums(str(dest)) == {moving.filename: hashlib.sha256(b"v2").hexdigest()}
+
+
+def test_projects_ship_the_prefetch_directory(server: FileServer, tmp_path: Path,
+                                              caplog: pytest.LogCaptureFixture) -> None:
+    project = tmp_path / "proj"
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--quick", "minimal"])
+    assert result.exit_code == 0, result.output
+    placeholder = project / "prefetch" / PLACEHOLDER_FILE
+    assert placeholder.is_file()
+
+    server.files = {"/install.sh": b"x"}
+    prefetch_artifacts([Artifact(url=server.url("/install.sh"), entry="e")], str(project / "prefetch"))
+    assert placeholder.is_file()
+
+    placeholder.unlink()
+    (project / ".dockerignore").write_text("prefetch/\n", encoding="utf-8")
+    with caplog.at_level("WARNING"):
+        result = CliRunner().invoke(pei.cli, ["configure", "-p", str(project)])
+    assert result.exit_code == 0, result.output
+    assert placeholder.is_file()
+    assert "excludes prefetch/" in caplog.text
+
+
+def test_transient_errors_are_retried(server: FileServer, tmp_path: Path) -> None:
+    server.files = {"/flaky.sh": b"ok"}
+    server.failures = {"/flaky.sh": 2}
+    artifacts = [Artifact(url=server.url("/flaky.sh"), entry="e"),
+                 Artifact(url=server.url("/missing.sh"), entry="e")]
+
+    results = prefetch_artifacts(artifacts, str(tmp_path), retries=3, retry_delay=0.01)
+
+    assert results[0].status == "downloaded" and server.hits.count("/flaky.sh") == 3
+    # a 404 is not retried, and the file is left out of the checksums
+    assert results[1].status == "failed" and server.hits.count("/missing.sh") == 1
+    assert list(read_checksums(str(tmp_path))) == [artifacts[0].filename]
+
+
+@pytest.mark.skipif(shutil.which("bash") is None or shutil.which("sha256sum") is None,
+                    reason="needs bash and sha256sum")
+def test_installers_find_prefetched_files(server: FileServer, tmp_path: Path) -> None:
+    url = server.url("/install.sh")
+    server.files = {"/install.sh": b"echo hi"}
+    prefetch_artifacts([Artifact(url=url, entry="e")], str(tmp_path))
+
+    def lookup(lookup_url: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(["bash", "-c", f'source "{PREFETCHED_SH}"; pei_prefetched "$1"', "_", lookup_url],
+                              env={**os.environ, "PEI_PREFETCH_DIR": str(tmp_path)},
+                              capture_output=True, text=True)
+
+    found = lookup(url)
+    assert found.returncode == 0
+    assert found.stdout.strip() == str(tmp_path / artifact_filename(url))
+    assert lookup(server.url("/other.sh")).returncode == 1
+
+    (tmp_path / artifact_filename(url)).write_bytes(b"tampered")
+    assert lookup(url).returncode == 1
@@ -0,0 +1,96 @@
+"""
+Tests for project export (GUI Download): exclusion rules, streamed zip, temp cleanup.
+"""
+from __future__ import annotations
+
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from pei_docker.pei_utils_export import ExcludeRules, list_export_files, write_project_zip
+from pei_docker.webgui.utils.utils import ExportStore
+
+
+def _write(path: Path, data: bytes = b"x") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    root = tmp_path / "proj"
+    _write(root / "user_config.yml", b"stage_1: {}\n")
+    _write(root / "installation/stage-1/custom/setup.sh", b"echo hi\n")
+    _write(root / "installation/stage-1/tmp/miniconda.sh", b"0" * 4096)
+    _write(root / "installation/stage-2/tmp/cache/pkg.tar", b"0" * 4096)
+    _write(root / "installation/stage-1/system/litellm/__pycache__/proxy.cpython-311.pyc")
+    _write(root / "notes/draft.md")
+    return root
+
+
+@pytest.mark.parametrize(
+    ("patterns", "path", "expected"),
+    [
+        (["installation/stage-*/tmp"], "installation/stage-1/tmp/a/b.bin", True),
+        (["installation/stage-*/tmp"], "installation/stage-1/custom/tmp.sh", False),
+        (["**/*.pyc"], "a/b/c.pyc", True),
+        (["**/*.pyc"], "top.pyc", True),
+        (["*.md", "!README.md"], "README.md", False),
+        (["*.md"], "docs/guide.md", False),
+        (["# comment", "", "docs"], "docs/guide.md", True),
+    ],
+)
+def test_exclude_rules(patterns: list[str], path: str, expected: bool) -> None:
+    assert ExcludeRules(patterns).is_excluded(path) is expected
+
+
+def test_export_skips_caches_and_honours_dockerignore(project: Path) -> None:
+    (project / ".dockerignore").write_text("notes\n!installation/stage-2/tmp\n")
+
+    names = [name for name, _ in list_export_files(str(project))]
+
+    assert "installation/stage-1/custom/setup.sh" in names
+    assert "installation/stage-1/tmp/miniconda.sh" not in names
+    assert not any("__pycache__" in name for name in names)
+    assert not any(name.startswith("notes/") for name in names)
+    # re-included by the project's .dockerignore
+    assert "installation/stage-2/tmp/cache/pkg.tar" in names
+
+
+def test_zip_reports_progress(project: Path, tmp_path: Path) -> None:
+    files = list_export_files(str(project))
+    reports: list[tuple[int, int]] = []
+    out = tmp_path / "out.zip"
+
+    n = write_project_zip(str(project), str(out), files, progress=lambda done, total: reports.append((done, total)))
+
+    assert n == len(files) == len(reports)
+    total = sum(size for _, size in files)
+    assert reports[-1] == (total, total)
+    with zipfile.ZipFile(out) as zf:
+        assert sorted(zf.namelist()) == sorted(name for name, _ in files)
+        assert zf.read("user_config.yml") == b"stage_1: {}\n"
+
+
+def test_export_store_cleans_up(tmp_path: Path) -> None:
+    store = ExportStore(ttl_seconds=3600)
+    token, path = store.reserve("proj.zip")
+    assert store.get(token) is None  # not written yet
+    Path(path).write_bytes(b"zip")
+    assert store.get(token) == (path, "proj.zip")
+
+    store.discard(token)
+    assert not os.path.exists(path) and store.get(token) is None
+
+    expired = ExportStore(ttl_seconds=-1)
+    old_token, old_path = expired.reserve("a.zip")
+    Path(old_path).write_bytes(b"zip")
+    expired.reserve("b.zip")  # sweeps the first one
+    assert not os.path.exists(old_path)
+
+    temp_dir = os.path.dirname(path)
+    store.cleanup()
+    expired.cleanup()
+    assert not os.path.exists(temp_dir)
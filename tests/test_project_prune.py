@@ -0,0 +1,153 @@
+"""
+Tests for project labelling in generated compose files and `remove --prune`.
+"""
+from __future__ import annotations
+
+import socket
+from pathlib import Path
+
+import omegaconf as oc
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from pei_docker import docker_engine, pei
+from pei_docker.config_processor import Defaults, PeiConfigProcessor
+from pei_docker.pei_utils import compute_project_id
+from tests.docker_stub import StubDaemon
+
+
+def _load_compose_template() -> oc.DictConfig:
+    import pei_docker
+
+    pkg_root = Path(pei_docker.__file__).resolve().parent
+    template_path = pkg_root / "templates" / "base-image-gen.yml"
+    cfg = oc.OmegaConf.load(str(template_path))
+    assert isinstance(cfg, oc.DictConfig)
+    return cfg
+
+
+def test_project_id_is_stable_and_path_specific(tmp_path: Path) -> None:
+    a = tmp_path / "a" / "My Project"
+    b = tmp_path / "b" / "My Project"
+    a.mkdir(parents=True)
+    b.mkdir(parents=True)
+
+    assert compute_project_id(str(a)) == compute_project_id(str(a) + "/")
+    assert compute_project_id(str(a)) != compute_project_id(str(b))
+    assert compute_project_id(str(a)).startswith("my-project-")
+
+
+def test_compose_resources_carry_project_label(tmp_path: Path) -> None:
+    in_config = oc.OmegaConf.create(
+        {
+            "stage_1": {"image": {"base": "ubuntu:24.04", "output": "test:stage-1"}},
+            "stage_2": {
+                "image": {"output": "test:stage-2"},
+                "storage": {
+                    "app": {"type": "auto-volume"},
+                    "data": {"type": "manual-volume", "volume_name": "shared-data"},
+                    "workspace": {"type": "image"},
+                },
+            },
+        }
+    )
+    assert isinstance(in_config, oc.DictConfig)
+
+    proc = PeiConfigProcessor.from_config(in_config, _load_compose_template(), project_dir=str(tmp_path))
+    out = oc.OmegaConf.to_container(proc.process(generate_custom_script_files=False), resolve=True)
+    assert isinstance(out, dict)
+    project_id = compute_project_id(str(tmp_path))
+
+    for stage in ("stage-1", "stage-2"):
+        service = out["services"][stage]
+        assert service["labels"][Defaults.ProjectLabel] == project_id
+        assert service["build"]["labels"][Defaults.ProjectLabel] == project_id
+        assert service["build"]["args"][Defaults.ProjectIdBuildArg] == project_id
+
+    assert out["volumes"]["app"]["labels"][Defaults.ProjectLabel] == project_id
+    # external volumes are not owned by the project
+    assert "labels" not in out["volumes"]["data"]
+
+    # dotted label keys survive the YAML round trip as single keys
+    dumped = yaml.safe_load(yaml.safe_dump(out))
+    assert dumped["services"]["stage-2"]["labels"] == {Defaults.ProjectLabel: project_id}
+
+
+@pytest.fixture
+def project_daemon(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("unix sockets not available")
+    sock_path = str(tmp_path / "docker.sock")
+    server = StubDaemon(sock_path).start()
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{sock_path}")
+
+    mine = {Defaults.ProjectLabel: "proj-1234abcd"}
+    other = {Defaults.ProjectLabel: "other-99999999"}
+    server.containers = {"old-c": "sha256:old"}
+    server.volumes = {"proj_app", "other_app"}
+    server.system_df = {
+        "Containers": [
+            {"Id": "old-c", "Names": ["/proj-stage-2-1"], "Labels": mine, "State": "exited", "SizeRw": 100},
+        ],
+        "Images": [
+            {"Id": "sha256:stage1", "RepoTags": ["proj:stage-1"], "Labels": mine, "Size": 5000, "SharedSize": 1000, "Created": 1},
+            {"Id": "sha256:old", "RepoTags": [], "Labels": mine, "Size": 2000, "SharedSize": -1, "Created": 2},
+            {"Id": "sha256:theirs", "RepoTags": ["other:stage-1"], "Labels": other, "Size": 7000, "Created": 3},
+        ],
+        "Volumes": [
+            {"Name": "proj_app", "Labels": mine, "UsageData": {"Size": 300, "RefCount": 0}},
+            {"Name": "other_app", "Labels": other, "UsageData": {"Size": 900, "RefCount": 0}},
+        ],
+        "BuildCache": [
+            {"ID": "cache-mine", "Type": "exec.cachemount", "Size": 40,
+             "Description": 'cached mount /var/cache/pei-build from exec /bin/sh -c x with id "pei-proj-1234abcd-build"'},
+            {"ID": "cache-theirs", "Type": "exec.cachemount", "Size": 80,
+             "Description": 'cached mount /var/cache/pei-build from exec /bin/sh -c x with id "pei-other-99999999-build"'},
+            {"ID": "cache-shared-apt", "Type": "exec.cachemount", "Size": 160,
+             "Description": 'cached mount /var/cache/apt from exec /bin/sh -c x with id "pei-apt"'},
+        ],
+    }
+
+    project_dir = tmp_path / "proj"
+    project_dir.mkdir()
+    compose = {"services": {"stage-2": {"image": "proj:stage-2", "labels": dict(mine)}}}
+    (project_dir / Defaults.OutputComposeName).write_text(yaml.safe_dump(compose), encoding="utf-8")
+
+    yield server, project_dir
+    server.stop()
+    docker_engine._client_cache.pop(sock_path, None)
+
+
+def test_prune_dry_run_reports_bytes_without_removing(project_daemon, caplog: pytest.LogCaptureFixture) -> None:
+    server, project_dir = project_daemon
+
+    with caplog.at_level("INFO"):
+        result = CliRunner().invoke(pei.cli, ["remove", "-p", str(project_dir), "--prune", "--dry-run"])
+
+    assert result.exit_code == 0, result.output
+    # 100 (container) + 4000 + 2000 (images, minus shared layers) + 300 (volume) + 40 (cache)
+    assert "(6440 bytes) reclaimable" in caplog.text
+    assert "other:stage-1" not in caplog.text
+    assert not [r for r in server.requests if r[0] in ("POST", "DELETE")]
+
+
+def test_prune_removes_only_project_resources(project_daemon) -> None:
+    server, project_dir = project_daemon
+
+    result = CliRunner().invoke(pei.cli, ["remove", "-p", str(project_dir), "--prune", "--yes"])
+
+    assert result.exit_code == 0, result.output
+    deletes = [path for method, path in server.requests if method == "DELETE"]
+    assert "/containers/old-c" in deletes
+    # newer (child) image removed before its parent
+    assert deletes.index("/images/sha256:old") < deletes.index("/images/sha256:stage1")
+    assert "/images/sha256:theirs" not in deletes
+    assert server.volumes == {"other_app"}
+    assert server.pruned_cache_ids == ["cache-mine"]
+
+
+def test_dry_run_requires_prune(tmp_path: Path) -> None:
+    result = CliRunner().invoke(pei.cli, ["remove", "-p", str(tmp_path), "--dry-run"])
+    assert result.exit_code != 0
+    assert "--dry-run can only be used together with --prune" in result.output
@@ -0,0 +1,92 @@
+"""
+Tests for pruning unreferenced system installers and restoring them on demand.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import yaml
+from click.testing import CliRunner
+
+from pei_docker import pei
+from pei_docker.pei_utils_installers import (
+    find_referenced_system_dirs,
+    list_system_dirs,
+    prune_unused_system_dirs,
+)
+
+
+def _create(project: Path) -> None:
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--quick", "minimal", "--prune-unused"])
+    assert result.exit_code == 0, result.output
+
+
+def _set_custom(project: Path, custom: dict) -> None:
+    config_path = project / "user_config.yml"
+    config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+    config["stage_2"]["custom"] = custom
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+
+def test_references_follow_stage2_wrappers(tmp_path: Path) -> None:
+    config = {"stage_2": {"custom": {"on_build": ["stage-2/system/pixi/install-pixi.bash --verbose"]}}}
+
+    refs = find_referenced_system_dirs(str(tmp_path), config)
+
+    assert ("stage-2", "pixi") in refs
+    # the stage-2 wrapper forwards to $PEI_STAGE_DIR_1/system/pixi
+    assert ("stage-1", "pixi") in refs
+    assert ("stage-1", "ros2") not in refs
+
+
+def test_custom_scripts_are_scanned(tmp_path: Path) -> None:
+    custom_dir = tmp_path / "installation" / "stage-1" / "custom"
+    custom_dir.mkdir(parents=True)
+    (custom_dir / "setup.sh").write_text('bash "$PEI_STAGE_DIR_1/system/uv/install-uv.sh"\n')
+
+    assert ("stage-1", "uv") in find_referenced_system_dirs(str(tmp_path), {})
+
+
+def test_create_prune_unused_keeps_top_level_files(tmp_path: Path) -> None:
+    project = tmp_path / "proj"
+    _create(project)
+
+    installation = project / "installation"
+    # the minimal template references no installer
+    assert list_system_dirs(str(installation), "stage-1") == []
+    assert list_system_dirs(str(installation), "stage-2") == []
+    assert (installation / "stage-1" / "system" / "set-locale.sh").is_file()
+    assert (installation / "stage-1" / "internals").is_dir()
+
+
+def test_user_dirs_under_system_are_not_pruned(tmp_path: Path) -> None:
+    project = tmp_path / "proj"
+    _create(project)
+    mine = project / "installation" / "stage-1" / "system" / "my-tool"
+    mine.mkdir()
+
+    removed, _ = prune_unused_system_dirs(str(project), {})
+
+    assert removed == []
+    assert mine.is_dir()
+
+
+def test_configure_restores_and_prunes(tmp_path: Path) -> None:
+    project = tmp_path / "proj"
+    _create(project)
+    _set_custom(project, {"on_build": ["stage-2/system/conda/auto-install-miniconda.sh"]})
+
+    result = CliRunner().invoke(pei.cli, ["configure", "-p", str(project)])
+    assert result.exit_code == 0, result.output
+
+    installation = project / "installation"
+    assert (installation / "stage-2" / "system" / "conda" / "auto-install-miniconda.sh").is_file()
+    assert "conda" in list_system_dirs(str(installation), "stage-1")
+
+    # switch to another installer: the old one goes away only with --prune-unused
+    _set_custom(project, {"on_build": ["stage-1/system/uv/install-uv.sh"]})
+    result = CliRunner().invoke(pei.cli, ["configure", "-p", str(project), "--prune-unused"])
+    assert result.exit_code == 0, result.output
+
+    assert list_system_dirs(str(installation), "stage-1") == ["uv"]
+    assert list_system_dirs(str(installation), "stage-2") == []
@@ -0,0 +1,115 @@
+"""
+Tests for batched container teardown used by the ``remove`` command.
+
+A fake ``docker`` executable is placed on ``PATH`` so the tests exercise the
+real subprocess path without requiring a Docker daemon.
+"""
+from __future__ import annotations
+
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from pei_docker import pei
+
+
+_FAKE_DOCKER = """#!{python}
+import json
+import sys
+
+args = sys.argv[1:]
+with open({log!r}, "a", encoding="utf-8") as fh:
+    fh.write(json.dumps(args) + "\\n")
+
+failing = set({failing!r})
+command = args[0]
+ids = args[3:] if command == "stop" else args[1:]
+code = 0
+for cid in ids:
+    if cid in failing:
+        sys.stderr.write("Error response from daemon: cannot %s container: %s\\n" % (command, cid))
+        code = 1
+    else:
+        sys.stdout.write(cid + "\\n")
+sys.exit(code)
+"""
+
+
+def _install_fake_docker(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, failing: list[str] | None = None) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log_path = tmp_path / "docker-calls.jsonl"
+    script = bin_dir / "docker"
+    script.write_text(
+        _FAKE_DOCKER.format(python=sys.executable, log=str(log_path), failing=list(failing or [])),
+        encoding="utf-8",
+    )
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    # point the Engine API client at a socket that does not exist so the CLI path is used
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{tmp_path / 'missing.sock'}")
+    return log_path
+
+
+def _read_calls(log_path: Path) -> list[list[str]]:
+    return [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake docker script relies on a POSIX shebang")
+def test_stop_and_remove_batches_containers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log_path = _install_fake_docker(tmp_path, monkeypatch)
+    ids = [f"c{i}" for i in range(5)]
+
+    assert pei.stop_and_remove_containers(ids, force_yes=True, stop_timeout=3, batch_size=2)
+
+    calls = _read_calls(log_path)
+    assert calls == [
+        ["stop", "-t", "3", "c0", "c1"],
+        ["stop", "-t", "3", "c2", "c3"],
+        ["stop", "-t", "3", "c4"],
+        ["rm", "c0", "c1"],
+        ["rm", "c2", "c3"],
+        ["rm", "c4"],
+    ]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake docker script relies on a POSIX shebang")
+def test_batch_reports_per_container_failures(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _install_fake_docker(tmp_path, monkeypatch, failing=["bad"])
+
+    done, failed = pei.run_docker_batch(["stop", "-t", "1"], ["ok1", "bad", "ok2"])
+
+    assert done == ["ok1", "ok2"]
+    assert list(failed) == ["bad"]
+    assert "cannot stop container: bad" in failed["bad"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake docker script relies on a POSIX shebang")
+def test_failed_stop_still_attempts_removal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    log_path = _install_fake_docker(tmp_path, monkeypatch, failing=["bad"])
+
+    with caplog.at_level("INFO"):
+        assert pei.stop_and_remove_containers(["ok", "bad"], force_yes=True)
+
+    calls = _read_calls(log_path)
+    assert calls[0] == ["stop", "-t", str(pei.DEFAULT_STOP_TIMEOUT), "ok", "bad"]
+    assert calls[1] == ["rm", "ok", "bad"]
+    assert "Failed to stop container bad" in caplog.text
+    assert "Failed to remove container bad" in caplog.text
+    assert "Stopped 1/2 container(s)" in caplog.text
+
+
+def test_missing_docker_binary_marks_all_failed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path))
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{tmp_path / 'missing.sock'}")
+
+    done, failed = pei.run_docker_batch(["rm"], ["a", "b"])
+
+    assert done == []
+    assert set(failed) == {"a", "b"}
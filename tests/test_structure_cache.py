@@ -0,0 +1,131 @@
+"""
+Tests for the UserConfig structuring cache.
+"""
+from __future__ import annotations
+
+import copy
+import os
+from pathlib import Path
+from typing import Iterator
+
+import cattrs
+import omegaconf as oc
+import pytest
+from click.testing import CliRunner
+
+from pei_docker import pei
+from pei_docker.config_processor import PeiConfigProcessor
+from pei_docker.pei_utils import load_yaml_file_with_duplicate_key_check
+from pei_docker.user_config import UserConfig, structure_cache
+from pei_docker.user_config.structure_cache import clear_structure_cache, config_hash, structure_user_config
+
+PUBKEY = "ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIGk2dGFfZ2VuZXJhdGVkX2Zvcl90ZXN0aW5nX29ubHk me@host"
+
+
+def _config(port: int = 22) -> dict:
+    return {
+        "stage_1": {
+            "image": {"base": "ubuntu:24.04", "output": "test:stage-1"},
+            "ssh": {"enable": True, "port": port, "host_port": 2222,
+                    "users": {"me": {"password": "123456", "pubkey_text": PUBKEY}}},
+            "environment": {"A": "1"},
+        },
+        "stage_2": {
+            "image": {"output": "test:stage-2"},
+            "storage": {"app": {"type": "image"}, "data": {"type": "auto-volume"}},
+            "mount": {"home": {"type": "host", "host_path": "/tmp/home", "dst_path": "/home/me"}},
+        },
+    }
+
+
+@pytest.fixture(autouse=True)
+def _empty_structure_cache() -> Iterator[None]:
+    clear_structure_cache()
+    yield
+    clear_structure_cache()
+
+
+@pytest.fixture
+def structure_calls(monkeypatch: pytest.MonkeyPatch) -> list:
+    calls: list = []
+    real_structure = cattrs.structure
+
+    def counting_structure(obj, cl):
+        calls.append(cl)
+        return real_structure(obj, cl)
+
+    monkeypatch.setattr(structure_cache.cattrs, "structure", counting_structure)
+    return calls
+
+
+def test_memory_cache_skips_structuring(structure_calls: list) -> None:
+    first = structure_user_config(_config())
+    assert first == cattrs.structure(_config(), UserConfig)
+    structure_calls.clear()
+
+    # same content, different key order: a hit
+    reordered = dict(reversed(list(_config().items())))
+    assert structure_user_config(reordered) is first
+    assert structure_calls == []
+
+    changed = structure_user_config(_config(port=2200))
+    assert changed.stage_1.ssh.port == 2200
+    assert len(structure_calls) == 1
+    assert config_hash(_config()) != config_hash(_config(port=2200))
+    assert config_hash({"a": 1}) != config_hash({"a": "1"}) != config_hash({"a": True})
+
+
+def test_invalid_configs_are_not_cached(structure_calls: list) -> None:
+    bad = _config()
+    bad["stage_1"]["ssh"]["users"]["me"]["pubkey_text"] = "not a key"
+    for _ in range(2):
+        with pytest.raises(Exception):
+            structure_user_config(bad)
+    assert len(structure_calls) == 2
+
+    # values JSON cannot key on bypass the cache
+    odd = _config()
+    odd["stage_1"]["environment"] = {"A": "1", 2: "x"}
+    assert config_hash(odd) is None
+
+
+def test_schema_change_invalidates(monkeypatch: pytest.MonkeyPatch, structure_calls: list) -> None:
+    structure_user_config(_config())
+    monkeypatch.setattr(structure_cache, "_schema_fingerprint", lambda: "changed")
+    structure_user_config(_config())
+    assert len(structure_calls) == 2
+
+
+def test_repeated_configure_reuses_structured_config(tmp_path: Path, structure_calls: list,
+                                                     monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    project = tmp_path / "proj"
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--quick", "minimal"])
+    assert result.exit_code == 0, result.output
+
+    outputs = []
+    for _ in range(2):  # as the GUI does, in one process
+        result = CliRunner().invoke(pei.cli, ["configure", "-p", str(project)])
+        assert result.exit_code == 0, result.output
+        outputs.append((project / "docker-compose.yml").read_text(encoding="utf-8"))
+
+    assert structure_calls == [UserConfig]
+    assert outputs[0] == outputs[1]
+    # nothing holding secrets is written outside the project
+    assert not (tmp_path / "cache").exists() and not (tmp_path / "home").exists()
+
+
+def test_processing_does_not_modify_cached_config(tmp_path: Path) -> None:
+    user_config = structure_user_config(_config())
+    snapshot = copy.deepcopy(user_config)
+    project = tmp_path / "proj"
+    result = CliRunner().invoke(pei.cli, ["create", "-p", str(project), "--quick", "minimal"])
+    assert result.exit_code == 0, result.output
+
+    template = load_yaml_file_with_duplicate_key_check(
+        os.path.join(os.path.dirname(pei.__file__), "templates", "base-image-gen.yml"))
+    proc = PeiConfigProcessor.from_config(oc.OmegaConf.create(_config()), template, project_dir=str(project))
+    proc.process(remove_extra=True, generate_custom_script_files=False)
+    assert structure_user_config(_config()) is user_config
+    assert user_config == snapshot